@@ -10,8 +10,21 @@ import json
 import re
 import urllib.parse
 
+import metricas_http
 import operacion
 import tn_client
+from costos import (
+    FOB_DEFAULTS, _match_costo_entry, _norm_compact, _normalizar, get_costo_total_usd,
+    get_fob_usd, invalidar_costos,
+)
+from ordenes import (
+    CAMPOS_ORDEN, COLUMNAS_FILAS, COLUMNAS_ITEMS, _extraer_nombre_producto, items_de,
+    procesar_orders_con_filas, promedio_ponderado, tabla_vacia, tasa_pago_nube, tipar_ordenes,
+)
+from ordenes_store import INTERVALO_SYNC, OrdenesStore
+from rango_cache import RangoCache
+from resultado import costo_productos_ars, margen_pct, resultado_periodo
+from subcadenas import IndiceSubcadenas
 
 # ── Config ─────────────────────────────────────────────────────────────────────
 st.set_page_config(page_title="Dashboard Market Gamer", layout="wide", page_icon="🎮")
@@ -23,6 +36,33 @@ GCP_CREDS = st.secrets.get("gcp_service_account", {})
 ANTHROPIC_KEY = st.secrets.get("ANTHROPIC_KEY", "")
 MP_ACCESS_TOKEN = st.secrets.get("MP_ACCESS_TOKEN", "")
 
+# Bases de las APIs externas. STANDIN_URL apunta TN, MP, Meta y cotizaciones al
+# stand-in local (python -m bench.servidor_local) para medir el fetch offline.
+STANDIN_URL = st.secrets.get("STANDIN_URL", "").rstrip("/")
+if STANDIN_URL:
+    tn_client.BASE = f"{STANDIN_URL}/v1/{TN_STORE_ID}"
+MP_API = f"{STANDIN_URL}/mp" if STANDIN_URL else "https://api.mercadopago.com"
+META_API = f"{STANDIN_URL}/meta" if STANDIN_URL else "https://graph.facebook.com"
+BLUELYTICS_API = f"{STANDIN_URL}/bluelytics" if STANDIN_URL else "https://api.bluelytics.com.ar"
+DOLARAPI_API = f"{STANDIN_URL}/dolarapi" if STANDIN_URL else "https://dolarapi.com"
+
+# Cache en disco de GETs condicionales a TN (catálogo): páginas sin cambios → 304
+if tn_client.CACHE is None:
+    tn_client.configurar_cache(st.secrets.get("TN_HTTP_CACHE", ".cache/tn_http"))
+
+# Instrumentación de llamadas salientes (⚙️ Operación → 📡 Llamadas HTTP).
+# Registro de proceso: sobrevive reruns; el observador se engancha una vez.
+if metricas_http.REGISTRO.evento not in tn_client.OBSERVADORES:
+    tn_client.OBSERVADORES.append(metricas_http.REGISTRO.evento)
+
+@st.cache_resource
+def get_http():
+    """requests.Session instrumentada (metricas_http.sesion). Una por proceso:
+    crearla en cada rerun dejaba sesiones con sockets sin cerrar."""
+    return metricas_http.sesion()
+
+HTTP = get_http()
+
 # ── Design tokens ───────────────────────────────────────────────────────────────
 MG_BG       = "#0a0a0b"
 MG_SURF     = "#131316"
@@ -342,31 +382,6 @@ def fmt(n):
 def fmt_pct(n):
     return f"{n:.2f}%"
 
-def _normalizar(s):
-    # Colapsar espacios y eliminar espacios entre letras/números del modelo
-    # ej: "RG 477M 12+256GB" → "rg477m 12+256gb"  (espacios dentro del modelo se quitan)
-    s = re.sub(r'\s+', ' ', str(s).strip().lower())
-    # Quitar espacios entre partes alfanuméricas del modelo (no entre modelo y variante)
-    s = re.sub(r'([a-z\d])\s+([a-z\d])', r'\1\2', s)
-    return s
-
-_NOISE_WORDS = ('almacenamiento', 'transparente', 'ram', 'negro', 'blanco',
-                'azul', 'rojo', 'naranja', 'verde', 'gris', 'violeta',
-                'purpura', 'rosa', 'dorado', 'plateado', 'amarillo',
-                'ndigo', 'indigo', 'silver', 'beige', 'metalico', 'celeste',
-                'turquesa', 'lila', 'cierre')
-
-def _norm_compact(s):
-    """Normalización agresiva: solo alfanumérico, sin colores ni 'GB/RAM/etc'.
-    Ej: 'ANBERNIC RG 477 V (12GB RAM + 256GB Almacenamiento)' → 'anbernicrg477v12256'
-        'Anbernic RG 477 V 12+256'                             → 'anbernicrg477v12256'
-    """
-    s = re.sub(r'[^a-z0-9]', '', str(s).lower())
-    s = s.replace('gb', '').replace('tb', '')
-    for w in _NOISE_WORDS:
-        s = s.replace(w, '')
-    return s
-
 # ── Brand catalog (fuente: catalogo_market_gamer.csv + modelos TN) ─────────────
 BRAND_CATALOG = {
     # ── Anbernic (bare model keys) ──────────────────────────────────────────────
@@ -442,14 +457,15 @@ BRAND_CATALOG = {
     "retroidflip2":"Retroid","retroidg2":"Retroid",
 }
 
+_BRAND_KEYS = list(BRAND_CATALOG)
+_BRAND_IDX = IndiceSubcadenas(_BRAND_KEYS)
+
 def _inferir_marca(nombre):
-    """Detecta la marca de un producto por su nombre usando BRAND_CATALOG.
+    """Detecta la marca de un producto por su nombre usando BRAND_CATALOG
+    (la primera clave, en orden del catálogo, contenida en el nombre).
     Devuelve 'Otra' si no matchea (accesorios, modelos desconocidos)."""
-    nc = _norm_compact(nombre)
-    for key, marca in BRAND_CATALOG.items():
-        if key in nc:
-            return marca
-    return "Otra"
+    i = _BRAND_IDX.primera(_norm_compact(nombre))
+    return BRAND_CATALOG[_BRAND_KEYS[i]] if i is not None else "Otra"
 
 # ── Competencia — snapshot de relevamiento (23/07/2026) ─────────────────────────
 # Precios de mercado ACTIVO en Argentina (ML + tiendas). "med" = mediana; "solo"=True
@@ -518,6 +534,10 @@ def gs_read(sheet_name):
         return {}
 
 def gs_write(sheet_name, data_dict):
+    if sheet_name == "CostosConsolas":
+        # Hay ediciones in-place de st.session_state.costos_consolas: el
+        # índice de costos cacheado para ese dict ya no vale
+        invalidar_costos()
     try:
         gc = get_gsheet_client()
         if not gc or not SHEET_ID:
@@ -633,6 +653,7 @@ def get_ga4_metrics(periodo="28d"):
     client = get_ga4_client()
     if not client:
         return None
+    client = metricas_http.ClienteMedido(client, "ga4")
 
     try:
         from google.analytics.data_v1beta.types import (
@@ -1140,34 +1161,135 @@ def get_ga4_metrics(periodo="28d"):
         return None
 
 # ── API Tienda Nube ────────────────────────────────────────────────────────────
+ORDENES_FILTROS = [
+    {"payment_status": "paid"},
+    {"payment_status": "paid", "status": "archived"},
+    {"payment_status": "paid", "status": "closed"},
+]
+# Listado que contiene a los 3 combos: si su conteo iguala al de uno, ese
+# combo ya trae todo y los otros no se recorren (tn_client, cubre=).
+ORDENES_CUBRE = {"payment_status": "paid", "status": "any"}
+
+def iter_tn_orders(fecha_desde, fecha_hasta, estado=None):
+    """Generador de órdenes pagas de TN (3 combos de filtros, dedup por id), a
+    medida que llegan las páginas. HTTP: tn_client.iter_paginado_por_fechas_multi
+    — los 3 combos corren en un solo barrido concurrente, cada uno partido en
+    ventanas según densidad (sin el techo de 2.500 por combo); un combo vacío
+    se saltea con un request, y uno que el conteo de ORDENES_CUBRE prueba
+    redundante también. Tiempos por combo en st.session_state.tn_streams.
+    Si alguna ventana igual quedó truncada lo avisa en pantalla.
+    estado (dict opcional) queda con completo=False si algo quedó parcial."""
+    est = estado if estado is not None else {}
+    with st.spinner("Conectando con Tienda Nube..."):
+        for batch in tn_client.iter_paginado_por_fechas_multi(
+            "orders", fecha_desde, fecha_hasta, ORDENES_FILTROS, cubre=ORDENES_CUBRE,
+            per_page=50, token=TN_TOKEN, estado=est, campos=CAMPOS_ORDEN,
+        ):
+            yield from batch
+    st.session_state.tn_streams = {
+        "rango": f"{fecha_desde} → {fecha_hasta}", "streams": est.get("streams", []),
+    }
+    if est.get("truncado"):
+        st.warning(
+            f"⚠️ Tienda Nube: algún día entre {fecha_desde} y {fecha_hasta} superó el "
+            "máximo por consulta — puede haber órdenes sin cargar."
+        )
+
 def get_tn_orders(fecha_desde, fecha_hasta):
     """Trae órdenes pagas de TN (3 combos de filtros, dedup por id). HTTP: tn_client."""
-    all_orders, seen_ids = [], set()
-    combinaciones = [
-        {"payment_status": "paid"},
-        {"payment_status": "paid", "status": "archived"},
-        {"payment_status": "paid", "status": "closed"},
+    return list(iter_tn_orders(fecha_desde, fecha_hasta))
+
+def iter_tn_orders_actualizadas(desde_iso, estado=None):
+    """Órdenes modificadas desde un instante (updated_at_min): las pagas en sus 3
+    combos + reembolsadas/anuladas/canceladas, para que el store local vea los
+    cambios de estado. Sin dedup (el store pisa por id)."""
+    combinaciones = ORDENES_FILTROS + [
+        {"payment_status": "refunded"},
+        {"payment_status": "voided"},
+        {"status": "cancelled"},
     ]
-    with st.spinner("Conectando con Tienda Nube..."):
-        for filtros in combinaciones:
-            batch = tn_client.get_paginado(
-                "orders",
-                params={
-                    "created_at_min": f"{fecha_desde}T00:00:00-03:00",
-                    "created_at_max": f"{fecha_hasta}T23:59:59-03:00",
-                    **filtros,
-                },
-                per_page=50,
-                token=TN_TOKEN,
-            )
-            for o in batch:
-                if o["id"] not in seen_ids:
-                    seen_ids.add(o["id"])
-                    all_orders.append(o)
-    return all_orders
-
-def get_tn_pagos(fecha_desde, fecha_hasta):
-    """Transacciones de Pago Nube del período. HTTP: tn_client."""
+    completo = True
+    for filtros in combinaciones:
+        est_combo = {}
+        for batch in tn_client.iter_paginado(
+            "orders", params={"updated_at_min": desde_iso, **filtros},
+            per_page=50, max_pages=200, token=TN_TOKEN, concurrente=True,
+            estado=est_combo, campos=CAMPOS_ORDEN,
+        ):
+            yield from batch
+        completo = completo and est_combo.get("completo", False)
+    if estado is not None:
+        estado["completo"] = completo
+
+@st.cache_resource
+def get_ordenes_store():
+    """Store SQLite local de órdenes (ordenes_store.py). Uno por proceso."""
+    return OrdenesStore(st.secrets.get("ORDENES_DB", ".cache/ordenes.sqlite"))
+
+@st.cache_resource
+def get_rango_cache():
+    """Cache compartido (todas las sesiones) de órdenes PROCESADAS por rango de
+    fechas (rango_cache.py), con sus líneas de venta y filas por producto: las
+    tres salen de una sola pasada por las órdenes crudas del tramo
+    (ordenes.OrdenesEnriquecidas). Los tramos salen del store, ya sincronizado."""
+    return RangoCache(lambda d0, d1: procesar_orders_con_filas(get_ordenes_store().leer(d0, d1)),
+                      partes=3)
+
+def _sync_ordenes(fecha_desde, forzar_sync=False, estado=None):
+    """Sincroniza el store con TN para leer desde fecha_desde: baja solo lo que
+    falta (rango no cubierto todavía + actualizadas desde el último sync), no
+    el rango entero. Invalida los tramos del cache por rango que tocó.
+    estado (dict opcional): completo=False si alguna bajada quedó parcial."""
+    tocadas = get_ordenes_store().asegurar(
+        fecha_desde, iter_tn_orders, iter_tn_orders_actualizadas,
+        intervalo=0 if forzar_sync else INTERVALO_SYNC, estado=estado,
+    )
+    if tocadas:
+        get_rango_cache().invalidar(tocadas)
+
+def ordenes_tn(fecha_desde, fecha_hasta, forzar_sync=False, estado=None):
+    """Órdenes pagas (crudas, recortadas a CAMPOS_ORDEN) creadas en el rango,
+    del store local. Generador. El recorte cubre también filas guardadas antes
+    de que el fetch pidiera solo esos campos. estado: ver _sync_ordenes."""
+    _sync_ordenes(fecha_desde, forzar_sync, estado)
+    return (tn_client.proyectar(o, CAMPOS_ORDEN)
+            for o in get_ordenes_store().leer(fecha_desde, fecha_hasta))
+
+def df_ordenes(fecha_desde, fecha_hasta, forzar_sync=False, con_items=False, con_filas=False,
+               sincronizar=True):
+    """Órdenes del rango ya pasadas por procesar_orders, servidas por el cache
+    por rango: los sub-rangos ya procesados (este mes, mes anterior, histórico)
+    no se recalculan. Devuelve un DataFrame nuevo; se puede mutar.
+    con_items: suma las líneas de venta (ordenes.COLUMNAS_ITEMS); con_filas,
+    las filas por producto (ordenes.COLUMNAS_FILAS): (df, [items], [filas]).
+    El df sale con los dtypes de ordenes.ESQUEMA_ORDENES (el concat de tramos
+    puede dejar categóricas como texto).
+    sincronizar=False: no toca TN (el caller ya sincronizó en esta carga, p.
+    ej. vía ordenes_tn); un segundo sync tras uno parcial repetiría la bajada."""
+    if sincronizar:
+        _sync_ordenes(fecha_desde, forzar_sync)
+    df, items, filas = get_rango_cache().obtener(fecha_desde, fecha_hasta)
+    df = tipar_ordenes(df)
+    extra = ([items] if con_items else []) + ([filas] if con_filas else [])
+    return (df, *extra) if extra else df
+
+# Campos que leen procesar_pagos_pn / _extraer_retencion_pn (la retención
+# aparece en distintos lugares según la versión del payload: se piden todos).
+CAMPOS_PAGO = (
+    "id", "created_at", "status", "order_id", "payment_method", "installments",
+    "amount", "fee_amount", "fee", "net_amount", "tax_amount", "withholding_amount",
+    "retention_amount", "retencion", "taxes", "withholdings", "tax_details", "charges",
+)
+
+# Campos de producto que usan stock, catálogo de precios y sync de costos.
+CAMPOS_PRODUCTO = (
+    "id", "name", "handle", "permalink", "canonical_url", "weight",
+    "variants.sku", "variants.stock", "variants.price", "variants.values", "variants.weight",
+)
+
+def get_tn_pagos(fecha_desde, fecha_hasta, estado=None):
+    """Transacciones de Pago Nube del período (solo CAMPOS_PAGO). HTTP: tn_client.
+    estado (dict opcional): completo=False si alguna página no se pudo bajar."""
     with st.spinner("Conectando con Pago Nube..."):
         return tn_client.get_paginado(
             "transactions",
@@ -1177,69 +1299,22 @@ def get_tn_pagos(fecha_desde, fecha_hasta):
             },
             per_page=50,
             token=TN_TOKEN,
+            concurrente=True,
+            campos=CAMPOS_PAGO,
+            estado=estado,
         )
 
+def iter_tn_products():
+    """Catálogo de productos página a página (generador). HTTP: tn_client, con
+    GET condicional: las páginas que no cambiaron vuelven 304 y salen del disco."""
+    return tn_client.iter_paginado("products", per_page=50, token=TN_TOKEN,
+                                   concurrente=True, cache=True, campos=CAMPOS_PRODUCTO)
+
 def get_tn_products():
     """Catálogo completo de productos. HTTP: tn_client."""
-    return tn_client.get_paginado("products", per_page=50, token=TN_TOKEN)
-
-# ── Tasas Pago Nube / Mercado Pago (reales, confirmadas con config MP 2026-07) ──
-# Los % de la pasarela NO incluyen IVA → se aplica IVA_FACTOR (21%).
-# Por cobro base 3,39% + financiación por ofrecer cuotas sin interés.
-# All-in: contado 4,10% · 3c 11,60% · 6c 16,56%.
-PROC_BASE = 0.0339          # por cobro con tarjeta (18 días)
-IVA_FACTOR = 1.2100         # IVA 21%
-PROC_EFECTIVO = PROC_BASE * IVA_FACTOR
-
-CUOTAS_BASE = {
-    1: 0.0, 2: 0.0440, 3: 0.0620, 6: 0.1030,
-    12: 0.3104, 18: 0.4346, 24: 0.5432,   # 12+ no se ofrecen (valores viejos)
-}
-
-def tasa_pago_nube(metodo, cuotas):  # noqa: keep for compatibilidad
-    metodo = str(metodo).lower()
-    if any(x in metodo for x in ["transfer", "wire", "account_money"]):
-        return 0.0099 * IVA_FACTOR
-    if any(x in metodo for x in ["debit", "debito", "modo"]):
-        return PROC_EFECTIVO
-    cuotas = int(cuotas or 1)
-    opciones = sorted(CUOTAS_BASE.keys())
-    cuotas_key = min(opciones, key=lambda x: abs(x - cuotas))
-    costo_cuotas = CUOTAS_BASE.get(cuotas_key, 0.0) * IVA_FACTOR
-    return PROC_EFECTIVO + costo_cuotas
-
-# ── Tasas Mercado Pago ──────────────────────────────────────────────────────────
-# Fuente: config MP real de Bruno (jul-2026). Por cobro 3,39% + financiación por
-# ofrecer cuotas, todo + IVA 21%. Fórmula: (3.39 + financing) × 1.21.
-COSTOS_MP_DEFAULTS = {
-    "Transferencia": 0.0,
-    "Contado":       4.10,   # 3.39 × 1.21
-    "2 cuotas":      9.42,   # (3.39 + 4.40) × 1.21
-    "3 cuotas":      11.60,  # (3.39 + 6.20) × 1.21
-    "6 cuotas":      16.56,  # (3.39 + 10.30) × 1.21
-    "9 cuotas":      22.62,  # no se ofrece (valor viejo)
-    "12 cuotas":     28.07,  # no se ofrece (valor viejo)
-}
+    return [p for batch in iter_tn_products() for p in batch]
 
-def _es_gateway_mp(gateway):
-    """True si la orden pasó por Mercado Pago (no Pago Nube)."""
-    gw = str(gateway).lower().replace(" ", "").replace("-", "").replace("_", "")
-    return "mercadopago" in gw or gw in {"mp", "mercadopagov1", "mercadopagocheckoutpro"}
-
-def _es_convenir(gateway, metodo):
-    """True si la orden fue creada con 'pago a convenir' (link MP generado por fuera de TN)."""
-    gw = str(gateway).lower().strip()
-    mt = str(metodo).lower().strip()
-    if "convenir" in gw or "convenir" in mt:
-        return True
-    # Gateway vacío + método no reconocido → probablemente a convenir
-    _metodos_conocidos = {"credit_card", "debit_card", "account_money"}
-    _frags_conocidos   = ["transfer", "wire", "pago", "mercado", "credit", "debit"]
-    if (not gw or gw in {"", "none", "null", "other", "offline", "manual"}) \
-       and mt not in _metodos_conocidos \
-       and not any(f in mt for f in _frags_conocidos):
-        return True
-    return False
+# Tasas Pago Nube / Mercado Pago, tasa_pasarela y procesar_orders: ordenes.py
 
 def match_mp_with_tn(df_tn, mp_payments_raw):
     """
@@ -1341,31 +1416,6 @@ def match_mp_with_tn(df_tn, mp_payments_raw):
 
     return df, matched, sin_match
 
-def tasa_pasarela(gateway, metodo, cuotas):
-    """Tasa de comisión real según pasarela: Mercado Pago o Pago Nube."""
-    if _es_gateway_mp(gateway):
-        m = str(metodo).lower()
-        c = int(cuotas or 1)
-        if any(x in m for x in ["transfer", "wire", "bank_transfer"]):
-            clave = "Transferencia"
-        elif "debit" in m or "debito" in m:
-            clave = "Contado"
-        elif c <= 1:
-            clave = "Contado"
-        elif c <= 2:
-            clave = "2 cuotas"
-        elif c <= 3:
-            clave = "3 cuotas"
-        elif c <= 6:
-            clave = "6 cuotas"
-        elif c <= 9:
-            clave = "9 cuotas"
-        else:
-            clave = "12 cuotas"
-        return COSTOS_MP_DEFAULTS.get(clave, 3.87) / 100
-    else:
-        return tasa_pago_nube(metodo, cuotas)
-
 @st.cache_data(ttl=900, show_spinner=False)
 def get_mp_payments(fecha_desde_str, fecha_hasta_str):
     """Trae pagos aprobados de MP para el período. Devuelve lista de dicts con fee real."""
@@ -1375,8 +1425,8 @@ def get_mp_payments(fecha_desde_str, fecha_hasta_str):
     all_payments, offset = [], 0
     while True:
         try:
-            r = requests.get(
-                "https://api.mercadopago.com/v1/payments/search",
+            r = HTTP.get(
+                f"{MP_API}/v1/payments/search",
                 headers=headers,
                 params={
                     "status": "approved",
@@ -1556,307 +1606,6 @@ def procesar_mp_payments(payments, montos_validos_tn=None):
         })
     return pd.DataFrame(filas) if filas else pd.DataFrame()
 
-# ── FOB defaults ───────────────────────────────────────────────────────────────
-FOB_DEFAULTS = {
-    "Anbernic RG 34XX 64GB":      {"fob_usd": 59.00,  "peso_kg": 0.3400},
-    "Anbernic RG 34XX SP 64GB":   {"fob_usd": 66.00,  "peso_kg": 0.3000},
-    "Anbernic RG 35XX Pro 64GB":  {"fob_usd": 49.00,  "peso_kg": 0.3450},
-    "Anbernic RG 35XX SP 64GB":   {"fob_usd": 49.00,  "peso_kg": 0.3300},
-    "Anbernic RG 406H":           {"fob_usd": 136.34, "peso_kg": 0.4652},
-    "Anbernic RG 406V":           {"fob_usd": 139.70, "peso_kg": 0.4900},
-    "Anbernic RG 40XX H 64GB":    {"fob_usd": 47.30,  "peso_kg": 0.3730},
-    "Anbernic RG 477M 128GB":     {"fob_usd": 284.00, "peso_kg": 0.6400},
-    "Anbernic RG 557 128GB":      {"fob_usd": 264.00, "peso_kg": 0.6070},
-    "Anbernic RG Cube 128GB":     {"fob_usd": 164.00, "peso_kg": 0.4630},
-    "Anbernic RG Cube XX 64GB":   {"fob_usd": 59.00,  "peso_kg": 0.4430},
-    "Anbernic RG P01 Blanco":     {"fob_usd": 12.70,  "peso_kg": 0.4300},
-    "Anbernic RG P01 Negro":      {"fob_usd": 12.70,  "peso_kg": 0.4300},
-    "Anbernic RG Slide 128GB":    {"fob_usd": 174.00, "peso_kg": 0.6500},
-    "Anbernic RG40XX H":          {"fob_usd": 50.60,  "peso_kg": 0.3600},
-    "Anbernic RG40XX V":          {"fob_usd": 48.40,  "peso_kg": 0.3700},
-    "Miyoo A30":                  {"fob_usd": 34.50,  "peso_kg": 0.2200},
-    "Miyoo Flip":                 {"fob_usd": 60.00,  "peso_kg": 0.2800},
-    "Miyoo Mini Plus":            {"fob_usd": 40.00,  "peso_kg": 0.2700},
-    "Powkiddy MAX3":              {"fob_usd": 48.00,  "peso_kg": 0.3800},
-    "Powkiddy MAX3 Pro":          {"fob_usd": 90.00,  "peso_kg": 0.5000},
-    "Powkiddy RGB10X":            {"fob_usd": 30.00,  "peso_kg": 0.3000},
-    "Powkiddy RGB20 Pro":         {"fob_usd": 45.00,  "peso_kg": 0.3800},
-    "Powkiddy RGB20S":            {"fob_usd": 32.00,  "peso_kg": 0.3500},
-    "Powkiddy RGB20SX":           {"fob_usd": 48.00,  "peso_kg": 0.3800},
-    "Powkiddy V10":               {"fob_usd": 28.00,  "peso_kg": 0.3000},
-    "Powkiddy V20 16GB":          {"fob_usd": 33.00,  "peso_kg": 0.3500},
-    "Powkiddy V90S 16GB":         {"fob_usd": 33.00,  "peso_kg": 0.3000},
-    "Powkiddy X35H 16GB":         {"fob_usd": 40.00,  "peso_kg": 0.3500},
-    "Powkiddy X35s":              {"fob_usd": 45.00,  "peso_kg": 0.3500},
-    "R36S Dual":                  {"fob_usd": 21.50,  "peso_kg": 0.3200},
-    "Trimui Brick":               {"fob_usd": 51.00,  "peso_kg": 0.3350},
-    "Trimui Brick Hammer":        {"fob_usd": 60.00,  "peso_kg": 0.4000},
-    "Trimui Smart":               {"fob_usd": 31.50,  "peso_kg": 0.1400},
-    "Trimui Smart Pro":           {"fob_usd": 54.00,  "peso_kg": 0.4050},
-}
-
-def get_fob_usd(nombre_prod, costos_gs=None):
-    nombre_norm = _normalizar(nombre_prod)
-    if not nombre_norm:
-        return 0.0
-    nombre_compact = _norm_compact(nombre_prod)
-    candidatos = []
-    if costos_gs:
-        for k, v in costos_gs.items():
-            if k.startswith("_"):
-                continue
-            if isinstance(v, dict):
-                fob = float(v.get("fob_usd", 0) or 0)
-                if fob > 0:
-                    candidatos.append((_normalizar(k), _norm_compact(k), fob))
-    for k, v in FOB_DEFAULTS.items():
-        candidatos.append((_normalizar(k), _norm_compact(k), float(v.get("fob_usd", 0) or 0)))
-    # Tier 1: match exacto
-    for k_norm, k_compact, fob in candidatos:
-        if k_norm == nombre_norm:
-            return fob
-    # Tier 2: match compacto exacto (sin colores/GB/RAM)
-    for k_norm, k_compact, fob in candidatos:
-        if k_compact and k_compact == nombre_compact:
-            return fob
-    # Tier 3: key en nombre
-    for k_norm, k_compact, fob in candidatos:
-        if k_norm in nombre_norm:
-            return fob
-    # Tier 4: key compacto en nombre compacto (el más largo gana)
-    best, best_len = 0.0, 0
-    for k_norm, k_compact, fob in candidatos:
-        if k_compact and k_compact in nombre_compact and len(k_compact) > best_len:
-            best, best_len = fob, len(k_compact)
-    if best > 0:
-        return best
-    # Tier 5: nombre compacto en key compacto (reverso — ej: "rg35xxsp" in "rg35xxsp64")
-    best, best_len = 0.0, 0
-    for k_norm, k_compact, fob in candidatos:
-        if k_compact and nombre_compact in k_compact and len(nombre_compact) > best_len:
-            best, best_len = fob, len(nombre_compact)
-    if best > 0:
-        return best
-    # Tier 6: nombre en key (normalización básica)
-    for k_norm, k_compact, fob in candidatos:
-        if nombre_norm in k_norm:
-            return fob
-    return 0.0
-
-def _match_costo_entry(nombre_prod, costos_gs=None):
-    """Encuentra la MEJOR entrada de costos y devuelve (fob_usd, import_usd, total_usd).
-    Garantiza que FOB, import y total vienen de la MISMA entrada."""
-    nombre_norm = _normalizar(nombre_prod)
-    if not nombre_norm:
-        return (0.0, 0.0, 0.0)
-    ckg_default = float(costos_gs.get("_costo_kg_usd", 65.0) or 65.0) if costos_gs else 65.0
-
-    def _extract(v, ckg):
-        if not isinstance(v, dict):
-            return (0.0, 0.0, 0.0)
-        fob = float(v.get("fob_usd", 0) or 0)
-        peso = float(v.get("peso_kg", 0) or 0)
-        imp = float(v.get("costo_import_usd", 0) or 0)
-        ct = float(v.get("costo_total_usd", 0) or 0)
-        if imp <= 0:
-            imp = round(peso * ckg, 2)
-        if ct <= 0:
-            ct = fob + imp
-        return (fob, imp, ct)
-
-    # Construir candidatos: (norm_basico, norm_compacto, data_dict, costo_kg)
-    # Ordenar: entradas con FOB > 0 primero para que matcheen antes que las vacías
-    candidatos = []
-    if costos_gs:
-        for k, v in costos_gs.items():
-            if k.startswith("_") or not isinstance(v, dict):
-                continue
-            candidatos.append((_normalizar(k), _norm_compact(k), v, ckg_default))
-    for k, v in FOB_DEFAULTS.items():
-        candidatos.append((_normalizar(k), _norm_compact(k), v, 65.0))
-    candidatos.sort(key=lambda c: -(float(c[2].get("fob_usd", 0) or 0) if isinstance(c[2], dict) else 0))
-
-    nombre_compact = _norm_compact(nombre_prod)
-
-    def _try_tiers():
-        # Recorrer todos los tiers. Si un tier matchea con FOB>0, retornar.
-        # Si matchea con FOB=0, guardar como fallback y seguir buscando.
-        _fallback = None
-
-        def _consider(r):
-            nonlocal _fallback
-            if r and r[2] > 0:
-                if r[0] > 0:       # tiene FOB → retorno inmediato
-                    return r
-                if not _fallback:   # FOB=0, guardar como fallback
-                    _fallback = r
-            return None
-
-        # Tier 1: match exacto
-        for k_norm, k_compact, v, ckg in candidatos:
-            if k_norm == nombre_norm:
-                hit = _consider(_extract(v, ckg))
-                if hit: return hit
-        # Tier 2: match compacto exacto
-        for k_norm, k_compact, v, ckg in candidatos:
-            if k_compact and k_compact == nombre_compact:
-                hit = _consider(_extract(v, ckg))
-                if hit: return hit
-        # Tier 3: key en nombre (básico, el más largo gana)
-        best, best_len = None, 0
-        for k_norm, k_compact, v, ckg in candidatos:
-            if k_norm in nombre_norm and len(k_norm) > best_len:
-                r = _extract(v, ckg)
-                if r[2] > 0:
-                    best, best_len = r, len(k_norm)
-        if best:
-            hit = _consider(best)
-            if hit: return hit
-        # Tier 4: key compacto en nombre compacto (el más largo gana)
-        best, best_len = None, 0
-        for k_norm, k_compact, v, ckg in candidatos:
-            if k_compact and k_compact in nombre_compact and len(k_compact) > best_len:
-                r = _extract(v, ckg)
-                if r[2] > 0:
-                    best, best_len = r, len(k_compact)
-        if best:
-            hit = _consider(best)
-            if hit: return hit
-        # Tier 5: nombre compacto en key compacto (reverso, el más largo gana)
-        best, best_len = None, 0
-        for k_norm, k_compact, v, ckg in candidatos:
-            if k_compact and nombre_compact in k_compact and len(nombre_compact) > best_len:
-                r = _extract(v, ckg)
-                if r[2] > 0:
-                    best, best_len = r, len(k_compact)
-        if best:
-            hit = _consider(best)
-            if hit: return hit
-        # Tier 6: nombre en key (básico)
-        for k_norm, k_compact, v, ckg in candidatos:
-            if nombre_norm in k_norm:
-                hit = _consider(_extract(v, ckg))
-                if hit: return hit
-
-        return _fallback  # FOB=0 fallback (mejor que nada)
-
-    return _try_tiers() or (0.0, 0.0, 0.0)
-
-def get_costo_total_usd(nombre_prod, costos_gs=None):
-    """Retorna costo total USD (FOB + import)."""
-    return _match_costo_entry(nombre_prod, costos_gs)[2]
-
-def calcular_costo_orden_ars(productos_str, cantidad, tipo_cambio_ars, costos_gs=None):
-    prods = [p.strip() for p in str(productos_str).split(" / ") if p.strip()]
-    if not prods:
-        return 0.0
-    if len(prods) == 1:
-        return get_fob_usd(prods[0], costos_gs) * int(cantidad or 1) * tipo_cambio_ars
-    return sum(get_fob_usd(p, costos_gs) * tipo_cambio_ars for p in prods)
-
-def calcular_costo_total_orden_ars(productos_str, cantidad, tipo_cambio_ars, costos_gs=None):
-    """Calcula costo total (FOB + import) en ARS."""
-    prods = [p.strip() for p in str(productos_str).split(" / ") if p.strip()]
-    if not prods:
-        return 0.0
-    if len(prods) == 1:
-        return get_costo_total_usd(prods[0], costos_gs) * int(cantidad or 1) * tipo_cambio_ars
-    return sum(get_costo_total_usd(p, costos_gs) * tipo_cambio_ars for p in prods)
-
-def costo_final_row(row, tipo_cambio, costos_gs):
-    """Costo de productos en ARS = (FOB + Import) de cada producto × cantidad × TC.
-    Usa la tabla CostosConsolas como source of truth (FOB + Import).
-    Solo cae al costo TN si la tabla no tiene el producto.
-    """
-    # 1) Intentar con CostosConsolas (FOB + Import)
-    costo_calc = calcular_costo_total_orden_ars(
-        row.get("Productos", ""), row.get("Cantidad", 1), tipo_cambio, costos_gs
-    )
-    if costo_calc > 0:
-        return round(costo_calc, 0)
-    # 2) Fallback: lo que TN reporta (puede ser FOB solo o desactualizado)
-    costo_tn = float(row.get("Costo Productos ($)", 0) or 0)
-    return round(costo_tn, 0)
-
-def costo_total_final_row(row, tipo_cambio, costos_gs):
-    """Costo total (FOB + import) para la fila."""
-    return round(calcular_costo_total_orden_ars(
-        row.get("Productos", ""), row.get("Cantidad", 1), tipo_cambio, costos_gs
-    ), 0)
-
-# ── Resultado financiero del período — FUENTE ÚNICA DE VERDAD ──────────────────
-# Toda solapa que muestre "resultado", "margen del período" o la cascada debe
-# consumir esta función. No copiar la fórmula inline en ninguna solapa nueva.
-def _dias_del_mes(d):
-    siguiente = (d.replace(day=28) + timedelta(days=4)).replace(day=1)
-    return (siguiente - timedelta(days=1)).day
-
-def calcular_resultado_periodo(df_tn, fecha_desde, fecha_hasta, tipo_cambio,
-                               pct_iva, pauta, costos_gs=None, gastos_fijos_dict=None):
-    """Calcula el P&L completo del período a partir del df de órdenes TN.
-
-    Devuelve un dict con df_calc (columnas de costo/margen recalculadas con
-    CostosConsolas como source of truth) y todos los agregados, incluyendo
-    resultado_final = margen bruto − IVA − pauta − gastos fijos prorrateados.
-    Gastos fijos se prorratean por los días reales del mes del período.
-    """
-    if costos_gs is None:
-        costos_gs = {}
-    if gastos_fijos_dict is None:
-        gastos_fijos_dict = {}
-
-    dias_periodo = max((fecha_hasta - fecha_desde).days + 1, 1)
-    total_gastos_fijos_mes = sum(
-        v for v in gastos_fijos_dict.values() if isinstance(v, (int, float)) and v > 0
-    )
-    factor_prorrateo = dias_periodo / _dias_del_mes(fecha_desde)
-    gastos_fijos_periodo = round(total_gastos_fijos_mes * factor_prorrateo)
-
-    if df_tn is None or df_tn.empty:
-        return {
-            "df_calc": pd.DataFrame(), "facturacion_bruta": 0.0, "comisiones": 0.0,
-            "neto_cobrado": 0.0, "costo_productos": 0.0, "costo_envios": 0.0,
-            "costo_iva": 0.0, "margen_bruto": 0.0, "pauta": float(pauta or 0),
-            "gastos_fijos_mes": total_gastos_fijos_mes,
-            "gastos_fijos_periodo": gastos_fijos_periodo,
-            "dias_periodo": dias_periodo, "factor_prorrateo": factor_prorrateo,
-            "resultado_final": -float(pauta or 0) - gastos_fijos_periodo,
-            "ordenes": 0,
-        }
-
-    df_calc = df_tn.copy()
-    df_calc["Neto cobrado ($)"] = df_calc["Total ($)"] - df_calc["Comision PN ($)"]
-    df_calc["Costo Productos ($)"] = df_calc.apply(
-        lambda r: costo_final_row(r, tipo_cambio, costos_gs), axis=1
-    )
-    df_calc["Margen ($)"] = (
-        df_calc["Neto cobrado ($)"] - df_calc["Costo Productos ($)"] - df_calc["Envio costo ($)"]
-    )
-    df_calc["Margen (%)"] = df_calc.apply(
-        lambda r: round((r["Margen ($)"] / r["Total ($)"] * 100) if r["Total ($)"] > 0 else 0, 2),
-        axis=1,
-    )
-
-    facturacion_bruta = float(df_calc["Total ($)"].sum())
-    comisiones = float(df_calc["Comision PN ($)"].sum())
-    costo_productos = float(df_calc["Costo Productos ($)"].sum())
-    costo_envios = float(df_calc["Envio costo ($)"].sum())
-    costo_iva = facturacion_bruta * (float(pct_iva or 0) / 100)
-    margen_bruto = float(df_calc["Margen ($)"].sum())
-    resultado_final = margen_bruto - costo_iva - float(pauta or 0) - gastos_fijos_periodo
-
-    return {
-        "df_calc": df_calc, "facturacion_bruta": facturacion_bruta,
-        "comisiones": comisiones, "neto_cobrado": facturacion_bruta - comisiones,
-        "costo_productos": costo_productos, "costo_envios": costo_envios,
-        "costo_iva": costo_iva, "margen_bruto": margen_bruto, "pauta": float(pauta or 0),
-        "gastos_fijos_mes": total_gastos_fijos_mes,
-        "gastos_fijos_periodo": gastos_fijos_periodo,
-        "dias_periodo": dias_periodo, "factor_prorrateo": factor_prorrateo,
-        "resultado_final": resultado_final,
-        "ordenes": int(len(df_calc)),
-    }
-
 # ── Card KPI compartida (usada por todas las solapas) ──────────────────────────
 def kpi_card(label, value, sub="", val_color=None, accent_border=False):
     vc = val_color or MG_TEXT
@@ -1887,7 +1636,7 @@ def get_meta_spend(fecha_desde_str, fecha_hasta_str):
         return None
     # Limpiar el prefijo act_ si ya viene incluido
     account_id = meta_account.replace("act_", "")
-    url = f"https://graph.facebook.com/v21.0/act_{account_id}/insights"
+    url = f"{META_API}/v21.0/act_{account_id}/insights"
     params = {
         "access_token": meta_token,
         "fields": "spend,account_currency",
@@ -1895,7 +1644,7 @@ def get_meta_spend(fecha_desde_str, fecha_hasta_str):
         "level": "account",
     }
     try:
-        r = requests.get(url, params=params, timeout=10)
+        r = HTTP.get(url, params=params, timeout=10)
         if r.status_code == 200:
             data = r.json().get("data", [])
             if data:
@@ -1920,7 +1669,7 @@ def get_meta_campanas_activas(dias=7):
     account_id = meta_account.replace("act_", "")
     hasta = date.today()
     desde = hasta - timedelta(days=dias)
-    url = f"https://graph.facebook.com/v21.0/act_{account_id}/insights"
+    url = f"{META_API}/v21.0/act_{account_id}/insights"
     params = {
         "access_token": meta_token,
         "fields": "campaign_id,campaign_name,spend,impressions,account_currency",
@@ -1929,7 +1678,7 @@ def get_meta_campanas_activas(dias=7):
         "limit": 200,
     }
     try:
-        r = requests.get(url, params=params, timeout=15)
+        r = HTTP.get(url, params=params, timeout=15)
         if r.status_code != 200:
             return None
         data = r.json().get("data", [])
@@ -1972,7 +1721,7 @@ def get_meta_gasto_por_producto(dias=30):
     hasta = date.today()
     desde = hasta - timedelta(days=dias)
 
-    url = f"https://graph.facebook.com/v21.0/act_{account_id}/insights"
+    url = f"{META_API}/v21.0/act_{account_id}/insights"
     params = {
         "access_token": meta_token,
         "fields": "spend,impressions,account_currency",
@@ -1986,7 +1735,7 @@ def get_meta_gasto_por_producto(dias=30):
         cur = "ARS"
         pages = 0
         while url and pages < 20:
-            r = requests.get(url, params=params, timeout=20)
+            r = HTTP.get(url, params=params, timeout=20)
             if r.status_code != 200:
                 return None
             j = r.json()
@@ -2006,12 +1755,12 @@ def get_meta_gasto_por_producto(dias=30):
 
         nombre_por = {}
         if catalog_id:
-            cu = f"https://graph.facebook.com/v21.0/{catalog_id}/products"
+            cu = f"{META_API}/v21.0/{catalog_id}/products"
             cp = {"access_token": meta_token, "fields": "id,retailer_id,name", "limit": 500}
             try:
                 cpages = 0
                 while cu and cpages < 10:
-                    rc = requests.get(cu, params=cp, timeout=20)
+                    rc = HTTP.get(cu, params=cp, timeout=20)
                     if rc.status_code != 200:
                         break
                     jc = rc.json()
@@ -2076,7 +1825,7 @@ def get_meta_demograficos(fecha_desde_str, fecha_hasta_str):
     if not meta_token or not meta_account:
         return None
     account_id = meta_account.replace("act_", "")
-    url = f"https://graph.facebook.com/v21.0/act_{account_id}/insights"
+    url = f"{META_API}/v21.0/act_{account_id}/insights"
     params = {
         "access_token": meta_token,
         "fields": "spend,impressions,clicks,actions,action_values,account_currency",
@@ -2098,7 +1847,7 @@ def get_meta_demograficos(fecha_desde_str, fecha_hasta_str):
         return 0.0
 
     try:
-        r = requests.get(url, params=params, timeout=20)
+        r = HTTP.get(url, params=params, timeout=20)
         if r.status_code != 200:
             return None
         rows = []
@@ -2383,13 +2132,13 @@ def _generar_pdf_audiencias(win_label, geo_df, ciudades_df, seg_df, moneda,
 @st.cache_data(ttl=900, show_spinner=False)
 def get_dolar_blue():
     try:
-        r = requests.get("https://api.bluelytics.com.ar/v2/latest", timeout=5)
+        r = HTTP.get(f"{BLUELYTICS_API}/v2/latest", timeout=5)
         if r.status_code == 200:
             return float(r.json()["blue"]["value_sell"])
     except Exception:
         pass
     try:
-        r = requests.get("https://dolarapi.com/v1/dolares/blue", timeout=5)
+        r = HTTP.get(f"{DOLARAPI_API}/v1/dolares/blue", timeout=5)
         if r.status_code == 200:
             return float(r.json().get("venta", 0))
     except Exception:
@@ -2400,7 +2149,7 @@ def get_dolar_blue():
 def get_blue_historico():
     """Serie diaria del blue venta (Bluelytics evolution). {'YYYY-MM-DD': valor}."""
     try:
-        r = requests.get("https://api.bluelytics.com.ar/v2/evolution.json", timeout=15)
+        r = HTTP.get(f"{BLUELYTICS_API}/v2/evolution.json", timeout=15)
         if r.status_code == 200:
             return {
                 e["date"]: float(e["value_sell"])
@@ -2429,13 +2178,6 @@ def blue_en_fecha(fecha_str, serie, fallback):
     return fallback
 
 # ── Procesamiento de datos ─────────────────────────────────────────────────────
-def _extraer_nombre_producto(n):
-    if isinstance(n, str):
-        return n
-    if isinstance(n, dict):
-        return n.get("es", "") or next(iter(n.values()), "")
-    return ""
-
 def _variant_label(v):
     """Etiqueta legible de una variante TN: junta sus valores (color, RAM, etc.).
     Ej: values=[{'es':'Gris'}] → 'Gris'.  values=[{'es':'8GB'},{'es':'Negro'}] → '8GB, Negro'.
@@ -2489,102 +2231,6 @@ def propagar_fob_variantes(costos, nombre, fob):
             n += 1
     return n
 
-def procesar_orders(orders):
-    filas = []
-    for o in orders:
-        prods = []
-        costo_productos = 0.0
-        items_linea = []
-        for p in o.get("products", []):
-            nombre = _extraer_nombre_producto(p.get("name", ""))
-            prods.append(nombre)
-            qty = int(p.get("quantity", 1) or 1)
-            cost = float(p.get("cost", 0) or 0)
-            costo_productos += cost * qty
-            items_linea.append({"producto": nombre, "cantidad": qty, "costo": cost})
-        productos = " / ".join(prods)
-        cantidad = sum(int(p.get("quantity", 1) or 1) for p in o.get("products", []))
-
-        pd_raw = o.get("payment_details", {})
-        gateway = str(o.get("gateway", "")).lower()
-        metodo = gateway
-        cuotas = 1
-        if isinstance(pd_raw, dict):
-            metodo = pd_raw.get("method", gateway)
-            cuotas = int(pd_raw.get("installments", 1) or 1)
-
-        if metodo == "credit_card":
-            label_medio = "Credito contado" if cuotas == 1 else f"Credito {cuotas} cuotas"
-        elif metodo == "debit_card":
-            label_medio = "Debito"
-        elif any(x in str(metodo).lower() for x in ["transfer", "wire"]):
-            label_medio = "Transferencia"
-        elif "account_money" in str(metodo).lower():
-            label_medio = "Dinero en cuenta"
-        else:
-            label_medio = str(metodo).replace("_", " ").title() if metodo else str(gateway)
-
-        try:
-            fecha = pd.to_datetime(o.get("created_at", "")).strftime("%Y-%m-%d")
-        except Exception:
-            fecha = ""
-
-        total = float(o.get("total", 0))
-        descuento = float(o.get("discount", 0) or 0)
-        costo_envio_dueno = float(o.get("shipping_cost_owner", 0) or 0)
-        province = str(o.get("billing_province", "")).strip()
-        _ship = o.get("shipping_address") or {}
-        city = str(o.get("billing_city", "") or (_ship.get("city", "") if isinstance(_ship, dict) else "")).strip()
-
-        if _es_gateway_mp(gateway):
-            pasarela = "MP"
-            tasa = tasa_pasarela(gateway, metodo, cuotas)
-            comision_pn = round(total * tasa, 2)
-        elif _es_convenir(gateway, metodo):
-            pasarela = "Convenir"   # se resolverá en match_mp_with_tn()
-            tasa = 0.0
-            comision_pn = 0.0
-        else:
-            pasarela = "PN"
-            # Fee = tasa pública oficial de PN (no es estimación inventada,
-            # son los rates publicados: 1.25% transferencia, 4.15% crédito, etc.)
-            # La retención IIBB NO se calcula porque TN no la expone vía API.
-            tasa = tasa_pasarela(gateway, metodo, cuotas)
-            comision_pn = round(total * tasa, 2)
-        neto = round(total - comision_pn, 2)
-        margen = round(neto - costo_productos - costo_envio_dueno, 2)
-        margen_pct = round((margen / total * 100) if total > 0 else 0, 2)
-
-        filas.append({
-            "Orden": o.get("number"),
-            "Fecha": fecha,
-            "Cliente": str(o.get("contact_name", "")),
-            "Medio de Pago": label_medio,
-            "Cuotas": cuotas,
-            "Pasarela": pasarela,
-            "Total ($)": total,
-            "Descuento ($)": descuento,
-            "Envio costo ($)": costo_envio_dueno,
-            "Comision PN ($)": comision_pn,
-            "Costo PN (%)": round(tasa * 100, 2),
-            "Neto cobrado ($)": neto,
-            "Costo Productos ($)": round(costo_productos, 2),
-            "Margen ($)": margen,
-            "Margen (%)": margen_pct,
-            "Estado Envio": o.get("shipping_status", ""),
-            "Productos": productos,
-            "Cantidad": cantidad,
-            "Canal": str(o.get("app_id", "") or "tiendanube"),
-            "Estado": o.get("status", ""),
-            "ID MP": "",
-            "Provincia": province,
-            "Ciudad": city,
-            "Gateway raw": gateway,
-            "Metodo raw": str(metodo),
-            "Items": items_linea,
-        })
-    return pd.DataFrame(filas)
-
 # Tasas IIBB por provincia para órdenes Pago Nube (transferencia bancaria).
 # Valores observados en MG. Editables vía Google Sheets si querés ajustarlas.
 IIBB_DEFAULT_RATES = {
@@ -2718,9 +2364,10 @@ def calcular_tasas_reales(df_pagos):
 
 # ── Session state init ─────────────────────────────────────────────────────────
 defaults = {
-    "df_tn": None, "df_pagos": None, "orders_raw": [],
+    "df_tn": None, "items_tn": None, "filas_producto": None, "df_pagos": None, "orders_raw": [],
     "costos_productos": {}, "ordenes_efectivo": set(), "ids_venta_local": set(),
     "mp_raw": [], "mp_match_stats": {"matched": 0, "sin_match": 0},
+    "datos_parciales": [],
 }
 for key, default in defaults.items():
     if key not in st.session_state:
@@ -2825,30 +2472,45 @@ with st.sidebar:
     st.session_state.margen_objetivo = _margen_obj_sf
 
 # ── Helper: cargar y cruzar datos ─────────────────────────────────────────────
-def _cargar_datos(fecha_desde, fecha_hasta, mostrar_success=False):
-    """Carga órdenes TN + pagos PN + pagos MP y ejecuta el matching automático."""
-    # 1. Órdenes TN
-    orders = get_tn_orders(fecha_desde, fecha_hasta)
+def _aviso_datos_parciales():
+    """Warning si la última carga quedó incompleta (algún fetch cortó tras sus
+    reintentos). Va arriba de todo número de P&L."""
+    parciales = st.session_state.get("datos_parciales") or []
+    if parciales:
+        st.warning(
+            f"⚠️ Datos parciales: no se pudieron bajar completos ({', '.join(parciales)}) "
+            "— Tienda Nube no respondió tras varios reintentos. Los totales y el resultado "
+            "pueden estar subestimados: tocá 'Actualizar datos' para completar."
+        )
+    return bool(parciales)
+
+def _cargar_datos(fecha_desde, fecha_hasta, mostrar_success=False, forzar_sync=False):
+    """Carga órdenes TN + pagos PN + pagos MP y ejecuta el matching automático.
+    forzar_sync: sincroniza el store de órdenes con TN aunque no haya pasado
+    INTERVALO_SYNC (botón "Actualizar datos")."""
+    # 1. Órdenes TN (store local, sync incremental; df procesado del cache por rango)
+    _est_ordenes, _est_pagos = {}, {}
+    orders = list(ordenes_tn(fecha_desde, fecha_hasta, forzar_sync=forzar_sync,
+                             estado=_est_ordenes))
     if orders:
-        orders_filtrados = []
-        for o in orders:
-            try:
-                dt = pd.to_datetime(o.get("created_at", ""))
-                if dt.tzinfo:
-                    dt = dt.tz_convert(None)
-                if fecha_desde <= dt.date() <= fecha_hasta:
-                    orders_filtrados.append(o)
-            except Exception:
-                orders_filtrados.append(o)
-        orders = orders_filtrados
-        df_tn = procesar_orders(orders)
+        # ordenes_tn ya sincronizó: df_ordenes solo lee (un sync por carga)
+        df_tn, items_tn, filas_prod = df_ordenes(fecha_desde, fecha_hasta, con_items=True,
+                                                 con_filas=True, sincronizar=False)
         st.session_state.orders_raw = orders
     else:
-        df_tn = pd.DataFrame()
+        df_tn, items_tn = pd.DataFrame(), tabla_vacia(COLUMNAS_ITEMS)
+        filas_prod = tabla_vacia(COLUMNAS_FILAS)
         st.session_state.orders_raw = []
 
     # 2. Pagos Pago Nube
-    pagos = get_tn_pagos(fecha_desde, fecha_hasta)
+    pagos = get_tn_pagos(fecha_desde, fecha_hasta, estado=_est_pagos)
+    # Un fetch que quedó parcial no se calla: el P&L se calcularía sobre
+    # órdenes/pagos faltantes. Las secciones con P&L muestran el aviso.
+    st.session_state.datos_parciales = (
+        (["órdenes Tienda Nube"] if not _est_ordenes.get("completo", True) else [])
+        + (["pagos Pago Nube"] if not _est_pagos.get("completo", True) else [])
+    )
+    _aviso_datos_parciales()
     df_pagos_pn = procesar_pagos_pn(pagos) if pagos else pd.DataFrame()
     st.session_state.df_pagos = df_pagos_pn
 
@@ -2953,6 +2615,8 @@ def _cargar_datos(fecha_desde, fecha_hasta, mostrar_success=False):
         st.session_state.mp_match_stats = {"matched": 0, "sin_match": 0}
 
     st.session_state.df_tn = df_tn
+    st.session_state.items_tn = items_tn
+    st.session_state.filas_producto = filas_prod
     st.session_state.ids_venta_local = set()
 
     if mostrar_success and orders:
@@ -2967,29 +2631,29 @@ def _cargar_datos(fecha_desde, fecha_hasta, mostrar_success=False):
     elif mostrar_success:
         st.info("No se encontraron órdenes en el período.")
 
-@st.cache_data(ttl=1800, show_spinner="Cargando histórico de ventas...")
-def _cargar_ordenes_historico(dias_historia):
+def _cargar_ordenes_historico(dias_historia, con_items=False):
     """Órdenes sobre una ventana amplia, independiente del período del sidebar.
 
-    Cacheado por dias_historia (TTL 30 min) para no refetchear en cada rerun.
-    Liviano: solo fetch + procesar_orders (sin matching PN/MP, innecesario para velocidad).
+    Servidas por el cache por rango (df_ordenes): la ventana de 730d, la de
+    365d y el slider de Reposición comparten los tramos ya procesados.
+    Liviano: solo store + procesar_orders (sin matching PN/MP, innecesario para velocidad).
+    con_items: devuelve (df, líneas de venta).
     """
     desde = (date.today() - timedelta(days=dias_historia)).isoformat()
     hasta = date.today().isoformat()
     try:
-        orders = get_tn_orders(desde, hasta)
+        with st.spinner("Cargando histórico de ventas..."):
+            return df_ordenes(desde, hasta, con_items=con_items)
     except Exception:
-        return pd.DataFrame()
-    return procesar_orders(orders) if orders else pd.DataFrame()
+        vacio = pd.DataFrame()
+        return (vacio, tabla_vacia(COLUMNAS_ITEMS)) if con_items else vacio
 
 def _fetch_stock_tn():
     """Trae el stock de TN, lo guarda en sesión y registra snapshot histórico.
     Devuelve True si cargó algo."""
-    productos = get_tn_products()
-    if not productos:
-        return False
     stock_rows = []
-    for p in productos:
+    # Página a página: el JSON crudo del catálogo no queda retenido entero.
+    for p in (p for batch in iter_tn_products() for p in batch):
         nombre_raw = p.get("name", {})
         nombre = nombre_raw.get("es", "") if isinstance(nombre_raw, dict) else str(nombre_raw)
         for v in p.get("variants", []):
@@ -3007,6 +2671,8 @@ def _fetch_stock_tn():
                 "Stock": stock if stock is not None else "Sin límite",
                 "Precio ($)": float(v.get("price", 0) or 0),
             })
+    if not stock_rows:
+        return False
     st.session_state.stock_tn = pd.DataFrame(stock_rows)
     st.session_state.stock_tn_ts = time.strftime("%H:%M")
     _snap_map = {}
@@ -3018,35 +2684,19 @@ def _fetch_stock_tn():
         gs_append_snapshot(_snap_map)
     return True
 
-@st.cache_data(ttl=1800, show_spinner=False)
 def _df_periodo_liviano(desde_str, hasta_str):
     """Órdenes procesadas de un rango arbitrario, sin matching PN/MP.
-    Para comparativas (ej: período anterior en el Dashboard). Cacheado 30 min.
+    Para comparativas (ej: período anterior en el Dashboard). Cache por rango.
     Las comisiones son las estimadas por procesar_orders — suficiente para comparar.
     """
     try:
-        orders = get_tn_orders(desde_str, hasta_str)
+        return df_ordenes(desde_str, hasta_str)
     except Exception:
         return pd.DataFrame()
-    if not orders:
-        return pd.DataFrame()
-    d_desde = date.fromisoformat(desde_str)
-    d_hasta = date.fromisoformat(hasta_str)
-    filtrados = []
-    for o in orders:
-        try:
-            dt = pd.to_datetime(o.get("created_at", ""))
-            if dt.tzinfo:
-                dt = dt.tz_convert(None)
-            if d_desde <= dt.date() <= d_hasta:
-                filtrados.append(o)
-        except Exception:
-            filtrados.append(o)
-    return procesar_orders(filtrados) if filtrados else pd.DataFrame()
 
 # ── Búsqueda ───────────────────────────────────────────────────────────────────
 if buscar:
-    _cargar_datos(fecha_desde, fecha_hasta, mostrar_success=True)
+    _cargar_datos(fecha_desde, fecha_hasta, mostrar_success=True, forzar_sync=True)
     _sd = st.session_state.get("stock_tn")
     if _sd is not None:
         _sm = {}
@@ -3076,7 +2726,7 @@ SENALES_KEY = st.secrets.get("SENALES_KEY", "")
 @st.cache_data(ttl=120, show_spinner=False)
 def get_senales():
     try:
-        r = requests.get(f"{SENALES_URL}/senales", params={"key": SENALES_KEY}, timeout=10)
+        r = HTTP.get(f"{SENALES_URL}/senales", params={"key": SENALES_KEY}, timeout=10)
         if r.status_code == 200:
             return r.json()
         return None
@@ -3086,6 +2736,74 @@ def get_senales():
 
 if seccion == "⚙️ Operación":
     st.markdown("## ⚙️ Operación")
+    _streams_tn = st.session_state.get("tn_streams")
+    if _streams_tn:
+        with st.expander(f"⏱️ Último fetch de órdenes TN por filtro ({_streams_tn['rango']})"):
+            st.dataframe(pd.DataFrame([{
+                "Filtro": ", ".join(f"{k}={v}" for k, v in s_["filtros"].items()),
+                "Segundos": s_["segundos"],
+                "Filas": s_["filas"],
+                "Nuevas": s_["nuevas"],
+                "Total TN": s_["total"],
+                "Salteado": ("cubierto" if s_.get("cubierto")
+                             else "vacío" if s_["salteado"] else ""),
+            } for s_ in _streams_tn["streams"]]), hide_index=True, use_container_width=True)
+            st.caption("Nuevas = órdenes que ningún otro filtro trajo. Un filtro con 0 "
+                       "nuevas de forma sostenida no vale la pasada. Cubierto = otro "
+                       "filtro ya tenía el total de status=any.")
+    _rl = tn_client.estado_rate_limit()
+    if _rl["requests"]:
+        with st.expander(f"🚦 Rate limit TN — {_rl['tokens']:.0f}/{_rl['capacidad']:.0f} tokens, "
+                         f"{_rl['errores_429']} × 429"):
+            _c1, _c2, _c3, _c4 = st.columns(4)
+            _c1.metric("Tasa actual", f"{_rl['tasa']:.2f} req/s",
+                       delta=f"{_rl['tasa'] - _rl['tasa_nominal']:+.2f}" if _rl["tasa"] < _rl["tasa_nominal"] else None)
+            _c2.metric("Espera próxima", f"{_rl['espera_proxima']:.2f} s")
+            _c3.metric("Esperas", f"{_rl['esperas']} / {_rl['requests']}",
+                       help=f"{_rl['espera_total']:.1f} s esperados en total")
+            _c4.metric("Remaining TN", "—" if _rl["remaining_tn"] is None else _rl["remaining_tn"])
+            st.caption("Bucket local sincronizado con x-rate-limit-* de TN. Cada 429 parte la "
+                       "tasa a la mitad; se recupera sola con las respuestas ok.")
+    _ch = tn_client.estado_cache()
+    if _ch and (_ch["hits"] or _ch["misses"]):
+        _hit_rate = _ch["hits"] / (_ch["hits"] + _ch["misses"]) * 100
+        with st.expander(f"🗄️ Cache HTTP TN — {_hit_rate:.0f}% de páginas sin cambios (304)"):
+            _c1, _c2, _c3, _c4 = st.columns(4)
+            _c1.metric("Hits (304)", _ch["hits"])
+            _c2.metric("Misses (200)", _ch["misses"])
+            _c3.metric("Entradas", _ch["entradas"], help=f"{_ch['desalojos']} desalojadas por tamaño")
+            _c4.metric("En disco", f"{_ch['bytes'] / 1e6:.1f} / {_ch['max_bytes'] / 1e6:.0f} MB")
+    _llamadas = metricas_http.REGISTRO.resumen()
+    if _llamadas:
+        _srv = metricas_http.REGISTRO.por_servicio()
+        with st.expander(f"📡 Llamadas HTTP — {sum(s_['llamadas'] for s_ in _srv)} en el proceso, "
+                         f"más lento: {_srv[0]['servicio']}"):
+            _cols = st.columns(min(len(_srv), 5))
+            for _c, s_ in zip(_cols, _srv):
+                _c.metric(s_["servicio"], f"{s_['segundos'] + s_['espera']:.1f} s",
+                          help=f"{s_['llamadas']} llamadas · {s_['bytes'] / 1e6:.1f} MB · "
+                               f"{s_['errores']} errores · {s_['n_429']} × 429")
+            st.dataframe(pd.DataFrame([{
+                "Servicio": f["servicio"],
+                "Endpoint": f"{f['method']} {f['endpoint']}",
+                "Llamadas": f["llamadas"],
+                "p50 ms": f["p50_ms"],
+                "p90 ms": f["p90_ms"],
+                "p99 ms": f["p99_ms"],
+                "Total s": f["segundos"],
+                "Espera s": f["espera"],
+                "KB": round(f["bytes"] / 1e3, 1),
+                "Reintentos": f["reintentos"],
+                "Errores": f["errores"],
+                "Cache hit/miss": f"{f['cache_hits']}/{f['cache_misses']}" if f["cache_hits"] or f["cache_misses"] else "",
+                "Último status": f["ultimo_status"],
+            } for f in _llamadas]), hide_index=True, use_container_width=True)
+            st.caption(f"Percentiles sobre las últimas {metricas_http.VENTANA} llamadas por "
+                       "endpoint. Espera = rate limiter + Retry-After; errores incluye status 0 "
+                       "(red caída / timeout).")
+            if st.button("Reiniciar métricas", key="reset_metricas_http"):
+                metricas_http.REGISTRO.limpiar()
+                st.rerun()
     if not SENALES_KEY:
         st.warning("⚠️ Falta SENALES_KEY en secrets — agregala en Streamlit Cloud → Settings → Secrets.")
         st.stop()
@@ -3156,95 +2874,15 @@ if seccion == "⚙️ Operación":
     st.stop()
 
 if st.session_state.df_tn is not None:
-    # ── Helper: Extraer precios individuales por producto desde órdenes raw ──
-    def _build_product_rows_from_raw(orders_raw):
-        """
-        Extrae precio individual de cada producto desde la API de TN.
-        Cada producto en la orden tiene su propio 'price', así que no
-        dividimos el total de la orden entre productos.
-        """
-        product_rows = []
-        for o in orders_raw:
-            pd_raw = o.get("payment_details", {})
-            gateway = str(o.get("gateway", "")).lower()
-            metodo = gateway
-            cuotas = 1
-            if isinstance(pd_raw, dict):
-                metodo = pd_raw.get("method", gateway)
-                cuotas = int(pd_raw.get("installments", 1) or 1)
-
-            if metodo == "credit_card":
-                label_medio = "Credito contado" if cuotas == 1 else f"Credito {cuotas} cuotas"
-            elif metodo == "debit_card":
-                label_medio = "Debito"
-            elif any(x in str(metodo).lower() for x in ["transfer", "wire"]):
-                label_medio = "Transferencia"
-            elif "account_money" in str(metodo).lower():
-                label_medio = "Dinero en cuenta"
-            else:
-                label_medio = str(metodo).replace("_", " ").title() if metodo else str(gateway)
-
-            try:
-                fecha = pd.to_datetime(o.get("created_at", "")).strftime("%Y-%m-%d")
-            except Exception:
-                fecha = ""
-
-            order_total = float(o.get("total", 0))
-            n_products = len(o.get("products", []))
-            costo_envio = float(o.get("shipping_cost_owner", 0) or 0)
-            shipping_customer = float(o.get("shipping_cost_customer", 0) or 0)
-            tasa = tasa_pasarela(gateway, metodo, cuotas)
-
-            # Calcular subtotal real de productos (precio de lista * qty)
-            order_subtotal = 0.0
-            for _p in o.get("products", []):
-                try:
-                    order_subtotal += float(_p.get("price", 0) or 0) * int(_p.get("quantity", 1) or 1)
-                except Exception:
-                    pass
-            # Revenue real de productos = total pagado por el cliente - lo que pagó por envío
-            # Esto absorbe descuentos por medio de pago, cupones y promos
-            product_revenue = order_total - shipping_customer
-            ratio_neto = (product_revenue / order_subtotal) if order_subtotal > 0 else 1.0
-
-            for p in o.get("products", []):
-                nombre = _extraer_nombre_producto(p.get("name", ""))
-                precio_unit = float(p.get("price", 0) or 0)
-                qty = int(p.get("quantity", 1) or 1)
-
-                # Si el precio individual es 0, fallback a dividir total
-                if precio_unit <= 0 and n_products > 0:
-                    precio_unit = order_total / n_products
-
-                # Precio neto post-descuentos prorrateado por participación en subtotal
-                precio_neto_unit = round(precio_unit * ratio_neto, 2)
-                descuento_unit = round(precio_unit - precio_neto_unit, 2)
-
-                # Comisión proporcional al precio del producto respecto al total
-                if order_total > 0:
-                    peso_en_orden = (precio_unit * qty) / order_total
-                else:
-                    peso_en_orden = 1.0 / max(n_products, 1)
-                comision_unit = round(order_total * tasa * peso_en_orden / qty, 2)
-                envio_unit = round(costo_envio * peso_en_orden / qty, 2)
-
-                for _ in range(qty):
-                    product_rows.append({
-                        "Producto": nombre,
-                        "Precio ($)": round(precio_unit, 0),
-                        "Precio neto ($)": round(precio_neto_unit, 0),
-                        "Descuento ($)": round(descuento_unit, 0),
-                        "Medio de Pago": label_medio,
-                        "Cuotas": cuotas,
-                        "Comisión PN ($)": round(comision_unit, 0),
-                        "Tasa PN (%)": round(tasa * 100, 2),
-                        "Envío ($)": round(envio_unit, 0),
-                        "Fecha": fecha,
-                        "Orden Total ($)": order_total,
-                    })
-        return product_rows
-
     df_tn = st.session_state.df_tn.copy()
+    # Líneas de venta de df_tn (una fila por producto de cada orden)
+    items_tn = items_de(st.session_state.get("items_tn"), df_tn)
+    # Filas por producto del período (precio individual de cada línea, con
+    # "Unidades" como peso): salen de la misma pasada que df_tn, no se
+    # vuelven a armar desde orders_raw en cada solapa.
+    filas_prod = st.session_state.get("filas_producto")
+    if filas_prod is None:
+        filas_prod = tabla_vacia(COLUMNAS_FILAS)
     df_pagos = st.session_state.df_pagos.copy() if st.session_state.df_pagos is not None else pd.DataFrame()
 
     # ══════════════════════════════════════════════════════════════════════════
@@ -3267,11 +2905,12 @@ if st.session_state.df_tn is not None:
                 return f"${n:.0f}"
 
             # ── RESUMEN EJECUTIVO — el neto real del período, no el bruto ──────
+            _aviso_datos_parciales()
             _tc_dash = st.session_state.tipo_cambio_sf or (int(dolar_blue) if dolar_blue else 1200)
             _costos_gs_dash = st.session_state.get("costos_consolas") or gs_read("CostosConsolas") or {}
             _gastos_dash = gs_read("GastosFijos") or {}
 
-            _res_act = calcular_resultado_periodo(
+            _res_act = resultado_periodo(
                 df_tn, fecha_desde, fecha_hasta, _tc_dash,
                 st.session_state.pct_iva, st.session_state.pauta_manual,
                 costos_gs=_costos_gs_dash, gastos_fijos_dict=_gastos_dash,
@@ -3287,7 +2926,7 @@ if st.session_state.df_tn is not None:
             if _meta_prev:
                 _spend_prev, _cur_prev = _meta_prev
                 _pauta_prev = round(_spend_prev) if _cur_prev == "ARS" else round(_spend_prev * _tc_dash)
-            _res_prev = calcular_resultado_periodo(
+            _res_prev = resultado_periodo(
                 _df_prev, _prev_desde, _prev_hasta, _tc_dash,
                 st.session_state.pct_iva, _pauta_prev,
                 costos_gs=_costos_gs_dash, gastos_fijos_dict=_gastos_dash,
@@ -3381,11 +3020,7 @@ if st.session_state.df_tn is not None:
             # ── ALERTAS ACCIONABLES ────────────────────────────────────────────
             _alertas = []
             # 1) Productos vendidos sin costo cargado → margen inflado
-            _prods_vendidos = set()
-            for _, _row_a in df_tn.iterrows():
-                for _p in str(_row_a.get("Productos", "")).split(" / "):
-                    if _p.strip():
-                        _prods_vendidos.add(_p.strip())
+            _prods_vendidos = set(items_tn["Producto"].str.strip()) - {""}
             _sin_costo = sorted(p for p in _prods_vendidos if get_fob_usd(p, _costos_gs_dash) <= 0)
             if _sin_costo:
                 _alertas.append(f"💸 **{len(_sin_costo)} vendidos sin costo cargado** (margen inflado) → 💻 Costos de consolas, filtro \"Sin precio\"")
@@ -3414,15 +3049,13 @@ if st.session_state.df_tn is not None:
             # Vista mensual desde que hay datos, con el promedio como referencia.
             # ══════════════════════════════════════════════════════════════════
             st.markdown("### 📈 Evolución histórica — ¿estamos creciendo?")
-            _df_hist_dash = _cargar_ordenes_historico(730)
+            _df_hist_dash, _items_hist_dash = _cargar_ordenes_historico(730, con_items=True)
             if _df_hist_dash is None or _df_hist_dash.empty:
                 st.caption("Sin histórico disponible todavía.")
             else:
                 _dfh = _df_hist_dash.copy()
                 _dfh["Mes"] = pd.to_datetime(_dfh["Fecha"]).dt.to_period("M").dt.to_timestamp()
-                _dfh["_costo_h"] = _dfh.apply(
-                    lambda r: costo_final_row(r, _tc_dash, _costos_gs_dash), axis=1
-                )
+                _dfh["_costo_h"] = costo_productos_ars(_dfh, _tc_dash, _costos_gs_dash)
                 _dfh["_margen_h"] = (
                     _dfh["Total ($)"] - _dfh["Comision PN ($)"] - _dfh["_costo_h"] - _dfh["Envio costo ($)"]
                 )
@@ -3617,14 +3250,10 @@ if st.session_state.df_tn is not None:
                 st.plotly_chart(fig_dia, use_container_width=True)
 
             with col_b:
-                top_prods = {}
-                for _, row in df_tn.iterrows():
-                    for p in str(row.get("Productos", "")).split(" / "):
-                        p = p.strip()
-                        if p:
-                            top_prods[p] = top_prods.get(p, 0) + 1
-                if top_prods:
-                    df_tp = pd.DataFrame(list(top_prods.items()), columns=["Producto", "Unidades"])
+                _lineas_tp = items_tn["Producto"].str.strip()
+                top_prods = _lineas_tp[_lineas_tp != ""].value_counts()
+                if not top_prods.empty:
+                    df_tp = top_prods.rename_axis("Producto").reset_index(name="Unidades")
                     df_tp = df_tp.sort_values("Unidades", ascending=False).head(10)
                     df_tp["Label"] = df_tp["Producto"].apply(_truncar)
                     fig_tp = px.bar(
@@ -3717,13 +3346,9 @@ if st.session_state.df_tn is not None:
             # ── Top 10 facturación (full width) — prorrateo por precio real ────
             # Usa el precio unitario de cada producto en la orden (TN API), no
             # una división pareja del total entre productos.
-            top_revenue = {}
-            _rows_rev = _build_product_rows_from_raw(st.session_state.get("orders_raw", []) or [])
-            for _pr in _rows_rev:
-                _n = _pr["Producto"]
-                top_revenue[_n] = top_revenue.get(_n, 0) + float(_pr.get("Precio neto ($)", 0) or 0)
-            if top_revenue:
-                df_rev = pd.DataFrame(list(top_revenue.items()), columns=["Producto", "Monto ($)"])
+            if not filas_prod.empty:
+                df_rev = (filas_prod["Precio neto ($)"] * filas_prod["Unidades"]).groupby(
+                    filas_prod["Producto"], sort=False).sum().rename("Monto ($)").reset_index()
                 df_rev["Monto ($)"] = df_rev["Monto ($)"].round(0)
                 df_rev = df_rev.sort_values("Monto ($)", ascending=False).head(10)
                 df_rev["Label"] = df_rev["Producto"].apply(_truncar)
@@ -3760,14 +3385,13 @@ if st.session_state.df_tn is not None:
                 def _base_prod(n):
                     return re.sub(r"\s*\([^)]*\)\s*$", "", str(n)).strip()
 
-                _apar = []  # (fecha, producto_base) una por aparición en orden
-                for _, _row_t in _df_hist_dash.iterrows():
-                    _dt_t = pd.to_datetime(_row_t["Fecha"])
-                    for _p in str(_row_t.get("Productos", "")).split(" / "):
-                        _p = _p.strip()
-                        if _p:
-                            _apar.append((_dt_t, _base_prod(_p)))
-                _df_apar = pd.DataFrame(_apar, columns=["_dt", "Producto"])
+                # Una aparición por línea de venta: (fecha, producto base)
+                _lt = _items_hist_dash[_items_hist_dash["Producto"].str.strip() != ""]
+                _bases_t = {p: _base_prod(p.strip()) for p in _lt["Producto"].unique()}
+                _df_apar = pd.DataFrame({
+                    "_dt": pd.to_datetime(_lt["Fecha"]),
+                    "Producto": _lt["Producto"].map(_bases_t),
+                })
                 _u30 = _df_apar[_df_apar["_dt"] > _hoy_t - timedelta(days=30)].groupby("Producto").size()
                 _u90prev = _df_apar[
                     (_df_apar["_dt"] <= _hoy_t - timedelta(days=30))
@@ -3827,17 +3451,13 @@ if st.session_state.df_tn is not None:
             _dolar_det = st.session_state.tipo_cambio_sf or dolar_blue or 1200
             _costos_gs = st.session_state.get("costos_consolas") or gs_read("CostosConsolas") or {}
             df_det = df_tn.copy()
-            df_det["Costo Productos ($)"] = df_det.apply(
-                lambda r: costo_final_row(r, _dolar_det, _costos_gs), axis=1
-            )
+            df_det["Costo Productos ($)"] = costo_productos_ars(df_det, _dolar_det, _costos_gs)
             df_det["Neto cobrado ($)"] = df_det["Total ($)"] - df_det["Comision PN ($)"]
             df_det["Margen ($)"] = (
                 df_det["Neto cobrado ($)"] - df_det["Costo Productos ($)"]
                 - df_det["Envio costo ($)"].fillna(0)
             ).round(2)
-            df_det["Margen (%)"] = df_det.apply(
-                lambda r: round((r["Margen ($)"] / r["Total ($)"] * 100) if r["Total ($)"] > 0 else 0, 2), axis=1
-            )
+            df_det["Margen (%)"] = margen_pct(df_det["Margen ($)"], df_det["Total ($)"])
 
             # ══════════════════════════════════════════════════════════════════
             # 1) KPIs ARRIBA — 5 cards uniformes
@@ -3911,6 +3531,7 @@ if st.session_state.df_tn is not None:
                         "Costo fin. %": "{:.2f}%", "Neto cobrado ($)": "${:,.0f}",
                         "Costo Productos ($)": "${:,.0f}", "Margen ($)": "${:,.0f}",
                         "Margen (%)": "{:.2f}%",
+                        "Fecha": lambda f: f.strftime("%Y-%m-%d") if pd.notna(f) else "",
                     })
                     .apply(_color_margen_row, axis=1),
                 use_container_width=True, hide_index=True, height=460,
@@ -4074,7 +3695,7 @@ if st.session_state.df_tn is not None:
                             st.warning("⚠️ Sin payment_details (efectivo o convenir manual).")
                         else:
                             st.json(_pd_data)
-                        with st.expander("Ver orden completa (JSON)", expanded=False):
+                        with st.expander("Ver orden (JSON, campos que usa el dashboard)", expanded=False):
                             st.json(o)
 
             # Los desgloses PN/MP viven en 💚 Salud Financiera (única fuente).
@@ -4082,12 +3703,7 @@ if st.session_state.df_tn is not None:
             # Estado de costos
             st.divider()
             st.subheader("📋 Estado de costos por producto")
-            todos_prods = set()
-            for _, row in df_tn.iterrows():
-                for p in str(row.get("Productos", "")).split(" / "):
-                    p = p.strip()
-                    if p:
-                        todos_prods.add(p)
+            todos_prods = set(items_tn["Producto"].str.strip()) - {""}
 
             filas_estado = []
             for p in sorted(todos_prods):
@@ -4133,10 +3749,11 @@ if st.session_state.df_tn is not None:
         if df_tn.empty:
             st.info("Buscá primero para ver los datos financieros.")
         else:
+            _aviso_datos_parciales()
             _costos_gs_sf = st.session_state.get("costos_consolas") or gs_read("CostosConsolas") or {}
             gastos_fijos_saved = gs_read("GastosFijos") or {}
 
-            _res = calcular_resultado_periodo(
+            _res = resultado_periodo(
                 df_tn, fecha_desde, fecha_hasta, tipo_cambio, pct_iva, pauta_manual,
                 costos_gs=_costos_gs_sf, gastos_fijos_dict=gastos_fijos_saved,
             )
@@ -4292,8 +3909,8 @@ if st.session_state.df_tn is not None:
                         _dbg_submit = st.form_submit_button("Buscar pago", use_container_width=True)
                         if _dbg_submit and _dbg_id:
                             try:
-                                _r = requests.get(
-                                    f"https://api.mercadopago.com/v1/payments/{_dbg_id.strip()}",
+                                _r = HTTP.get(
+                                    f"{MP_API}/v1/payments/{_dbg_id.strip()}",
                                     headers={"Authorization": f"Bearer {MP_ACCESS_TOKEN}"},
                                     timeout=10,
                                 )
@@ -4649,7 +4266,7 @@ if st.session_state.df_tn is not None:
             p_minu = ce.slider("Mín. unidades p/ confianza", 1, 20, 5)
             p_mind = cf.slider("Mín. días distintos p/ confianza", 1, 10, 3)
 
-        df_full = _cargar_ordenes_historico(p_hist)
+        df_full, items_full = _cargar_ordenes_historico(p_hist, con_items=True)
         if df_full is None or df_full.empty:
             st.info("No hay órdenes en el rango histórico seleccionado.")
         else:
@@ -4678,7 +4295,7 @@ if st.session_state.df_tn is not None:
             }
 
             df_vel = calcular_velocidad_restock(
-                df_full, stock_map, historial, precio_map, params,
+                items_full, stock_map, historial, precio_map, params,
                 date.today().isoformat(),
             )
 
@@ -4858,10 +4475,12 @@ if st.session_state.df_tn is not None:
                 st.subheader("📈 Evolución de ventas")
                 prod_sel = st.selectbox("Producto", df_vel["Producto"].tolist())
                 if prod_sel:
-                    df_evo = df_full[df_full["Productos"].str.contains(prod_sel, na=False, regex=False)]
+                    df_evo = items_full[items_full["Producto"] == prod_sel]
                     if not df_evo.empty:
-                        df_evo_g = df_evo.groupby("Fecha").agg(
-                            Unidades=("Cantidad", "sum"), Revenue=("Total ($)", "sum"),
+                        df_evo_g = df_evo.assign(
+                            _rev=df_evo["Cantidad"] * df_evo["Precio ($)"],
+                        ).groupby("Fecha").agg(
+                            Unidades=("Cantidad", "sum"), Revenue=("_rev", "sum"),
                         ).reset_index()
                         df_evo_g["Acumulado"] = df_evo_g["Unidades"].cumsum()
                         fig_evo = px.bar(df_evo_g, x="Fecha", y="Unidades",
@@ -5381,7 +5000,7 @@ if st.session_state.df_tn is not None:
                     )
                     with st.spinner("Leyendo catálogo con Claude..."):
                         try:
-                            _r_cat = requests.post(
+                            _r_cat = HTTP.post(
                                 "https://api.anthropic.com/v1/messages",
                                 headers={
                                     "x-api-key": ANTHROPIC_KEY,
@@ -5785,17 +5404,10 @@ if st.session_state.df_tn is not None:
         catalogo_tn = _get_catalogo_tn()
 
         # ── Combinar productos de órdenes + catálogo TN ──
-        orders_raw = st.session_state.orders_raw
-        product_rows = _build_product_rows_from_raw(orders_raw)
-        df_prod_raw = pd.DataFrame(product_rows) if product_rows else pd.DataFrame()
-
-        # Precios de órdenes (promedio real vendido)
-        if not df_prod_raw.empty:
-            precios_ordenes = df_prod_raw.groupby("Producto").agg(
-                Precio_prom=("Precio ($)", "mean"),
-                Unidades=("Precio ($)", "count"),
-            ).reset_index()
-            precios_dict = dict(zip(precios_ordenes["Producto"], precios_ordenes["Precio_prom"]))
+        # Precios de órdenes (promedio real vendido, ponderado por unidades)
+        if not filas_prod.empty:
+            precios_ordenes = promedio_ponderado(filas_prod, "Producto", ["Precio ($)"])
+            precios_dict = dict(zip(precios_ordenes["Producto"], precios_ordenes["Precio ($)"]))
             unidades_dict = dict(zip(precios_ordenes["Producto"], precios_ordenes["Unidades"]))
         else:
             precios_dict = {}
@@ -5876,7 +5488,7 @@ if st.session_state.df_tn is not None:
                 costo_full = round(costo_prod_ars + packaging_ars + costo_iva + envio_prom, 0)
                 # Margen a transferencia (mejor caso, tu PN real)
                 margen_teorico = round(precio_prom - costo_full - round(precio_prom * _tasa_transf, 0), 0)
-                margen_pct = round(margen_teorico / precio_prom * 100, 1) if precio_prom > 0 else 0
+                margen_pct_t = round(margen_teorico / precio_prom * 100, 1) if precio_prom > 0 else 0
                 # Margen a 6 cuotas (peor caso que ofrecés) — el piso a proteger
                 margen_6c = round(precio_prom - costo_full - round(precio_prom * _tasa_6c, 0), 0)
                 margen_6c_pct = round(margen_6c / precio_prom * 100, 1) if precio_prom > 0 else 0
@@ -5905,7 +5517,7 @@ if st.session_state.df_tn is not None:
                     "Posición": posicion,
                     "Costo ($)": costo_full,
                     "Margen ($)": margen_teorico,
-                    "Margen (%)": margen_pct,
+                    "Margen (%)": margen_pct_t,
                     "Margen 6c ($)": margen_6c,
                     "Margen 6c (%)": margen_6c_pct,
                     "_fuente": fuente,
@@ -6055,15 +5667,14 @@ if st.session_state.df_tn is not None:
         else:
             _costos_gs_mr = st.session_state.get("costos_consolas") or gs_read("CostosConsolas") or {}
             _tc_mr = int(st.session_state.tipo_cambio_sf or (dolar_blue or 1200))
-            orders_raw_mr = st.session_state.orders_raw
 
             # Config global (sidebar → ⚙️ Config financiera)
             iva_mr = float(st.session_state.pct_iva)
             packaging_mr = float(st.session_state.get("packaging_global", 2500))
             st.caption(f"Config global: IVA {iva_mr:.1f}% · packaging {fmt(packaging_mr)} · dólar ${_tc_mr:,.0f}")
 
-            # Extraer precios individuales desde raw orders
-            product_rows_mr = _build_product_rows_from_raw(orders_raw_mr)
+            # Precios individuales por línea (filas por producto del período)
+            product_rows_mr = filas_prod.to_dict("records")
 
             if not product_rows_mr:
                 st.info("No hay datos de productos.")
@@ -6071,8 +5682,10 @@ if st.session_state.df_tn is not None:
                 # Serie histórica del blue para el margen verdadero en USD
                 _serie_blue_mr = get_blue_historico()
 
-                # Calcular margen real por cada línea de producto
+                # Calcular margen real por cada línea de producto (valores por
+                # unidad; "Unidades" pondera medias y sumas)
                 rows_real = []
+                _blue_por_fecha = {}
                 for pr in product_rows_mr:
                     prod = pr["Producto"]
                     precio_lista = pr["Precio ($)"]
@@ -6093,7 +5706,10 @@ if st.session_state.df_tn is not None:
                     # ── Margen VERDADERO en USD (neutro a la devaluación) ──
                     # Convierte lo cobrado al blue del día de la venta y le resta
                     # el costo que ya está en USD. Compara enero vs julio sin trampa.
-                    _blue_venta = blue_en_fecha(pr.get("Fecha", ""), _serie_blue_mr, _tc_mr)
+                    _fecha_pr = pr.get("Fecha", "")
+                    if _fecha_pr not in _blue_por_fecha:
+                        _blue_por_fecha[_fecha_pr] = blue_en_fecha(_fecha_pr, _serie_blue_mr, _tc_mr)
+                    _blue_venta = _blue_por_fecha[_fecha_pr]
                     _neto_usd = neto / _blue_venta if _blue_venta > 0 else 0
                     _iva_usd = costo_iva / _blue_venta if _blue_venta > 0 else 0
                     _pkg_usd = packaging_mr / _blue_venta if _blue_venta > 0 else 0
@@ -6102,6 +5718,7 @@ if st.session_state.df_tn is not None:
 
                     rows_real.append({
                         "Producto": prod,
+                        "Unidades": pr["Unidades"],
                         "Medio de Pago": pr["Medio de Pago"],
                         "Cuotas": pr["Cuotas"],
                         "Fecha": pr.get("Fecha", ""),
@@ -6131,23 +5748,12 @@ if st.session_state.df_tn is not None:
                     # ── Vista 1: Margen promedio por producto ──
                     st.markdown("### Margen promedio real por consola")
                     col_iva_mr = f"IVA ({iva_mr}%)"
-                    df_avg = df_real.groupby("Producto").agg(
-                        Ventas=("Precio neto ($)", "count"),
-                        Precio_lista_prom=("Precio lista ($)", "mean"),
-                        Descuento_prom=("Descuento ($)", "mean"),
-                        Precio_prom=("Precio neto ($)", "mean"),
-                        Comision_prom=("Comisión PN ($)", "mean"),
-                        FOB_prom=("FOB (USD)", "mean"),
-                        Import_prom=("Import (USD)", "mean"),
-                        Costo_prom=("← Costo prod ($)", "mean"),
-                        Packaging_prom=("Packaging ($)", "mean"),
-                        IVA_prom=(col_iva_mr, "mean"),
-                        Envio_prom=("Envío ($)", "mean"),
-                        Margen_prom=("Margen ($)", "mean"),
-                        Margen_pct_prom=("Margen (%)", "mean"),
-                        Margen_usd_prom=("Margen (USD)", "mean"),
-                        Margen_usd_pct_prom=("Margen USD (%)", "mean"),
-                    ).reset_index()
+                    df_avg = promedio_ponderado(df_real, "Producto", [
+                        "Precio lista ($)", "Descuento ($)", "Precio neto ($)", "Comisión PN ($)",
+                        "FOB (USD)", "Import (USD)", "← Costo prod ($)", "Packaging ($)",
+                        col_iva_mr, "Envío ($)", "Margen ($)", "Margen (%)",
+                        "Margen (USD)", "Margen USD (%)",
+                    ])
                     df_avg.columns = [
                         "Producto", "Ventas", "Precio lista prom ($)", "Descuento prom ($)",
                         "Precio neto prom ($)", "Comisión prom ($)",
@@ -6191,8 +5797,9 @@ if st.session_state.df_tn is not None:
 
                     # ── Margen VERDADERO en USD (neutro a la devaluación) ──
                     _tiene_serie = bool(_serie_blue_mr)
-                    _margen_usd_tot = float(df_real["Margen (USD)"].sum())
-                    _neto_usd_tot = float((df_real["Precio neto ($)"] - df_real["Comisión PN ($)"]).div(df_real["Blue venta"]).sum())
+                    _margen_usd_tot = float(df_real["Margen (USD)"].mul(df_real["Unidades"]).sum())
+                    _neto_usd_tot = float((df_real["Precio neto ($)"] - df_real["Comisión PN ($)"])
+                                          .div(df_real["Blue venta"]).mul(df_real["Unidades"]).sum())
                     _margen_usd_pct = (_margen_usd_tot / _neto_usd_tot * 100) if _neto_usd_tot > 0 else 0
                     _margen_usd_unit = _margen_usd_tot / _total_ventas if _total_ventas > 0 else 0
 
@@ -6228,9 +5835,10 @@ if st.session_state.df_tn is not None:
                     _df_usd_mes = df_real[df_real["Fecha"] != ""].copy()
                     if not _df_usd_mes.empty:
                         _df_usd_mes["Mes"] = pd.to_datetime(_df_usd_mes["Fecha"]).dt.to_period("M").dt.to_timestamp()
+                        _df_usd_mes["Margen_USD"] = _df_usd_mes["Margen (USD)"] * _df_usd_mes["Unidades"]
                         _mens_usd = _df_usd_mes.groupby("Mes").agg(
-                            Margen_USD=("Margen (USD)", "sum"),
-                            Unidades=("Margen (USD)", "count"),
+                            Margen_USD=("Margen_USD", "sum"),
+                            Unidades=("Unidades", "sum"),
                         ).reset_index().sort_values("Mes")
                         _mens_usd["Margen USD/u"] = (_mens_usd["Margen_USD"] / _mens_usd["Unidades"]).round(1)
                         if len(_mens_usd) >= 2:
@@ -6289,16 +5897,10 @@ if st.session_state.df_tn is not None:
 
                     if prod_sel_mr:
                         df_prod = df_real[df_real["Producto"] == prod_sel_mr]
-                        df_by_medio = df_prod.groupby("Medio de Pago").agg(
-                            Ventas=("Precio neto ($)", "count"),
-                            Precio_lista_prom=("Precio lista ($)", "mean"),
-                            Descuento_prom=("Descuento ($)", "mean"),
-                            Precio_prom=("Precio neto ($)", "mean"),
-                            Comision_prom=("Comisión PN ($)", "mean"),
-                            Costo_PN_pct=("Costo PN (%)", "mean"),
-                            Margen_prom=("Margen ($)", "mean"),
-                            Margen_pct=("Margen (%)", "mean"),
-                        ).reset_index().sort_values("Margen_pct", ascending=False)
+                        df_by_medio = promedio_ponderado(df_prod, "Medio de Pago", [
+                            "Precio lista ($)", "Descuento ($)", "Precio neto ($)",
+                            "Comisión PN ($)", "Costo PN (%)", "Margen ($)", "Margen (%)",
+                        ]).sort_values("Margen (%)", ascending=False)
                         df_by_medio.columns = [
                             "Medio de Pago", "Ventas", "Precio lista ($)", "Descuento ($)",
                             "Precio neto ($)", "Comisión prom ($)", "Costo PN (%)",
@@ -7488,15 +7090,11 @@ mucho tráfico con engagement bajo NO zafan por volumen.
                         "(las campañas activas pueden no ser de catálogo)."
                     )
                 else:
-                    from velocidad_restock import explotar_items as _expl
                     _u_norm = {}
-                    _df_h = _cargar_ordenes_historico(30)
-                    if _df_h is not None and not _df_h.empty:
-                        _li = _expl(_df_h)
-                        if not _li.empty:
-                            for _p, _g in _li.groupby("Producto"):
-                                _k = _norm_nombre(_p)
-                                _u_norm[_k] = _u_norm.get(_k, 0) + int(_g["Cantidad"].sum())
+                    _, _li = _cargar_ordenes_historico(30, con_items=True)
+                    for _p, _g in _li.groupby("Producto"):
+                        _k = _norm_nombre(_p)
+                        _u_norm[_k] = _u_norm.get(_k, 0) + int(_g["Cantidad"].sum())
                     _precio_norm = {}
                     _sdf = st.session_state.get("stock_tn")
                     if _sdf is not None:
@@ -7560,23 +7158,21 @@ mucho tráfico con engagement bajo NO zafan por volumen.
                     "buscado orgánicamente**. Agrupado por producto (no por color), "
                     "últimos 30 días. Soporte de decisión — vos cargás los carruseles."
                 )
-                from velocidad_restock import explotar_items as _eih
                 _hoy_h = date.today()
                 _c30 = (_hoy_h - timedelta(days=30)).isoformat()
                 _c45 = (_hoy_h - timedelta(days=45)).isoformat()
-                _dfh = _cargar_ordenes_historico(90)
+                _dfh, _lih = _cargar_ordenes_historico(90, con_items=True)
                 if _dfh is None or _dfh.empty:
                     st.info("No hay órdenes en 90 días para generar la recomendación.")
                 else:
-                    _lih = _eih(_dfh)
                     _prod = {}
                     if not _lih.empty:
                         for _p, _g in _lih.groupby("Producto"):
                             _k = _base_nombre(_p)
                             if not _k:
                                 continue
-                            _f = sorted(str(f) for f in _g["Fecha"] if f)
-                            _u30 = int(_g[_g["Fecha"] >= _c30]["Cantidad"].sum())
+                            _f = sorted(_g["Fecha"].dropna().dt.strftime("%Y-%m-%d"))
+                            _u30 = int(_g[_g["Fecha"] >= pd.Timestamp(_c30)]["Cantidad"].sum())
                             _cs = [float(c) for c in _g["Costo"] if c and float(c) > 0]
                             d = _prod.setdefault(
                                 _k, {"k": _k, "nombre": "", "u30": 0,
@@ -7844,7 +7440,7 @@ mucho tráfico con engagement bajo NO zafan por volumen.
                 _gastos_gs = gs_read("GastosFijos") or {}
                 _costos_gs = st.session_state.get("costos_consolas") or gs_read("CostosConsolas") or {}
                 # Resultado del período — misma función que Salud Financiera y Dashboard
-                _res_ia = calcular_resultado_periodo(
+                _res_ia = resultado_periodo(
                     df_tn, fecha_desde, fecha_hasta, _tc, _iva_pct,
                     st.session_state.pauta_manual, costos_gs=_costos_gs,
                     gastos_fijos_dict=_gastos_gs,
@@ -7852,6 +7448,10 @@ mucho tráfico con engagement bajo NO zafan por volumen.
 
                 lines.append(f"=== MARKET GAMER — ANÁLISIS FINANCIERO ===")
                 lines.append(f"Período: {fecha_desde.strftime('%d/%m/%Y')} → {fecha_hasta.strftime('%d/%m/%Y')} ({_dias_p} días)")
+                if st.session_state.get("datos_parciales"):
+                    lines.append("ATENCIÓN: datos parciales (faltan "
+                                 + " y ".join(st.session_state.datos_parciales)
+                                 + "); los totales pueden estar subestimados.")
                 lines.append(f"Tipo de cambio: ${_tc:,} ARS/USD (dólar blue)")
                 lines.append("")
 
@@ -7880,29 +7480,29 @@ mucho tráfico con engagement bajo NO zafan por volumen.
 
                 # Ventas por producto
                 lines.append("--- VENTAS POR PRODUCTO ---")
-                _prod_stats = {}
-                for _, _row in df_tn.iterrows():
-                    _prods = [p.strip() for p in str(_row.get("Productos", "")).split(" / ") if p.strip()]
-                    _n = max(len(_prods), 1)
-                    for _p in _prods:
-                        if _p not in _prod_stats:
-                            _prod_stats[_p] = {"uds": 0, "rev": 0.0, "ords": 0}
-                        _prod_stats[_p]["uds"] += int(_row.get("Cantidad", 1) or 1)
-                        _prod_stats[_p]["rev"] += _row.get("Total ($)", 0) / _n
-                        _prod_stats[_p]["ords"] += 1
-
-                _orders_raw = st.session_state.orders_raw
-                _prod_rows = _build_product_rows_from_raw(_orders_raw) if _orders_raw else []
+                # Por línea de venta: unidades de la línea; el total de la orden
+                # se reparte en partes iguales entre sus líneas
+                _li_ia = items_tn.assign(Producto=items_tn["Producto"].str.strip())
+                _li_ia = _li_ia[_li_ia["Producto"] != ""]
+                _li_ia = _li_ia.merge(df_tn[["Orden", "Total ($)"]].drop_duplicates("Orden"),
+                                      on="Orden", how="left")
+                _li_ia["_rev"] = _li_ia["Total ($)"].fillna(0) / _li_ia.groupby("Orden")["Orden"].transform("size")
+                _prod_stats = {
+                    _p: {"uds": int(_g["Cantidad"].sum()), "rev": float(_g["_rev"].sum()),
+                         "ords": int(_g["Orden"].nunique())}
+                    for _p, _g in _li_ia.groupby("Producto")
+                }
+
                 _margen_map = {}
-                if _prod_rows:
-                    _df_pr = pd.DataFrame(_prod_rows)
-                    for _pn, _grp in _df_pr.groupby("Producto"):
-                        _precio_p = _grp["Precio ($)"].mean()
+                if not filas_prod.empty:
+                    _df_pr = promedio_ponderado(filas_prod, "Producto",
+                                                ["Precio ($)", "Comisión PN ($)", "Envío ($)"])
+                    for _pn, _precio_p, _com_p, _env_p in zip(
+                            _df_pr["Producto"], _df_pr["Precio ($)"],
+                            _df_pr["Comisión PN ($)"], _df_pr["Envío ($)"]):
                         _costo_usd = get_costo_total_usd(_pn, _costos_gs)
                         _costo_ars = _costo_usd * _tc
                         _costo_full = _costo_ars + _pkg_ia + (_precio_p * _iva_pct / 100)
-                        _com_p = _grp["Comisión PN ($)"].mean()
-                        _env_p = _grp["Envío ($)"].mean()
                         _margen_p = _precio_p - _costo_full - _com_p - _env_p
                         _margen_pct = (_margen_p / _precio_p * 100) if _precio_p > 0 else 0
                         _margen_map[_pn] = {
@@ -7925,7 +7525,7 @@ mucho tráfico con engagement bajo NO zafan por volumen.
                     Ordenes=("Orden", "count"), Facturacion=("Total ($)", "sum"), Unidades=("Cantidad", "sum"),
                 ).reset_index().sort_values("Fecha")
                 for _, _r in _df_dia.iterrows():
-                    lines.append(f"{_r['Fecha']:<12} {int(_r['Ordenes']):>5} órd  ${_r['Facturacion']:>12,.0f}  {int(_r['Unidades']):>4} uds")
+                    lines.append(f"{_r['Fecha']:%Y-%m-%d}   {int(_r['Ordenes']):>5} órd  ${_r['Facturacion']:>12,.0f}  {int(_r['Unidades']):>4} uds")
                 if len(_df_dia) >= 6:
                     _1h = _df_dia.head(len(_df_dia) // 2)["Facturacion"].mean()
                     _2h = _df_dia.tail(len(_df_dia) // 2)["Facturacion"].mean()
@@ -8065,7 +7665,7 @@ DATOS DEL NEGOCIO:
                 messages.append({"role": "user", "content": question})
 
                 try:
-                    response = requests.post(
+                    response = HTTP.post(
                         "https://api.anthropic.com/v1/messages",
                         headers={
                             "Content-Type": "application/json",
@@ -0,0 +1,140 @@
+"""
+Benchmark: N busquedas de costo por nombre de producto contra una tabla de
+CostosConsolas sintetica (+ FOB_DEFAULTS).
+
+  lineal     get_fob_usd_lineal / match_costo_entry_lineal (bench/referencias.py):
+             arman, normalizan y recorren todos los candidatos en cada
+             llamada
+  resolver   costos.CostResolver recien armado en frio (memo vacio, sin
+             heredar de otra version ni Aho-Corasick reusados)
+  memo       el mismo resolver con los nombres ya vistos (caso rerun)
+  sin memo   cada busqueda resuelve los seis niveles (nombres nuevos, con la
+             normalizacion ya cacheada): lo que cuesta una busqueda con
+             indice de subcadenas
+
+Los nombres se repiten como en las ventas reales (pocos cientos de productos
+distintos) y mezclan variantes de color / GB, nombres que no estan en la
+tabla y nombres exactos.
+
+La version lineal tarda milisegundos por busqueda: se mide sobre una muestra
+(--muestra-lineal) y se extrapola a N.
+
+    python bench/bench_costos.py [--entradas 500] [--busquedas 10000] [--distintos 400]
+                                 [--muestra-lineal 1000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import costos  # noqa: E402
+from bench.referencias import get_fob_usd_lineal, match_costo_entry_lineal  # noqa: E402
+
+_MARCAS = ["Anbernic", "Miyoo", "Retroid", "Powkiddy", "Ayaneo", "Trimui", "AYN", "GKD"]
+_MODELOS = ["RG", "Mini", "Pocket", "Flip", "Brick", "Plus", "Pro", "X", "V", "SP"]
+_COLORES = ["Negro", "Blanco", "Transparente Violeta", "Gris", "Azul", "Rojo"]
+
+
+def tabla_costos_sintetica(n, rng):
+    """CostosConsolas con n entradas: la mayoria con FOB, algunas solo con
+    total / import cargado, algunas vacias, '_costo_kg_usd' y una basura."""
+    tabla = {"_costo_kg_usd": 58, "_meta": "no es una entrada"}
+    while len(tabla) < n + 2:
+        nombre = (f"{rng.choice(_MARCAS)} {rng.choice(_MODELOS)} {rng.randint(1, 600)}"
+                  f"{rng.choice(['', 'H', 'XX', ' Plus', ' V'])}")
+        if rng.random() < 0.3:
+            nombre += f" {rng.choice([16, 32, 64, 128])}GB"
+        e = {"peso_kg": round(rng.uniform(0.2, 1.5), 2)}
+        tipo = rng.random()
+        if tipo < 0.75:
+            e["fob_usd"] = round(rng.uniform(20, 300), 2)
+        elif tipo < 0.85:
+            e["costo_total_usd"] = round(rng.uniform(30, 350), 2)
+        elif tipo < 0.92:
+            e["costo_import_usd"] = round(rng.uniform(5, 40), 2)
+        tabla[nombre] = e
+    tabla["roto"] = "no es dict"
+    return tabla
+
+
+def nombres_sinteticos(tabla, n, rng):
+    """n nombres de venta: claves exactas, con color / GB / mayusculas y
+    espacios cambiados, recortes y productos que no estan."""
+    claves = [k for k in list(tabla) + list(costos.FOB_DEFAULTS) if not k.startswith("_")]
+    out = []
+    for _ in range(n):
+        k = rng.choice(claves)
+        t = rng.random()
+        if t < 0.2:
+            out.append(k)
+        elif t < 0.5:
+            out.append(f"{k.upper()} ({rng.choice(_COLORES)})")
+        elif t < 0.65:
+            out.append(k.replace(" ", "  ") + f" {rng.choice([64, 128, 256])}GB")
+        elif t < 0.8:
+            out.append(k[:max(3, len(k) - rng.randint(1, 6))])
+        elif t < 0.9:
+            out.append(f"Funda para {k}")
+        else:
+            out.append(f"{rng.choice(_MARCAS)} Producto {rng.randint(1, 10 ** 6)}")
+    return out
+
+
+def _medir(nombre, fn, nombres, total=None):
+    """Tiempo de fn sobre nombres, escalado a total busquedas si es una muestra."""
+    t0 = time.perf_counter()
+    for n in nombres:
+        fn(n)
+    dt = (time.perf_counter() - t0) * (total or len(nombres)) / len(nombres)
+    nota = f"  (extrapolado de {len(nombres)})" if total else ""
+    print(f"{nombre:<22} {dt * 1000:9.1f} ms  {dt / (total or len(nombres)) * 1e6:8.1f} "
+          f"us/busqueda{nota}")
+    return dt
+
+
+def _en_frio():
+    """Sin resolvers, sin memo para heredar y sin automatas ni normas cacheados."""
+    costos.invalidar_costos()
+    costos._ULTIMO = None
+    costos._AUTOMATAS.clear()
+    costos._normas.cache_clear()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--entradas", type=int, default=500)
+    ap.add_argument("--busquedas", type=int, default=10_000)
+    ap.add_argument("--distintos", type=int, default=400)
+    ap.add_argument("--muestra-lineal", type=int, default=1000)
+    a = ap.parse_args()
+
+    rng = random.Random(21)
+    tabla = tabla_costos_sintetica(a.entradas, rng)
+    distintos = nombres_sinteticos(tabla, a.distintos, rng)
+    nombres = [rng.choice(distintos) for _ in range(a.busquedas)]
+    print(f"{a.busquedas} busquedas · {a.entradas} entradas + {len(costos.FOB_DEFAULTS)} "
+          f"defaults · {len(set(nombres))} nombres distintos\n")
+
+    for etiqueta, lineal, metodo in (
+            ("fob", get_fob_usd_lineal, "fob"),
+            ("entrada", match_costo_entry_lineal, "entrada")):
+        muestra = nombres[:a.muestra_lineal]
+        t_lin = _medir(f"{etiqueta} lineal", lambda n: lineal(n, tabla), muestra,
+                       total=len(nombres) if len(muestra) < len(nombres) else None)
+        _en_frio()
+        t0 = time.perf_counter()
+        r = costos.resolver_costos(tabla)
+        t_armado = time.perf_counter() - t0
+        t_frio = _medir(f"{etiqueta} resolver", getattr(r, metodo), nombres)
+        t_memo = _medir(f"{etiqueta} memo", getattr(r, metodo), nombres)
+        _medir(f"{etiqueta} sin memo", getattr(r, f"_resolver_{metodo}"), nombres)
+        assert all(lineal(n, tabla) == getattr(r, metodo)(n) for n in distintos)
+        print(f"  armado del indice {t_armado * 1000:.1f} ms · resolver x{t_lin / t_frio:.0f} · "
+              f"memo x{t_lin / t_memo:.0f} sobre lineal\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Benchmark: procesar_orders columnar vs la version fila por fila
+(bench/referencias.py) a 1k / 10k / 100k ordenes.
+
+Ordenes de bench/servidor_local.orden_sintetica recortadas a CAMPOS_ORDEN
+(lo que baja el dashboard). Verifica ademas que las dos salidas sean
+identicas (la de referencia pasada por tipar_ordenes).
+
+    python bench/bench_procesar_orders.py [--tamanos 1000,10000,100000] [--repeticiones 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import tn_client  # noqa: E402
+from bench.referencias import procesar_orders_por_fila  # noqa: E402
+from bench.servidor_local import orden_sintetica  # noqa: E402
+from ordenes import CAMPOS_ORDEN, procesar_orders, tipar_ordenes  # noqa: E402
+
+
+def _mejor(fn, ordenes, repeticiones):
+    mejor, df = float("inf"), None
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        df = fn(ordenes)
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor, df
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tamanos", default="1000,10000,100000")
+    ap.add_argument("--repeticiones", type=int, default=3)
+    a = ap.parse_args()
+
+    print(f"{'ordenes':>8} {'fila x fila':>12} {'columnar':>10} {'speedup':>8}")
+    for n in (int(x) for x in a.tamanos.split(",")):
+        ordenes = tn_client.proyectar([orden_sintetica(i) for i in range(n)], CAMPOS_ORDEN)
+        rep = a.repeticiones if n <= 10_000 else 1
+        t_fila, df_fila = _mejor(procesar_orders_por_fila, ordenes, rep)
+        t_col, df_col = _mejor(procesar_orders, ordenes, rep)
+        assert df_col.equals(tipar_ordenes(df_fila.drop(columns="Items"))), \
+            f"salidas distintas con {n} ordenes"
+        print(f"{n:>8} {t_fila:>11.3f}s {t_col:>9.3f}s {t_fila / t_col:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark: calcular_resultado_periodo columnar vs fila por fila (apply con
+costo_final_row + margen % con apply) sobre N ordenes sinteticas.
+
+Los nombres de producto salen de una tabla de CostosConsolas sintetica
+(bench_costos): la mayoria de las ordenes con un producto, el resto con
+varios separados por " / ". "columnar" arranca con el indice de costos
+vacio (en frio); "columnar tibio" es el rerun, con los nombres ya
+resueltos. "cacheado" es resultado_periodo con el resultado ya guardado: lo
+que cuesta es la huella de los insumos (hash del contenido de df_tn).
+"FOB parcheado" cambia el FOB de una clave de la tabla (como guardar en
+Costos de consolas) y pide el P&L de nuevo: parchea el resultado guardado
+(solo las filas afectadas). "FOB de cero" es lo mismo con el cache vacio.
+
+    python bench/bench_resultado.py [--ordenes 50000] [--entradas 500] [--distintos 400]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import costos  # noqa: E402
+from bench.bench_costos import _en_frio, nombres_sinteticos, tabla_costos_sintetica  # noqa: E402
+from bench.referencias import calcular_resultado_periodo_por_fila  # noqa: E402
+from bench.servidor_local import orden_sintetica  # noqa: E402
+from ordenes import procesar_orders  # noqa: E402
+from resultado import (  # noqa: E402
+    CacheResultados, calcular_resultado_periodo, resultado_periodo,
+)
+
+
+def df_sintetico(n, entradas, distintos, seed=23):
+    rng = random.Random(seed)
+    tabla = tabla_costos_sintetica(entradas, rng)
+    nombres = nombres_sinteticos(tabla, distintos, rng)
+    df = procesar_orders(orden_sintetica(i) for i in range(n))
+    df["Productos"] = pd.Series(
+        [rng.choice(nombres) if rng.random() < 0.8
+         else " / ".join(rng.choice(nombres) for _ in range(rng.randint(2, 3)))
+         for _ in range(n)], index=df.index, dtype="str")
+    return df, tabla
+
+
+def _medir(nombre, fn):
+    t0 = time.perf_counter()
+    r = fn()
+    dt = time.perf_counter() - t0
+    print(f"{nombre:<16} {dt * 1000:9.1f} ms")
+    return dt, r
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--ordenes", type=int, default=50_000)
+    ap.add_argument("--entradas", type=int, default=500)
+    ap.add_argument("--distintos", type=int, default=400)
+    a = ap.parse_args()
+
+    df, tabla = df_sintetico(a.ordenes, a.entradas, a.distintos)
+    print(f"{len(df)} ordenes · {df['Productos'].nunique()} strings de productos distintos · "
+          f"{a.entradas} entradas de costos\n")
+    args = (df, date(2024, 1, 1), date(2024, 12, 31), 1215.0, 21, 1_000_000, tabla,
+            {"alquiler": 300_000})
+
+    _en_frio()
+    t_fila, ref = _medir("fila por fila", lambda: calcular_resultado_periodo_por_fila(*args))
+    _en_frio()
+    t_col, nuevo = _medir("columnar", lambda: calcular_resultado_periodo(*args))
+    t_tibio, _ = _medir("columnar tibio", lambda: calcular_resultado_periodo(*args))
+    resultado_periodo(*args)
+    t_cache, cacheado = _medir("cacheado", lambda: resultado_periodo(*args))
+    pd.testing.assert_frame_equal(cacheado["df_calc"], nuevo["df_calc"], check_exact=True)
+
+    pd.testing.assert_frame_equal(nuevo.pop("df_calc"), ref.pop("df_calc"), check_exact=True)
+    assert nuevo == ref
+    print(f"\ncolumnar x{t_fila / t_col:.0f} · tibio x{t_fila / t_tibio:.0f} · "
+          f"cacheado x{t_fila / t_cache:.0f} sobre fila por fila (resultado identico)\n")
+
+    # Editar un FOB (guardar en Costos de consolas: gs_write invalida y el
+    # rerun pide el P&L con la tabla nueva)
+    clave = random.Random(a.ordenes).choice(
+        [k for k, v in tabla.items() if isinstance(v, dict) and v.get("fob_usd")])
+    editada = {**tabla, clave: {**tabla[clave], "fob_usd": tabla[clave]["fob_usd"] + 10}}
+    args_ed = args[:6] + (editada, args[7])
+    costos.invalidar_costos()
+    t_inc, parcheado = _medir("FOB parcheado", lambda: resultado_periodo(*args_ed))
+    _en_frio()
+    t_cero, ref = _medir("FOB de cero", lambda: resultado_periodo(*args_ed, cache=CacheResultados()))
+    distintas = int((parcheado["df_calc"]["Costo Productos ($)"]
+                     != cacheado["df_calc"]["Costo Productos ($)"]).sum())
+    pd.testing.assert_frame_equal(parcheado.pop("df_calc"), ref.pop("df_calc"), check_exact=True)
+    assert parcheado == ref
+    print(f"\n{clave!r}: {distintas} ordenes cambian de costo · parcheado x{t_cero / t_inc:.1f} "
+          f"sobre recalcular de cero (resultado identico)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark: RSS pico al procesar un histórico de órdenes, lista vs streaming.
+
+  lista:  tn_client.get_paginado → lista con todo el JSON crudo → procesar_orders
+  stream: tn_client.iter_paginado → procesar_orders consume página a página
+
+Cada modo corre en un subproceso aparte (ru_maxrss es monótono por proceso)
+contra bench/servidor_local, que vive en el proceso padre.
+
+    python bench/bench_rss_ordenes.py [--ordenes 20000]
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import tn_client  # noqa: E402
+from ordenes import procesar_orders  # noqa: E402
+
+PER_PAGE = 200
+
+
+def _rss_mb():
+    kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return kb / 1024 if sys.platform != "darwin" else kb / 1024 / 1024
+
+
+def _hijo(modo, base, ordenes):
+    tn_client.BASE = base
+    tn_client.LIMITADOR.configurar(capacidad=1e9, tasa=1e9)  # servidor local: sin bucket de TN
+    max_pages = -(-ordenes // PER_PAGE)
+    base_rss = _rss_mb()
+    t0 = time.perf_counter()
+    if modo == "lista":
+        raw = tn_client.get_paginado("orders", per_page=PER_PAGE, max_pages=max_pages,
+                                     token="bench", concurrente=True)
+        df = procesar_orders(raw)
+    else:
+        paginas = tn_client.iter_paginado("orders", per_page=PER_PAGE, max_pages=max_pages,
+                                          token="bench", concurrente=True)
+        df = procesar_orders(o for batch in paginas for o in batch)
+    dt = time.perf_counter() - t0
+    print(f"{modo:<7} {len(df):>7} filas  {dt:6.2f} s  "
+          f"RSS pico {_rss_mb():7.1f} MB  (+{_rss_mb() - base_rss:.1f} MB sobre el import)")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--ordenes", type=int, default=20000)
+    ap.add_argument("--_hijo", nargs=2, metavar=("MODO", "BASE"))
+    a = ap.parse_args()
+    if a._hijo:
+        return _hijo(a._hijo[0], a._hijo[1], a.ordenes)
+
+    from bench import servidor_local
+    srv = servidor_local.levantar(total_ordenes=a.ordenes)
+    try:
+        print(f"{a.ordenes} órdenes sintéticas · per_page {PER_PAGE}\n")
+        for modo in ("lista", "stream"):
+            subprocess.run([sys.executable, __file__, "--ordenes", str(a.ordenes),
+                            "--_hijo", modo, srv.base], check=True)
+    finally:
+        srv.shutdown()
+
+
+if __name__ == "__main__":
+    main()
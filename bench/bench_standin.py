@@ -0,0 +1,118 @@
+"""
+Benchmark: fetch completo del dashboard contra el stand-in local, con volumen
+y errores de produccion (50k ordenes, 429 periodicos, latencia con jitter).
+
+Baja orders (por fechas, como ordenes_tn), transactions y products con
+tn_client y MP payments/search y Meta insights con urllib, todo instrumentado
+con metricas_http: la tabla final es la misma que ⚙️ Operación → 📡 Llamadas
+HTTP. Sirve de linea de base reproducible para cualquier cambio del fetch.
+
+    python bench/bench_standin.py [--ordenes 50000] [--cada-429 50] [--latencia-request 0.05]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import metricas_http  # noqa: E402
+import tn_client  # noqa: E402
+from bench import servidor_local  # noqa: E402
+
+
+def _get_json(url, params=None):
+    """GET medido; un 429 se reintenta tras Retry-After (el stand-in los inyecta
+    en todas las APIs)."""
+    if params:
+        url = f"{url}?{urllib.parse.urlencode(params)}"
+    with metricas_http.medir(metricas_http.servicio_de(url), "GET", url) as m:
+        while True:
+            try:
+                with urllib.request.urlopen(url, timeout=30) as r:
+                    texto = r.read()
+                    m.status, m.bytes = r.status, len(texto)
+                return json.loads(texto)
+            except urllib.error.HTTPError as e:
+                if e.code != 429:
+                    raise
+                m.reintentos += 1
+                time.sleep(float(e.headers.get("Retry-After") or 1))
+
+
+def _mp(base, desde, hasta):
+    pagos, offset = [], 0
+    while True:
+        j = _get_json(f"{base}/v1/payments/search", {
+            "status": "approved", "begin_date": f"{desde}T00:00:00.000-03:00",
+            "end_date": f"{hasta}T23:59:59.999-03:00", "limit": 100, "offset": offset})
+        pagos += j["results"]
+        offset += 100
+        if not j["results"] or offset >= j["paging"]["total"]:
+            return pagos
+
+
+def _meta(base, desde, hasta):
+    url = f"{base}/v21.0/act_1/insights"
+    params = {"breakdowns": "product_id", "limit": 500,
+              "time_range": json.dumps({"since": str(desde), "until": str(hasta)})}
+    filas = []
+    while url:
+        j = _get_json(url, params)
+        filas += j["data"]
+        url, params = (j.get("paging") or {}).get("next"), None
+    return filas
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--ordenes", type=int, default=50_000)
+    ap.add_argument("--ordenes-por-dia", type=int, default=40)
+    ap.add_argument("--cada-429", type=int, default=50)
+    ap.add_argument("--latencia-request", type=float, default=0.02)
+    ap.add_argument("--latencia-jitter", type=float, default=0.03)
+    a = ap.parse_args()
+
+    dias = -(-a.ordenes // a.ordenes_por_dia)
+    hasta = date.today()
+    desde = hasta - timedelta(days=dias - 1)
+    srv = servidor_local.levantar(total_ordenes=a.ordenes, ordenes_por_dia=a.ordenes_por_dia,
+                                  inicio=desde, total_productos=1000, cada_429=a.cada_429,
+                                  retry_after=0, latencia_request=a.latencia_request,
+                                  latencia_jitter=a.latencia_jitter)
+    tn_client.BASE = srv.base
+    tn_client.LIMITADOR.configurar(capacidad=1e9, tasa=1e9)  # servidor local: sin bucket de TN
+    tn_client.OBSERVADORES.append(metricas_http.REGISTRO.evento)
+    try:
+        t0 = time.perf_counter()
+        n = {}
+        n["orders"] = sum(len(b) for b in tn_client.iter_paginado_por_fechas(
+            "orders", desde, hasta, per_page=50, token="bench"))
+        n["transactions"] = len(tn_client.get_paginado(
+            "transactions", per_page=50, token="bench", concurrente=True,
+            params={"created_at_min": f"{hasta - timedelta(days=90)}T00:00:00-03:00"}))
+        n["products"] = len(tn_client.get_paginado("products", per_page=50, token="bench",
+                                                   concurrente=True))
+        n["mp payments"] = len(_mp(srv.bases["mp"], hasta - timedelta(days=90), hasta))
+        n["meta insights"] = len(_meta(srv.bases["meta"], hasta - timedelta(days=30), hasta))
+        dt = time.perf_counter() - t0
+    finally:
+        tn_client._POOL.cerrar()
+        srv.shutdown()
+
+    print(" · ".join(f"{k} {v}" for k, v in n.items()))
+    print(f"{srv.requests} requests · {srv.bytes_enviados / 1e6:.1f} MB · {dt:.1f} s\n")
+    print(f"{'servicio':<11}{'endpoint':<42}{'llamadas':>9}{'p50 ms':>9}{'p99 ms':>9}"
+          f"{'429':>6}{'total s':>9}")
+    for f in metricas_http.REGISTRO.resumen():
+        print(f"{f['servicio']:<11}{f['endpoint'][:41]:<42}{f['llamadas']:>9}{f['p50_ms']:>9}"
+              f"{f['p99_ms']:>9}{f['reintentos']:>6}{f['segundos']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark: df de ordenes sin tipar (object / float64 / int64, Fecha str)
+vs tipado con ordenes.ESQUEMA_ORDENES (categoricas, enteros nullable, Fecha
+datetime64).
+
+Mide memoria (memory_usage deep), el copy() que hace cada rerun
+(st.session_state.df_tn.copy()) y los groupby que mas se repiten en el
+dashboard (por pasarela, medio de pago, provincia y fecha).
+
+    python bench/bench_tipos_ordenes.py [--tamanos 10000,100000] [--repeticiones 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import tn_client  # noqa: E402
+from bench.referencias import procesar_orders_por_fila  # noqa: E402
+from bench.servidor_local import orden_sintetica  # noqa: E402
+from ordenes import CAMPOS_ORDEN, procesar_orders  # noqa: E402
+
+GROUPBYS = {
+    "pasarela": lambda df: df.groupby("Pasarela", observed=True)["Total ($)"].sum(),
+    "medio de pago": lambda df: df.groupby("Medio de Pago", observed=True).agg(
+        Ordenes=("Orden", "count"), Total=("Total ($)", "sum"), Margen=("Margen ($)", "mean")),
+    "provincia+ciudad": lambda df: df.groupby(["Provincia", "Ciudad"], observed=True)[
+        "Total ($)"].sum(),
+    "fecha": lambda df: df.groupby("Fecha")[["Total ($)", "Margen ($)"]].sum(),
+}
+
+
+def _mejor(fn, repeticiones):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        fn()
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tamanos", default="10000,100000")
+    ap.add_argument("--repeticiones", type=int, default=5)
+    a = ap.parse_args()
+
+    for n in (int(x) for x in a.tamanos.split(",")):
+        ordenes = tn_client.proyectar([orden_sintetica(i) for i in range(n)], CAMPOS_ORDEN)
+        crudo = procesar_orders_por_fila(ordenes).drop(columns="Items")
+        tipado = procesar_orders(ordenes)
+        mb_c = crudo.memory_usage(deep=True).sum() / 1e6
+        mb_t = tipado.memory_usage(deep=True).sum() / 1e6
+        print(f"\n{n} ordenes")
+        print(f"  {'memoria':<18} {mb_c:8.1f} MB -> {mb_t:6.1f} MB  ({mb_c / mb_t:.1f}x)")
+        rep = a.repeticiones
+        for nombre, fn in [("copy()", lambda df: df.copy())] + list(GROUPBYS.items()):
+            t_c = _mejor(lambda: fn(crudo), rep)
+            t_t = _mejor(lambda: fn(tipado), rep)
+            print(f"  {nombre:<18} {t_c * 1000:8.2f} ms -> {t_t * 1000:6.2f} ms  ({t_c / t_t:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark: throughput de N GETs sueltos a TN en tres modos.
+
+  sync    tn_client.get en serie
+  hilos   tn_client.get en un ThreadPoolExecutor (un hilo por request en vuelo)
+  async   tn_client_aio.get con asyncio.gather en un solo event loop
+
+Corre contra bench/servidor_local (sin credenciales) con latencia por request
+simulada. Los tres comparten el tope de requests en vuelo del proceso
+(_MAX_EN_VUELO), asi que hilos y async deberian rendir parecido; la
+diferencia de async es que no necesita un hilo por request.
+
+    python bench/bench_tn_aio.py [--requests 200] [--latencia-request 0.05]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import tn_client  # noqa: E402
+import tn_client_aio  # noqa: E402
+from bench import servidor_local  # noqa: E402
+
+
+def _params(i):
+    return {"per_page": 5, "page": i % 20 + 1}
+
+
+def _sync(n):
+    for i in range(n):
+        tn_client.get("orders", token="bench", params=_params(i))
+
+
+def _hilos(n, workers):
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        list(ex.map(lambda i: tn_client.get("orders", token="bench", params=_params(i)),
+                    range(n)))
+
+
+def _async(n):
+    async def correr():
+        await asyncio.gather(*(tn_client_aio.get("orders", token="bench", params=_params(i))
+                               for i in range(n)))
+        await tn_client_aio.cerrar()
+    asyncio.run(correr())
+
+
+def _hilos_cliente():
+    """Hilos vivos del lado cliente (sin los del server local ni el vigilante)."""
+    return sum(1 for h in threading.enumerate()
+               if "process_request_thread" not in h.name and h.name != "vigilante")
+
+
+def _medir(nombre, fn, n):
+    hilos0 = _hilos_cliente()
+    pico = [hilos0]
+    parar = threading.Event()
+
+    def _vigilar():
+        while not parar.wait(0.005):
+            pico[0] = max(pico[0], _hilos_cliente())
+    v = threading.Thread(target=_vigilar, name="vigilante", daemon=True)
+    v.start()
+    t0 = time.perf_counter()
+    fn()
+    dt = time.perf_counter() - t0
+    parar.set()
+    v.join()
+    print(f"{nombre:<8} {n:>5} requests  {dt:6.2f} s  {n / dt:7.1f} req/s  "
+          f"hilos cliente extra {pico[0] - hilos0}")
+    return dt
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--workers", type=int, default=16)
+    ap.add_argument("--latencia-request", type=float, default=0.05)
+    a = ap.parse_args()
+
+    # El server simula la latencia con sleep por hilo: no es el cuello de botella
+    srv = servidor_local.levantar(total_ordenes=200, latencia_request=a.latencia_request)
+    tn_client.BASE = srv.base
+    tn_client.LIMITADOR.configurar(capacidad=1e9, tasa=1e9)  # servidor local: sin bucket de TN
+    try:
+        print(f"{a.requests} GETs · latencia simulada {a.latencia_request * 1000:.0f} ms · "
+              f"tope en vuelo {tn_client._MAX_EN_VUELO}\n")
+        t_sync = _medir("sync", lambda: _sync(a.requests), a.requests)
+        t_hilos = _medir("hilos", lambda: _hilos(a.requests, a.workers), a.requests)
+        t_async = _medir("async", lambda: _async(a.requests), a.requests)
+        print(f"\nhilos x{t_sync / t_hilos:.1f} · async x{t_sync / t_async:.1f} sobre sync")
+    finally:
+        tn_client._POOL.cerrar()
+        srv.shutdown()
+
+
+if __name__ == "__main__":
+    main()
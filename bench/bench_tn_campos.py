@@ -0,0 +1,59 @@
+"""
+Benchmark: bytes transferidos, tiempo y memoria de orders_raw con y sin
+proyeccion de campos (tn_client campos= / CAMPOS_ORDEN).
+
+Corre contra bench/servidor_local (sin credenciales), que como TN filtra el
+primer nivel con `fields`; lo anidado (products) lo poda tn_client.
+
+    python bench/bench_tn_campos.py [--ordenes 5000]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import tn_client  # noqa: E402
+from bench import servidor_local  # noqa: E402
+from ordenes import CAMPOS_ORDEN  # noqa: E402
+
+
+def _medir(nombre, srv, paginas, per_page, campos):
+    b0 = srv.bytes_enviados
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    filas = tn_client.get_paginado("orders", per_page=per_page, max_pages=paginas,
+                                    token="bench", concurrente=True, campos=campos)
+    dt = time.perf_counter() - t0
+    retenido, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    mb = (srv.bytes_enviados - b0) / 1e6
+    print(f"{nombre:<12} {len(filas):>7} filas  {mb:7.2f} MB por la red  "
+          f"{dt:6.2f} s  orders_raw {retenido / 1e6:7.1f} MB")
+    return mb, dt, retenido
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--ordenes", type=int, default=5000)
+    ap.add_argument("--per-page", type=int, default=50)
+    a = ap.parse_args()
+
+    paginas = -(-a.ordenes // a.per_page)
+    srv = servidor_local.levantar(total_ordenes=a.ordenes)
+    tn_client.BASE = srv.base
+    tn_client.LIMITADOR.configurar(capacidad=1e9, tasa=1e9)  # servidor local: sin bucket de TN
+    try:
+        mb_c, dt_c, mem_c = _medir("completo", srv, paginas, a.per_page, None)
+        mb_p, dt_p, mem_p = _medir("proyectado", srv, paginas, a.per_page, CAMPOS_ORDEN)
+        print(f"\nred -{(1 - mb_p / mb_c) * 100:.0f}% · tiempo -{(1 - dt_p / dt_c) * 100:.0f}% · "
+              f"memoria orders_raw -{(1 - mem_p / mem_c) * 100:.0f}%")
+    finally:
+        tn_client._POOL.cerrar()
+        srv.shutdown()
+
+
+if __name__ == "__main__":
+    main()
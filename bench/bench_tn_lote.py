@@ -0,0 +1,71 @@
+"""
+Benchmark: ajuste de precio de todo el catalogo — put() en serie vs
+escribir_lote (paralelo bajo el rate limiter, con journal).
+
+Corre contra bench/servidor_local (sin credenciales) con latencia por request
+simulada. El limiter se configura con el bucket del plan (--bucket; TN informa
+el real en x-rate-limit-limit, leak = bucket/20 por segundo): con el plan base
+(40) el techo lo pone TN, no el cliente.
+
+    python bench/bench_tn_lote.py [--items 500] [--latencia-request 0.15] [--bucket 400]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import tn_client  # noqa: E402
+from bench import servidor_local  # noqa: E402
+
+
+def _items(n):
+    return [(f"products/{1000 + i}/variants/{5000 + i}", {"price": str(1000 + i)})
+            for i in range(n)]
+
+
+def _limiter(bucket):
+    tn_client.LIMITADOR.configurar(capacidad=bucket, tasa=bucket / 20)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", type=int, default=500)
+    ap.add_argument("--latencia-request", type=float, default=0.15)
+    ap.add_argument("--bucket", type=float, default=400)
+    a = ap.parse_args()
+
+    srv = servidor_local.levantar(latencia_request=a.latencia_request)
+    tn_client.BASE = srv.base
+    try:
+        print(f"{a.items} PUTs · latencia simulada {a.latencia_request * 1000:.0f} ms · "
+              f"bucket {a.bucket:.0f} ({a.bucket / 20:.0f} req/s)\n")
+        _limiter(a.bucket)
+        t0 = time.perf_counter()
+        for path, body in _items(a.items):
+            tn_client.put(path, body, token="bench")
+        t_serie = time.perf_counter() - t0
+        print(f"serie    {t_serie:7.2f} s")
+
+        _limiter(a.bucket)
+        with tempfile.TemporaryDirectory() as d:
+            journal = os.path.join(d, "lote.jsonl")
+            t0 = time.perf_counter()
+            ok = sum(r["ok"] for r in tn_client.escribir_lote(_items(a.items), token="bench",
+                                                              journal=journal))
+            t_lote = time.perf_counter() - t0
+            print(f"lote     {t_lote:7.2f} s  ({ok} ok)")
+            t0 = time.perf_counter()
+            saltados = sum(r["saltado"] for r in tn_client.escribir_lote(
+                _items(a.items), token="bench", journal=journal))
+            print(f"reanudar {time.perf_counter() - t0:7.2f} s  ({saltados} ya aplicados, 0 requests)")
+        print(f"\nspeedup: x{t_serie / t_lote:.1f}")
+    finally:
+        tn_client._POOL.cerrar()
+        srv.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark: tiempo por pagina de get_paginado con y sin reuso de conexiones.
+
+Corre contra bench/servidor_local (sin credenciales). La latencia de conexion
+simula el handshake TCP+TLS contra api.tiendanube.com (~60-120 ms desde AR);
+sin pool se paga en cada pagina, con pool una sola vez.
+
+    python bench/bench_tn_pool.py [--paginas 100] [--latencia-conexion 0.08]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import tn_client  # noqa: E402
+from bench import servidor_local  # noqa: E402
+
+
+def _medir(nombre, transporte, paginas, per_page):
+    t0 = time.perf_counter()
+    filas = tn_client.get_paginado("orders", per_page=per_page, max_pages=paginas,
+                                    token="bench", _http=transporte)
+    dt = time.perf_counter() - t0
+    print(f"{nombre:<12} {len(filas):>7} filas  {dt:7.2f} s  "
+          f"{dt / paginas * 1000:7.1f} ms/pagina")
+    return dt
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--paginas", type=int, default=100)
+    ap.add_argument("--per-page", type=int, default=50)
+    ap.add_argument("--latencia-conexion", type=float, default=0.08)
+    ap.add_argument("--latencia-request", type=float, default=0.0)
+    a = ap.parse_args()
+
+    srv = servidor_local.levantar(total_ordenes=a.paginas * a.per_page,
+                                  latencia_conexion=a.latencia_conexion,
+                                  latencia_request=a.latencia_request)
+    tn_client.BASE = srv.base
+    tn_client.LIMITADOR.configurar(capacidad=1e9, tasa=1e9)  # servidor local: sin bucket de TN
+    try:
+        print(f"{a.paginas} paginas x {a.per_page} · handshake simulado "
+              f"{a.latencia_conexion * 1000:.0f} ms\n")
+        c0 = srv.conexiones
+        t_sin = _medir("sin pool", tn_client._http_sin_pool, a.paginas, a.per_page)
+        c1 = srv.conexiones
+        t_con = _medir("con pool", tn_client._http, a.paginas, a.per_page)
+        c2 = srv.conexiones
+        print(f"\nconexiones abiertas: sin pool {c1 - c0} · con pool {c2 - c1}")
+        print(f"speedup: x{t_sin / t_con:.1f}")
+    finally:
+        tn_client._POOL.cerrar()
+        srv.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+"""
+Implementaciones de referencia: las versiones fila por fila que reemplazaron
+las columnares del dashboard. No las usa la app; son el oraculo de los tests
+de equivalencia y la linea de base de los benchmarks.
+
+  procesar_orders_por_fila       ordenes.procesar_orders
+  filas_por_producto_por_fila    ordenes.filas_por_producto
+  get_fob_usd_lineal             costos.get_fob_usd (CostResolver)
+  match_costo_entry_lineal       costos._match_costo_entry (CostResolver)
+  calcular_resultado_periodo_por_fila
+                                 resultado.calcular_resultado_periodo
+"""
+import pandas as pd
+
+from costos import FOB_DEFAULTS, _extract, _norm_compact, _normalizar, costo_final_row
+from ordenes import (
+    _es_convenir, _es_gateway_mp, _extraer_nombre_producto, _fecha_por_fila, _label_medio,
+    tasa_pasarela,
+)
+from resultado import _agregados, _gastos_fijos, _vacio
+
+
+def procesar_orders_por_fila(orders):
+    """ordenes.procesar_orders fila por fila (la version que reemplazo la
+    columnar)."""
+    filas = []
+    for o in orders:
+        prods = []
+        costo_productos = 0.0
+        items_linea = []
+        for p in o.get("products", []):
+            nombre = _extraer_nombre_producto(p.get("name", ""))
+            prods.append(nombre)
+            qty = int(p.get("quantity", 1) or 1)
+            cost = float(p.get("cost", 0) or 0)
+            costo_productos += cost * qty
+            items_linea.append({"producto": nombre, "cantidad": qty, "costo": cost})
+        productos = " / ".join(prods)
+        cantidad = sum(int(p.get("quantity", 1) or 1) for p in o.get("products", []))
+
+        pd_raw = o.get("payment_details", {})
+        gateway = str(o.get("gateway", "")).lower()
+        metodo = gateway
+        cuotas = 1
+        if isinstance(pd_raw, dict):
+            metodo = pd_raw.get("method", gateway)
+            cuotas = int(pd_raw.get("installments", 1) or 1)
+
+        if metodo == "credit_card":
+            label_medio = "Credito contado" if cuotas == 1 else f"Credito {cuotas} cuotas"
+        elif metodo == "debit_card":
+            label_medio = "Debito"
+        elif any(x in str(metodo).lower() for x in ["transfer", "wire"]):
+            label_medio = "Transferencia"
+        elif "account_money" in str(metodo).lower():
+            label_medio = "Dinero en cuenta"
+        else:
+            label_medio = str(metodo).replace("_", " ").title() if metodo else str(gateway)
+
+        try:
+            fecha = pd.to_datetime(o.get("created_at", "")).strftime("%Y-%m-%d")
+        except Exception:
+            fecha = ""
+
+        total = float(o.get("total", 0))
+        descuento = float(o.get("discount", 0) or 0)
+        costo_envio_dueno = float(o.get("shipping_cost_owner", 0) or 0)
+        province = str(o.get("billing_province", "")).strip()
+        _ship = o.get("shipping_address") or {}
+        city = str(o.get("billing_city", "") or (_ship.get("city", "") if isinstance(_ship, dict) else "")).strip()
+
+        if _es_gateway_mp(gateway):
+            pasarela = "MP"
+            tasa = tasa_pasarela(gateway, metodo, cuotas)
+            comision_pn = round(total * tasa, 2)
+        elif _es_convenir(gateway, metodo):
+            pasarela = "Convenir"   # se resolverá en match_mp_with_tn()
+            tasa = 0.0
+            comision_pn = 0.0
+        else:
+            pasarela = "PN"
+            # Fee = tasa pública oficial de PN (no es estimación inventada,
+            # son los rates publicados: 1.25% transferencia, 4.15% crédito, etc.)
+            # La retención IIBB NO se calcula porque TN no la expone vía API.
+            tasa = tasa_pasarela(gateway, metodo, cuotas)
+            comision_pn = round(total * tasa, 2)
+        neto = round(total - comision_pn, 2)
+        margen = round(neto - costo_productos - costo_envio_dueno, 2)
+        margen_pct = round((margen / total * 100) if total > 0 else 0, 2)
+
+        filas.append({
+            "Orden": o.get("number"),
+            "Fecha": fecha,
+            "Cliente": str(o.get("contact_name", "")),
+            "Medio de Pago": label_medio,
+            "Cuotas": cuotas,
+            "Pasarela": pasarela,
+            "Total ($)": total,
+            "Descuento ($)": descuento,
+            "Envio costo ($)": costo_envio_dueno,
+            "Comision PN ($)": comision_pn,
+            "Costo PN (%)": round(tasa * 100, 2),
+            "Neto cobrado ($)": neto,
+            "Costo Productos ($)": round(costo_productos, 2),
+            "Margen ($)": margen,
+            "Margen (%)": margen_pct,
+            "Estado Envio": o.get("shipping_status", ""),
+            "Productos": productos,
+            "Cantidad": cantidad,
+            "Canal": str(o.get("app_id", "") or "tiendanube"),
+            "Estado": o.get("status", ""),
+            "ID MP": "",
+            "Provincia": province,
+            "Ciudad": city,
+            "Gateway raw": gateway,
+            "Metodo raw": str(metodo),
+            "Items": items_linea,
+        })
+    return pd.DataFrame(filas)
+
+
+def filas_por_producto_por_fila(orders):
+    """ordenes.filas_por_producto orden por orden (lista de dicts)."""
+    filas = []
+    for o in orders:
+        pd_raw = o.get("payment_details", {})
+        gateway = str(o.get("gateway", "")).lower()
+        metodo = gateway
+        cuotas = 1
+        if isinstance(pd_raw, dict):
+            metodo = pd_raw.get("method", gateway)
+            cuotas = int(pd_raw.get("installments", 1) or 1)
+        label_medio = _label_medio(metodo, cuotas, gateway)
+        fecha = _fecha_por_fila(o.get("created_at", ""))
+
+        order_total = float(o.get("total", 0))
+        n_products = len(o.get("products", []))
+        costo_envio = float(o.get("shipping_cost_owner", 0) or 0)
+        shipping_customer = float(o.get("shipping_cost_customer", 0) or 0)
+        tasa = tasa_pasarela(gateway, metodo, cuotas)
+
+        # Subtotal real de productos (precio de lista * qty)
+        order_subtotal = 0.0
+        for _p in o.get("products", []):
+            try:
+                order_subtotal += float(_p.get("price", 0) or 0) * int(_p.get("quantity", 1) or 1)
+            except Exception:
+                pass
+        # Revenue real de productos = total pagado por el cliente - lo que pagó por envío
+        # Esto absorbe descuentos por medio de pago, cupones y promos
+        product_revenue = order_total - shipping_customer
+        ratio_neto = (product_revenue / order_subtotal) if order_subtotal > 0 else 1.0
+
+        for p in o.get("products", []):
+            qty = int(p.get("quantity", 1) or 1)
+            if qty <= 0:
+                continue
+            nombre = _extraer_nombre_producto(p.get("name", ""))
+            precio_unit = float(p.get("price", 0) or 0)
+
+            # Si el precio individual es 0, fallback a dividir total
+            if precio_unit <= 0 and n_products > 0:
+                precio_unit = order_total / n_products
+
+            # Precio neto post-descuentos prorrateado por participación en subtotal
+            precio_neto_unit = round(precio_unit * ratio_neto, 2)
+            descuento_unit = round(precio_unit - precio_neto_unit, 2)
+
+            # Comisión proporcional al precio del producto respecto al total
+            if order_total > 0:
+                peso_en_orden = (precio_unit * qty) / order_total
+            else:
+                peso_en_orden = 1.0 / max(n_products, 1)
+            comision_unit = round(order_total * tasa * peso_en_orden / qty, 2)
+            envio_unit = round(costo_envio * peso_en_orden / qty, 2)
+
+            filas.append({
+                "Producto": nombre,
+                "Unidades": qty,
+                "Precio ($)": round(precio_unit, 0),
+                "Precio neto ($)": round(precio_neto_unit, 0),
+                "Descuento ($)": round(descuento_unit, 0),
+                "Medio de Pago": label_medio,
+                "Cuotas": cuotas,
+                "Comisión PN ($)": round(comision_unit, 0),
+                "Tasa PN (%)": round(tasa * 100, 2),
+                "Envío ($)": round(envio_unit, 0),
+                "Fecha": fecha,
+                "Orden Total ($)": order_total,
+            })
+    return filas
+
+
+def get_fob_usd_lineal(nombre_prod, costos_gs=None):
+    """costos.get_fob_usd recorriendo los candidatos (armados en cada llamada)."""
+    nombre_norm = _normalizar(nombre_prod)
+    if not nombre_norm:
+        return 0.0
+    nombre_compact = _norm_compact(nombre_prod)
+    candidatos = []
+    if costos_gs:
+        for k, v in costos_gs.items():
+            if k.startswith("_"):
+                continue
+            if isinstance(v, dict):
+                fob = float(v.get("fob_usd", 0) or 0)
+                if fob > 0:
+                    candidatos.append((_normalizar(k), _norm_compact(k), fob))
+    for k, v in FOB_DEFAULTS.items():
+        candidatos.append((_normalizar(k), _norm_compact(k), float(v.get("fob_usd", 0) or 0)))
+    # Tier 1: match exacto
+    for k_norm, k_compact, fob in candidatos:
+        if k_norm == nombre_norm:
+            return fob
+    # Tier 2: match compacto exacto (sin colores/GB/RAM)
+    for k_norm, k_compact, fob in candidatos:
+        if k_compact and k_compact == nombre_compact:
+            return fob
+    # Tier 3: key en nombre
+    for k_norm, k_compact, fob in candidatos:
+        if k_norm in nombre_norm:
+            return fob
+    # Tier 4: key compacto en nombre compacto (el más largo gana)
+    best, best_len = 0.0, 0
+    for k_norm, k_compact, fob in candidatos:
+        if k_compact and k_compact in nombre_compact and len(k_compact) > best_len:
+            best, best_len = fob, len(k_compact)
+    if best > 0:
+        return best
+    # Tier 5: nombre compacto en key compacto (reverso — ej: "rg35xxsp" in "rg35xxsp64")
+    best, best_len = 0.0, 0
+    for k_norm, k_compact, fob in candidatos:
+        if k_compact and nombre_compact in k_compact and len(nombre_compact) > best_len:
+            best, best_len = fob, len(nombre_compact)
+    if best > 0:
+        return best
+    # Tier 6: nombre en key (normalización básica)
+    for k_norm, k_compact, fob in candidatos:
+        if nombre_norm in k_norm:
+            return fob
+    return 0.0
+
+
+def match_costo_entry_lineal(nombre_prod, costos_gs=None):
+    """costos._match_costo_entry recorriendo los candidatos (ver get_fob_usd_lineal)."""
+    nombre_norm = _normalizar(nombre_prod)
+    if not nombre_norm:
+        return (0.0, 0.0, 0.0)
+    ckg_default = float(costos_gs.get("_costo_kg_usd", 65.0) or 65.0) if costos_gs else 65.0
+
+    # Construir candidatos: (norm_basico, norm_compacto, data_dict, costo_kg)
+    # Ordenar: entradas con FOB > 0 primero para que matcheen antes que las vacías
+    candidatos = []
+    if costos_gs:
+        for k, v in costos_gs.items():
+            if k.startswith("_") or not isinstance(v, dict):
+                continue
+            candidatos.append((_normalizar(k), _norm_compact(k), v, ckg_default))
+    for k, v in FOB_DEFAULTS.items():
+        candidatos.append((_normalizar(k), _norm_compact(k), v, 65.0))
+    candidatos.sort(key=lambda c: -(float(c[2].get("fob_usd", 0) or 0) if isinstance(c[2], dict) else 0))
+
+    nombre_compact = _norm_compact(nombre_prod)
+
+    def _try_tiers():
+        # Recorrer todos los tiers. Si un tier matchea con FOB>0, retornar.
+        # Si matchea con FOB=0, guardar como fallback y seguir buscando.
+        _fallback = None
+
+        def _consider(r):
+            nonlocal _fallback
+            if r and r[2] > 0:
+                if r[0] > 0:       # tiene FOB → retorno inmediato
+                    return r
+                if not _fallback:   # FOB=0, guardar como fallback
+                    _fallback = r
+            return None
+
+        # Tier 1: match exacto
+        for k_norm, k_compact, v, ckg in candidatos:
+            if k_norm == nombre_norm:
+                hit = _consider(_extract(v, ckg))
+                if hit: return hit
+        # Tier 2: match compacto exacto
+        for k_norm, k_compact, v, ckg in candidatos:
+            if k_compact and k_compact == nombre_compact:
+                hit = _consider(_extract(v, ckg))
+                if hit: return hit
+        # Tier 3: key en nombre (básico, el más largo gana)
+        best, best_len = None, 0
+        for k_norm, k_compact, v, ckg in candidatos:
+            if k_norm in nombre_norm and len(k_norm) > best_len:
+                r = _extract(v, ckg)
+                if r[2] > 0:
+                    best, best_len = r, len(k_norm)
+        if best:
+            hit = _consider(best)
+            if hit: return hit
+        # Tier 4: key compacto en nombre compacto (el más largo gana)
+        best, best_len = None, 0
+        for k_norm, k_compact, v, ckg in candidatos:
+            if k_compact and k_compact in nombre_compact and len(k_compact) > best_len:
+                r = _extract(v, ckg)
+                if r[2] > 0:
+                    best, best_len = r, len(k_compact)
+        if best:
+            hit = _consider(best)
+            if hit: return hit
+        # Tier 5: nombre compacto en key compacto (reverso, el más largo gana)
+        best, best_len = None, 0
+        for k_norm, k_compact, v, ckg in candidatos:
+            if k_compact and nombre_compact in k_compact and len(nombre_compact) > best_len:
+                r = _extract(v, ckg)
+                if r[2] > 0:
+                    best, best_len = r, len(k_compact)
+        if best:
+            hit = _consider(best)
+            if hit: return hit
+        # Tier 6: nombre en key (básico)
+        for k_norm, k_compact, v, ckg in candidatos:
+            if nombre_norm in k_norm:
+                hit = _consider(_extract(v, ckg))
+                if hit: return hit
+
+        return _fallback  # FOB=0 fallback (mejor que nada)
+
+    return _try_tiers() or (0.0, 0.0, 0.0)
+
+
+def calcular_resultado_periodo_por_fila(df_tn, fecha_desde, fecha_hasta, tipo_cambio,
+                                        pct_iva, pauta, costos_gs=None, gastos_fijos_dict=None):
+    """resultado.calcular_resultado_periodo con costo y margen % por apply,
+    fila por fila (costos.costo_final_row)."""
+    if costos_gs is None:
+        costos_gs = {}
+    gastos = _gastos_fijos(fecha_desde, fecha_hasta, gastos_fijos_dict or {})
+    if df_tn is None or df_tn.empty:
+        return _vacio(pauta, gastos)
+
+    df_calc = df_tn.copy()
+    df_calc["Neto cobrado ($)"] = df_calc["Total ($)"] - df_calc["Comision PN ($)"]
+    df_calc["Costo Productos ($)"] = df_calc.apply(
+        lambda r: costo_final_row(r, tipo_cambio, costos_gs), axis=1
+    )
+    df_calc["Margen ($)"] = (
+        df_calc["Neto cobrado ($)"] - df_calc["Costo Productos ($)"] - df_calc["Envio costo ($)"]
+    )
+    df_calc["Margen (%)"] = df_calc.apply(
+        lambda r: round((r["Margen ($)"] / r["Total ($)"] * 100) if r["Total ($)"] > 0 else 0, 2),
+        axis=1,
+    )
+    return _agregados(df_calc, pct_iva, pauta, gastos)
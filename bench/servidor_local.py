@@ -0,0 +1,546 @@
+"""
+servidor_local — stand-in HTTP de las APIs externas del dashboard para
+benchmarks y pruebas de carga offline (sin credenciales).
+
+Rutas (el primer segmento elige la API; cada una con el shape que consume
+app.py):
+  /v1/<store>/orders        TN: paginado page/per_page, x-total-count, fields,
+  /v1/<store>/transactions      created_at_min/max. Una transaccion Pago Nube
+  /v1/<store>/products          por orden; catalogo de `total_productos`.
+  /mp/v1/payments/search    MP: offset/limit, paging.total, begin/end_date.
+  /meta/<v>/act_<id>/insights   Meta: level account/campaign, breakdowns
+  /meta/<v>/<catalogo>/products    product_id y age,gender; paginado por cursor
+                                   (paging.next absoluto, vuelve al server).
+  /bluelytics/v2/latest, /bluelytics/v2/evolution.json, /dolarapi/v1/dolares/blue
+
+Las ordenes van en orden de fecha desde `inicio`, `ordenes_por_dia` por dia,
+y se generan al vuelo: 50k ordenes no ocupan memoria. `latencia_conexion`
+simula el handshake (TCP+TLS) una vez por conexion nueva; `latencia_request`
+(+ `latencia_jitter` aleatorio) el tiempo de respuesta por request.
+
+429: `cada_429=N` devuelve 429 con Retry-After cada N requests (cualquier
+API); `bucket_tn=(capacidad, tasa)` simula el leaky bucket de TN con los
+headers x-rate-limit-* y 429 cuando se vacia.
+
+Record/replay: con `grabaciones=<dir>` cada request busca primero una
+respuesta grabada (clave: metodo + path + query sin tokens). Si no esta y la
+API tiene `origenes[api]` (p. ej. {"tn": "https://api.tiendanube.com"}), el
+request se reenvia a la API real con los mismos headers y la respuesta se
+graba; sin origen, se sirve la sintetica. Grabar una vez con credenciales y
+reproducir despues sin red.
+
+Uso programatico:
+    srv = levantar(total_ordenes=5000)
+    tn_client.BASE = srv.base
+    ...
+    srv.shutdown()
+
+Dashboard contra el stand-in (todas las APIs salvo GA4 y Anthropic):
+    python -m bench.servidor_local --ordenes 50000 --puerto 8765 --latencia-request 0.15
+    # .streamlit/secrets.toml: STANDIN_URL = "http://127.0.0.1:8765"
+    # (TN_TOKEN, MP_ACCESS_TOKEN, META_TOKEN, META_AD_ACCOUNT_ID con cualquier valor)
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_PRODUCTOS = ["Anbernic RG 35XX Pro 64GB", "Miyoo Mini Plus", "Trimui Brick",
+              "Powkiddy RGB20S", "R36S Dual", "Anbernic RG 406H"]
+_METODOS = [("credit_card", 1), ("credit_card", 3), ("credit_card", 6),
+            ("debit_card", 1), ("bank_transfer", 1)]
+_GATEWAYS = ["pago-nube", "mercadopago", "offline"]
+_CAMPANAS = ["Advantage+ Catálogo", "Retro handhelds", "Remarketing 30d", "Hot Sale"]
+_EDADES = ["18-24", "25-34", "35-44", "45-54", "55-64", "65+"]
+INICIO = date(2024, 1, 1)
+
+# Segmentos de query que no entran en la clave de una grabacion (credenciales)
+_SIN_CLAVE = {"access_token", "key"}
+# Headers que no se reenvian al origen ni se reproducen
+_HOP = {"host", "connection", "content-length", "accept-encoding", "transfer-encoding",
+        "keep-alive", "content-encoding"}
+
+
+def orden_sintetica(i, ordenes_por_dia=20, rng=None, inicio=INICIO):
+    """Orden TN sintetica con los campos que lee procesar_orders (+ ruido
+    tipico del payload real: customer, direcciones)."""
+    rng = rng or random.Random(i)
+    dia = inicio + timedelta(days=i // ordenes_por_dia)
+    metodo, cuotas = rng.choice(_METODOS)
+    prods = [{
+        "name": {"es": rng.choice(_PRODUCTOS)},
+        "quantity": rng.randint(1, 3),
+        "price": str(rng.randint(60, 400) * 1000),
+        "cost": str(rng.randint(30, 200) * 1000),
+        "product_id": rng.randint(1, 10**8), "variant_id": rng.randint(1, 10**8),
+        "sku": f"SKU-{rng.randint(1, 9999)}", "weight": "0.500",
+        "image": {"id": rng.randint(1, 10**8), "src": "https://cdn.example/img/" + "x" * 60,
+                  "alt": [], "position": 1},
+    } for _ in range(rng.randint(1, 3))]
+    return {
+        "id": 1_000_000 + i,
+        "number": 10_000 + i,
+        "created_at": f"{dia.isoformat()}T1{i % 10}:30:00-0300",
+        "updated_at": f"{dia.isoformat()}T1{i % 10}:45:00-0300",
+        "payment_status": "paid",
+        "contact_name": f"Cliente {i}",
+        "gateway": rng.choice(_GATEWAYS),
+        "payment_details": {"method": metodo, "installments": cuotas},
+        "total": str(sum(int(p["price"]) * p["quantity"] for p in prods)),
+        "discount": "0.00",
+        "shipping_cost_owner": str(rng.choice([0, 5000, 8000])),
+        "billing_province": rng.choice(["Buenos Aires", "Córdoba", "Santa Fe"]),
+        "billing_city": "Ciudad",
+        "shipping_status": "shipped",
+        "status": "closed",
+        "app_id": None,
+        "products": prods,
+        "customer": {"id": i, "name": f"Cliente {i}", "email": f"c{i}@mail.com",
+                     "note": "", "default_address": {"address": "Calle 123"}},
+        "shipping_address": {"city": "Ciudad", "address": "Calle 123", "number": "1",
+                             "province": "Buenos Aires", "zipcode": "1000", "phone": "+541100000000"},
+        "billing_address": "Calle 123", "billing_number": "1", "billing_zipcode": "1000",
+        "client_details": {"browser_ip": "10.0.0.1", "user_agent": "Mozilla/5.0 " + "x" * 80},
+        "note": "", "owner_note": None, "token": "t" * 40, "currency": "ARS",
+        "landing_url": "https://www.marketgamer.com.ar/?utm_source=" + "x" * 40,
+    }
+
+
+def transaccion_sintetica(i, ordenes_por_dia=20, inicio=INICIO):
+    """Transaccion Pago Nube de la orden i (mismo monto y dia)."""
+    o = orden_sintetica(i, ordenes_por_dia, inicio=inicio)
+    monto = float(o["total"])
+    fee = round(monto * 0.0539, 2)
+    return {
+        "id": f"tx-{i}", "order_id": o["id"], "created_at": o["created_at"],
+        "status": "paid", "payment_method": o["payment_details"]["method"],
+        "installments": o["payment_details"]["installments"],
+        "amount": {"value": f"{monto:.2f}", "currency": "ARS"},
+        "fee_amount": {"value": f"{fee:.2f}", "currency": "ARS"},
+        "net_amount": {"value": f"{monto - fee:.2f}", "currency": "ARS"},
+        "events": [{"type": "authorized", "happened_at": o["created_at"]}] * 3,
+    }
+
+
+def producto_sintetico(i):
+    """Producto TN con variantes (stock, precio, sku) y el ruido del payload."""
+    rng = random.Random(10**6 + i)
+    nombre = f"{_PRODUCTOS[i % len(_PRODUCTOS)]} #{i}"
+    return {
+        "id": 200_000 + i,
+        "name": {"es": nombre},
+        "handle": {"es": nombre.lower().replace(" ", "-").replace("#", "")},
+        "permalink": f"https://www.marketgamer.com.ar/productos/p{i}/",
+        "canonical_url": f"https://www.marketgamer.com.ar/productos/p{i}/",
+        "description": {"es": "<p>" + "lorem ipsum " * 40 + "</p>"},
+        "variants": [{
+            "id": 300_000 + i * 10 + v, "sku": f"SKU-{i}-{v}",
+            "stock": rng.randint(0, 40), "price": str(rng.randint(60, 400) * 1000),
+            "weight": "0.500", "values": [{"es": c}],
+        } for v, c in enumerate(rng.sample(["Negro", "Blanco", "Gris", "Azul"], rng.randint(1, 3)))],
+        "images": [{"id": rng.randint(1, 10**8), "src": "https://cdn.example/img/" + "x" * 60}],
+        "tags": "retro,handheld", "published": True,
+    }
+
+
+def pago_mp_sintetico(i, ordenes_por_dia=20, inicio=INICIO):
+    """Pago MP aprobado con el monto y el dia de la orden i (matchea en
+    match_mp_with_tn)."""
+    o = orden_sintetica(i, ordenes_por_dia, inicio=inicio)
+    monto = float(o["total"])
+    fee = round(monto * 0.0629, 2)
+    tipo = o["payment_details"]["method"]
+    return {
+        "id": 150_000_000_000 + i, "status": "approved",
+        "date_approved": o["created_at"][:19] + ".000-03:00",
+        "transaction_amount": monto, "installments": o["payment_details"]["installments"],
+        "payment_type_id": tipo, "payment_method_id": "visa" if tipo != "bank_transfer" else "cvu",
+        "description": o["products"][0]["name"]["es"], "statement_descriptor": "MARKETGAMER",
+        "fee_details": [{"type": "mercadopago_fee", "amount": fee, "fee_payer": "collector"}],
+        "charges_details": [], "taxes_amount": 0,
+        "transaction_details": {"net_received_amount": round(monto - fee, 2),
+                                "total_paid_amount": monto},
+        "payer": {"identification": {"type": "DNI", "number": str(20_000_000 + i)}},
+        "additional_info": {"items": [{"title": p["name"]["es"]} for p in o["products"]]},
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        # Una vez por conexion TCP: simula el handshake que el keep-alive ahorra.
+        if self.server.latencia_conexion:
+            time.sleep(self.server.latencia_conexion)
+        with self.server.lock:
+            self.server.conexiones += 1
+        super().setup()
+
+    def log_message(self, *args):
+        pass
+
+    # ── Entrada ────────────────────────────────────────────────────────────
+    def do_GET(self):
+        self._atender("GET")
+
+    def do_PUT(self):
+        self._atender("PUT")
+
+    def do_POST(self):
+        self._atender("POST")
+
+    def _atender(self, method):
+        u = urllib.parse.urlsplit(self.path)
+        partes = [p for p in u.path.split("/") if p]
+        api = partes[0] if partes and partes[0] in _APIS else "tn"
+        q = dict(urllib.parse.parse_qsl(u.query))
+        largo = int(self.headers.get("Content-Length") or 0)
+        cuerpo = self.rfile.read(largo) if largo else b""
+        with self.server.lock:
+            self.server.requests += 1
+            n = self.server.requests
+            self.server.por_api[api] = self.server.por_api.get(api, 0) + 1
+            if method != "GET":
+                self.server.escrituras += 1
+        s = self.server
+        if s.latencia_request or s.latencia_jitter:
+            time.sleep(s.latencia_request + random.random() * s.latencia_jitter)
+        if s.cada_429 and n % s.cada_429 == 0:
+            return self._json(429, {"description": "Too Many Requests"},
+                              {"Retry-After": str(s.retry_after)})
+        extra = {}
+        if api == "tn" and s.bucket_tn:
+            restantes = s.bucket_tn.tomar()
+            extra = {"x-rate-limit-limit": str(int(s.bucket_tn.capacidad)),
+                     "x-rate-limit-remaining": str(max(0, int(restantes))),
+                     "x-rate-limit-reset": str(int(s.bucket_tn.reset_ms()))}
+            if restantes < 0:
+                return self._json(429, {"description": "Too Many Requests"}, extra)
+        if s.grabaciones and self._replay(api, method, u, q, cuerpo):
+            return
+        if api == "tn":
+            if method == "GET":
+                return self._tn(partes, q, extra)
+            return self._tn_escritura(partes, cuerpo, extra)
+        if method != "GET":
+            return self._json(405, {"error": "method not allowed"})
+        getattr(self, "_" + api)(partes[1:], q)
+
+    # ── Record / replay ────────────────────────────────────────────────────
+    def _clave(self, method, u, q):
+        query = sorted((k, v) for k, v in q.items() if k not in _SIN_CLAVE)
+        base = f"{method} {u.path} {urllib.parse.urlencode(query)}"
+        return hashlib.sha1(base.encode("utf-8")).hexdigest()[:20]
+
+    def _replay(self, api, method, u, q, cuerpo):
+        """Sirve una respuesta grabada (o la graba desde el origen). True si
+        respondio."""
+        ruta = os.path.join(self.server.grabaciones, api, self._clave(method, u, q) + ".json")
+        if os.path.exists(ruta):
+            with open(ruta, encoding="utf-8") as f:
+                g = json.load(f)
+            with self.server.lock:
+                self.server.replays += 1
+            self._enviar(g["status"], g["body"].encode("utf-8"), g.get("headers"))
+            return True
+        origen = self.server.origenes.get(api)
+        if not origen:
+            return False
+        path = u.path if api == "tn" else u.path[len(api) + 1:]
+        url = origen.rstrip("/") + path + (f"?{u.query}" if u.query else "")
+        hdrs = {k: v for k, v in self.headers.items() if k.lower() not in _HOP}
+        req = urllib.request.Request(url, data=cuerpo or None, headers=hdrs, method=method)
+        try:
+            with urllib.request.urlopen(req, timeout=60) as r:
+                status, r_hdrs, texto = r.status, dict(r.headers), r.read().decode("utf-8")
+        except urllib.error.HTTPError as e:
+            status, r_hdrs, texto = e.code, dict(e.headers), e.read().decode("utf-8", "replace")
+        r_hdrs = {k: v for k, v in r_hdrs.items() if k.lower() not in _HOP}
+        if status < 500 and status != 429:
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            with open(ruta, "w", encoding="utf-8") as f:
+                json.dump({"url": url.split("?")[0], "status": status,
+                           "headers": r_hdrs, "body": texto}, f, ensure_ascii=False)
+            with self.server.lock:
+                self.server.grabadas += 1
+        self._enviar(status, texto.encode("utf-8"), r_hdrs)
+        return True
+
+    # ── Tienda Nube ────────────────────────────────────────────────────────
+    def _tn(self, partes, q, extra):
+        recurso = partes[-1] if partes else ""
+        s = self.server
+        if recurso == "products":
+            primero, ultimo = 0, s.total_productos
+            gen = producto_sintetico
+        elif recurso in ("orders", "transactions"):
+            primero, ultimo = self._rango(q)
+            fn = s.orden if recurso == "orders" else transaccion_sintetica
+
+            def gen(i):
+                return fn(i, s.ordenes_por_dia, inicio=s.inicio)
+        else:
+            return self._json(404, {"description": "Not Found"}, extra)
+        per_page = int(q.get("per_page", 30))
+        page = int(q.get("page", 1))
+        total = max(0, ultimo - primero)
+        desde = primero + (page - 1) * per_page
+        filas = [gen(i) for i in range(desde, min(desde + per_page, ultimo))]
+        if not filas:
+            return self._json(404, {"description": "Last page is 0"}, extra)
+        if q.get("fields"):
+            # Como TN: `fields` filtra solo el primer nivel
+            campos = set(q["fields"].split(","))
+            filas = [{k: v for k, v in f.items() if k in campos} for f in filas]
+        self._json(200, filas, {"x-total-count": str(total), **extra})
+
+    def _tn_escritura(self, partes, cuerpo, extra):
+        # products/{id} y products/{id}/variants/{id}: devuelve el body aplicado
+        if "products" not in partes:
+            return self._json(404, {"description": "Not Found"}, extra)
+        data = json.loads(cuerpo or b"{}")
+        self._json(200, {"id": int(partes[-1]) if partes[-1].isdigit() else None, **data}, extra)
+
+    def _rango(self, q, desde_k="created_at_min", hasta_k="created_at_max"):
+        """[primero, ultimo) de indices de orden dentro de created_at_min/max."""
+        opd, inicio = self.server.ordenes_por_dia, self.server.inicio
+        primero, ultimo = 0, self.server.total_ordenes
+        if q.get(desde_k):
+            d = date.fromisoformat(q[desde_k][:10])
+            primero = max(primero, (d - inicio).days * opd)
+        if q.get(hasta_k):
+            d = date.fromisoformat(q[hasta_k][:10])
+            ultimo = min(ultimo, ((d - inicio).days + 1) * opd)
+        return primero, max(primero, ultimo)
+
+    # ── Mercado Pago ───────────────────────────────────────────────────────
+    def _mp(self, partes, q):
+        if partes[-2:] != ["payments", "search"]:
+            return self._json(404, {"message": "not_found", "status": 404})
+        s = self.server
+        primero, ultimo = self._rango(q, "begin_date", "end_date")
+        limit = min(int(q.get("limit", 30)), 1000)
+        offset = int(q.get("offset", 0))
+        desde = primero + offset
+        res = [pago_mp_sintetico(i, s.ordenes_por_dia, s.inicio)
+               for i in range(desde, min(desde + limit, ultimo))]
+        self._json(200, {"paging": {"total": ultimo - primero, "limit": limit, "offset": offset},
+                         "results": res})
+
+    # ── Meta ───────────────────────────────────────────────────────────────
+    def _meta(self, partes, q):
+        s = self.server
+        if len(partes) < 3:
+            return self._json(404, {"error": {"message": "Unknown path"}})
+        if partes[-1] == "products" and not partes[-2].startswith("act_"):
+            filas = [{"id": str(500_000 + i), "retailer_id": f"SKU-{i}-0",
+                      "name": producto_sintetico(i)["name"]["es"]}
+                     for i in range(s.total_productos)]
+            return self._paginar_meta(filas, q)
+        if partes[-1] != "insights":
+            return self._json(404, {"error": {"message": "Unknown path"}})
+        rango = json.loads(q.get("time_range") or "{}")
+        try:
+            dias = (date.fromisoformat(rango["until"]) - date.fromisoformat(rango["since"])).days + 1
+        except (KeyError, ValueError):
+            dias = 30
+        rng = random.Random(dias)
+        base = {"account_currency": "ARS", "date_start": rango.get("since"),
+                "date_stop": rango.get("until")}
+        breakdowns = q.get("breakdowns", "")
+        if breakdowns == "product_id":
+            filas = [{**base, "product_id": str(500_000 + i),
+                      "spend": f"{rng.uniform(100, 5000) * dias / 30:.2f}",
+                      "impressions": str(rng.randint(100, 20000))}
+                     for i in range(s.total_productos)]
+        elif breakdowns == "age,gender":
+            filas = [{**base, "age": a, "gender": g,
+                      "spend": f"{rng.uniform(1000, 80000):.2f}",
+                      "impressions": str(rng.randint(1000, 90000)),
+                      "clicks": str(rng.randint(10, 900)),
+                      "actions": [{"action_type": "omni_purchase", "value": str(rng.randint(0, 20))}],
+                      "action_values": [{"action_type": "omni_purchase",
+                                         "value": str(rng.randint(0, 20) * 150000)}]}
+                     for a in _EDADES for g in ("male", "female", "unknown")]
+        elif q.get("level") == "campaign":
+            filas = [{**base, "campaign_id": str(120_000 + i), "campaign_name": c,
+                      "spend": f"{rng.uniform(5000, 200000):.2f}",
+                      "impressions": str(rng.randint(1000, 300000))}
+                     for i, c in enumerate(_CAMPANAS)]
+        else:
+            filas = [{**base, "spend": f"{rng.uniform(20000, 60000) * dias:.2f}"}]
+        self._paginar_meta(filas, q)
+
+    def _paginar_meta(self, filas, q):
+        """Paginado por cursor como Graph API: paging.next es una URL absoluta
+        que vuelve a este server con `after`."""
+        limit = int(q.get("limit", 25))
+        desde = int(q.get("after", 0))
+        data = {"data": filas[desde:desde + limit]}
+        if desde + limit < len(filas):
+            sig = urllib.parse.urlencode({**q, "after": desde + limit})
+            ruta = urllib.parse.urlsplit(self.path).path
+            data["paging"] = {"cursors": {"after": str(desde + limit)},
+                              "next": f"http://{self.headers['Host']}{ruta}?{sig}"}
+        self._json(200, data)
+
+    # ── Cotizaciones ───────────────────────────────────────────────────────
+    def _bluelytics(self, partes, q):
+        if partes[-1] == "latest":
+            return self._json(200, {
+                "oficial": {"value_avg": 1000.0, "value_sell": 1020.0, "value_buy": 980.0},
+                "blue": {"value_avg": 1220.0, "value_sell": 1240.0, "value_buy": 1200.0},
+                "last_update": f"{date.today().isoformat()}T12:00:00-03:00"})
+        if partes[-1] == "evolution.json":
+            hoy = date.today()
+            serie = []
+            for d in range(self.server.dias_blue):
+                f = hoy - timedelta(days=d)
+                if f.weekday() >= 5:
+                    continue
+                v = round(1240.0 - d * 0.4, 2)
+                serie.append({"date": f.isoformat(), "source": "Blue",
+                              "value_sell": v, "value_buy": v - 40})
+                serie.append({"date": f.isoformat(), "source": "Oficial",
+                              "value_sell": v - 220, "value_buy": v - 260})
+            return self._json(200, serie)
+        self._json(404, {"error": "not found"})
+
+    def _dolarapi(self, partes, q):
+        if partes[-2:] != ["dolares", "blue"]:
+            return self._json(404, {"error": "not found"})
+        self._json(200, {"moneda": "USD", "casa": "blue", "compra": 1200, "venta": 1240,
+                         "fechaActualizacion": f"{date.today().isoformat()}T12:00:00.000Z"})
+
+    # ── Salida ─────────────────────────────────────────────────────────────
+    def _json(self, status, data, extra=None):
+        self._enviar(status, json.dumps(data).encode("utf-8"),
+                     {"Content-Type": "application/json", **(extra or {})})
+
+    def _enviar(self, status, cuerpo, headers=None):
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+        with self.server.lock:
+            self.server.bytes_enviados += len(cuerpo)
+
+
+_APIS = {"mp", "meta", "bluelytics", "dolarapi"}
+
+
+class _BucketTN:
+    """Leaky bucket como el de TN: `capacidad` requests, se vacia a `tasa`/s."""
+
+    def __init__(self, capacidad=40, tasa=2.0):
+        self.capacidad, self.tasa = float(capacidad), float(tasa)
+        self.tokens = self.capacidad
+        self.t = time.monotonic()
+        self.lock = threading.Lock()
+
+    def tomar(self):
+        """Consume un token; devuelve los restantes (negativo = 429)."""
+        with self.lock:
+            ahora = time.monotonic()
+            self.tokens = min(self.capacidad, self.tokens + (ahora - self.t) * self.tasa)
+            self.t = ahora
+            if self.tokens < 1:
+                return -1
+            self.tokens -= 1
+            return self.tokens
+
+    def reset_ms(self):
+        return (self.capacidad - self.tokens) / self.tasa * 1000
+
+
+def levantar(total_ordenes=1000, latencia_conexion=0.0, latencia_request=0.0,
+             ordenes_por_dia=20, store_id="6623036", total_productos=300,
+             inicio=INICIO, latencia_jitter=0.0, cada_429=0, retry_after=1,
+             bucket_tn=None, grabaciones=None, origenes=None, puerto=0, dias_blue=400):
+    """Arranca el server en 127.0.0.1 (`puerto` 0 = libre) en un hilo daemon.
+    Devuelve el server con `.base` listo para asignar a tn_client.BASE,
+    `.url` (raiz, la de STANDIN_URL) y `.bases` por API."""
+    srv = ThreadingHTTPServer(("127.0.0.1", puerto), _Handler)
+    srv.daemon_threads = True
+    srv.lock = threading.Lock()
+    srv.total_ordenes = total_ordenes
+    srv.total_productos = total_productos
+    srv.ordenes_por_dia = ordenes_por_dia
+    srv.inicio = inicio
+    srv.dias_blue = dias_blue
+    srv.latencia_conexion = latencia_conexion
+    srv.latencia_request = latencia_request
+    srv.latencia_jitter = latencia_jitter
+    srv.cada_429 = cada_429
+    srv.retry_after = retry_after
+    srv.bucket_tn = _BucketTN(*bucket_tn) if bucket_tn else None
+    srv.grabaciones = grabaciones
+    srv.origenes = origenes or {}
+    srv.conexiones = 0
+    srv.requests = 0
+    srv.por_api = {}
+    srv.bytes_enviados = 0
+    srv.escrituras = 0
+    srv.replays = 0
+    srv.grabadas = 0
+    srv.orden = orden_sintetica
+    srv.url = f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.base = f"{srv.url}/v1/{store_id}"
+    srv.bases = {"tn": srv.base, **{api: f"{srv.url}/{api}" for api in sorted(_APIS)}}
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Stand-in local de TN / MP / Meta / Bluelytics")
+    ap.add_argument("--puerto", type=int, default=8765)
+    ap.add_argument("--ordenes", type=int, default=50_000)
+    ap.add_argument("--ordenes-por-dia", type=int, default=20)
+    ap.add_argument("--productos", type=int, default=300)
+    ap.add_argument("--latencia-request", type=float, default=0.0)
+    ap.add_argument("--latencia-jitter", type=float, default=0.0)
+    ap.add_argument("--latencia-conexion", type=float, default=0.0)
+    ap.add_argument("--cada-429", type=int, default=0, help="429 cada N requests (0 = nunca)")
+    ap.add_argument("--retry-after", type=int, default=1)
+    ap.add_argument("--bucket-tn", action="store_true", help="leaky bucket de TN (40, 2/s)")
+    ap.add_argument("--grabaciones", help="directorio de respuestas grabadas (replay)")
+    ap.add_argument("--grabar", action="store_true",
+                    help="con --grabaciones: lo que falte se pide a la API real y se graba")
+    a = ap.parse_args()
+
+    # La ultima orden cae hoy: los rangos por defecto del dashboard traen datos
+    dias = -(-a.ordenes // a.ordenes_por_dia)
+    origenes = {"tn": "https://api.tiendanube.com", "mp": "https://api.mercadopago.com",
+                "meta": "https://graph.facebook.com", "bluelytics": "https://api.bluelytics.com.ar",
+                "dolarapi": "https://dolarapi.com"} if a.grabar else None
+    srv = levantar(total_ordenes=a.ordenes, ordenes_por_dia=a.ordenes_por_dia,
+                   total_productos=a.productos, inicio=date.today() - timedelta(days=dias - 1),
+                   latencia_request=a.latencia_request, latencia_jitter=a.latencia_jitter,
+                   latencia_conexion=a.latencia_conexion, cada_429=a.cada_429,
+                   retry_after=a.retry_after, bucket_tn=(40, 2.0) if a.bucket_tn else None,
+                   grabaciones=a.grabaciones, origenes=origenes, puerto=a.puerto)
+    print(f"stand-in en {srv.url} · {a.ordenes} ordenes desde {srv.inicio} · "
+          f"{a.productos} productos")
+    print(f'secrets.toml: STANDIN_URL = "{srv.url}"')
+    try:
+        while True:
+            time.sleep(30)
+            print(f"requests {srv.requests} {srv.por_api} · {srv.bytes_enviados / 1e6:.1f} MB"
+                  + (f" · replays {srv.replays} grabadas {srv.grabadas}" if a.grabaciones else ""))
+    except KeyboardInterrupt:
+        srv.shutdown()
+
+
+if __name__ == "__main__":
+    main()
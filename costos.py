@@ -0,0 +1,487 @@
+"""
+costos.py — costo de producto (FOB, importación, total USD) por nombre.
+
+Sin Streamlit: solo stdlib (+ subcadenas). Testeable en aislamiento (patrón velocidad_restock).
+El nombre de un producto vendido (TN, con color / GB / variante) se resuelve
+contra CostosConsolas (Google Sheets) + FOB_DEFAULTS en seis niveles: exacto,
+compacto exacto, clave dentro del nombre, compacta dentro del compacto (la
+más larga gana), nombre compacto dentro de la clave y nombre dentro de la
+clave.
+
+CostResolver precompila eso una vez por versión de CostosConsolas: claves ya
+normalizadas, hash maps para los niveles 1-2, índices de subcadenas
+(Aho-Corasick y contenedoras, subcadenas.py) para los 3-6, resultados de
+_extract ya calculados y un memo nombre → resultado. resolver_costos() lo cachea por
+identidad del dict y, si es otro dict con el mismo contenido (cada gs_read
+devuelve uno nuevo), por huella del contenido. invalidar_costos() descarta
+todo: lo llama gs_write al guardar CostosConsolas (hay ediciones in-place).
+
+Guardar un FOB (o propagar_fob_variantes en unas pocas variantes) no tira
+todo lo resuelto: el resolver de la versión nueva hereda el memo del último
+usado salvo los nombres que alguna clave cambiada matchea (claves_cambiadas,
+afectados, heredar), y los Aho-Corasick, que dependen solo de la lista de
+claves, se reusan (_automatas). resultado.py usa lo mismo para parchear solo
+las filas afectadas de un P&L ya calculado.
+
+calcular_costo_total_orden_ars / costo_final_row dan el costo de una orden
+(string "Productos" con " / "); resultado.costo_productos_ars es la versión
+columnar que usa el P&L.
+
+Las versiones que arman y recorren los candidatos en cada llamada quedan
+como referencia en bench/referencias.py.
+"""
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from subcadenas import IndiceContenedoras, IndiceSubcadenas
+
+def _normalizar(s):
+    # Colapsar espacios y eliminar espacios entre letras/números del modelo
+    # ej: "RG 477M 12+256GB" → "rg477m 12+256gb"  (espacios dentro del modelo se quitan)
+    s = re.sub(r'\s+', ' ', str(s).strip().lower())
+    # Quitar espacios entre partes alfanuméricas del modelo (no entre modelo y variante)
+    s = re.sub(r'([a-z\d])\s+([a-z\d])', r'\1\2', s)
+    return s
+
+_NOISE_WORDS = ('almacenamiento', 'transparente', 'ram', 'negro', 'blanco',
+                'azul', 'rojo', 'naranja', 'verde', 'gris', 'violeta',
+                'purpura', 'rosa', 'dorado', 'plateado', 'amarillo',
+                'ndigo', 'indigo', 'silver', 'beige', 'metalico', 'celeste',
+                'turquesa', 'lila', 'cierre')
+
+def _norm_compact(s):
+    """Normalización agresiva: solo alfanumérico, sin colores ni 'GB/RAM/etc'.
+    Ej: 'ANBERNIC RG 477 V (12GB RAM + 256GB Almacenamiento)' → 'anbernicrg477v12256'
+        'Anbernic RG 477 V 12+256'                             → 'anbernicrg477v12256'
+    """
+    s = re.sub(r'[^a-z0-9]', '', str(s).lower())
+    s = s.replace('gb', '').replace('tb', '')
+    for w in _NOISE_WORDS:
+        s = s.replace(w, '')
+    return s
+
+FOB_DEFAULTS = {
+    "Anbernic RG 34XX 64GB":      {"fob_usd": 59.00,  "peso_kg": 0.3400},
+    "Anbernic RG 34XX SP 64GB":   {"fob_usd": 66.00,  "peso_kg": 0.3000},
+    "Anbernic RG 35XX Pro 64GB":  {"fob_usd": 49.00,  "peso_kg": 0.3450},
+    "Anbernic RG 35XX SP 64GB":   {"fob_usd": 49.00,  "peso_kg": 0.3300},
+    "Anbernic RG 406H":           {"fob_usd": 136.34, "peso_kg": 0.4652},
+    "Anbernic RG 406V":           {"fob_usd": 139.70, "peso_kg": 0.4900},
+    "Anbernic RG 40XX H 64GB":    {"fob_usd": 47.30,  "peso_kg": 0.3730},
+    "Anbernic RG 477M 128GB":     {"fob_usd": 284.00, "peso_kg": 0.6400},
+    "Anbernic RG 557 128GB":      {"fob_usd": 264.00, "peso_kg": 0.6070},
+    "Anbernic RG Cube 128GB":     {"fob_usd": 164.00, "peso_kg": 0.4630},
+    "Anbernic RG Cube XX 64GB":   {"fob_usd": 59.00,  "peso_kg": 0.4430},
+    "Anbernic RG P01 Blanco":     {"fob_usd": 12.70,  "peso_kg": 0.4300},
+    "Anbernic RG P01 Negro":      {"fob_usd": 12.70,  "peso_kg": 0.4300},
+    "Anbernic RG Slide 128GB":    {"fob_usd": 174.00, "peso_kg": 0.6500},
+    "Anbernic RG40XX H":          {"fob_usd": 50.60,  "peso_kg": 0.3600},
+    "Anbernic RG40XX V":          {"fob_usd": 48.40,  "peso_kg": 0.3700},
+    "Miyoo A30":                  {"fob_usd": 34.50,  "peso_kg": 0.2200},
+    "Miyoo Flip":                 {"fob_usd": 60.00,  "peso_kg": 0.2800},
+    "Miyoo Mini Plus":            {"fob_usd": 40.00,  "peso_kg": 0.2700},
+    "Powkiddy MAX3":              {"fob_usd": 48.00,  "peso_kg": 0.3800},
+    "Powkiddy MAX3 Pro":          {"fob_usd": 90.00,  "peso_kg": 0.5000},
+    "Powkiddy RGB10X":            {"fob_usd": 30.00,  "peso_kg": 0.3000},
+    "Powkiddy RGB20 Pro":         {"fob_usd": 45.00,  "peso_kg": 0.3800},
+    "Powkiddy RGB20S":            {"fob_usd": 32.00,  "peso_kg": 0.3500},
+    "Powkiddy RGB20SX":           {"fob_usd": 48.00,  "peso_kg": 0.3800},
+    "Powkiddy V10":               {"fob_usd": 28.00,  "peso_kg": 0.3000},
+    "Powkiddy V20 16GB":          {"fob_usd": 33.00,  "peso_kg": 0.3500},
+    "Powkiddy V90S 16GB":         {"fob_usd": 33.00,  "peso_kg": 0.3000},
+    "Powkiddy X35H 16GB":         {"fob_usd": 40.00,  "peso_kg": 0.3500},
+    "Powkiddy X35s":              {"fob_usd": 45.00,  "peso_kg": 0.3500},
+    "R36S Dual":                  {"fob_usd": 21.50,  "peso_kg": 0.3200},
+    "Trimui Brick":               {"fob_usd": 51.00,  "peso_kg": 0.3350},
+    "Trimui Brick Hammer":        {"fob_usd": 60.00,  "peso_kg": 0.4000},
+    "Trimui Smart":               {"fob_usd": 31.50,  "peso_kg": 0.1400},
+    "Trimui Smart Pro":           {"fob_usd": 54.00,  "peso_kg": 0.4050},
+}
+
+# Memo nombre → resultado por resolver (los nombres distintos son cientos;
+# el tope es por si llega basura)
+MAX_MEMO = 20_000
+# Resolvers vivos (uno por versión de CostosConsolas en uso)
+MAX_RESOLVERS = 8
+# Hasta cuántas claves cambiadas un resolver nuevo hereda el memo del
+# anterior (más que eso, re-resolver todo sale igual o más barato)
+MAX_CAMBIADAS = 16
+
+
+def _extract(v, ckg):
+    """(fob, import, total) USD de una entrada de costos; import por peso ×
+    costo/kg si no está cargado, total = fob + import si no está cargado."""
+    if not isinstance(v, dict):
+        return (0.0, 0.0, 0.0)
+    fob = float(v.get("fob_usd", 0) or 0)
+    peso = float(v.get("peso_kg", 0) or 0)
+    imp = float(v.get("costo_import_usd", 0) or 0)
+    ct = float(v.get("costo_total_usd", 0) or 0)
+    if imp <= 0:
+        imp = round(peso * ckg, 2)
+    if ct <= 0:
+        ct = fob + imp
+    return (fob, imp, ct)
+
+
+@lru_cache(maxsize=MAX_MEMO)
+def _normas(s):
+    """(normalizado, compacto) de una clave o un nombre: no depende de la tabla."""
+    return (_normalizar(s), _norm_compact(s))
+
+
+_LOCK_AUTOMATAS = threading.Lock()
+_AUTOMATAS = OrderedDict()   # claves (en orden) → (IndiceSubcadenas norm, compacto)
+
+
+def _automatas(claves):
+    """Aho-Corasick de las claves normalizadas y compactas (niveles 3 y 4).
+    Dependen solo de qué claves hay y en qué orden, no de sus valores: una
+    edición de FOB / peso / total reusa los de la versión anterior."""
+    clave = tuple(claves)
+    with _LOCK_AUTOMATAS:
+        a = _AUTOMATAS.get(clave)
+        if a is not None:
+            _AUTOMATAS.move_to_end(clave)
+            return a
+    a = (IndiceSubcadenas([c[0] for c in claves]), IndiceSubcadenas([c[1] for c in claves]))
+    with _LOCK_AUTOMATAS:
+        _AUTOMATAS[clave] = a
+        if len(_AUTOMATAS) > MAX_RESOLVERS:
+            _AUTOMATAS.popitem(last=False)
+    return a
+
+
+def _contenidas(automata, texto, pos):
+    """Posiciones (ascendentes) en una lista de candidatos de las claves
+    contenidas en texto; pos: posición en la planilla → en la lista (-1 si
+    no está)."""
+    return sorted(p for j in automata.contenidas(texto) if (p := pos[j]) >= 0)
+
+
+class CostResolver:
+    """Índice de costos precompilado para un CostosConsolas dado. Resuelve
+    igual que las versiones lineales de bench/referencias.py (mismos
+    niveles, mismo orden de candidatos, mismos desempates)."""
+
+    def __init__(self, costos_gs=None):
+        costos_gs = costos_gs or {}
+        ckg_default = float(costos_gs.get("_costo_kg_usd", 65.0) or 65.0) if costos_gs else 65.0
+
+        # Las claves en orden de planilla y después los defaults: sobre esa
+        # lista están los Aho-Corasick (compartidos entre versiones);
+        # _fob / _ent son subconjunto / permutación, con su mapa de posiciones
+        entradas = [(k, v, ckg_default) for k, v in costos_gs.items()
+                    if not k.startswith("_") and isinstance(v, dict)]
+        planilla = len(entradas)
+        entradas += [(k, v, 65.0) for k, v in FOB_DEFAULTS.items()]
+        claves = [_normas(k) for k, _, _ in entradas]
+        self._en_nombre, self._en_compacto = _automatas(claves)
+
+        # get_fob_usd: entradas con FOB > 0 de la planilla, después los defaults
+        fob, self._pos_fob = [], [-1] * len(entradas)
+        for j, (_, v, _) in enumerate(entradas):
+            f = float(v.get("fob_usd", 0) or 0)
+            if f > 0 or j >= planilla:
+                self._pos_fob[j] = len(fob)
+                fob.append((*claves[j], f))
+        self._fob = fob
+        self._fob_exacto, self._fob_compacto = {}, {}
+        for k_norm, k_compact, f in fob:
+            self._fob_exacto.setdefault(k_norm, f)
+            if k_compact:
+                self._fob_compacto.setdefault(k_compact, f)
+        self._fob_cont = (IndiceContenedoras([c[1] for c in fob]),
+                          IndiceContenedoras([c[0] for c in fob]))
+
+        # _match_costo_entry: todas las entradas, las de FOB > 0 primero
+        # (sort estable), con el (fob, import, total) ya calculado
+        orden = sorted(range(len(entradas)),
+                       key=lambda j: -(float(entradas[j][1].get("fob_usd", 0) or 0)))
+        self._ent, self._pos_ent = [], [0] * len(entradas)
+        for i, j in enumerate(orden):
+            _, v, ckg = entradas[j]
+            self._pos_ent[j] = i
+            self._ent.append((*claves[j], _extract(v, ckg)))
+        self._ent_exacto, self._ent_compacto = {}, {}
+        for k_norm, k_compact, r in self._ent:
+            self._ent_exacto.setdefault(k_norm, []).append(r)
+            if k_compact:
+                self._ent_compacto.setdefault(k_compact, []).append(r)
+        self._ent_cont = (IndiceContenedoras([c[1] for c in self._ent]),
+                          IndiceContenedoras([c[0] for c in self._ent]))
+
+        # Lo derivado de cada clave de la planilla, en orden: para ver qué
+        # claves cambiaron entre dos versiones (claves_cambiadas)
+        self._derivados = {k: self._ent[self._pos_ent[j]][2]
+                           for j, (k, _, _) in enumerate(entradas[:planilla])}
+
+        self._memo_fob, self._memo_ent = {}, {}
+
+    def fob(self, nombre_prod):
+        """FOB USD del producto (0.0 si no matchea)."""
+        r = self._memo_fob.get(nombre_prod)
+        if r is None:
+            r = self._resolver_fob(nombre_prod)
+            if len(self._memo_fob) >= MAX_MEMO:
+                self._memo_fob.clear()
+            self._memo_fob[nombre_prod] = r
+        return r
+
+    def entrada(self, nombre_prod):
+        """(fob_usd, import_usd, total_usd) de la MEJOR entrada. FOB, import
+        y total vienen de la MISMA entrada."""
+        r = self._memo_ent.get(nombre_prod)
+        if r is None:
+            r = self._resolver_entrada(nombre_prod)
+            if len(self._memo_ent) >= MAX_MEMO:
+                self._memo_ent.clear()
+            self._memo_ent[nombre_prod] = r
+        return r
+
+    def total(self, nombre_prod):
+        """Costo total USD (FOB + import)."""
+        return self.entrada(nombre_prod)[2]
+
+    def claves_cambiadas(self, otro):
+        """Claves de la planilla cuyo (fob, import, total) difiere entre self
+        y otro (incluye altas y bajas), o None si cambió el orden relativo de
+        las demás (desempates distintos: no se puede acotar)."""
+        a, b = self._derivados, otro._derivados
+        cambiadas = {k for k in a.keys() | b.keys() if a.get(k) != b.get(k)}
+        if [k for k in a if k not in cambiadas] != [k for k in b if k not in cambiadas]:
+            return None
+        return cambiadas
+
+    def afectados(self, nombres, cambiadas):
+        """Nombres cuya resolución puede depender de alguna clave de
+        cambiadas: la clave matchea al nombre en algún nivel (exacto, clave en
+        nombre o nombre en clave, básico o compacto). Los niveles solo miran
+        claves que matchean, y las demás conservan valor y orden relativo
+        (claves_cambiadas), así que el resto resuelve igual."""
+        claves = [_normas(k) for k in cambiadas]
+        out = set()
+        for nombre in nombres:
+            nn, nc = _normas(nombre)
+            for kn, kc in claves:
+                if (kn in nn or nn in kn or (kc and kc in nc)
+                        or (nc and nc in kc)):
+                    out.add(nombre)
+                    break
+        return out
+
+    def heredar(self, anterior):
+        """Copia el memo de otro resolver (la versión anterior de la tabla)
+        salvo los nombres que tocan las claves cambiadas. Devuelve cuántos
+        nombres heredó (0 si las tablas difieren demasiado)."""
+        cambiadas = anterior.claves_cambiadas(self)
+        if cambiadas is None or len(cambiadas) > MAX_CAMBIADAS:
+            return 0
+        memo_fob, memo_ent = dict(anterior._memo_fob), dict(anterior._memo_ent)
+        fuera = self.afectados(memo_fob.keys() | memo_ent.keys(), cambiadas)
+        self._memo_fob.update((n, r) for n, r in memo_fob.items() if n not in fuera)
+        self._memo_ent.update((n, r) for n, r in memo_ent.items() if n not in fuera)
+        return len(memo_fob.keys() | memo_ent.keys()) - len(fuera)
+
+    def _resolver_fob(self, nombre_prod):
+        nombre_norm, nombre_compact = _normas(nombre_prod)
+        if not nombre_norm:
+            return 0.0
+        # Tier 1 y 2: exacto y compacto exacto (hash)
+        if nombre_norm in self._fob_exacto:
+            return self._fob_exacto[nombre_norm]
+        if nombre_compact in self._fob_compacto:
+            return self._fob_compacto[nombre_compact]
+        contienen_compacto, contienen_nombre = self._fob_cont
+        # Tier 3: key en nombre (la primera)
+        pos = _contenidas(self._en_nombre, nombre_norm, self._pos_fob)
+        if pos:
+            return self._fob[pos[0]][2]
+        # Tier 4: key compacto en nombre compacto (el más largo gana)
+        best, best_len = 0.0, 0
+        for i in _contenidas(self._en_compacto, nombre_compact, self._pos_fob):
+            k_compact, fob = self._fob[i][1], self._fob[i][2]
+            if k_compact and len(k_compact) > best_len:
+                best, best_len = fob, len(k_compact)
+        if best > 0:
+            return best
+        # Tier 5: nombre compacto en key compacto (el primero que lo contiene)
+        if nombre_compact:
+            i = contienen_compacto.primera(nombre_compact)
+            if i is not None and self._fob[i][2] > 0:
+                return self._fob[i][2]
+        # Tier 6: nombre en key (normalización básica)
+        i = contienen_nombre.primera(nombre_norm)
+        if i is not None:
+            return self._fob[i][2]
+        return 0.0
+
+    def _resolver_entrada(self, nombre_prod):
+        nombre_norm, nombre_compact = _normas(nombre_prod)
+        if not nombre_norm:
+            return (0.0, 0.0, 0.0)
+        # Un match con FOB > 0 corta; uno con FOB = 0 (y total > 0) queda
+        # como fallback y se sigue buscando.
+        fallback = None
+
+        def _consider(r):
+            nonlocal fallback
+            if r[2] > 0:
+                if r[0] > 0:
+                    return r
+                if fallback is None:
+                    fallback = r
+            return None
+
+        # Tier 1 y 2: exacto y compacto exacto (hash)
+        for r in self._ent_exacto.get(nombre_norm, ()):
+            if _consider(r):
+                return r
+        for r in self._ent_compacto.get(nombre_compact, ()):
+            if _consider(r):
+                return r
+        contienen_compacto, contienen_nombre = self._ent_cont
+        ent = self._ent
+        # Tier 3: key en nombre (básico, el más largo gana)
+        best, best_len = None, 0
+        for i in _contenidas(self._en_nombre, nombre_norm, self._pos_ent):
+            k_norm, r = ent[i][0], ent[i][2]
+            if r[2] > 0 and len(k_norm) > best_len:
+                best, best_len = r, len(k_norm)
+        if best and _consider(best):
+            return best
+        # Tier 4: key compacto en nombre compacto (el más largo gana)
+        best, best_len = None, 0
+        for i in _contenidas(self._en_compacto, nombre_compact, self._pos_ent):
+            k_compact, r = ent[i][1], ent[i][2]
+            if r[2] > 0 and k_compact and len(k_compact) > best_len:
+                best, best_len = r, len(k_compact)
+        if best and _consider(best):
+            return best
+        # Tier 5: nombre compacto en key compacto (el primero con total > 0)
+        if nombre_compact:
+            for i in contienen_compacto.contienen(nombre_compact):
+                r = ent[i][2]
+                if r[2] > 0:
+                    if _consider(r):
+                        return r
+                    break
+        # Tier 6: nombre en key (básico)
+        for i in contienen_nombre.contienen(nombre_norm):
+            r = ent[i][2]
+            if _consider(r):
+                return r
+        return fallback or (0.0, 0.0, 0.0)
+
+
+_LOCK = threading.Lock()
+_POR_ID = OrderedDict()      # id(costos_gs) → (costos_gs, resolver)
+_POR_HUELLA = OrderedDict()  # huella del contenido → resolver
+_ULTIMO = None               # último resolver devuelto: el que hereda el próximo
+
+
+def huella_costos(costos_gs):
+    """Huella del contenido de CostosConsolas (sha1 del JSON ordenado)."""
+    crudo = json.dumps(costos_gs or {}, sort_keys=True, default=str)
+    return hashlib.sha1(crudo.encode()).hexdigest()
+
+
+def resolver_costos(costos_gs=None):
+    """CostResolver para este CostosConsolas. Mismo dict (identidad) → el
+    mismo resolver sin mirar el contenido; otro dict con igual contenido →
+    el de esa huella. Ediciones in-place: invalidar_costos()."""
+    global _ULTIMO
+    clave = id(costos_gs)
+    with _LOCK:
+        par = _POR_ID.get(clave)
+        if par is not None and par[0] is costos_gs:
+            _POR_ID.move_to_end(clave)
+            _ULTIMO = par[1]
+            return par[1]
+    huella = huella_costos(costos_gs)
+    with _LOCK:
+        r = _POR_HUELLA.get(huella)
+        if r is None:
+            r = CostResolver(costos_gs)
+            if _ULTIMO is not None:
+                r.heredar(_ULTIMO)
+            _POR_HUELLA[huella] = r
+            if len(_POR_HUELLA) > MAX_RESOLVERS:
+                _POR_HUELLA.popitem(last=False)
+        _POR_HUELLA.move_to_end(huella)
+        # Se guarda el dict para que su id no se reuse mientras esté acá
+        _POR_ID[clave] = (costos_gs, r)
+        if len(_POR_ID) > MAX_RESOLVERS:
+            _POR_ID.popitem(last=False)
+        _ULTIMO = r
+        return r
+
+
+def invalidar_costos():
+    """Descarta los resolvers cacheados (CostosConsolas se guardó o editó).
+    El último usado queda solo como base: el próximo que se arme hereda su
+    memo salvo los nombres que tocan las claves que cambiaron."""
+    with _LOCK:
+        _POR_ID.clear()
+        _POR_HUELLA.clear()
+
+
+def get_fob_usd(nombre_prod, costos_gs=None):
+    return resolver_costos(costos_gs).fob(nombre_prod)
+
+
+def _match_costo_entry(nombre_prod, costos_gs=None):
+    """Encuentra la MEJOR entrada de costos y devuelve (fob_usd, import_usd, total_usd).
+    Garantiza que FOB, import y total vienen de la MISMA entrada."""
+    return resolver_costos(costos_gs).entrada(nombre_prod)
+
+
+def get_costo_total_usd(nombre_prod, costos_gs=None):
+    """Retorna costo total USD (FOB + import)."""
+    return resolver_costos(costos_gs).total(nombre_prod)
+
+
+def calcular_costo_orden_ars(productos_str, cantidad, tipo_cambio_ars, costos_gs=None):
+    prods = [p.strip() for p in str(productos_str).split(" / ") if p.strip()]
+    if not prods:
+        return 0.0
+    if len(prods) == 1:
+        return get_fob_usd(prods[0], costos_gs) * int(cantidad or 1) * tipo_cambio_ars
+    return sum(get_fob_usd(p, costos_gs) * tipo_cambio_ars for p in prods)
+
+
+def calcular_costo_total_orden_ars(productos_str, cantidad, tipo_cambio_ars, costos_gs=None):
+    """Calcula costo total (FOB + import) en ARS."""
+    prods = [p.strip() for p in str(productos_str).split(" / ") if p.strip()]
+    if not prods:
+        return 0.0
+    if len(prods) == 1:
+        return get_costo_total_usd(prods[0], costos_gs) * int(cantidad or 1) * tipo_cambio_ars
+    return sum(get_costo_total_usd(p, costos_gs) * tipo_cambio_ars for p in prods)
+
+
+def costo_final_row(row, tipo_cambio, costos_gs):
+    """Costo de productos en ARS = (FOB + Import) de cada producto × cantidad × TC.
+    Usa la tabla CostosConsolas como source of truth (FOB + Import).
+    Solo cae al costo TN si la tabla no tiene el producto.
+    """
+    # 1) Intentar con CostosConsolas (FOB + Import)
+    costo_calc = calcular_costo_total_orden_ars(
+        row.get("Productos", ""), row.get("Cantidad", 1), tipo_cambio, costos_gs
+    )
+    if costo_calc > 0:
+        return round(costo_calc, 0)
+    # 2) Fallback: lo que TN reporta (puede ser FOB solo o desactualizado)
+    costo_tn = float(row.get("Costo Productos ($)", 0) or 0)
+    return round(costo_tn, 0)
+
+
+def costo_total_final_row(row, tipo_cambio, costos_gs):
+    """Costo total (FOB + import) para la fila."""
+    return round(calcular_costo_total_orden_ars(
+        row.get("Productos", ""), row.get("Cantidad", 1), tipo_cambio, costos_gs
+    ), 0)
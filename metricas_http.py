@@ -0,0 +1,258 @@
+"""
+metricas_http.py — instrumentación de las llamadas salientes del dashboard.
+
+Sin Streamlit: solo stdlib (requests se importa recién en sesion()). Testeable
+en aislamiento (patrón velocidad_restock). Un registro de proceso recibe un
+evento por llamada — servicio, método, endpoint (plantilla, sin ids), status,
+latencia, bytes de respuesta, reintentos, espera (rate limit / backoff) y
+estado de cache — y guarda por endpoint contadores y una ventana de las
+últimas latencias para percentiles móviles. ⚙️ Operación lo muestra para ver
+qué integración frena un rerun.
+
+Fuentes:
+  - tn_client / tn_client_aio: observador (tn_client.OBSERVADORES).
+  - MP, Meta, Bluelytics, dolarapi, worker de señales: sesion() — un
+    requests.Session con hook de respuesta (y keep-alive de regalo).
+  - GA4: ClienteMedido envuelve el client de la librería de Google.
+"""
+import re
+import threading
+import time
+import urllib.parse
+from collections import deque
+
+VENTANA = 500           # latencias que se guardan por endpoint (percentiles móviles)
+
+_HOSTS = {
+    "api.tiendanube.com": "tn",
+    "api.mercadopago.com": "mp",
+    "graph.facebook.com": "meta",
+    "api.bluelytics.com.ar": "bluelytics",
+    "dolarapi.com": "dolarapi",
+    "api.anthropic.com": "anthropic",
+    "analyticsdata.googleapis.com": "ga4",
+}
+
+_SERVICIOS = set(_HOSTS.values())
+
+_RE_ID = re.compile(r"^(\d+|[0-9a-f]{16,}|[0-9a-f-]{32,36})$", re.I)
+_RE_PREFIJO_ID = re.compile(r"^([a-z]+_)\d+$", re.I)   # act_123 (Meta)
+
+
+def plantilla(path):
+    """Path o URL → plantilla de endpoint sin query ni ids:
+    'products/123/variants/9' → 'products/{id}/variants/{id}',
+    '/v19.0/act_55/insights' → 'v19.0/act_{id}/insights'."""
+    path = urllib.parse.urlsplit(str(path)).path if "://" in str(path) else str(path).split("?")[0]
+    partes = []
+    for p in path.strip("/").split("/"):
+        if _RE_ID.match(p):
+            partes.append("{id}")
+        elif _RE_PREFIJO_ID.match(p):
+            partes.append(_RE_PREFIJO_ID.sub(r"\1{id}", p))
+        else:
+            partes.append(p)
+    return "/".join(partes)
+
+
+def servicio_de(url, default=None):
+    """Servicio a partir del host de la URL (default: el host). Contra el
+    stand-in local (bench/servidor_local) el servicio es el primer segmento
+    del path: /mp/..., /meta/...; /v1/<store>/... es TN."""
+    u = urllib.parse.urlsplit(url)
+    host = u.hostname or ""
+    if host in _HOSTS:
+        return _HOSTS[host]
+    primero = u.path.strip("/").split("/", 1)[0]
+    if primero in _SERVICIOS:
+        return primero
+    if primero == "v1" and host in ("127.0.0.1", "localhost"):
+        return "tn"
+    return default or host
+
+
+def _percentil(ordenados, q):
+    if not ordenados:
+        return None
+    k = (len(ordenados) - 1) * q
+    i = int(k)
+    j = min(i + 1, len(ordenados) - 1)
+    return ordenados[i] + (ordenados[j] - ordenados[i]) * (k - i)
+
+
+class RegistroHTTP:
+    """Contadores y latencias por (servicio, método, endpoint). Thread-safe."""
+
+    def __init__(self, ventana=VENTANA, reloj=time.time):
+        self.ventana = ventana
+        self.reloj = reloj
+        self._lock = threading.Lock()
+        self._eps = {}
+
+    def registrar(self, servicio, method, endpoint, status, segundos, bytes_=None,
+                  reintentos=0, espera=0.0, cache=None):
+        clave = (servicio, str(method).upper(), plantilla(endpoint))
+        with self._lock:
+            ep = self._eps.get(clave)
+            if ep is None:
+                ep = self._eps[clave] = {
+                    "llamadas": 0, "errores": 0, "n_429": 0, "reintentos": 0,
+                    "bytes": 0, "segundos": 0.0, "espera": 0.0,
+                    "cache_hits": 0, "cache_misses": 0,
+                    "latencias": deque(maxlen=self.ventana), "ultimo": None,
+                    "ultimo_status": None,
+                }
+            ep["llamadas"] += 1
+            ep["errores"] += int(not status or status >= 400)
+            ep["n_429"] += int(status == 429)
+            ep["reintentos"] += int(reintentos or 0)
+            ep["bytes"] += int(bytes_ or 0)
+            ep["segundos"] += float(segundos)
+            ep["espera"] += float(espera or 0.0)
+            ep["cache_hits"] += int(cache == "hit")
+            ep["cache_misses"] += int(cache == "miss")
+            ep["latencias"].append(float(segundos))
+            ep["ultimo"] = self.reloj()
+            ep["ultimo_status"] = status
+
+    def evento(self, ev):
+        """Observador con la forma de tn_client.OBSERVADORES (un dict por llamada)."""
+        self.registrar(ev.get("servicio", "tn"), ev["method"], ev["endpoint"], ev["status"],
+                       ev["segundos"], ev.get("bytes"), ev.get("reintentos", 0),
+                       ev.get("espera", 0.0), ev.get("cache"))
+
+    def resumen(self):
+        """Una fila por endpoint, ordenadas por tiempo total (lo que más pesa arriba)."""
+        with self._lock:
+            filas = []
+            for (servicio, method, endpoint), ep in self._eps.items():
+                lat = sorted(ep["latencias"])
+                filas.append({
+                    "servicio": servicio, "method": method, "endpoint": endpoint,
+                    "llamadas": ep["llamadas"], "errores": ep["errores"],
+                    "n_429": ep["n_429"], "reintentos": ep["reintentos"],
+                    "bytes": ep["bytes"], "segundos": round(ep["segundos"], 3),
+                    "espera": round(ep["espera"], 3),
+                    "p50_ms": None if not lat else round(_percentil(lat, 0.50) * 1000, 1),
+                    "p90_ms": None if not lat else round(_percentil(lat, 0.90) * 1000, 1),
+                    "p99_ms": None if not lat else round(_percentil(lat, 0.99) * 1000, 1),
+                    "cache_hits": ep["cache_hits"], "cache_misses": ep["cache_misses"],
+                    "ultimo": ep["ultimo"], "ultimo_status": ep["ultimo_status"],
+                })
+        return sorted(filas, key=lambda f: f["segundos"] + f["espera"], reverse=True)
+
+    def por_servicio(self):
+        """Totales por servicio: llamadas, segundos, bytes, errores, 429s."""
+        tot = {}
+        for f in self.resumen():
+            t = tot.setdefault(f["servicio"], {"servicio": f["servicio"], "llamadas": 0,
+                                               "segundos": 0.0, "espera": 0.0, "bytes": 0,
+                                               "errores": 0, "n_429": 0})
+            for k in ("llamadas", "segundos", "espera", "bytes", "errores", "n_429"):
+                t[k] += f[k]
+        return sorted(tot.values(), key=lambda t: t["segundos"] + t["espera"], reverse=True)
+
+    def limpiar(self):
+        with self._lock:
+            self._eps.clear()
+
+
+REGISTRO = RegistroHTTP()
+
+
+class medir:
+    """Context manager para instrumentar una llamada a mano:
+
+        with medir("ga4", "POST", "runReport") as m:
+            resp = client.run_report(req)
+            m.bytes = len(...)
+
+    status queda 200 si el bloque termina bien y 0 si levanta (la excepción
+    sigue su curso)."""
+
+    def __init__(self, servicio, method, endpoint, registro=None):
+        self.servicio, self.method, self.endpoint = servicio, method, endpoint
+        self.registro = registro or REGISTRO
+        self.status = None
+        self.bytes = None
+        self.reintentos = 0
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, exc, tb):
+        status = self.status if self.status is not None else (0 if tipo else 200)
+        self.registro.registrar(self.servicio, self.method, self.endpoint, status,
+                                time.perf_counter() - self._t0, self.bytes, self.reintentos)
+        return False
+
+
+def _tamano_proto(resp):
+    """Bytes serializados de una respuesta protobuf / proto-plus, o None."""
+    try:
+        return type(resp).pb(resp).ByteSize()
+    except Exception:
+        pass
+    try:
+        return resp.ByteSize()
+    except Exception:
+        return None
+
+
+class ClienteMedido:
+    """Proxy de un client de librería (GA4): cada método llamado se registra
+    como (servicio, 'RPC', nombre del método)."""
+
+    def __init__(self, cliente, servicio, registro=None):
+        self._cliente = cliente
+        self._servicio = servicio
+        self._registro = registro or REGISTRO
+
+    def __getattr__(self, nombre):
+        attr = getattr(self._cliente, nombre)
+        if not callable(attr) or nombre.startswith("_"):
+            return attr
+
+        def _llamar(*args, **kwargs):
+            with medir(self._servicio, "RPC", nombre, self._registro) as m:
+                resp = attr(*args, **kwargs)
+                m.bytes = _tamano_proto(resp)
+            return resp
+        return _llamar
+
+
+def _hook_respuesta(registro, servicio):
+    def hook(r, *args, **kwargs):
+        try:
+            bytes_ = len(r.content)
+        except Exception:
+            bytes_ = None
+        registro.registrar(servicio or servicio_de(r.url), r.request.method, r.url,
+                           r.status_code, r.elapsed.total_seconds(), bytes_,
+                           len(getattr(r, "history", []) or []))
+        return r
+    return hook
+
+
+def sesion(servicio=None, registro=None):
+    """requests.Session instrumentada: cada respuesta se registra con el
+    servicio (o el que corresponda al host), endpoint, status, latencia
+    (r.elapsed) y bytes; un error de red se registra con status 0 y se
+    propaga igual."""
+    import requests
+    registro = registro or REGISTRO
+
+    class _Sesion(requests.Session):
+        def request(self, method, url, *args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return super().request(method, url, *args, **kwargs)
+            except Exception:
+                registro.registrar(servicio or servicio_de(url), method, url, 0,
+                                   time.perf_counter() - t0)
+                raise
+
+    s = _Sesion()
+    s.hooks["response"].append(_hook_respuesta(registro, servicio))
+    return s
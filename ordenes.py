@@ -0,0 +1,567 @@
+"""Órdenes TN → DataFrame: tasas de pasarela y procesar_orders.
+
+Sin Streamlit: solo pandas. Testeable en aislamiento (patrón velocidad_restock).
+procesar_orders acepta cualquier iterable de órdenes (lista o generador de
+tn_client.iter_paginado): consume una a una, sin retener el payload crudo.
+
+El enriquecimiento es uno solo (OrdenesEnriquecidas) y es columnar: una
+pasada por las órdenes baja cada campo a una lista (sin un dict por fila),
+las fechas se parsean en una sola llamada y la clasificación de pago (medio,
+pasarela, tasa) se calcula una vez por combinación (gateway, método, cuotas)
+distinta y se aplica como lookup. De ahí salen el df de órdenes, las líneas
+de venta y las filas por producto (procesar_orders_con_filas las da juntas).
+Las salidas son idénticas a las de las versiones fila por fila, que quedan
+como referencia en bench/referencias.py (tests de equivalencia y
+bench/bench_procesar_orders.py).
+
+Las líneas de venta salen aparte, en forma larga (procesar_orders_con_items):
+una fila por producto de cada orden con Orden, Fecha, Producto, Variante,
+Cantidad, Precio ($) y Costo. Los consumidores agrupan o cruzan por Orden
+(items_de) en vez de partir el string "Productos".
+
+El DataFrame de órdenes sale tipado (ESQUEMA_ORDENES, tipar_ordenes):
+categóricas para los textos repetidos (pasarela, medio de pago, provincia,
+estados...), enteros nullable para Orden / Cuotas / Cantidad y Fecha como
+datetime64 de resolución día (NaT si created_at no parsea). Las líneas de
+venta y las filas por producto llevan la misma Fecha datetime64[s]: las
+tres tablas se cortan y cruzan juntas. Los montos
+quedan en float64: son pesos con centavos y se suman, float32 no alcanza.
+
+filas_por_producto es la vista de precios de Margen real, Precios y el
+Analista IA: una fila por línea con precio de lista, neto, comisión y envío
+por unidad y el peso "Unidades" (no una fila repetida por unidad). Las
+medias salen ponderadas por ese peso (promedio_ponderado).
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+# Forma de orden que usa el dashboard (procesar_orders, filas por producto del
+# dashboard, debug de orden y el store local). Se pide a TN solo esto
+# (tn_client, campos=) y es lo que queda en st.session_state.orders_raw: un
+# campo nuevo que se lea de la orden cruda tiene que sumarse acá.
+CAMPOS_ORDEN = (
+    "id", "number", "created_at", "updated_at", "payment_status", "status",
+    "shipping_status", "total", "discount", "shipping_cost_owner",
+    "shipping_cost_customer", "gateway", "payment_details", "contact_name",
+    "billing_province", "billing_city", "shipping_address.city", "app_id",
+    "products.name", "products.price", "products.quantity", "products.cost",
+    "products.variant_values",
+)
+
+# Columnas de la tabla de líneas de venta (una fila por producto de una orden).
+# Fecha es datetime64[s], como en ESQUEMA_ORDENES (también en COLUMNAS_FILAS)
+COLUMNAS_ITEMS = ["Orden", "Fecha", "Producto", "Variante", "Cantidad", "Precio ($)", "Costo"]
+
+# Columnas de las filas por producto (filas_por_producto): valores por unidad
+# de cada línea, "Unidades" es el peso
+COLUMNAS_FILAS = [
+    "Producto", "Unidades", "Precio ($)", "Precio neto ($)", "Descuento ($)",
+    "Medio de Pago", "Cuotas", "Comisión PN ($)", "Tasa PN (%)", "Envío ($)",
+    "Fecha", "Orden Total ($)",
+]
+
+# Pasarelas posibles. Van fijas en la categórica para que match_mp_with_tn y
+# las órdenes en efectivo puedan escribir "MP" / "Efectivo" en cualquier fila.
+PASARELAS = ["PN", "MP", "Convenir", "Efectivo"]
+
+# dtypes del DataFrame de órdenes (tipar_ordenes). Las columnas que no están
+# quedan como las arma pandas: montos float64, textos libres str.
+ESQUEMA_ORDENES = {
+    "Orden": "Int64",
+    "Fecha": "datetime64[s]",
+    "Medio de Pago": "category",
+    "Cuotas": "Int16",
+    "Pasarela": pd.CategoricalDtype(PASARELAS),
+    "Margen (%)": "float64",
+    "Estado Envio": "category",
+    "Cantidad": "Int32",
+    "Canal": "category",
+    "Estado": "category",
+    "Provincia": "category",
+    "Ciudad": "category",
+    "Gateway raw": "category",
+    "Metodo raw": "category",
+}
+
+# ── Tasas Pago Nube / Mercado Pago (reales, confirmadas con config MP 2026-07) ──
+# Los % de la pasarela NO incluyen IVA → se aplica IVA_FACTOR (21%).
+# Por cobro base 3,39% + financiación por ofrecer cuotas sin interés.
+# All-in: contado 4,10% · 3c 11,60% · 6c 16,56%.
+PROC_BASE = 0.0339          # por cobro con tarjeta (18 días)
+IVA_FACTOR = 1.2100         # IVA 21%
+PROC_EFECTIVO = PROC_BASE * IVA_FACTOR
+
+CUOTAS_BASE = {
+    1: 0.0, 2: 0.0440, 3: 0.0620, 6: 0.1030,
+    12: 0.3104, 18: 0.4346, 24: 0.5432,   # 12+ no se ofrecen (valores viejos)
+}
+
+def tasa_pago_nube(metodo, cuotas):  # noqa: keep for compatibilidad
+    metodo = str(metodo).lower()
+    if any(x in metodo for x in ["transfer", "wire", "account_money"]):
+        return 0.0099 * IVA_FACTOR
+    if any(x in metodo for x in ["debit", "debito", "modo"]):
+        return PROC_EFECTIVO
+    cuotas = int(cuotas or 1)
+    opciones = sorted(CUOTAS_BASE.keys())
+    cuotas_key = min(opciones, key=lambda x: abs(x - cuotas))
+    costo_cuotas = CUOTAS_BASE.get(cuotas_key, 0.0) * IVA_FACTOR
+    return PROC_EFECTIVO + costo_cuotas
+
+# ── Tasas Mercado Pago ──────────────────────────────────────────────────────────
+# Fuente: config MP real de Bruno (jul-2026). Por cobro 3,39% + financiación por
+# ofrecer cuotas, todo + IVA 21%. Fórmula: (3.39 + financing) × 1.21.
+COSTOS_MP_DEFAULTS = {
+    "Transferencia": 0.0,
+    "Contado":       4.10,   # 3.39 × 1.21
+    "2 cuotas":      9.42,   # (3.39 + 4.40) × 1.21
+    "3 cuotas":      11.60,  # (3.39 + 6.20) × 1.21
+    "6 cuotas":      16.56,  # (3.39 + 10.30) × 1.21
+    "9 cuotas":      22.62,  # no se ofrece (valor viejo)
+    "12 cuotas":     28.07,  # no se ofrece (valor viejo)
+}
+
+def _es_gateway_mp(gateway):
+    """True si la orden pasó por Mercado Pago (no Pago Nube)."""
+    gw = str(gateway).lower().replace(" ", "").replace("-", "").replace("_", "")
+    return "mercadopago" in gw or gw in {"mp", "mercadopagov1", "mercadopagocheckoutpro"}
+
+def _es_convenir(gateway, metodo):
+    """True si la orden fue creada con 'pago a convenir' (link MP generado por fuera de TN)."""
+    gw = str(gateway).lower().strip()
+    mt = str(metodo).lower().strip()
+    if "convenir" in gw or "convenir" in mt:
+        return True
+    # Gateway vacío + método no reconocido → probablemente a convenir
+    _metodos_conocidos = {"credit_card", "debit_card", "account_money"}
+    _frags_conocidos   = ["transfer", "wire", "pago", "mercado", "credit", "debit"]
+    if (not gw or gw in {"", "none", "null", "other", "offline", "manual"}) \
+       and mt not in _metodos_conocidos \
+       and not any(f in mt for f in _frags_conocidos):
+        return True
+    return False
+
+def tasa_pasarela(gateway, metodo, cuotas):
+    """Tasa de comisión real según pasarela: Mercado Pago o Pago Nube."""
+    if _es_gateway_mp(gateway):
+        m = str(metodo).lower()
+        c = int(cuotas or 1)
+        if any(x in m for x in ["transfer", "wire", "bank_transfer"]):
+            clave = "Transferencia"
+        elif "debit" in m or "debito" in m:
+            clave = "Contado"
+        elif c <= 1:
+            clave = "Contado"
+        elif c <= 2:
+            clave = "2 cuotas"
+        elif c <= 3:
+            clave = "3 cuotas"
+        elif c <= 6:
+            clave = "6 cuotas"
+        elif c <= 9:
+            clave = "9 cuotas"
+        else:
+            clave = "12 cuotas"
+        return COSTOS_MP_DEFAULTS.get(clave, 3.87) / 100
+    else:
+        return tasa_pago_nube(metodo, cuotas)
+
+
+def _extraer_nombre_producto(n):
+    if isinstance(n, str):
+        return n
+    if isinstance(n, dict):
+        return n.get("es", "") or next(iter(n.values()), "")
+    return ""
+
+def _label_medio(metodo, cuotas, gateway):
+    if metodo == "credit_card":
+        return "Credito contado" if cuotas == 1 else f"Credito {cuotas} cuotas"
+    if metodo == "debit_card":
+        return "Debito"
+    if any(x in str(metodo).lower() for x in ["transfer", "wire"]):
+        return "Transferencia"
+    if "account_money" in str(metodo).lower():
+        return "Dinero en cuenta"
+    return str(metodo).replace("_", " ").title() if metodo else str(gateway)
+
+
+def _clasificar_pago(gateway, metodo, cuotas):
+    """(medio de pago, pasarela, tasa, costo %) de una combinación
+    gateway/método/cuotas. Convenir no lleva tasa: se resuelve en
+    match_mp_with_tn()."""
+    if _es_gateway_mp(gateway):
+        pasarela, tasa = "MP", tasa_pasarela(gateway, metodo, cuotas)
+    elif _es_convenir(gateway, metodo):
+        pasarela, tasa = "Convenir", 0.0
+    else:
+        # Tasa pública oficial de PN; la retención IIBB no la expone TN.
+        pasarela, tasa = "PN", tasa_pasarela(gateway, metodo, cuotas)
+    return _label_medio(metodo, cuotas, gateway), pasarela, tasa, round(tasa * 100, 2)
+
+
+def _redondear(x, ndigits=2):
+    """round(x, ndigits) de Python sobre un array. numpy redondea x*10^n, que
+    arrastra error de representación: los valores a medio camino se
+    recalculan con round() para que el resultado sea bit a bit el mismo."""
+    x = np.asarray(x, dtype=float)
+    escalado = x * 10.0 ** ndigits
+    r = np.round(escalado) / 10.0 ** ndigits
+    dudosos = np.abs(np.abs(escalado) % 1.0 - 0.5) < 1e-6 + np.abs(escalado) * 1e-15
+    for i in np.flatnonzero(dudosos):
+        r[i] = round(float(x[i]), ndigits)
+    return r
+
+
+_RE_FECHA_ISO = re.compile(r"^\d{4}-\d{2}-\d{2}(?:[T ]|$)")
+
+
+def _fecha_por_fila(created_at):
+    try:
+        return pd.to_datetime(created_at).strftime("%Y-%m-%d")
+    except Exception:
+        return ""
+
+
+def _fechas(created):
+    """created_at → 'YYYY-MM-DD' ('' si no parsea). Los ISO 8601 (lo que manda
+    TN) se validan en una sola llamada vectorizada y la fecha es el prefijo
+    (el día local de la orden, como strftime sobre el timestamp con offset);
+    lo que no valida y cualquier otro formato pasa por el parseo de a uno."""
+    fechas = [""] * len(created)
+    iso = [i for i, c in enumerate(created) if isinstance(c, str) and _RE_FECHA_ISO.match(c)]
+    if iso:
+        ok = pd.to_datetime(pd.Series([created[i] for i in iso], dtype=object),
+                            format="ISO8601", utc=True, errors="coerce").notna().to_numpy()
+        for i, valida in zip(iso, ok):
+            fechas[i] = created[i][:10] if valida else _fecha_por_fila(created[i])
+    for i in set(range(len(created))) - set(iso):
+        fechas[i] = _fecha_por_fila(created[i])
+    return fechas
+
+
+def _variante(valores):
+    """variant_values de TN (lista de str o de {idioma: str}) → 'Negro / 64GB'."""
+    if not isinstance(valores, list):
+        return ""
+    return " / ".join(_extraer_nombre_producto(v) for v in valores)
+
+
+def _a_fecha(s):
+    """Serie de 'YYYY-MM-DD' ('' / None si no hay) → datetime64[s], NaT si
+    no parsea. Una serie ya datetime solo cambia de resolución."""
+    if not pd.api.types.is_datetime64_any_dtype(s):
+        s = pd.to_datetime(s.astype(object).where(s.notna(), ""),
+                           format="%Y-%m-%d", errors="coerce")
+    return s.astype("datetime64[s]")
+
+
+def tabla_vacia(columnas):
+    """Líneas de venta / filas por producto sin filas, con Fecha datetime64[s]:
+    un tramo vacío concatenado con otros no devuelve Fecha a object."""
+    return pd.DataFrame(columns=columnas).astype({"Fecha": "datetime64[s]"})
+
+
+def tipar_ordenes(df):
+    """Aplica ESQUEMA_ORDENES a un DataFrame de órdenes (idempotente). Sirve
+    también después de un concat, que pierde las categóricas si los tramos
+    traen categorías distintas."""
+    if df is None or df.empty:
+        return df
+    cols = {}
+    for col, tipo in ESQUEMA_ORDENES.items():
+        if col not in df.columns:
+            continue
+        s = df[col]
+        if col == "Fecha":
+            s = _a_fecha(s)
+        elif col == "Pasarela":
+            extra = sorted(set(s.dropna().astype(str)) - set(PASARELAS))
+            tipo = pd.CategoricalDtype(PASARELAS + extra)
+        cols[col] = s.astype(tipo)
+    return df.assign(**cols)
+
+
+def _pago_orden(o):
+    """(gateway, método, cuotas) de una orden cruda."""
+    pd_raw = o.get("payment_details", {})
+    gateway = str(o.get("gateway", "")).lower()
+    metodo, cuotas = gateway, 1
+    if isinstance(pd_raw, dict):
+        metodo = pd_raw.get("method", gateway)
+        cuotas = int(pd_raw.get("installments", 1) or 1)
+    return gateway, metodo, cuotas
+
+
+class OrdenesEnriquecidas:
+    """Una sola pasada por las órdenes crudas (cualquier iterable): los
+    atributos de cada orden (pago, montos, fecha) y de cada línea de producto
+    quedan en listas. La clasificación de pago (medio, pasarela, tasa) se
+    calcula una vez por combinación (gateway, método, cuotas) distinta y las
+    fechas en una sola llamada vectorizada.
+
+    De acá salen, sin volver a leer el payload: el df de órdenes (ordenes()),
+    las líneas de venta (items()) y las filas por producto (filas_producto())."""
+
+    def __init__(self, orders):
+        numero, created, cliente, envio_estado, canal, estado = [], [], [], [], [], []
+        provincia, ciudad, gateways, metodos_raw, cuotas_l = [], [], [], [], []
+        total, descuento, envio, envio_cliente, costo_prod, cantidad = [], [], [], [], [], []
+        productos, n_productos, subtotal = [], [], []
+        it_pos, it_prod, it_var, it_cant, it_precio, it_costo = [], [], [], [], [], []
+        clase_idx, clases = [], {}
+        for o in orders:
+            pos = len(total)
+            nombres = []
+            costo_productos = 0.0
+            sub = 0.0
+            cant = 0
+            for p in o.get("products", []):
+                nombre = _extraer_nombre_producto(p.get("name", ""))
+                nombres.append(nombre)
+                qty = int(p.get("quantity", 1) or 1)
+                cost = float(p.get("cost", 0) or 0)
+                precio = float(p.get("price", 0) or 0)
+                costo_productos += cost * qty
+                sub += precio * qty
+                cant += qty
+                it_pos.append(pos)
+                it_prod.append(nombre)
+                it_var.append(_variante(p.get("variant_values")))
+                it_cant.append(qty)
+                it_precio.append(precio)
+                it_costo.append(cost)
+            productos.append(" / ".join(nombres))
+            n_productos.append(len(nombres))
+            cantidad.append(cant)
+            costo_prod.append(costo_productos)
+            subtotal.append(sub)
+
+            gateway, metodo, cuotas = _pago_orden(o)
+            try:
+                clave = (gateway, metodo, cuotas)
+                idx = clases.get(clave)
+            except TypeError:                      # método no hasheable: clase propia
+                clave, idx = object(), None
+            if idx is None:
+                idx = clases[clave] = len(clases)
+            clase_idx.append(idx)
+            gateways.append(gateway)
+            metodos_raw.append(metodo)
+            cuotas_l.append(cuotas)
+
+            created.append(o.get("created_at", ""))
+            total.append(float(o.get("total", 0)))
+            descuento.append(float(o.get("discount", 0) or 0))
+            envio.append(float(o.get("shipping_cost_owner", 0) or 0))
+            envio_cliente.append(float(o.get("shipping_cost_customer", 0) or 0))
+            provincia.append(str(o.get("billing_province", "")).strip())
+            _ship = o.get("shipping_address") or {}
+            ciudad.append(str(o.get("billing_city", "") or (
+                _ship.get("city", "") if isinstance(_ship, dict) else "")).strip())
+            numero.append(o.get("number"))
+            cliente.append(str(o.get("contact_name", "")))
+            envio_estado.append(o.get("shipping_status", ""))
+            canal.append(str(o.get("app_id", "") or "tiendanube"))
+            estado.append(o.get("status", ""))
+
+        self.n = len(total)
+        self._txt = {
+            "numero": numero, "cliente": cliente, "envio_estado": envio_estado,
+            "canal": canal, "estado": estado, "provincia": provincia, "ciudad": ciudad,
+            "gateways": gateways, "metodos_raw": metodos_raw, "cuotas": cuotas_l,
+            "productos": productos, "cantidad": cantidad,
+        }
+        self._lineas = (it_pos, it_prod, it_var, it_cant, it_precio, it_costo)
+        self.total = np.asarray(total, dtype=float)
+        self.descuento = np.asarray(descuento, dtype=float)
+        self.envio = np.asarray(envio, dtype=float)
+        self.envio_cliente = np.asarray(envio_cliente, dtype=float)
+        self.costo_prod = np.asarray(costo_prod, dtype=float)
+        self.subtotal = np.asarray(subtotal, dtype=float)
+        self.n_productos = np.asarray(n_productos, dtype=np.int64)
+        self.fechas = _fechas(created) if self.n else []
+        self._fechas_dt = None
+
+        # Clasificación de pago: una vez por combinación distinta, después lookup.
+        # tasa_lista es tasa_pasarela sin el caso Convenir (la que estima las
+        # filas por producto antes del cruce con MP).
+        tabla = [None] * len(clases)
+        primera = {}
+        for i, idx in enumerate(clase_idx):
+            primera.setdefault(idx, i)
+        for idx, i in primera.items():
+            g, m, c = gateways[i], metodos_raw[i], cuotas_l[i]
+            clase = _clasificar_pago(g, m, c)
+            tasa_lista = tasa_pasarela(g, m, c) if clase[1] == "Convenir" else clase[2]
+            tabla[idx] = clase + (tasa_lista,)
+        clase_idx = np.asarray(clase_idx, dtype=np.int64)
+        self.label = np.array([t[0] for t in tabla], dtype=object)[clase_idx]
+        self.pasarela = np.array([t[1] for t in tabla], dtype=object)[clase_idx]
+        self.tasa = np.array([t[2] for t in tabla], dtype=float)[clase_idx]
+        self.costo_pct = np.array([t[3] for t in tabla], dtype=float)[clase_idx]
+        self.tasa_lista = np.array([t[4] for t in tabla], dtype=float)[clase_idx]
+
+    def ordenes(self):
+        """DataFrame de una fila por orden (el de procesar_orders), tipado."""
+        if not self.n:
+            return pd.DataFrame([])
+        t = self._txt
+        n = self.n
+        total_a, envio_a, costo_a = self.total, self.envio, self.costo_prod
+        comision = np.where(self.pasarela == "Convenir", 0.0, _redondear(total_a * self.tasa))
+        neto = _redondear(total_a - comision)
+        margen = _redondear(neto - costo_a - envio_a)
+        positivo = total_a > 0
+        if positivo.any():
+            with np.errstate(divide="ignore", invalid="ignore"):
+                margen_pct = np.where(positivo, _redondear(margen / total_a * 100), 0.0)
+        else:
+            margen_pct = np.zeros(n, dtype=np.int64)   # round(0, 2) es int
+
+        df = pd.DataFrame({
+            "Orden": t["numero"],
+            "Fecha": self.fechas,
+            "Cliente": t["cliente"],
+            "Medio de Pago": self.label.tolist(),
+            "Cuotas": t["cuotas"],
+            "Pasarela": self.pasarela.tolist(),
+            "Total ($)": total_a,
+            "Descuento ($)": self.descuento,
+            "Envio costo ($)": envio_a,
+            "Comision PN ($)": comision,
+            "Costo PN (%)": self.costo_pct,
+            "Neto cobrado ($)": neto,
+            "Costo Productos ($)": _redondear(costo_a),
+            "Margen ($)": margen,
+            "Margen (%)": margen_pct,
+            "Estado Envio": t["envio_estado"],
+            "Productos": t["productos"],
+            "Cantidad": t["cantidad"],
+            "Canal": t["canal"],
+            "Estado": t["estado"],
+            "ID MP": [""] * n,
+            "Provincia": t["provincia"],
+            "Ciudad": t["ciudad"],
+            "Gateway raw": t["gateways"],
+            "Metodo raw": [str(m) for m in t["metodos_raw"]],
+        })
+        return tipar_ordenes(df)
+
+    def _fechas_de(self, pos):
+        """Fecha datetime64[s] de las órdenes en `pos` (una por línea)."""
+        if self._fechas_dt is None:
+            self._fechas_dt = _a_fecha(pd.Series(self.fechas, dtype=object)).to_numpy()
+        return self._fechas_dt[np.asarray(pos, dtype=np.int64)]
+
+    def items(self):
+        """Líneas de venta (COLUMNAS_ITEMS): una fila por producto de cada orden."""
+        it_pos, it_prod, it_var, it_cant, it_precio, it_costo = self._lineas
+        if not self.n:
+            return tabla_vacia(COLUMNAS_ITEMS)
+        numero = self._txt["numero"]
+        return pd.DataFrame({
+            "Orden": [numero[i] for i in it_pos],
+            "Fecha": self._fechas_de(it_pos),
+            "Producto": it_prod,
+            "Variante": it_var,
+            "Cantidad": np.asarray(it_cant, dtype=np.int64),
+            "Precio ($)": np.asarray(it_precio, dtype=float),
+            "Costo": np.asarray(it_costo, dtype=float),
+        }, columns=COLUMNAS_ITEMS)
+
+    def filas_producto(self):
+        """Filas por producto (COLUMNAS_FILAS): precio individual de cada línea
+        (el 'price' de TN, sin dividir el total entre productos), neto de
+        descuentos, con comisión y envío prorrateados. Valores por unidad y
+        "Unidades" como peso. Las líneas sin unidades no suman."""
+        it_pos, it_prod, _, it_cant, it_precio, _ = self._lineas
+        qty = np.asarray(it_cant, dtype=np.int64)
+        ok = qty > 0
+        if not ok.any():
+            return tabla_vacia(COLUMNAS_FILAS)
+        pos = np.asarray(it_pos, dtype=np.int64)[ok]
+        qty = qty[ok]
+        precio = np.asarray(it_precio, dtype=float)[ok]
+        total = self.total[pos]
+        n_prod = self.n_productos[pos]
+        sub = self.subtotal[pos]
+        tasa = self.tasa_lista[pos]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Revenue real de productos = total pagado - envío que pagó el
+            # cliente: absorbe descuentos por medio de pago, cupones y promos
+            ratio_neto = np.where(sub > 0, (total - self.envio_cliente[pos]) / sub, 1.0)
+            # Precio individual en 0: fallback a dividir el total
+            precio = np.where((precio <= 0) & (n_prod > 0), total / n_prod, precio)
+            neto = _redondear(precio * ratio_neto)
+            descuento = _redondear(precio - neto)
+            # Comisión y envío proporcionales al peso del producto en la orden
+            peso = np.where(total > 0, (precio * qty) / total, 1.0 / np.maximum(n_prod, 1))
+            comision = _redondear(total * tasa * peso / qty)
+            envio = _redondear(self.envio[pos] * peso / qty)
+        cuotas = np.asarray(self._txt["cuotas"], dtype=np.int64)[pos]
+        return pd.DataFrame({
+            "Producto": [p for p, v in zip(it_prod, ok) if v],
+            "Unidades": qty,
+            "Precio ($)": _redondear(precio, 0),
+            "Precio neto ($)": _redondear(neto, 0),
+            "Descuento ($)": _redondear(descuento, 0),
+            "Medio de Pago": self.label[pos].tolist(),
+            "Cuotas": cuotas,
+            "Comisión PN ($)": _redondear(comision, 0),
+            "Tasa PN (%)": _redondear(tasa * 100),
+            "Envío ($)": _redondear(envio, 0),
+            "Fecha": self._fechas_de(pos),
+            "Orden Total ($)": total,
+        }, columns=COLUMNAS_FILAS)
+
+
+def procesar_orders(orders):
+    """Órdenes TN (iterable) → DataFrame de una fila por orden: medio de pago,
+    pasarela y comisión, neto, costo de productos y margen."""
+    return OrdenesEnriquecidas(orders).ordenes()
+
+
+def items_de(items, df):
+    """Líneas de venta de las órdenes de df (semi-join por Orden): las de un
+    df_tn ya filtrado por canal, pasarela, etc."""
+    if items is None or items.empty or df is None or df.empty:
+        return tabla_vacia(COLUMNAS_ITEMS)
+    return items[items["Orden"].isin(df["Orden"])]
+
+
+def procesar_orders_con_items(orders):
+    """Como procesar_orders, más la tabla de líneas de venta (COLUMNAS_ITEMS),
+    en la misma pasada: (df_ordenes, df_items)."""
+    e = OrdenesEnriquecidas(orders)
+    return e.ordenes(), e.items()
+
+
+def procesar_orders_con_filas(orders):
+    """Órdenes, líneas de venta y filas por producto de una sola pasada:
+    (df_ordenes, df_items, df_filas)."""
+    e = OrdenesEnriquecidas(orders)
+    return e.ordenes(), e.items(), e.filas_producto()
+
+
+def filas_por_producto(orders):
+    """Filas por producto de las órdenes (ver OrdenesEnriquecidas.filas_producto)."""
+    return OrdenesEnriquecidas(orders).filas_producto()
+
+
+def promedio_ponderado(df, por, columnas, peso="Unidades"):
+    """groupby(por) con la media de cada columna ponderada por peso (la
+    misma que daría una fila por unidad) y el peso sumado en la columna peso."""
+    por = [por] if isinstance(por, str) else list(por)
+    columnas = list(columnas)
+    w = df[peso].astype(float)
+    pond = df[columnas].astype(float).mul(w, axis=0)
+    pond[peso] = df[peso]
+    for c in por:
+        pond[c] = df[c]
+    g = pond.groupby(por, sort=True)[columnas + [peso]].sum()
+    medias = g[columnas].div(g[peso].astype(float), axis=0)
+    medias.insert(0, peso, g[peso])
+    return medias.reset_index()
@@ -0,0 +1,206 @@
+"""
+ordenes_store.py — store local (SQLite) de órdenes TN con sync incremental.
+
+Sin Streamlit: solo stdlib. Testeable en aislamiento (patrón velocidad_restock).
+El HTTP lo ponen los callables que recibe `asegurar` (en el dashboard:
+iter_tn_orders / iter_tn_orders_actualizadas), así el store no conoce a TN.
+
+Modelo:
+  - ordenes: una fila por order id con el JSON crudo, created_at en epoch UTC,
+    payment_status y status (las lecturas devuelven solo las pagas no
+    canceladas). Las órdenes sin created_at parseable no se guardan: no caen
+    en ningún rango.
+  - meta: cubierto_desde (fecha desde la que el store tiene TODO lo creado) y
+    watermark (instante del último sync de actualizadas, ISO UTC).
+Un rango ya cubierto no vuelve a TN: solo se piden las órdenes creadas antes
+de cubierto_desde y las actualizadas desde el watermark (updated_at_min).
+"""
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+
+TZ_AR = timezone(timedelta(hours=-3))
+SOLAPE_SYNC = timedelta(minutes=10)   # margen sobre el watermark (relojes / latencia TN)
+INTERVALO_SYNC = 120                   # segundos mínimos entre syncs de actualizadas
+
+_UPSERT = ("INSERT OR REPLACE INTO ordenes "
+           "(id, created_ts, payment_status, status, updated_at, json) "
+           "VALUES (?, ?, ?, ?, ?, ?)")
+
+
+def _ts(created_at):
+    """created_at de TN → epoch UTC (int) o None si no parsea."""
+    try:
+        dt = datetime.fromisoformat(str(created_at))
+    except (TypeError, ValueError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=TZ_AR)
+    return int(dt.timestamp())
+
+
+def _limites(desde, hasta):
+    """Epochs del rango de días AR [desde 00:00, hasta 23:59:59], igual que el
+    created_at_min/max que arma iter_tn_orders."""
+    d0 = date.fromisoformat(str(desde)[:10])
+    d1 = date.fromisoformat(str(hasta)[:10])
+    t0 = datetime(d0.year, d0.month, d0.day, tzinfo=TZ_AR)
+    t1 = datetime(d1.year, d1.month, d1.day, 23, 59, 59, tzinfo=TZ_AR)
+    return int(t0.timestamp()), int(t1.timestamp())
+
+
+class OrdenesStore:
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._lock = threading.RLock()
+        d = os.path.dirname(ruta)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        with self._con() as c:
+            c.execute("""CREATE TABLE IF NOT EXISTS ordenes (
+                id INTEGER PRIMARY KEY, created_ts INTEGER, payment_status TEXT,
+                updated_at TEXT, json TEXT NOT NULL, status TEXT)""")
+            columnas = {r[1] for r in c.execute("PRAGMA table_info(ordenes)")}
+            if "status" not in columnas:
+                # Store de antes de guardar status: se completa desde el JSON
+                c.execute("ALTER TABLE ordenes ADD COLUMN status TEXT")
+                c.executemany("UPDATE ordenes SET status = ? WHERE id = ?", [
+                    (json.loads(js).get("status"), i)
+                    for i, js in c.execute("SELECT id, json FROM ordenes").fetchall()])
+            c.execute("DELETE FROM ordenes WHERE created_ts IS NULL")
+            c.execute("CREATE INDEX IF NOT EXISTS ix_ordenes_created ON ordenes(created_ts)")
+            c.execute("CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT)")
+
+    @contextmanager
+    def _con(self):
+        """Conexión por operación (sqlite3 no se comparte entre hilos):
+        commit al salir sin error, siempre cierra."""
+        c = sqlite3.connect(self.ruta, timeout=30)
+        try:
+            with c:
+                yield c
+        finally:
+            c.close()
+
+    # ── meta ────────────────────────────────────────────────────────────────
+    def _meta(self, clave):
+        with self._con() as c:
+            r = c.execute("SELECT valor FROM meta WHERE clave = ?", (clave,)).fetchone()
+        return r[0] if r else None
+
+    def _set_meta(self, clave, valor):
+        with self._con() as c:
+            c.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES (?, ?)", (clave, valor))
+
+    def cubierto_desde(self):
+        v = self._meta("cubierto_desde")
+        return date.fromisoformat(v) if v else None
+
+    def watermark(self):
+        v = self._meta("watermark")
+        return datetime.fromisoformat(v) if v else None
+
+    # ── escritura / lectura ─────────────────────────────────────────────────
+    def upsert(self, orders, tocadas=None):
+        """Inserta o pisa por id. Acepta cualquier iterable (generador de páginas
+        aplanado); escribe en lotes. Devuelve cuántas órdenes escribió (las sin
+        created_at parseable se descartan). tocadas (set opcional) recibe la
+        fecha AR de creación de cada una."""
+        n = 0
+        lote = []
+        with self._con() as c:
+            for o in orders:
+                if not isinstance(o, dict) or o.get("id") is None:
+                    continue
+                ts = _ts(o.get("created_at"))
+                if ts is None:
+                    continue
+                if tocadas is not None:
+                    tocadas.add(datetime.fromtimestamp(ts, TZ_AR).date())
+                lote.append((int(o["id"]), ts, o.get("payment_status"), o.get("status"),
+                             o.get("updated_at"), json.dumps(o)))
+                if len(lote) >= 500:
+                    c.executemany(_UPSERT, lote)
+                    n += len(lote)
+                    lote = []
+            if lote:
+                c.executemany(_UPSERT, lote)
+                n += len(lote)
+        return n
+
+    def leer(self, desde, hasta):
+        """Generador de órdenes pagas creadas en [desde, hasta] (días AR), por
+        fecha. Las sin payment_status se incluyen; las canceladas no (aunque
+        sigan 'paid': los 3 combos de iter_tn_orders nunca las traen)."""
+        t0, t1 = _limites(desde, hasta)
+        with self._con() as c:
+            cur = c.execute(
+                "SELECT json FROM ordenes WHERE created_ts BETWEEN ? AND ? "
+                "AND (payment_status IS NULL OR payment_status = 'paid') "
+                "AND (status IS NULL OR status != 'cancelled') "
+                "ORDER BY created_ts, id", (t0, t1))
+            for (js,) in cur:
+                yield json.loads(js)
+
+    def cantidad(self):
+        with self._con() as c:
+            return c.execute("SELECT COUNT(*) FROM ordenes").fetchone()[0]
+
+    # ── sync ────────────────────────────────────────────────────────────────
+    def asegurar(self, desde, bajar_creadas, bajar_actualizadas, ahora=None,
+                 intervalo=INTERVALO_SYNC, estado=None):
+        """Deja el store al día para leer desde `desde` hasta hoy.
+
+        - Store vacío: baja todo lo creado en [desde, hoy] y fija el watermark
+          al instante previo al backfill (lo creado durante la bajada entra en
+          el próximo sync).
+        - `desde` anterior a cubierto_desde: baja solo el hueco.
+        - Siempre (a lo sumo cada `intervalo` s): baja las actualizadas desde
+          el watermark − SOLAPE_SYNC (cambios de estado, órdenes nuevas).
+
+        bajar_creadas(d0, d1, estado) y bajar_actualizadas(desde_iso_utc, estado)
+        devuelven iterables de órdenes crudas y, al agotarse, dejan
+        estado["completo"]. Si una bajada quedó parcial lo que trajo se guarda
+        igual, pero cubierto_desde / watermark no avanzan: el próximo
+        asegurar la repite. Devuelve el set de fechas AR de creación de las
+        órdenes que escribió (para invalidar caches aguas abajo).
+
+        estado (dict opcional): completo (False si alguna bajada de esta
+        pasada quedó parcial: lo leído del store puede estar incompleto) y
+        parciales (cuáles: "backfill", "hueco", "actualizadas")."""
+        ahora = ahora or datetime.now(timezone.utc)
+        desde = date.fromisoformat(str(desde)[:10])
+        hoy = ahora.astimezone(TZ_AR).date()
+        tocadas = set()
+        est = estado if estado is not None else {}
+        est.update(completo=True, parciales=[])
+
+        def _bajar(nombre, orders_de):
+            e = {}
+            self.upsert(orders_de(e), tocadas)
+            ok = e.get("completo", True)
+            if not ok:
+                est["completo"] = False
+                est["parciales"].append(nombre)
+            return ok
+
+        with self._lock:
+            cubierto = self.cubierto_desde()
+            wm = self.watermark()
+            if cubierto is None or wm is None:
+                if _bajar("backfill", lambda e: bajar_creadas(desde, hoy, e)):
+                    self._set_meta("cubierto_desde", desde.isoformat())
+                    self._set_meta("watermark", ahora.isoformat())
+                return tocadas
+            if desde < cubierto:
+                hasta_hueco = cubierto - timedelta(days=1)
+                if _bajar("hueco", lambda e: bajar_creadas(desde, hasta_hueco, e)):
+                    self._set_meta("cubierto_desde", desde.isoformat())
+            if (ahora - wm).total_seconds() >= intervalo:
+                desde_iso = (wm - SOLAPE_SYNC).isoformat()
+                if _bajar("actualizadas", lambda e: bajar_actualizadas(desde_iso, e)):
+                    self._set_meta("watermark", ahora.isoformat())
+        return tocadas
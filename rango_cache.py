@@ -0,0 +1,172 @@
+"""
+rango_cache.py — cache en memoria de órdenes procesadas por rango de fechas.
+
+Sin Streamlit: solo pandas. Testeable en aislamiento (patrón velocidad_restock).
+Un único cache para todos los loaders (período del sidebar, período anterior,
+histórico 730d, Audiencias 365d, slider de Reposición): guarda tramos
+[d0, d1] ya cargados y, ante un pedido, arma el resultado con los tramos que
+lo cubren y solo carga los huecos. Cada tramo vence según su propio TTL (lo
+reciente vence rápido, la historia cerrada dura) y el total está acotado en
+bytes con desalojo LRU. Con partes=n, cargar devuelve una tupla de n
+DataFrames con Fecha (órdenes + líneas de venta) y obtener otra igual.
+El lock cubre solo la contabilidad de tramos: cargar corre sin él.
+"""
+import threading
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+TTL_RECIENTE = 120        # s: tramos que tocan los últimos días (entran órdenes nuevas)
+TTL_HISTORICO = 3600      # s: tramos cerrados
+DIAS_RECIENTES = 2
+MAX_BYTES = 256 * 1024 * 1024
+
+
+def _d(x):
+    return x if isinstance(x, date) else date.fromisoformat(str(x)[:10])
+
+
+def _en_rango(fecha, desde, hasta):
+    if pd.api.types.is_datetime64_any_dtype(fecha):
+        return fecha.between(pd.Timestamp(desde), pd.Timestamp(hasta))
+    f = fecha.astype(str)
+    return (f >= desde.isoformat()) & (f <= hasta.isoformat())
+
+
+class RangoCache:
+    """cargar(d0, d1) → DataFrame con columna Fecha ('YYYY-MM-DD' o datetime64) dentro de
+    [d0, d1] (o tupla de `partes` DataFrames así). obtener(desde, hasta)
+    devuelve siempre DataFrames nuevos (el caller puede mutarlos), con las
+    filas en orden de tramo."""
+
+    def __init__(self, cargar, max_bytes=MAX_BYTES, ttl_reciente=TTL_RECIENTE,
+                 ttl_historico=TTL_HISTORICO, reloj=time.monotonic, hoy=date.today,
+                 partes=1):
+        self.cargar = cargar
+        self.partes = partes
+        self.max_bytes = max_bytes
+        self.ttl_reciente = ttl_reciente
+        self.ttl_historico = ttl_historico
+        self.reloj = reloj
+        self.hoy = hoy
+        self._lock = threading.RLock()
+        self._tramos = []   # dicts: d0, d1, dfs (tupla), vence, uso, bytes (sin solaparse)
+        self._version = 0   # sube con cada invalidar (cargas en vuelo no se guardan)
+        self.stats = {"hits": 0, "cargas": 0, "desalojos": 0}
+
+    def _ttl(self, d1):
+        reciente = d1 >= self.hoy() - timedelta(days=DIAS_RECIENTES)
+        return self.ttl_reciente if reciente else self.ttl_historico
+
+    def _huecos(self, desde, hasta):
+        """Sub-rangos de [desde, hasta] sin tramo vigente (tramos ya ordenados)."""
+        huecos = []
+        cursor = desde
+        for t in self._tramos:
+            if t["d1"] < cursor or t["d0"] > hasta:
+                continue
+            if t["d0"] > cursor:
+                huecos.append((cursor, t["d0"] - timedelta(days=1)))
+            cursor = max(cursor, t["d1"] + timedelta(days=1))
+            if cursor > hasta:
+                break
+        if cursor <= hasta:
+            huecos.append((cursor, hasta))
+        return huecos
+
+    def _purgar_vencidos(self, ahora):
+        self._tramos = [t for t in self._tramos if t["vence"] > ahora]
+
+    def _desalojar(self):
+        total = sum(t["bytes"] for t in self._tramos)
+        while total > self.max_bytes and len(self._tramos) > 1:
+            viejo = min(self._tramos, key=lambda t: t["uso"])
+            self._tramos.remove(viejo)
+            total -= viejo["bytes"]
+            self.stats["desalojos"] += 1
+
+    def bytes(self):
+        with self._lock:
+            return sum(t["bytes"] for t in self._tramos)
+
+    def tramos(self):
+        with self._lock:
+            return [(t["d0"], t["d1"]) for t in self._tramos]
+
+    def invalidar(self, fechas=None):
+        """Descarta todos los tramos, o solo los que contienen alguna de `fechas`."""
+        with self._lock:
+            self._version += 1
+            if fechas is None:
+                self._tramos = []
+                return
+            fechas = [_d(f) for f in fechas]
+            self._tramos = [t for t in self._tramos
+                            if not any(t["d0"] <= f <= t["d1"] for f in fechas)]
+
+    def _frames(self, cargado):
+        """Resultado de cargar → tupla de `partes` DataFrames (None = vacíos)."""
+        if self.partes == 1:
+            cargado = (cargado,)
+        elif cargado is None:
+            cargado = (None,) * self.partes
+        return tuple(pd.DataFrame() if df is None else df for df in cargado)
+
+    def _guardar(self, h0, h1, dfs, ahora):
+        """Agrega el tramo cargado [h0, h1]. Si mientras se cargaba otra
+        sesión guardó parte del rango, se guarda solo lo que sigue faltando
+        (los tramos no se solapan)."""
+        for s0, s1 in self._huecos(h0, h1):
+            sub = dfs if (s0, s1) == (h0, h1) else tuple(
+                df if df.empty else df[_en_rango(df["Fecha"], s0, s1)] for df in dfs)
+            self._tramos.append({
+                "d0": s0, "d1": s1, "dfs": sub, "vence": ahora + self._ttl(s1),
+                "uso": ahora, "bytes": sum(int(df.memory_usage(deep=True).sum())
+                                           for df in sub if not df.empty),
+            })
+            self._tramos.sort(key=lambda t: t["d0"])
+
+    def obtener(self, desde, hasta):
+        desde, hasta = _d(desde), _d(hasta)
+        piezas = []   # (d0, d1, dfs) que cubren [desde, hasta], sin solaparse
+        huecos = []
+        if hasta >= desde:
+            with self._lock:
+                ahora = self.reloj()
+                self._purgar_vencidos(ahora)
+                huecos = self._huecos(desde, hasta)
+                if not huecos:
+                    self.stats["hits"] += 1
+                for t in self._tramos:
+                    if t["d1"] < desde or t["d0"] > hasta:
+                        continue
+                    t["uso"] = ahora
+                    piezas.append((t["d0"], t["d1"], t["dfs"]))
+                version = self._version
+
+        # Los huecos se cargan sin el lock: una carga en frío de varios meses
+        # no frena los hits de las otras sesiones. Si en el medio se invalidó
+        # algo, lo cargado se devuelve pero no se guarda (puede ser viejo).
+        cargados = [(h0, h1, self._frames(self.cargar(h0, h1))) for h0, h1 in huecos]
+        if cargados:
+            with self._lock:
+                self.stats["cargas"] += len(cargados)
+                if self._version == version:
+                    ahora = self.reloj()
+                    for h0, h1, dfs in cargados:
+                        self._guardar(h0, h1, dfs, ahora)
+                    self._desalojar()
+            piezas = sorted(piezas + cargados, key=lambda p: p[0])
+
+        partes = [[] for _ in range(self.partes)]
+        for d0, d1, dfs in piezas:
+            recortar = d0 < desde or d1 > hasta
+            for i, df in enumerate(dfs):
+                if df.empty:
+                    continue
+                if recortar:
+                    df = df[_en_rango(df["Fecha"], desde, hasta)]
+                partes[i].append(df)
+        out = tuple(pd.concat(p, ignore_index=True) if p else pd.DataFrame() for p in partes)
+        return out[0] if self.partes == 1 else out
@@ -0,0 +1,347 @@
+"""
+resultado.py — resultado financiero del período (P&L): FUENTE ÚNICA DE VERDAD.
+
+Sin Streamlit: solo pandas. Testeable en aislamiento (patrón velocidad_restock).
+Toda solapa que muestre "resultado", "margen del período" o la cascada
+consume calcular_resultado_periodo. No copiar la fórmula inline en ninguna
+solapa nueva.
+
+El cálculo es columnar. El costo de productos de una orden sale del string
+"Productos" (nombres separados por " / ") y de Cantidad: se resuelve una vez
+por string distinto (y cada nombre una vez, vía costos.resolver_costos) y
+se aplica como lookup; el margen % es una operación de columnas. Los números
+son los mismos que fila por fila (costos.costo_final_row con apply), que
+queda como referencia en bench/referencias.py.
+
+Dashboard (período actual y anterior), Salud Financiera y el Analista IA
+piden el mismo P&L en cada rerun aunque solo haya cambiado un widget ajeno.
+resultado_periodo lo memoiza en CacheResultados: la clave es la huella de
+los insumos (contenido de df_tn, de CostosConsolas y de GastosFijos, fechas,
+tipo de cambio, IVA y pauta) y el cache desaloja por LRU con tope en bytes.
+Cambia cualquier insumo → otra clave; no hace falta invalidar a mano.
+
+Guardar un FOB en Costos de consolas cambia solo la huella de CostosConsolas.
+Si el cache tiene el resultado de la versión anterior con los demás insumos
+iguales, _parchear lo actualiza: claves cambiadas → nombres que matchean
+(costos.CostResolver.afectados) → strings de Productos → filas; re-costea
+esas filas y vuelve a sumar los agregados. Los números son los de
+calcular_resultado_periodo.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from costos import MAX_CAMBIADAS, huella_costos, resolver_costos
+from ordenes import _redondear
+
+# Copy-on-write: siempre en pandas 3; en 2.x solo con mode.copy_on_write.
+# Sin él, una copia liviana comparte los arrays y el caller podría
+# escribir en el guardado (df.loc[...] = ..., .iloc, .to_numpy()).
+_COW = int(pd.__version__.split(".")[0]) >= 3 or pd.get_option("mode.copy_on_write") is True
+MAX_BYTES = 64 * 1024 * 1024   # resultados memoizados (df_calc, memory_usage deep)
+
+
+def _dias_del_mes(d):
+    siguiente = (d.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return (siguiente - timedelta(days=1)).day
+
+
+def _insumos_costo(df):
+    """Lo que el costo de productos toma de df, sin CostosConsolas: código
+    de string de Productos por fila, nombres de cada string distinto,
+    Cantidad (truncada, 0 → 1) y el costo que reporta TN."""
+    productos = df["Productos"] if "Productos" in df else pd.Series("", index=df.index)
+    codigos, unicos = pd.factorize(productos, use_na_sentinel=False)
+    prods = [[p.strip() for p in str(u).split(" / ") if p.strip()] for u in unicos]
+    if "Cantidad" in df:
+        cant = np.trunc(df["Cantidad"].astype("float64").to_numpy())
+        cant = np.where(cant == 0, 1.0, cant)   # int(cantidad or 1)
+    else:
+        cant = np.ones(len(df))
+    if "Costo Productos ($)" in df:
+        costo_tn = df["Costo Productos ($)"].astype("float64").to_numpy()
+    else:
+        costo_tn = np.zeros(len(df))
+    return {"codigos": codigos, "prods": prods, "cant": cant, "costo_tn": costo_tn}
+
+
+def _costear_strings(prods, resolver, tipo_cambio, costos, indices):
+    """Llena costos = (es_unico, unitario_usd, fijo_ars) en las posiciones
+    indices. Un producto → costo unitario USD (se multiplica por Cantidad);
+    varios → suma ya en ARS (no usa Cantidad)."""
+    es_unico, unitario_usd, fijo_ars = costos
+    for i in indices:
+        ps = prods[i]
+        es_unico[i], unitario_usd[i], fijo_ars[i] = len(ps) == 1, 0.0, 0.0
+        if len(ps) == 1:
+            unitario_usd[i] = resolver.total(ps[0])
+        elif ps:
+            fijo_ars[i] = sum(resolver.total(p) * tipo_cambio for p in ps)
+
+
+def _costo_filas(ins, costos, tipo_cambio, filas=slice(None)):
+    """Costo ARS de las filas pedidas: redondeado a pesos; si da 0, el de TN."""
+    es_unico, unitario_usd, fijo_ars = costos
+    c = ins["codigos"][filas]
+    calc = np.where(es_unico[c], unitario_usd[c] * ins["cant"][filas] * tipo_cambio,
+                    fijo_ars[c])
+    return np.where(calc > 0, _redondear(calc, 0), _redondear(ins["costo_tn"][filas], 0))
+
+
+def _costear(df, tipo_cambio, resolver):
+    ins = _insumos_costo(df)
+    n = len(ins["prods"])
+    costos = (np.zeros(n, dtype=bool), np.zeros(n), np.zeros(n))
+    _costear_strings(ins["prods"], resolver, tipo_cambio, costos, range(n))
+    return ins, costos
+
+
+def costo_productos_ars(df, tipo_cambio, costos_gs=None):
+    """Costo de productos en ARS por orden, como costo_final_row: (FOB +
+    import) × TC de cada producto de CostosConsolas (× Cantidad si la orden
+    tiene un solo producto), redondeado a pesos; si da 0, el costo que
+    reporta TN. Devuelve una Series float64 con el índice de df."""
+    ins, costos = _costear(df, tipo_cambio, resolver_costos(costos_gs))
+    return pd.Series(_costo_filas(ins, costos, tipo_cambio), index=df.index, dtype="float64")
+
+
+def margen_pct(margen, total):
+    """round(margen / total × 100, 2) por fila; 0 si el total no es > 0."""
+    margen = np.asarray(margen, dtype=float)
+    total = np.asarray(total, dtype=float)
+    positivo = total > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = _redondear(np.where(positivo, margen / np.where(positivo, total, 1.0) * 100, 0.0), 2)
+    return np.where(positivo, pct, 0.0)
+
+
+def _agregados(df_calc, pct_iva, pauta, gastos):
+    facturacion_bruta = float(df_calc["Total ($)"].sum())
+    comisiones = float(df_calc["Comision PN ($)"].sum())
+    costo_productos = float(df_calc["Costo Productos ($)"].sum())
+    costo_envios = float(df_calc["Envio costo ($)"].sum())
+    costo_iva = facturacion_bruta * (float(pct_iva or 0) / 100)
+    margen_bruto = float(df_calc["Margen ($)"].sum())
+    resultado_final = margen_bruto - costo_iva - float(pauta or 0) - gastos["gastos_fijos_periodo"]
+
+    return {
+        "df_calc": df_calc, "facturacion_bruta": facturacion_bruta,
+        "comisiones": comisiones, "neto_cobrado": facturacion_bruta - comisiones,
+        "costo_productos": costo_productos, "costo_envios": costo_envios,
+        "costo_iva": costo_iva, "margen_bruto": margen_bruto, "pauta": float(pauta or 0),
+        **gastos,
+        "resultado_final": resultado_final,
+        "ordenes": int(len(df_calc)),
+    }
+
+
+def _gastos_fijos(fecha_desde, fecha_hasta, gastos_fijos_dict):
+    """Gastos fijos del mes prorrateados por los días reales del mes del período."""
+    dias_periodo = max((fecha_hasta - fecha_desde).days + 1, 1)
+    total_gastos_fijos_mes = sum(
+        v for v in gastos_fijos_dict.values() if isinstance(v, (int, float)) and v > 0
+    )
+    factor_prorrateo = dias_periodo / _dias_del_mes(fecha_desde)
+    return {
+        "gastos_fijos_mes": total_gastos_fijos_mes,
+        "gastos_fijos_periodo": round(total_gastos_fijos_mes * factor_prorrateo),
+        "dias_periodo": dias_periodo, "factor_prorrateo": factor_prorrateo,
+    }
+
+
+def _vacio(pauta, gastos):
+    return {
+        "df_calc": pd.DataFrame(), "facturacion_bruta": 0.0, "comisiones": 0.0,
+        "neto_cobrado": 0.0, "costo_productos": 0.0, "costo_envios": 0.0,
+        "costo_iva": 0.0, "margen_bruto": 0.0, "pauta": float(pauta or 0),
+        **gastos,
+        "resultado_final": -float(pauta or 0) - gastos["gastos_fijos_periodo"],
+        "ordenes": 0,
+    }
+
+
+def calcular_resultado_periodo(df_tn, fecha_desde, fecha_hasta, tipo_cambio,
+                               pct_iva, pauta, costos_gs=None, gastos_fijos_dict=None):
+    """Calcula el P&L completo del período a partir del df de órdenes TN.
+
+    Devuelve un dict con df_calc (columnas de costo/margen recalculadas con
+    CostosConsolas como source of truth) y todos los agregados, incluyendo
+    resultado_final = margen bruto − IVA − pauta − gastos fijos prorrateados.
+    Gastos fijos se prorratean por los días reales del mes del período.
+    """
+    return _calcular(df_tn, fecha_desde, fecha_hasta, tipo_cambio, pct_iva, pauta,
+                     costos_gs, gastos_fijos_dict)[0]
+
+
+def _calcular(df_tn, fecha_desde, fecha_hasta, tipo_cambio, pct_iva, pauta,
+              costos_gs, gastos_fijos_dict):
+    """calcular_resultado_periodo + el contexto del costeo (resolver usado,
+    insumos y costos por string) para parchear el resultado si después
+    cambia CostosConsolas (_parchear). Sin órdenes, contexto None."""
+    if costos_gs is None:
+        costos_gs = {}
+    gastos = _gastos_fijos(fecha_desde, fecha_hasta, gastos_fijos_dict or {})
+    if df_tn is None or df_tn.empty:
+        return _vacio(pauta, gastos), None
+
+    resolver = resolver_costos(costos_gs)
+    df_calc = df_tn.copy()
+    df_calc["Neto cobrado ($)"] = df_calc["Total ($)"] - df_calc["Comision PN ($)"]
+    ins, costos = _costear(df_calc, tipo_cambio, resolver)
+    df_calc["Costo Productos ($)"] = pd.Series(_costo_filas(ins, costos, tipo_cambio),
+                                               index=df_calc.index, dtype="float64")
+    df_calc["Margen ($)"] = (
+        df_calc["Neto cobrado ($)"] - df_calc["Costo Productos ($)"] - df_calc["Envio costo ($)"]
+    )
+    df_calc["Margen (%)"] = margen_pct(df_calc["Margen ($)"], df_calc["Total ($)"])
+    return _agregados(df_calc, pct_iva, pauta, gastos), {**ins, "resolver": resolver,
+                                                          "costos": costos}
+
+
+def _parchear(res, ctx, costos_gs, tipo_cambio, pct_iva, pauta, gastos):
+    """El resultado de _calcular con otra versión de CostosConsolas, a partir
+    del calculado con la anterior (res, ctx): re-costea solo los strings de
+    Productos con algún nombre que matchea una clave cambiada, actualiza
+    costo y margen de esas filas y vuelve a sumar los agregados. Mismo
+    resultado que _calcular; None si no se puede acotar (cambió el orden de
+    las claves o demasiadas claves)."""
+    if ctx is None:
+        return None
+    resolver = resolver_costos(costos_gs)
+    cambiadas = ctx["resolver"].claves_cambiadas(resolver)
+    if cambiadas is None or len(cambiadas) > MAX_CAMBIADAS:
+        return None
+    nombres = {p for ps in ctx["prods"] for p in ps}
+    afectados = resolver.afectados(nombres, cambiadas)
+    indices = [i for i, ps in enumerate(ctx["prods"]) if not afectados.isdisjoint(ps)]
+    costos = tuple(a.copy() for a in ctx["costos"])
+    _costear_strings(ctx["prods"], resolver, tipo_cambio, costos, indices)
+
+    df_calc = res["df_calc"].copy(deep=False)
+    filas = np.flatnonzero(np.isin(ctx["codigos"], indices))
+    if len(filas):
+        costo = df_calc["Costo Productos ($)"].to_numpy(dtype="float64", copy=True)
+        margen = df_calc["Margen ($)"].to_numpy(dtype="float64", copy=True)
+        pct = df_calc["Margen (%)"].to_numpy(dtype="float64", copy=True)
+        costo[filas] = _costo_filas(ctx, costos, tipo_cambio, filas)
+        margen[filas] = (df_calc["Neto cobrado ($)"].to_numpy()[filas] - costo[filas]
+                         - df_calc["Envio costo ($)"].to_numpy()[filas])
+        pct[filas] = margen_pct(margen[filas], df_calc["Total ($)"].to_numpy()[filas])
+        df_calc["Costo Productos ($)"] = costo
+        df_calc["Margen ($)"] = margen
+        df_calc["Margen (%)"] = pct
+    return _agregados(df_calc, pct_iva, pauta, gastos), {**ctx, "resolver": resolver,
+                                                          "costos": costos}
+
+
+def huella_df(df):
+    """Huella del contenido de un DataFrame: columnas, dtypes, índice y
+    valores (pd.util.hash_pandas_object). Es O(filas): ~1 ms cada 2k órdenes."""
+    if df is None or df.empty:
+        return "vacio" if df is None else f"vacio:{list(df.columns)}"
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+class CacheResultados:
+    """Resultados de calcular_resultado_periodo por huella de insumos, LRU
+    acotado en bytes (siempre queda al menos uno). Thread-safe: el cache es
+    de proceso y lo comparten las sesiones.
+
+    La clave es (base, versión): base = todo menos CostosConsolas, versión =
+    su huella. Si falta una clave y hay guardado otro resultado de la misma
+    base, se intenta parchear ese (una edición de costos) antes de calcular
+    de cero."""
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()   # clave → (resultado, contexto, bytes)
+        self.stats = {"hits": 0, "calculos": 0, "incrementales": 0, "desalojos": 0}
+
+    def obtener(self, clave, calcular, parchear=None):
+        """Resultado guardado para clave, o el de parchear(resultado, contexto)
+        sobre el último guardado de la misma base, o el de calcular(). Los
+        dos devuelven (resultado, contexto); parchear puede devolver None."""
+        with self._lock:
+            e = self._entradas.get(clave)
+            if e is not None:
+                self._entradas.move_to_end(clave)
+                self.stats["hits"] += 1
+                return e[0]
+            hermana = next((self._entradas[c] for c in reversed(self._entradas)
+                            if c[0] == clave[0]), None)
+        par = None
+        if parchear is not None and hermana is not None:
+            par = parchear(hermana[0], hermana[1])
+        tipo = "incrementales" if par is not None else "calculos"
+        res, ctx = par if par is not None else calcular()
+        nbytes = _bytes(res, ctx)
+        with self._lock:
+            self.stats[tipo] += 1
+            self._entradas[clave] = (res, ctx, nbytes)
+            self._entradas.move_to_end(clave)
+            total = sum(e[2] for e in self._entradas.values())
+            while total > self.max_bytes and len(self._entradas) > 1:
+                _, e = self._entradas.popitem(last=False)
+                total -= e[2]
+                self.stats["desalojos"] += 1
+        return res
+
+    def bytes(self):
+        with self._lock:
+            return sum(e[2] for e in self._entradas.values())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entradas)
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+
+def _bytes(res, ctx):
+    """df_calc (memory_usage deep) + los arrays del contexto. Un resultado
+    parcheado tiene la misma forma que el original: hereda la cuenta (lo que
+    comparten se cuenta dos veces)."""
+    if ctx is not None and "bytes" in ctx:
+        return ctx["bytes"]
+    df = res.get("df_calc")
+    n = int(df.memory_usage(deep=True).sum()) if df is not None and not df.empty else 0
+    if ctx is not None:
+        n += sum(a.nbytes for a in (ctx["codigos"], ctx["cant"], ctx["costo_tn"], *ctx["costos"]))
+        ctx["bytes"] = n
+    return n
+
+
+CACHE = CacheResultados()
+
+
+def resultado_periodo(df_tn, fecha_desde, fecha_hasta, tipo_cambio, pct_iva, pauta,
+                      costos_gs=None, gastos_fijos_dict=None, cache=None):
+    """calcular_resultado_periodo memoizado (mismos argumentos, mismo dict).
+    df_calc es una copia del guardado: liviana con copy-on-write, profunda
+    sin él (pandas 2.x). El caller puede modificarla sin tocar el cache. Si solo cambió CostosConsolas, se
+    parchean las filas afectadas del resultado anterior."""
+    cache = cache if cache is not None else CACHE
+    base = (
+        huella_df(df_tn),
+        json.dumps(gastos_fijos_dict or {}, sort_keys=True, default=str),
+        str(fecha_desde), str(fecha_hasta),
+        float(tipo_cambio), float(pct_iva or 0), float(pauta or 0),
+    )
+    gastos = _gastos_fijos(fecha_desde, fecha_hasta, gastos_fijos_dict or {})
+    res = cache.obtener(
+        (base, huella_costos(costos_gs)),
+        lambda: _calcular(df_tn, fecha_desde, fecha_hasta, tipo_cambio, pct_iva, pauta,
+                          costos_gs, gastos_fijos_dict),
+        lambda r, ctx: _parchear(r, ctx, costos_gs or {}, tipo_cambio, pct_iva, pauta, gastos))
+    return {**res, "df_calc": res["df_calc"].copy(deep=not _COW)}
@@ -0,0 +1,113 @@
+"""
+subcadenas.py — qué claves de una lista están dentro de un texto (y al revés).
+
+Sin Streamlit: solo stdlib. Testeable en aislamiento (patrón velocidad_restock).
+El matching por nombre (costos, marca) pregunta todo el tiempo "qué clave
+está contenida en este nombre" y "qué clave contiene a este nombre"; el
+recorrido clave por clave es O(claves × largo) por nombre.
+
+  IndiceSubcadenas      Aho-Corasick sobre las claves: todas las claves
+                        contenidas en el texto en una pasada sobre el texto.
+  IndiceContenedoras    las claves unidas por un separador: str.find (C)
+                        salta directo a cada clave que contiene al texto.
+
+Los dos devuelven posiciones en la lista original (en orden, sin repetir),
+así el que llama resuelve el desempate que ya tenía (la primera, la más
+larga, la primera con costo cargado, ...) sobre unas pocas candidatas.
+"""
+from bisect import bisect_right
+from collections import deque
+
+_SEP = "\x00"
+
+
+class IndiceSubcadenas:
+    """Aho-Corasick. contenidas(texto) → posiciones (ascendentes) de las
+    claves que son subcadena de texto. Claves repetidas → todas sus
+    posiciones; la clave vacía está contenida en cualquier texto."""
+
+    def __init__(self, claves):
+        self.claves = list(claves)
+        hijos = [{}]        # nodo → {caracter: nodo}
+        salida = [[]]       # nodo → posiciones de las claves que terminan ahí
+        for i, clave in enumerate(self.claves):
+            nodo = 0
+            for ch in clave:
+                sig = hijos[nodo].get(ch)
+                if sig is None:
+                    sig = len(hijos)
+                    hijos[nodo][ch] = sig
+                    hijos.append({})
+                    salida.append([])
+                nodo = sig
+            salida[nodo].append(i)
+
+        # Links de falla por BFS; la salida de cada nodo suma la de su falla
+        # (claves que son sufijo de la rama actual)
+        falla = [0] * len(hijos)
+        cola = deque(hijos[0].values())
+        while cola:
+            nodo = cola.popleft()
+            for ch, sig in hijos[nodo].items():
+                f = falla[nodo]
+                while f and ch not in hijos[f]:
+                    f = falla[f]
+                falla[sig] = hijos[f].get(ch, 0)
+                salida[sig] = salida[sig] + salida[falla[sig]]
+                cola.append(sig)
+        self._hijos = hijos
+        self._falla = falla
+        self._salida = [tuple(s) for s in salida]
+        self._vacias = self._salida[0]
+
+    def contenidas(self, texto):
+        hijos, falla, salida = self._hijos, self._falla, self._salida
+        vistas = set(self._vacias)
+        nodo = 0
+        for ch in texto:
+            while nodo and ch not in hijos[nodo]:
+                nodo = falla[nodo]
+            nodo = hijos[nodo].get(ch, 0)
+            if salida[nodo]:
+                vistas.update(salida[nodo])
+        return sorted(vistas)
+
+    def primera(self, texto):
+        """Posición de la primera clave (en orden de lista) contenida, o None."""
+        pos = self.contenidas(texto)
+        return pos[0] if pos else None
+
+
+class IndiceContenedoras:
+    """contienen(texto) → posiciones (ascendentes, lazy) de las claves que
+    contienen a texto. Las claves no pueden tener el separador (\\x00); un
+    texto que lo tenga no está en ninguna."""
+
+    def __init__(self, claves):
+        self.claves = list(claves)
+        self._inicios = []
+        pos = 0
+        for clave in self.claves:
+            self._inicios.append(pos)
+            pos += len(clave) + 1
+        self._unidas = _SEP.join(self.claves)
+
+    def contienen(self, texto):
+        if _SEP in texto or not self.claves:
+            return
+        unidas, inicios = self._unidas, self._inicios
+        desde = 0
+        while True:
+            j = unidas.find(texto, desde)
+            if j < 0:
+                return
+            i = bisect_right(inicios, j) - 1
+            yield i
+            # Siguiente clave: cada una se devuelve una sola vez
+            if i + 1 >= len(inicios):
+                return
+            desde = inicios[i + 1]
+
+    def primera(self, texto):
+        """Posición de la primera clave que contiene a texto, o None."""
+        return next(self.contienen(texto), None)
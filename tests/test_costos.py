@@ -0,0 +1,85 @@
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import random
+
+import costos
+from bench.bench_costos import nombres_sinteticos, tabla_costos_sintetica
+from bench.referencias import get_fob_usd_lineal, match_costo_entry_lineal
+
+
+def setup_function():
+    costos.invalidar_costos()
+
+
+def test_resolver_identico_a_lineal():
+    rng = random.Random(7)
+    tabla = tabla_costos_sintetica(150, rng)
+    nombres = nombres_sinteticos(tabla, 400, rng) + ["", "   ", "xx", "rg", "Miyoo Flip"]
+    for gs in (tabla, None):
+        for n in nombres:
+            fob, entrada = get_fob_usd_lineal(n, gs), match_costo_entry_lineal(n, gs)
+            assert costos.get_fob_usd(n, gs) == fob, n
+            assert costos._match_costo_entry(n, gs) == entrada, n
+            # Segunda vuelta: desde el memo
+            assert costos._match_costo_entry(n, gs) == entrada, n
+
+
+def test_misma_entrada_para_fob_import_y_total():
+    gs = {"_costo_kg_usd": 50,
+          "Consola Sin Fob": {"costo_total_usd": 80},
+          "Consola Sin Fob Pro": {"fob_usd": 100, "peso_kg": 0.5}}
+    assert costos._match_costo_entry("Consola Sin Fob Pro (Negro)", gs) == (100.0, 25.0, 125.0)
+    # La de FOB 0 queda de fallback solo si no hay nada mejor
+    assert costos._match_costo_entry("consola sin fob", gs) == (100.0, 25.0, 125.0)
+    assert costos.get_costo_total_usd("Nada Que Ver", gs) == 0.0
+
+
+def test_invalidar_ve_ediciones_in_place():
+    gs = {"Consola Test": {"fob_usd": 10, "peso_kg": 1}}
+    assert costos.get_fob_usd("Consola Test", gs) == 10.0
+    gs["Consola Test"]["fob_usd"] = 20
+    assert costos.get_fob_usd("Consola Test", gs) == 10.0   # mismo dict: cacheado
+    costos.invalidar_costos()
+    assert costos.get_fob_usd("Consola Test", gs) == 20.0
+    assert costos._match_costo_entry("Consola Test", gs) == (20.0, 65.0, 85.0)
+
+
+def test_mismo_contenido_reusa_resolver():
+    tabla = tabla_costos_sintetica(50, random.Random(3))
+    r = costos.resolver_costos(tabla)
+    assert costos.resolver_costos(tabla) is r
+    assert costos.resolver_costos(dict(tabla)) is r          # gs_read: dict nuevo, mismo contenido
+    otra = dict(tabla, **{"Otra Consola": {"fob_usd": 1}})
+    assert costos.resolver_costos(otra) is not r
+
+
+def test_resolver_nuevo_hereda_memo_sin_cambiar_resultados():
+    rng = random.Random(11)
+    tabla = tabla_costos_sintetica(150, rng)
+    nombres = nombres_sinteticos(tabla, 400, rng)
+    claves = [k for k, v in tabla.items() if isinstance(v, dict)]
+    anterior = costos.resolver_costos(tabla)
+    for n in nombres:
+        anterior.fob(n), anterior.entrada(n)
+    for paso in range(20):
+        tabla = {k: dict(v) if isinstance(v, dict) else v for k, v in tabla.items()}
+        k = rng.choice(claves)
+        if paso % 3 == 0:
+            tabla[k]["fob_usd"] = rng.choice([0, round(rng.uniform(1, 400), 2)])
+        elif paso % 3 == 1:
+            tabla.pop(k)
+            tabla[k.split()[0] + " " + k.split()[1]] = {"fob_usd": 77.0}
+            claves = [c for c, v in tabla.items() if isinstance(v, dict)]
+        else:
+            tabla[k] = {"costo_total_usd": rng.uniform(10, 99)}
+        nuevo = costos.CostResolver(tabla)
+        assert nuevo.heredar(anterior) > 0, paso
+        fresco = costos.CostResolver(tabla)
+        for n in nombres:
+            assert (nuevo.fob(n), nuevo.entrada(n)) == (fresco.fob(n), fresco.entrada(n)), (paso, n)
+        anterior = nuevo
+
+    # Cambia el orden relativo de las claves que quedan: no hereda nada
+    reordenada = dict(reversed(list(tabla.items())))
+    assert costos.CostResolver(reordenada).heredar(anterior) == 0
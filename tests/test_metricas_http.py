@@ -0,0 +1,80 @@
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from metricas_http import ClienteMedido, RegistroHTTP, medir, plantilla, servicio_de
+
+
+def test_plantilla_saca_ids_y_query():
+    assert plantilla("products/123/variants/9") == "products/{id}/variants/{id}"
+    assert plantilla("/v19.0/act_55/insights?fields=spend") == "v19.0/act_{id}/insights"
+    assert plantilla("https://api.mercadopago.com/v1/payments/156885323147") == "v1/payments/{id}"
+    assert plantilla("orders") == "orders"
+
+
+def test_servicio_de_host():
+    assert servicio_de("https://graph.facebook.com/v19.0/act_1/insights") == "meta"
+    assert servicio_de("https://api.mercadopago.com/v1/payments/search") == "mp"
+    assert servicio_de("http://127.0.0.1:9000/x") == "127.0.0.1"
+    assert servicio_de("http://127.0.0.1:9000/x", "tn") == "tn"
+    # stand-in local: el servicio sale del primer segmento del path
+    assert servicio_de("http://127.0.0.1:8765/mp/v1/payments/search") == "mp"
+    assert servicio_de("http://127.0.0.1:8765/v1/6623036/orders") == "tn"
+
+
+def test_registro_agrupa_por_endpoint_y_calcula_percentiles():
+    reg = RegistroHTTP(ventana=100, reloj=lambda: 0)
+    for i in range(1, 101):
+        reg.registrar("tn", "get", f"products/{i}", 200, i / 1000, bytes_=10)
+    reg.registrar("tn", "GET", "orders", 429, 0.5, reintentos=2, espera=3.0)
+    reg.registrar("tn", "GET", "orders", 0, 0.1)
+    reg.registrar("tn", "GET", "orders", 200, 0.2, cache="hit")
+    filas = {f["endpoint"]: f for f in reg.resumen()}
+    prod = filas["products/{id}"]
+    assert prod["llamadas"] == 100 and prod["bytes"] == 1000 and prod["method"] == "GET"
+    assert prod["p50_ms"] == 50.5 and prod["p99_ms"] == 99.0
+    orders = filas["orders"]
+    assert orders["errores"] == 2 and orders["n_429"] == 1 and orders["reintentos"] == 2
+    assert orders["cache_hits"] == 1 and orders["ultimo_status"] == 200
+    # orden por tiempo total: products 5.05 s > orders 0.8 s + 3 s de espera
+    assert reg.resumen()[0]["endpoint"] == "products/{id}"
+    (tn,) = reg.por_servicio()
+    assert tn["llamadas"] == 103 and tn["espera"] == 3.0
+
+
+def test_ventana_acota_latencias():
+    reg = RegistroHTTP(ventana=3)
+    for s in (10.0, 0.001, 0.001, 0.001):
+        reg.registrar("mp", "GET", "x", 200, s)
+    (f,) = reg.resumen()
+    assert f["llamadas"] == 4 and f["p99_ms"] == 1.0
+
+
+def test_medir_registra_errores_y_propaga():
+    reg = RegistroHTTP()
+    with medir("ga4", "RPC", "run_report", reg) as m:
+        m.bytes = 42
+    try:
+        with medir("ga4", "RPC", "run_report", reg):
+            raise RuntimeError("cuota")
+        assert False, "medir no debe tragarse la excepcion"
+    except RuntimeError:
+        pass
+    (f,) = reg.resumen()
+    assert f["llamadas"] == 2 and f["errores"] == 1 and f["bytes"] == 42
+
+
+def test_cliente_medido_envuelve_metodos():
+    class Falso:
+        propiedad = "x"
+
+        def run_report(self, req):
+            return {"filas": req}
+
+    reg = RegistroHTTP()
+    c = ClienteMedido(Falso(), "ga4", reg)
+    assert c.run_report(3) == {"filas": 3}
+    assert c.propiedad == "x"
+    (f,) = reg.resumen()
+    assert (f["servicio"], f["method"], f["endpoint"], f["ultimo_status"]) == \
+        ("ga4", "RPC", "run_report", 200)
+
@@ -0,0 +1,206 @@
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import random
+
+import pandas as pd
+
+import tn_client
+from bench.referencias import filas_por_producto_por_fila, procesar_orders_por_fila
+from bench.servidor_local import orden_sintetica
+from ordenes import (
+    CAMPOS_ORDEN, COLUMNAS_FILAS, COLUMNAS_ITEMS, _a_fecha, _redondear, filas_por_producto,
+    items_de, procesar_orders, procesar_orders_con_filas, procesar_orders_con_items, promedio_ponderado,
+    tasa_pasarela, tipar_ordenes,
+)
+from velocidad_restock import explotar_items
+
+
+def _orden(i, gateway="pago-nube", metodo="credit_card", cuotas=1):
+    return {
+        "id": i, "number": 100 + i, "created_at": "2026-05-10T15:00:00-0300",
+        "contact_name": "Ana", "gateway": gateway,
+        "payment_details": {"method": metodo, "installments": cuotas},
+        "total": "100000", "discount": "0", "shipping_cost_owner": "5000",
+        "billing_province": "Córdoba", "billing_city": "Córdoba",
+        "shipping_status": "shipped", "status": "closed",
+        "products": [{"name": {"es": "Miyoo Flip (Negro)"}, "quantity": 2, "cost": "20000",
+                      "price": "50000", "variant_values": [{"es": "Negro"}]}],
+    }
+
+
+def test_procesar_orders_acepta_generador():
+    df = procesar_orders(_orden(i) for i in range(3))
+    assert len(df) == 3
+    r = df.iloc[0]
+    assert r["Fecha"] == pd.Timestamp("2026-05-10")
+    assert r["Productos"] == "Miyoo Flip (Negro)" and r["Cantidad"] == 2
+    assert r["Costo Productos ($)"] == 40000.0
+    assert r["Pasarela"] == "PN"
+    assert "Items" not in df.columns
+
+
+def test_items_una_fila_por_linea_de_venta():
+    o = _orden(1)
+    o["products"].append({"name": "Trimui Brick", "quantity": None, "cost": None,
+                          "price": "90000", "variant_values": ["Gris", "64GB"]})
+    df, items = procesar_orders_con_items([o, _orden(2)])
+    assert list(items.columns) == COLUMNAS_ITEMS
+    assert items.to_dict("records")[:2] == [
+        {"Orden": 101, "Fecha": pd.Timestamp("2026-05-10"), "Producto": "Miyoo Flip (Negro)",
+         "Variante": "Negro", "Cantidad": 2, "Precio ($)": 50000.0, "Costo": 20000.0},
+        {"Orden": 101, "Fecha": pd.Timestamp("2026-05-10"), "Producto": "Trimui Brick",
+         "Variante": "Gris / 64GB", "Cantidad": 1, "Precio ($)": 90000.0, "Costo": 0.0},
+    ]
+    assert items_de(items, df[df["Orden"] == 102])["Orden"].tolist() == [102]
+    # mismo tipo de Fecha que el df de órdenes
+    assert items["Fecha"].dtype == df["Fecha"].dtype == "datetime64[s]"
+    vacio_df, vacio_items = procesar_orders_con_items([])
+    assert vacio_df.empty and list(vacio_items.columns) == COLUMNAS_ITEMS
+    # un tramo vacío no le cambia el tipo a Fecha al concatenar
+    assert pd.concat([vacio_items, items])["Fecha"].dtype == "datetime64[s]"
+
+
+def test_filas_por_producto_una_fila_por_linea_con_unidades():
+    o = _orden(1)
+    o["shipping_cost_customer"] = "10000"     # neto de productos: 90000 de 100000
+    filas = filas_por_producto([o])
+    assert list(filas.columns) == COLUMNAS_FILAS and len(filas) == 1
+    f = filas.iloc[0]
+    assert f["Unidades"] == 2 and f["Precio ($)"] == 50000
+    assert f["Precio neto ($)"] == 45000 and f["Descuento ($)"] == 5000
+    assert f["Envío ($)"] == 2500              # 5000 de la orden entre 2 unidades
+    assert f["Medio de Pago"] == "Credito contado" and f["Fecha"] == pd.Timestamp("2026-05-10")
+
+
+def test_promedio_ponderado_igual_a_una_fila_por_unidad():
+    rng = random.Random(3)
+    filas = [{"Producto": rng.choice("ABC"), "Medio": rng.choice(["x", "y"]),
+              "Unidades": rng.randint(1, 20), "Precio": rng.uniform(1, 1000),
+              "Margen (%)": rng.uniform(-10, 40)} for _ in range(200)]
+    por_unidad = pd.DataFrame([f for f in filas for _ in range(f["Unidades"])])
+    esperado = por_unidad.groupby(["Producto", "Medio"]).agg(
+        Unidades=("Precio", "count"), Precio=("Precio", "mean"),
+        Margen=("Margen (%)", "mean")).reset_index()
+    pond = promedio_ponderado(pd.DataFrame(filas), ["Producto", "Medio"], ["Precio", "Margen (%)"])
+    assert list(pond.columns) == ["Producto", "Medio", "Unidades", "Precio", "Margen (%)"]
+    assert pond["Unidades"].tolist() == esperado["Unidades"].tolist()
+    assert (pond["Precio"] - esperado["Precio"]).abs().max() < 1e-9
+    assert (pond["Margen (%)"] - esperado["Margen"]).abs().max() < 1e-9
+
+
+def test_procesar_orders_vacio():
+    assert procesar_orders(iter([])).empty
+
+
+def test_tasa_pasarela_mp_por_cuotas():
+    assert tasa_pasarela("mercadopago", "credit_card", 6) == 0.1656
+    assert tasa_pasarela("mercadopago", "bank_transfer", 1) == 0.0
+
+
+def test_campos_orden_alcanzan_para_procesar_orders():
+    ordenes = [orden_sintetica(i) for i in range(200)]
+    completo = procesar_orders(ordenes)
+    recortado = procesar_orders(tn_client.proyectar(ordenes, CAMPOS_ORDEN))
+    assert completo.equals(recortado)
+
+
+def _orden_rara(i, rng):
+    """Orden con las variantes que se ven en el payload real (y algunas rotas)."""
+    o = {
+        "id": i,
+        "number": rng.choice([100 + i, 100 + i, None]),
+        "created_at": rng.choice([
+            f"2026-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}T0{rng.randint(0, 9)}:30:00-0300",
+            "2026-05-10T23:59:59+0000", "2026-05-10", "2026-02-30T10:00:00-0300",
+            "10/05/2026", "", None]),
+        "contact_name": rng.choice(["Ana", None, ""]),
+        "gateway": rng.choice(["pago-nube", "mercadopago", "Mercado Pago", "offline",
+                               "", None, "a convenir", "mp"]),
+        "payment_details": rng.choice([
+            {"method": rng.choice(["credit_card", "debit_card", "bank_transfer", "wire",
+                                   "account_money", "custom_cash", "", None]),
+             "installments": rng.choice([None, 0, 1, 2, 3, 6, 9, 12, "3"])},
+            {"installments": 3}, None, "raro"]),
+        "total": rng.choice([f"{rng.randint(0, 900000) / 100:.2f}", "0", "-150.5",
+                             str(rng.randint(1, 9) * 100005)]),
+        "discount": rng.choice(["0", None, "1500.25"]),
+        "shipping_cost_owner": rng.choice(["0", None, "8000", "7350.33"]),
+        "shipping_cost_customer": rng.choice(["0", None, "2500.75"]),
+        "billing_province": rng.choice([" Córdoba ", None]),
+        "billing_city": rng.choice(["Rosario", None, ""]),
+        "shipping_address": rng.choice([{"city": " Mendoza "}, None, "x"]),
+        "shipping_status": rng.choice(["shipped", None]),
+        "status": "closed",
+        "app_id": rng.choice([None, 1234, ""]),
+        "products": [{
+            "name": rng.choice([{"es": "Miyoo Flip"}, {"pt": "Trimui"}, "R36S", None, {}]),
+            "quantity": rng.choice([1, 2, None, "3"]),
+            "cost": rng.choice(["20000.10", None, "0", "33333.335"]),
+            "price": rng.choice([None, "0", "45000.5", str(rng.randint(1, 90000))]),
+        } for _ in range(rng.randint(0, 4))],
+    }
+    if rng.random() < 0.1:
+        del o["products"]
+    return o
+
+
+def test_procesar_orders_columnar_identico_a_fila_por_fila():
+    rng = random.Random(7)
+    ordenes = [_orden_rara(i, rng) for i in range(3000)] + [orden_sintetica(i) for i in range(500)]
+    df, items = procesar_orders_con_items(iter(ordenes))
+    ref = procesar_orders_por_fila(ordenes)
+    pd.testing.assert_frame_equal(df, tipar_ordenes(ref.drop(columns="Items")))
+    # las líneas de venta son las mismas que explotaba velocidad_restock
+    lineas = explotar_items(ref)
+    pd.testing.assert_frame_equal(items[["Fecha", "Producto", "Cantidad", "Costo"]],
+                                  lineas.assign(Fecha=_a_fecha(lineas["Fecha"])))
+
+
+def test_filas_por_producto_identico_a_orden_por_orden():
+    rng = random.Random(11)
+    ordenes = [_orden_rara(i, rng) for i in range(3000)] + [orden_sintetica(i) for i in range(500)]
+    df, items, filas = procesar_orders_con_filas(iter(ordenes))
+    ref = pd.DataFrame(filas_por_producto_por_fila(ordenes), columns=COLUMNAS_FILAS)
+    ref["Fecha"] = _a_fecha(ref["Fecha"])
+    pd.testing.assert_frame_equal(filas, ref)
+    # la misma pasada da las mismas órdenes y líneas que procesar_orders_con_items
+    df2, items2 = procesar_orders_con_items(ordenes)
+    pd.testing.assert_frame_equal(df, df2)
+    pd.testing.assert_frame_equal(items, items2)
+
+
+def test_procesar_orders_sin_totales_positivos_margen_float():
+    ordenes = [dict(_orden(i), total="0") for i in range(3)]
+    df = procesar_orders(ordenes)
+    assert str(df["Margen (%)"].dtype) == "float64"
+    pd.testing.assert_frame_equal(df, tipar_ordenes(
+        procesar_orders_por_fila(ordenes).drop(columns="Items")))
+
+
+def test_tipos_compactos_y_escribibles():
+    rng = random.Random(5)
+    ordenes = [_orden_rara(i, rng) for i in range(300)]
+    df = procesar_orders(ordenes)
+    assert str(df["Orden"].dtype) == "Int64" and df["Orden"].isna().any()
+    assert str(df["Cuotas"].dtype) == "Int16" and str(df["Cantidad"].dtype) == "Int32"
+    assert str(df["Fecha"].dtype) == "datetime64[s]" and df["Fecha"].isna().any()   # '' → NaT
+    for col in ("Medio de Pago", "Provincia", "Estado Envio", "Canal", "Metodo raw"):
+        assert isinstance(df[col].dtype, pd.CategoricalDtype), col
+    # match_mp_with_tn y las órdenes en efectivo escriben en cualquier fila
+    df.at[0, "Pasarela"] = "Efectivo"
+    df.at[1, "Cuotas"] = 6
+    assert df.loc[0, "Pasarela"] == "Efectivo" and df.loc[1, "Cuotas"] == 6
+    # el concat de tramos con categorías distintas se vuelve a tipar igual
+    junto = pd.concat([df.iloc[:10].astype({"Provincia": str}), df.iloc[10:]],
+                      ignore_index=True)
+    pd.testing.assert_frame_equal(tipar_ordenes(junto), df)
+    assert df.memory_usage(deep=True).sum() < procesar_orders_por_fila(
+        ordenes).drop(columns="Items").memory_usage(deep=True).sum()
+
+
+def test_redondear_igual_a_round():
+    rng = random.Random(1)
+    xs = [rng.uniform(-1e7, 1e7) for _ in range(20000)] + \
+         [k / 1000 for k in range(-20000, 20000, 5)] + [0.125, 2.675, 1.005, 0.285]
+    assert _redondear(xs).tolist() == [round(x, 2) for x in xs]
@@ -0,0 +1,130 @@
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import json
+import sqlite3
+from datetime import date, datetime, timedelta, timezone
+
+from ordenes_store import OrdenesStore
+
+
+def _o(i, created, status="paid"):
+    return {"id": i, "created_at": created, "payment_status": status, "total": str(i)}
+
+
+AHORA = datetime(2026, 5, 20, 15, 0, tzinfo=timezone.utc)
+
+
+class _TN:
+    """Fake de TN: registra qué rangos se pidieron."""
+    def __init__(self, ordenes):
+        self.ordenes = ordenes
+        self.creadas, self.actualizadas = [], []
+        self.cambios = []
+        self.completo = True
+
+    def bajar_creadas(self, d0, d1, estado):
+        self.creadas.append((d0, d1))
+        estado["completo"] = self.completo
+        return [o for o in self.ordenes
+                if d0.isoformat() <= o["created_at"][:10] <= d1.isoformat()]
+
+    def bajar_actualizadas(self, desde_iso, estado):
+        self.actualizadas.append(desde_iso)
+        estado["completo"] = self.completo
+        return list(self.cambios)
+
+
+def test_store_frio_baja_rango_y_lee_por_fecha(tmp_path):
+    tn = _TN([_o(1, "2026-05-01T10:00:00-0300"), _o(2, "2026-05-10T10:00:00-0300"),
+              _o(3, "2026-05-15T10:00:00-0300")])
+    st = OrdenesStore(str(tmp_path / "o.sqlite"))
+    st.asegurar(date(2026, 5, 1), tn.bajar_creadas, tn.bajar_actualizadas, ahora=AHORA)
+    assert tn.creadas == [(date(2026, 5, 1), date(2026, 5, 20))]
+    assert [o["id"] for o in st.leer("2026-05-05", "2026-05-15")] == [2, 3]
+    assert st.cubierto_desde() == date(2026, 5, 1)
+
+
+def test_store_solo_baja_hueco_y_actualizadas(tmp_path):
+    tn = _TN([_o(1, "2026-04-01T10:00:00-0300"), _o(2, "2026-05-10T10:00:00-0300")])
+    st = OrdenesStore(str(tmp_path / "o.sqlite"))
+    st.asegurar("2026-05-01", tn.bajar_creadas, tn.bajar_actualizadas, ahora=AHORA)
+    tn.cambios = [_o(2, "2026-05-10T10:00:00-0300", status="refunded"),
+                  _o(4, "2026-05-20T09:00:00-0300")]
+    luego = AHORA + timedelta(minutes=5)
+    tocadas = st.asegurar("2026-03-15", tn.bajar_creadas, tn.bajar_actualizadas, ahora=luego)
+    assert tocadas == {date(2026, 4, 1), date(2026, 5, 10), date(2026, 5, 20)}
+    assert tn.creadas[-1] == (date(2026, 3, 15), date(2026, 4, 30))
+    assert tn.actualizadas == [(AHORA - timedelta(minutes=10)).isoformat()]
+    # la 2 pasó a reembolsada → ya no se lee; la 4 es nueva
+    assert [o["id"] for o in st.leer("2026-03-15", "2026-05-20")] == [1, 4]
+
+
+def test_store_no_resincroniza_antes_del_intervalo(tmp_path):
+    tn = _TN([])
+    st = OrdenesStore(str(tmp_path / "o.sqlite"))
+    st.asegurar("2026-05-01", tn.bajar_creadas, tn.bajar_actualizadas, ahora=AHORA)
+    st.asegurar("2026-05-01", tn.bajar_creadas, tn.bajar_actualizadas,
+                ahora=AHORA + timedelta(seconds=30))
+    assert tn.actualizadas == []
+    assert len(tn.creadas) == 1
+
+
+def test_store_upsert_idempotente(tmp_path):
+    st = OrdenesStore(str(tmp_path / "o.sqlite"))
+    st.upsert([_o(1, "2026-05-01T10:00:00-0300")])
+    st.upsert(iter([_o(1, "2026-05-01T10:00:00-0300"), {"sin": "id"}]))
+    assert st.cantidad() == 1
+
+
+def test_store_bajada_parcial_no_avanza_cobertura(tmp_path):
+    tn = _TN([_o(1, "2026-05-10T10:00:00-0300")])
+    tn.completo = False
+    st = OrdenesStore(str(tmp_path / "o.sqlite"))
+    est = {}
+    st.asegurar("2026-05-01", tn.bajar_creadas, tn.bajar_actualizadas, ahora=AHORA,
+                estado=est)
+    assert st.cantidad() == 1          # lo que llegó se guarda
+    assert st.cubierto_desde() is None  # pero el rango se vuelve a pedir
+    assert est == {"completo": False, "parciales": ["backfill"]}
+    tn.completo = True
+    st.asegurar("2026-05-01", tn.bajar_creadas, tn.bajar_actualizadas, ahora=AHORA,
+                estado=est)
+    assert len(tn.creadas) == 2 and st.cubierto_desde() == date(2026, 5, 1)
+    assert est["completo"]
+
+
+def test_store_excluye_canceladas_aunque_sigan_pagas(tmp_path):
+    tn = _TN([_o(1, "2026-05-10T10:00:00-0300"), _o(2, "2026-05-11T10:00:00-0300")])
+    st = OrdenesStore(str(tmp_path / "o.sqlite"))
+    st.asegurar("2026-05-01", tn.bajar_creadas, tn.bajar_actualizadas, ahora=AHORA)
+    # El sync de actualizadas trae la 2 cancelada con el pago todavía 'paid'
+    tn.cambios = [{**_o(2, "2026-05-11T10:00:00-0300"), "status": "cancelled"}]
+    st.asegurar("2026-05-01", tn.bajar_creadas, tn.bajar_actualizadas,
+                ahora=AHORA + timedelta(minutes=5))
+    assert [o["id"] for o in st.leer("2026-05-01", "2026-05-20")] == [1]
+
+
+def test_store_descarta_ordenes_sin_fecha(tmp_path):
+    st = OrdenesStore(str(tmp_path / "o.sqlite"))
+    assert st.upsert([_o(1, "2026-05-01T10:00:00-0300"), _o(2, None), _o(3, "ayer")]) == 1
+    # No aparecen en todos los rangos (duplicadas entre tramos del RangoCache)
+    assert [o["id"] for o in st.leer("2026-05-01", "2026-05-01")] == [1]
+    assert list(st.leer("2026-06-01", "2026-06-30")) == []
+
+
+def test_store_viejo_sin_columna_status_se_migra(tmp_path):
+    ruta = str(tmp_path / "o.sqlite")
+    c = sqlite3.connect(ruta)
+    c.execute("""CREATE TABLE ordenes (id INTEGER PRIMARY KEY, created_ts INTEGER,
+                 payment_status TEXT, updated_at TEXT, json TEXT NOT NULL)""")
+    ts = int(datetime(2026, 5, 10, 13, tzinfo=timezone.utc).timestamp())
+    c.executemany("INSERT INTO ordenes VALUES (?, ?, 'paid', NULL, ?)", [
+        (1, ts, json.dumps({"id": 1, "status": "open"})),
+        (2, ts, json.dumps({"id": 2, "status": "cancelled"})),
+        (3, None, json.dumps({"id": 3}))])
+    c.commit()
+    c.close()
+    st = OrdenesStore(ruta)
+    assert [o["id"] for o in st.leer("2026-05-01", "2026-05-31")] == [1]
+    assert st.cantidad() == 2
@@ -0,0 +1,166 @@
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import threading
+from datetime import date, timedelta
+
+import pandas as pd
+
+from rango_cache import RangoCache
+
+HOY = date(2026, 6, 30)
+
+
+class _Fuente:
+    """Una orden por día; registra qué rangos se cargaron."""
+    def __init__(self):
+        self.pedidos = []
+
+    def __call__(self, d0, d1):
+        self.pedidos.append((d0, d1))
+        dias = [(d0 + timedelta(days=i)).isoformat() for i in range((d1 - d0).days + 1)]
+        return pd.DataFrame({"Fecha": dias, "Total ($)": [1.0] * len(dias)})
+
+
+class _Reloj:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+def _cache(**kw):
+    fuente, reloj = _Fuente(), _Reloj()
+    c = RangoCache(fuente, reloj=reloj, hoy=lambda: HOY, **kw)
+    return c, fuente, reloj
+
+
+def test_subrango_cubierto_no_vuelve_a_cargar():
+    c, fuente, _ = _cache()
+    c.obtener("2026-01-01", "2026-06-30")
+    df = c.obtener("2026-06-01", "2026-06-30")
+    assert len(fuente.pedidos) == 1
+    assert list(df["Fecha"])[0] == "2026-06-01" and len(df) == 30
+
+
+def test_solo_carga_los_huecos_y_ordena():
+    c, fuente, _ = _cache()
+    c.obtener("2026-03-01", "2026-03-31")
+    df = c.obtener("2026-02-15", "2026-04-10")
+    assert fuente.pedidos[1:] == [(date(2026, 2, 15), date(2026, 2, 28)),
+                                  (date(2026, 4, 1), date(2026, 4, 10))]
+    assert list(df["Fecha"]) == sorted(df["Fecha"])
+    assert len(df) == (date(2026, 4, 10) - date(2026, 2, 15)).days + 1
+
+
+def test_ttl_por_tramo_reciente_vence_antes():
+    c, fuente, reloj = _cache(ttl_reciente=60, ttl_historico=3600)
+    c.obtener("2026-01-01", "2026-01-31")     # histórico
+    c.obtener("2026-06-01", "2026-06-30")     # toca hoy → reciente
+    reloj.t = 120
+    c.obtener("2026-01-01", "2026-06-30")
+    # enero sigue vigente; el hueco feb-may se une con junio (vencido)
+    assert fuente.pedidos[2:] == [(date(2026, 2, 1), date(2026, 6, 30))]
+
+
+def test_desalojo_lru_por_bytes():
+    c, fuente, reloj = _cache(max_bytes=1)
+    c.obtener("2026-01-01", "2026-01-31")
+    reloj.t = 1
+    c.obtener("2026-02-01", "2026-02-28")
+    assert c.tramos() == [(date(2026, 2, 1), date(2026, 2, 28))]
+    assert c.stats["desalojos"] == 1
+
+
+def test_resultado_es_copia_mutable():
+    c, _, _ = _cache()
+    df = c.obtener("2026-01-01", "2026-01-10")
+    df["Total ($)"] = 0.0
+    assert c.obtener("2026-01-01", "2026-01-10")["Total ($)"].sum() == 10.0
+
+
+def test_invalidar_solo_tramos_tocados():
+    c, fuente, _ = _cache()
+    c.obtener("2026-01-01", "2026-01-31")
+    c.obtener("2026-06-01", "2026-06-30")
+    c.invalidar([date(2026, 6, 29)])
+    assert c.tramos() == [(date(2026, 1, 1), date(2026, 1, 31))]
+
+
+def test_partes_cachea_ordenes_e_items_juntos():
+    fuente = _Fuente()
+
+    def cargar(d0, d1):
+        df = fuente(d0, d1)
+        items = pd.DataFrame({"Fecha": list(df["Fecha"]) * 2, "Cantidad": 1})
+        return df, items
+    c = RangoCache(cargar, reloj=_Reloj(), hoy=lambda: HOY, partes=2)
+    df, items = c.obtener("2026-01-01", "2026-01-31")
+    df2, items2 = c.obtener("2026-01-10", "2026-01-19")
+    assert len(df) == 31 and len(items) == 62
+    assert len(df2) == 10 and len(items2) == 20
+    assert fuente.pedidos == [(date(2026, 1, 1), date(2026, 1, 31))]
+    vacio = c.obtener("2026-02-10", "2026-02-01")
+    assert isinstance(vacio, tuple) and all(x.empty for x in vacio)
+
+
+def test_recorta_fecha_datetime():
+    fuente = _Fuente()
+
+    def cargar(d0, d1):
+        df = fuente(d0, d1)
+        return df.assign(Fecha=pd.to_datetime(df["Fecha"]).astype("datetime64[s]"))
+    c = RangoCache(cargar, reloj=_Reloj(), hoy=lambda: HOY)
+    c.obtener("2026-01-01", "2026-06-30")
+    df = c.obtener("2026-06-01", "2026-06-10")
+    assert len(fuente.pedidos) == 1 and len(df) == 10
+    assert df["Fecha"].iloc[0] == pd.Timestamp("2026-06-01")
+
+
+def test_carga_lenta_no_frena_hits_de_otras_sesiones():
+    fuente = _Fuente()
+    entro, soltar = threading.Event(), threading.Event()
+
+    def cargar(d0, d1):
+        if d0.month == 3:
+            entro.set()
+            assert soltar.wait(5)
+        return fuente(d0, d1)
+    c = RangoCache(cargar, reloj=_Reloj(), hoy=lambda: HOY)
+    c.obtener("2026-01-01", "2026-01-31")
+    lenta = threading.Thread(target=c.obtener, args=("2026-03-01", "2026-03-31"))
+    lenta.start()
+    assert entro.wait(5)
+    hit = []
+    otra = threading.Thread(target=lambda: hit.append(len(c.obtener("2026-01-05", "2026-01-09"))))
+    otra.start()
+    otra.join(2)
+    # El hit terminó mientras la carga de marzo sigue en curso
+    assert hit == [5] and lenta.is_alive()
+    soltar.set()
+    lenta.join(5)
+    assert c.tramos() == [(date(2026, 1, 1), date(2026, 1, 31)), (date(2026, 3, 1), date(2026, 3, 31))]
+
+
+def test_carga_concurrente_no_solapa_ni_guarda_lo_invalidado():
+    fuente = _Fuente()
+    c = None
+
+    def cargar(d0, d1):
+        # Mientras se carga enero, otra sesión guarda del 10 al 20
+        if (d0, d1) == (date(2026, 1, 1), date(2026, 1, 31)):
+            c.obtener("2026-01-10", "2026-01-20")
+        return fuente(d0, d1)
+    c = RangoCache(cargar, reloj=_Reloj(), hoy=lambda: HOY)
+    assert len(c.obtener("2026-01-01", "2026-01-31")) == 31
+    assert c.tramos() == [(date(2026, 1, 1), date(2026, 1, 9)), (date(2026, 1, 10), date(2026, 1, 20)),
+                          (date(2026, 1, 21), date(2026, 1, 31))]
+    assert len(c.obtener("2026-01-01", "2026-01-31")) == 31
+
+    def cargar_e_invalidar(d0, d1):
+        c.invalidar([d0])
+        return fuente(d0, d1)
+    c.cargar = cargar_e_invalidar
+    assert len(c.obtener("2026-02-01", "2026-02-28")) == 28
+    assert (date(2026, 2, 1), date(2026, 2, 28)) not in c.tramos()
@@ -0,0 +1,182 @@
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import random
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+import costos
+from bench.bench_costos import nombres_sinteticos, tabla_costos_sintetica
+from bench.referencias import calcular_resultado_periodo_por_fila
+from bench.servidor_local import orden_sintetica
+from ordenes import procesar_orders
+from resultado import (
+    CacheResultados, calcular_resultado_periodo, costo_productos_ars, huella_df, margen_pct,
+    resultado_periodo,
+)
+
+
+def _df_y_costos(n, seed):
+    """Órdenes sintéticas con nombres de producto variados (simples, varios
+    ' / ', vacíos, NaN) y bordes: Cantidad 0, Total 0 / negativo, costo TN NaN."""
+    rng = random.Random(seed)
+    tabla = tabla_costos_sintetica(120, rng)
+    nombres = nombres_sinteticos(tabla, 150, rng) + ["", "  "]
+    df = procesar_orders(orden_sintetica(i) for i in range(n))
+    prods = []
+    for _ in range(n):
+        k = rng.random()
+        if k < 0.7:
+            prods.append(rng.choice(nombres))
+        elif k < 0.95:
+            prods.append(" / ".join(rng.choice(nombres) for _ in range(rng.randint(2, 4))))
+        else:
+            prods.append(None)
+    df["Productos"] = pd.Series(prods, index=df.index, dtype="str")
+    df.loc[df.sample(frac=0.05, random_state=seed).index, "Cantidad"] = 0
+    df.loc[df.sample(frac=0.03, random_state=seed + 1).index, "Total ($)"] = 0.0
+    df.loc[df.sample(frac=0.02, random_state=seed + 2).index, "Total ($)"] = -1500.0
+    df.loc[df.sample(frac=0.03, random_state=seed + 3).index, "Costo Productos ($)"] = np.nan
+    return df, tabla
+
+
+def test_resultado_columnar_identico_a_fila_por_fila():
+    for seed, tc in ((1, 1215.5), (2, 1000)):
+        df, tabla = _df_y_costos(600, seed)
+        args = (df, date(2024, 1, 1), date(2024, 1, 31), tc, 21, 50000, tabla,
+                {"alquiler": 300000, "nota": "x", "sueldos": 1.5e6})
+        costos.invalidar_costos()
+        nuevo = calcular_resultado_periodo(*args)
+        ref = calcular_resultado_periodo_por_fila(*args)
+        pd.testing.assert_frame_equal(nuevo.pop("df_calc"), ref.pop("df_calc"), check_exact=True)
+        assert nuevo == ref
+
+
+def test_costo_productos_reglas():
+    tabla = {"Consola A": {"fob_usd": 10, "peso_kg": 0}, "Consola B": {"fob_usd": 5}}
+    df = pd.DataFrame({
+        "Productos": ["Consola A", "Consola A / Consola B", "Otra Cosa", "Consola B"],
+        "Cantidad": [3, 3, 2, 0],
+        "Costo Productos ($)": [1.0, 1.0, 777.4, 1.0],
+    })
+    # Un producto: × Cantidad (0 cuenta como 1); varios: uno de cada uno;
+    # sin match: el costo de TN redondeado
+    assert costo_productos_ars(df, 100, tabla).tolist() == [3000.0, 1500.0, 777.0, 500.0]
+
+
+def test_margen_pct_sin_total():
+    assert margen_pct([10, 5, 1, 1], [40, 0, -3, 3]).tolist() == [25.0, 0.0, 0.0, 33.33]
+
+
+def test_periodo_vacio():
+    r = calcular_resultado_periodo(pd.DataFrame(), date(2024, 2, 1), date(2024, 2, 14), 1000,
+                                   21, 1000, None, {"alquiler": 290000})
+    assert r["ordenes"] == 0 and r["gastos_fijos_periodo"] == 140000
+    assert r["resultado_final"] == -141000
+
+
+def test_resultado_periodo_memoizado_por_huella():
+    df, tabla = _df_y_costos(200, 3)
+    cache = CacheResultados()
+    args = (date(2024, 1, 1), date(2024, 1, 31), 1200, 21, 50000)
+    r1 = resultado_periodo(df, *args, costos_gs=tabla, gastos_fijos_dict={"a": 1}, cache=cache)
+    # Rerun: df copiado y dicts nuevos con el mismo contenido → hit
+    r2 = resultado_periodo(df.copy(), *args, costos_gs=dict(tabla), gastos_fijos_dict={"a": 1},
+                           cache=cache)
+    assert cache.stats == {"hits": 1, "calculos": 1, "incrementales": 0, "desalojos": 0}
+    pd.testing.assert_frame_equal(r1.pop("df_calc"), r2.pop("df_calc"))
+    assert r1 == r2
+
+    # El caller puede mutar su df_calc sin tocar el guardado
+    r3 = resultado_periodo(df, *args, costos_gs=tabla, gastos_fijos_dict={"a": 1}, cache=cache)
+    r3["df_calc"]["Margen ($)"] = 0.0
+    r4 = resultado_periodo(df, *args, costos_gs=tabla, gastos_fijos_dict={"a": 1}, cache=cache)
+    assert r4["df_calc"]["Margen ($)"].ne(0).any()
+
+    # Cualquier insumo distinto es otra clave
+    df2 = df.copy()
+    df2.loc[df2.index[0], "Total ($)"] += 1
+    otra_tabla = {**tabla, "Consola Nueva": {"fob_usd": 1}}
+    for kw in ({"df_tn": df2}, {"costos_gs": otra_tabla}, {"gastos_fijos_dict": {"a": 2}},
+               {"tipo_cambio": 1201}, {"pauta": 0}):
+        a = dict(zip(("fecha_desde", "fecha_hasta", "tipo_cambio", "pct_iva", "pauta"), args),
+                 df_tn=df, costos_gs=tabla, gastos_fijos_dict={"a": 1}, cache=cache)
+        a.update(kw)
+        antes = cache.stats["calculos"] + cache.stats["incrementales"]
+        resultado_periodo(**a)
+        assert cache.stats["calculos"] + cache.stats["incrementales"] == antes + 1, kw
+
+
+def test_sin_copy_on_write_devuelve_copia_profunda(monkeypatch):
+    """pandas 2.x sin copy-on-write: escribir en el lugar no toca el guardado."""
+    import resultado
+    monkeypatch.setattr(resultado, "_COW", False)
+    df, tabla = _df_y_costos(100, 4)
+    cache = CacheResultados()
+    args = (date(2024, 1, 1), date(2024, 1, 31), 1200, 21, 0)
+    r1 = resultado_periodo(df, *args, costos_gs=tabla, cache=cache)
+    r1["df_calc"].loc[:, "Margen ($)"] = 0.0
+    r2 = resultado_periodo(df, *args, costos_gs=tabla, cache=cache)
+    assert cache.stats["hits"] == 1
+    assert r2["df_calc"]["Margen ($)"].ne(0).any()
+
+
+def test_cache_resultados_lru_por_bytes():
+    df, tabla = _df_y_costos(100, 4)
+    cache = CacheResultados()
+    resultado_periodo(df, date(2024, 1, 1), date(2024, 1, 31), 1000, 21, 0, tabla, cache=cache)
+    cache.max_bytes = int(cache.bytes() * 2.5)
+    for tc in (1001, 1002, 1000, 1003):
+        resultado_periodo(df, date(2024, 1, 1), date(2024, 1, 31), tc, 21, 0, tabla, cache=cache)
+    # Entran dos: quedan los dos últimos usados (1000, recalculado, y 1003)
+    assert len(cache) == 2 and cache.stats["desalojos"] == 3
+    antes = cache.stats["hits"]
+    resultado_periodo(df, date(2024, 1, 1), date(2024, 1, 31), 1000, 21, 0, tabla, cache=cache)
+    assert cache.stats["hits"] == antes + 1
+
+
+def test_huella_df_ve_contenido_indice_y_tipos():
+    df = pd.DataFrame({"a": [1, 2], "b": ["x", "y"]})
+    assert huella_df(df) == huella_df(df.copy())
+    assert huella_df(df) != huella_df(df.assign(b=["x", "z"]))
+    assert huella_df(df) != huella_df(df.set_axis([5, 6]))
+    assert huella_df(df) != huella_df(df.astype({"a": "float64"}))
+    assert huella_df(None) != huella_df(pd.DataFrame())
+
+
+def test_edicion_de_costos_parchea_solo_lo_afectado():
+    df, tabla = _df_y_costos(800, 5)
+    rng = random.Random(5)
+    args = (date(2024, 1, 1), date(2024, 1, 31), 1215.5, 21, 50000)
+    cache = CacheResultados()
+    costos.invalidar_costos()
+    resultado_periodo(df, *args, costos_gs=tabla, gastos_fijos_dict={"a": 1}, cache=cache)
+    claves = [k for k, v in tabla.items() if isinstance(v, dict)]
+    for paso in range(12):
+        tabla = {k: dict(v) if isinstance(v, dict) else v for k, v in tabla.items()}
+        k = rng.choice(claves)
+        if paso % 4 == 0:     # FOB de una clave y de sus variantes
+            for v in [c for c in claves if c.startswith(k[:6])][:4]:
+                tabla[v]["fob_usd"] = round(rng.uniform(0, 200), 2)
+        elif paso % 4 == 1:   # baja (y alta al final: mismo orden relativo del resto)
+            tabla[k + " Nueva"] = tabla.pop(k)
+            claves = [c for c, v in tabla.items() if isinstance(v, dict)]
+        elif paso % 4 == 2:
+            tabla[k]["peso_kg"] = rng.uniform(0, 3)
+        else:                 # edición sin efecto en el costo
+            tabla[k]["notas"] = f"paso {paso}"
+        r = resultado_periodo(df, *args, costos_gs=tabla, gastos_fijos_dict={"a": 1},
+                              cache=cache)
+        costos.invalidar_costos()
+        costos._ULTIMO = None   # referencia de cero, sin memo heredado
+        ref = calcular_resultado_periodo(df, *args, costos_gs=tabla, gastos_fijos_dict={"a": 1})
+        pd.testing.assert_frame_equal(r.pop("df_calc"), ref.pop("df_calc"), check_exact=True)
+        assert r == ref, paso
+    assert cache.stats["incrementales"] == 12 and cache.stats["calculos"] == 1
+
+    # Cambia el costo/kg por defecto: todas las claves con peso → de cero
+    tabla = {**tabla, "_costo_kg_usd": 80}
+    resultado_periodo(df, *args, costos_gs=tabla, gastos_fijos_dict={"a": 1}, cache=cache)
+    assert cache.stats["calculos"] == 2
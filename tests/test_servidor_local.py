@@ -0,0 +1,109 @@
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import json
+import time
+import urllib.error
+import urllib.request
+from datetime import date
+
+import tn_client
+from bench import servidor_local
+
+
+def setup_function():
+    tn_client.LIMITADOR.configurar(capacidad=1e9, tasa=1e9)
+    tn_client.configurar_cache(None)
+    tn_client._dormir = lambda s: None
+
+
+def teardown_function():
+    tn_client._dormir = time.sleep
+
+
+def _get(url):
+    """(status, headers, json) sin levantar en 4xx/5xx."""
+    try:
+        with urllib.request.urlopen(url, timeout=10) as r:
+            return r.status, dict(r.headers), json.loads(r.read())
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), json.loads(e.read())
+
+
+def test_tn_transactions_y_products_paginan_como_orders():
+    srv = servidor_local.levantar(total_ordenes=120, total_productos=70)
+    tn_client.BASE = srv.base
+    try:
+        txs = tn_client.get_paginado("transactions", per_page=50, token="t",
+                                     params={"created_at_min": "2024-01-02T00:00:00-03:00"})
+        prods = tn_client.get_paginado("products", per_page=50, token="t", concurrente=True)
+    finally:
+        tn_client._POOL.cerrar()
+        srv.shutdown()
+    assert len(txs) == 100 and txs[0]["order_id"] == 1_000_020
+    assert len(prods) == 70 and prods[-1]["variants"][0]["sku"].startswith("SKU-69-")
+
+
+def test_mp_offset_y_meta_cursor():
+    srv = servidor_local.levantar(total_ordenes=250, total_productos=60)
+    try:
+        base = srv.bases["mp"] + "/v1/payments/search?status=approved"
+        _, _, p1 = _get(base + "&begin_date=2024-01-01T00:00:00.000-03:00"
+                               "&end_date=2024-01-10T23:59:59.999-03:00&limit=100&offset=100")
+        url = (srv.bases["meta"] + "/v21.0/act_1/insights?breakdowns=product_id&limit=25"
+               '&time_range={"since":"2024-01-01","until":"2024-01-30"}')
+        filas, paginas = [], 0
+        while url:
+            _, _, j = _get(url)
+            filas += j["data"]
+            url = (j.get("paging") or {}).get("next")
+            paginas += 1
+        _, _, blue = _get(srv.bases["bluelytics"] + "/v2/latest")
+    finally:
+        srv.shutdown()
+    assert p1["paging"]["total"] == 200 and len(p1["results"]) == 100
+    assert p1["results"][0]["transaction_details"]["net_received_amount"] > 0
+    assert len(filas) == 60 and paginas == 3
+    assert blue["blue"]["value_sell"] > 0
+
+
+def test_429_con_retry_after_y_bucket_tn():
+    srv = servidor_local.levantar(total_ordenes=40, cada_429=3, retry_after=2)
+    try:
+        st = [_get(srv.base + "/orders?per_page=5")[:2] for _ in range(3)]
+    finally:
+        srv.shutdown()
+    assert [s for s, _ in st] == [200, 200, 429]
+    assert st[2][1]["Retry-After"] == "2"
+
+    srv = servidor_local.levantar(total_ordenes=40, bucket_tn=(3, 0.001))
+    try:
+        st = [_get(srv.base + "/orders?per_page=5")[:2] for _ in range(4)]
+        otra_api = _get(srv.bases["dolarapi"] + "/v1/dolares/blue")[0]
+    finally:
+        srv.shutdown()
+    assert [s for s, _ in st] == [200, 200, 200, 429]
+    assert st[0][1]["x-rate-limit-limit"] == "3" and st[2][1]["x-rate-limit-remaining"] == "0"
+    assert otra_api == 200   # el bucket es solo de TN
+
+
+def test_graba_desde_el_origen_y_reproduce_sin_el(tmp_path):
+    origen = servidor_local.levantar(total_ordenes=30, inicio=date(2025, 3, 1))
+    srv = servidor_local.levantar(total_ordenes=5, grabaciones=str(tmp_path),
+                                  origenes={"tn": origen.url, "mp": origen.bases["mp"]})
+    try:
+        url = srv.base + "/orders?per_page=50"
+        grabado = _get(url)
+        mp = _get(srv.bases["mp"] + "/v1/payments/search?limit=10&access_token=x")
+    finally:
+        origen.shutdown()
+    try:
+        replay = _get(url)
+        # el token no es parte de la clave
+        mp_replay = _get(srv.bases["mp"] + "/v1/payments/search?limit=10&access_token=otro")
+    finally:
+        srv.shutdown()
+    assert len(grabado[2]) == 30 and grabado[2][0]["created_at"].startswith("2025-03-01")
+    assert replay[2] == grabado[2] and replay[1]["x-total-count"] == "30"
+    assert mp_replay[2] == mp[2]
+    assert (srv.grabadas, srv.replays) == (2, 2)
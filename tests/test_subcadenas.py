@@ -0,0 +1,42 @@
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import random
+
+from subcadenas import IndiceContenedoras, IndiceSubcadenas
+
+
+def _claves(rng, n):
+    # Alfabeto chico: muchas claves que son sufijo / prefijo de otras
+    return ["".join(rng.choice("abc1") for _ in range(rng.randint(0, 5))) for _ in range(n)]
+
+
+def test_subcadenas_igual_que_recorrido():
+    rng = random.Random(5)
+    for _ in range(200):
+        claves = _claves(rng, rng.randint(0, 30))
+        idx = IndiceSubcadenas(claves)
+        for _ in range(10):
+            texto = "".join(rng.choice("abc1x") for _ in range(rng.randint(0, 12)))
+            esperado = [i for i, k in enumerate(claves) if k in texto]
+            assert idx.contenidas(texto) == esperado, (claves, texto)
+            assert idx.primera(texto) == (esperado[0] if esperado else None)
+
+
+def test_contenedoras_igual_que_recorrido():
+    rng = random.Random(6)
+    for _ in range(200):
+        claves = _claves(rng, rng.randint(0, 30))
+        idx = IndiceContenedoras(claves)
+        for _ in range(10):
+            texto = "".join(rng.choice("abc1") for _ in range(rng.randint(0, 3)))
+            esperado = [i for i, k in enumerate(claves) if texto in k]
+            assert list(idx.contienen(texto)) == esperado, (claves, texto)
+    assert list(IndiceContenedoras(["ab", "b"]).contienen("\x00")) == []
+
+
+def test_claves_repetidas_y_superpuestas():
+    idx = IndiceSubcadenas(["rg35xx", "rg35xxsp", "35xx", "rg35xx", "xsp"])
+    assert idx.contenidas("anbernicrg35xxsp64") == [0, 1, 2, 3, 4]
+    assert idx.contenidas("rg35x") == []
+    assert IndiceContenedoras(["rg35xx", "rg35xxsp", "x"]).primera("35xxs") == 1
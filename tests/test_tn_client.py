@@ -0,0 +1,611 @@
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import json
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import tn_client
+from bench import servidor_local
+
+
+def setup_function():
+    # Los tests hacen cientos de requests contra fakes: sin pacing del bucket de TN
+    # ni esperas reales de backoff
+    tn_client.LIMITADOR.configurar(capacidad=1e9, tasa=1e9)
+    tn_client.configurar_cache(None)
+    tn_client._dormir = lambda s: None
+
+
+def teardown_function():
+    tn_client._dormir = time.sleep
+
+
+def _fake_http(respuestas):
+    """Transporte inyectable: devuelve las respuestas en orden y registra URLs."""
+    llamadas = []
+
+    def http(method, url, headers, body=None, timeout=30):
+        llamadas.append((method, url))
+        status, hdrs, data = respuestas.pop(0)
+        return status, hdrs, json.dumps(data)
+    http.llamadas = llamadas
+    return http
+
+
+def test_request_reintenta_429_con_http_inyectado():
+    dormidas = []
+    tn_client._dormir, original = dormidas.append, tn_client._dormir
+    try:
+        http = _fake_http([(429, {"Retry-After": "2"}, {}), (200, {}, [1, 2])])
+        status, data = tn_client.request("GET", "orders", token="t", _http=http)
+    finally:
+        tn_client._dormir = original
+    assert (status, data) == (200, [1, 2])
+    assert dormidas == [2.0]
+
+
+
+def test_observadores_reciben_un_evento_por_request(tmp_path):
+    eventos = []
+    tn_client.OBSERVADORES.append(eventos.append)
+    tn_client.OBSERVADORES.append(lambda ev: 1 / 0)   # un observador roto no corta el request
+    try:
+        http = _fake_http([(429, {"Retry-After": "2"}, {}), (200, {}, [1, 2])])
+        tn_client.request("GET", "orders", token="t", params={"page": 3}, _http=http)
+        tn_client.configurar_cache(str(tmp_path))
+        http = _http_con_etag([[1]])
+        tn_client.get("products", params={"page": 1}, _http=http, cache=True)
+        tn_client.get("products", params={"page": 1}, _http=http, cache=True)
+
+        def caido(method, url, headers, body=None, timeout=30):
+            raise ConnectionResetError("sin red")
+        try:
+            tn_client.get("orders/5", _http=caido)
+            assert False, "el error de red se propaga"
+        except ConnectionResetError:
+            pass
+        # con Content-Length los bytes salen del header, sin re-codificar el cuerpo
+        tn_client.request("GET", "orders", token="t",
+                          _http=_fake_http([(200, {"Content-Length": "1234"}, [1])]))
+    finally:
+        del tn_client.OBSERVADORES[-2:]
+    ev = eventos[0]
+    assert (ev["servicio"], ev["method"], ev["endpoint"], ev["status"]) == ("tn", "GET", "orders", 200)
+    assert ev["reintentos"] == 1 and ev["espera"] >= 2.0 and ev["bytes"] == len("[1, 2]")
+    assert [e["cache"] for e in eventos[1:3]] == ["miss", "hit"]
+    assert (eventos[3]["endpoint"], eventos[3]["status"]) == ("orders/5", 0)
+    assert eventos[4]["bytes"] == 1234
+
+def test_get_paginado_parcial_si_falla_una_pagina():
+    http = _fake_http([(200, {}, [{"id": 1}, {"id": 2}]), (500, {}, {"error": "x"})])
+    filas = tn_client.get_paginado("orders", per_page=2, token="t", _http=http)
+    assert filas == [{"id": 1}, {"id": 2}]
+
+
+def test_pool_reusa_una_conexion_para_todas_las_paginas():
+    srv = servidor_local.levantar(total_ordenes=45)
+    base_orig = tn_client.BASE
+    tn_client.BASE = srv.base
+    try:
+        filas = tn_client.get_paginado("orders", per_page=10, token="t")
+        assert len(filas) == 45
+        assert srv.requests == 5
+        assert srv.conexiones == 1
+        assert tn_client._POOL.ociosas() == 1
+    finally:
+        tn_client.BASE = base_orig
+        tn_client._POOL.cerrar()
+        srv.shutdown()
+
+
+def test_pool_descarta_conexiones_ociosas_vencidas():
+    srv = servidor_local.levantar(total_ordenes=5)
+    pool = tn_client._PoolConexiones(max_por_host=2, idle_max=0.0)
+    try:
+        netloc = srv.base.split("/")[2]
+        conn, reusada = pool.tomar("http", netloc, 5)
+        assert reusada is False
+        pool.devolver("http", netloc, conn)
+        assert pool.ociosas() == 1
+        _, reusada = pool.tomar("http", netloc, 5)  # idle_max=0 → vencida
+        assert reusada is False
+        assert pool.ociosas() == 0
+    finally:
+        pool.cerrar()
+        srv.shutdown()
+
+
+def test_conexion_reusada_caida_se_reintenta_solo_si_es_idempotente():
+    class _Caida:
+        def request(self, *a, **k):
+            raise ConnectionResetError("keep-alive vencido")
+
+        def close(self):
+            pass
+
+    class _Ok(_Caida):
+        will_close = True
+        status, headers = 200, {}
+
+        def request(self, *a, **k):
+            pass
+
+        def getresponse(self):
+            return self
+
+        def read(self):
+            return b"{}"
+
+    class _Pool:
+        def __init__(self):
+            self.tomadas = 0
+
+        def tomar(self, scheme, netloc, timeout):
+            self.tomadas += 1
+            return (_Caida(), True) if self.tomadas == 1 else (_Ok(), False)
+
+    original = tn_client._POOL
+    try:
+        tn_client._POOL = pool = _Pool()
+        assert tn_client._http("PUT", "http://x/a", {}, {"a": 1})[0] == 200
+        assert pool.tomadas == 2
+        tn_client._POOL = pool = _Pool()
+        try:
+            tn_client._http("POST", "http://x/a", {}, {"a": 1})
+            assert False, "un POST no se reenvia: pudo haberse procesado"
+        except ConnectionResetError:
+            pass
+        assert pool.tomadas == 1
+    finally:
+        tn_client._POOL = original
+
+
+def test_pool_acota_ociosas_por_host():
+    pool = tn_client._PoolConexiones(max_por_host=2, idle_max=60)
+    conns = [pool.tomar("http", "127.0.0.1:9", 5)[0] for _ in range(3)]
+    for c in conns:
+        pool.devolver("http", "127.0.0.1:9", c)
+    assert pool.ociosas() == 2
+    pool.cerrar()
+    assert pool.ociosas() == 0
+
+
+def test_get_paginado_concurrente_mantiene_orden():
+    srv = servidor_local.levantar(total_ordenes=95, latencia_request=0.01)
+    base_orig = tn_client.BASE
+    tn_client.BASE = srv.base
+    try:
+        serie = tn_client.get_paginado("orders", per_page=10, token="t")
+        conc = tn_client.get_paginado("orders", per_page=10, token="t",
+                                      concurrente=True, workers=4)
+        assert [o["id"] for o in conc] == [o["id"] for o in serie]
+        assert len(conc) == 95
+    finally:
+        tn_client.BASE = base_orig
+        tn_client._POOL.cerrar()
+        srv.shutdown()
+
+
+def test_get_paginado_concurrente_parcial_corta_en_pagina_fallida():
+    def http(method, url, headers, body=None, timeout=30):
+        page = int(parse_qs(urlsplit(url).query)["page"][0])
+        if page == 3:
+            return 500, {}, "{}"
+        return 200, {"X-Total-Count": "50"}, json.dumps([{"p": page}] * 10)
+    filas = tn_client.get_paginado("orders", per_page=10, token="t", _http=http,
+                                   concurrente=True)
+    assert [f["p"] for f in filas] == [1] * 10 + [2] * 10
+
+
+def test_get_paginado_concurrente_sin_total_cae_a_serie():
+    http = _fake_http([(200, {}, [{"id": 1}, {"id": 2}]), (200, {}, [{"id": 3}])])
+    filas = tn_client.get_paginado("orders", per_page=2, token="t", _http=http,
+                                   concurrente=True)
+    assert [f["id"] for f in filas] == [1, 2, 3]
+
+
+def test_iter_paginado_entrega_paginas_en_orden():
+    srv = servidor_local.levantar(total_ordenes=25)
+    base_orig = tn_client.BASE
+    tn_client.BASE = srv.base
+    try:
+        for conc in (False, True):
+            paginas = list(tn_client.iter_paginado("orders", per_page=10, token="t",
+                                                   concurrente=conc))
+            assert [len(p) for p in paginas] == [10, 10, 5]
+            assert paginas[0][0]["id"] < paginas[2][0]["id"]
+    finally:
+        tn_client.BASE = base_orig
+        tn_client._POOL.cerrar()
+        srv.shutdown()
+
+
+def test_iter_paginado_estado_marca_truncado():
+    srv = servidor_local.levantar(total_ordenes=60)
+    base_orig = tn_client.BASE
+    tn_client.BASE = srv.base
+    try:
+        e = {}
+        filas = [f for b in tn_client.iter_paginado("orders", per_page=10, max_pages=3,
+                                                    token="t", estado=e) for f in b]
+        assert len(filas) == 30
+        assert e["truncado"] is True and e["completo"] is False and e["total"] == 60
+        e = {}
+        list(tn_client.iter_paginado("orders", per_page=10, max_pages=10, token="t", estado=e))
+        assert e["completo"] is True and e["filas"] == 60
+    finally:
+        tn_client.BASE = base_orig
+        tn_client._POOL.cerrar()
+        srv.shutdown()
+
+
+def test_iter_paginado_por_fechas_supera_el_techo_sin_perder_filas():
+    # 100 días x 20 órdenes = 2000; un solo get_paginado de 5x10 traería 50
+    srv = servidor_local.levantar(total_ordenes=2000, ordenes_por_dia=20)
+    base_orig = tn_client.BASE
+    tn_client.BASE = srv.base
+    try:
+        e = {}
+        filas = [f for b in tn_client.iter_paginado_por_fechas(
+            "orders", "2024-01-01", "2024-04-09", per_page=10, max_pages=5,
+            token="t", estado=e) for f in b]
+        ids = [f["id"] for f in filas]
+        assert len(ids) == 2000 and len(set(ids)) == 2000
+        assert ids == sorted(ids)
+        assert e["completo"] is True and e["ventanas"] > 1
+    finally:
+        tn_client.BASE = base_orig
+        tn_client._POOL.cerrar()
+        srv.shutdown()
+
+
+def test_iter_paginado_por_fechas_reporta_dia_que_no_entra():
+    srv = servidor_local.levantar(total_ordenes=300, ordenes_por_dia=100)
+    base_orig = tn_client.BASE
+    tn_client.BASE = srv.base
+    try:
+        e = {}
+        filas = [f for b in tn_client.iter_paginado_por_fechas(
+            "orders", "2024-01-01", "2024-01-03", per_page=10, max_pages=5,
+            token="t", estado=e) for f in b]
+        assert len(filas) == 150  # 50 por día: el techo de cada ventana de 1 día
+        assert e["truncado"] is True and e["completo"] is False
+    finally:
+        tn_client.BASE = base_orig
+        tn_client._POOL.cerrar()
+        srv.shutdown()
+
+
+def test_multi_barre_filtros_en_paralelo_dedup_y_saltea_vacios():
+    datos = {
+        None: [{"id": i} for i in range(1, 8)],            # paid
+        "archived": [],
+        "closed": [{"id": 6}, {"id": 7}, {"id": 8}],
+    }
+    requests_por_filtro = {}
+
+    def http(method, url, headers, body=None, timeout=30):
+        q = parse_qs(urlsplit(url).query)
+        st = q.get("status", [None])[0]
+        requests_por_filtro[st] = requests_por_filtro.get(st, 0) + 1
+        filas = datos[st]
+        per_page, page = int(q["per_page"][0]), int(q["page"][0])
+        lote = filas[(page - 1) * per_page: page * per_page]
+        return 200, {"x-total-count": str(len(filas))}, json.dumps(lote)
+
+    e = {}
+    filtros = [{"payment_status": "paid"}, {"payment_status": "paid", "status": "archived"},
+               {"payment_status": "paid", "status": "closed"}]
+    filas = [f for b in tn_client.iter_paginado_por_fechas_multi(
+        "orders", "2026-05-01", "2026-05-31", filtros, per_page=3, token="t",
+        _http=http, estado=e) for f in b]
+    assert sorted(f["id"] for f in filas) == list(range(1, 9))
+    assert requests_por_filtro["archived"] == 1
+    s = {st["filtros"].get("status"): st for st in e["streams"]}
+    assert s["archived"]["salteado"] is True
+    assert s[None]["filas"] == 7 and s["closed"]["filas"] == 3
+    assert s[None]["nuevas"] + s["closed"]["nuevas"] == 8
+    assert all(st["segundos"] >= 0 for st in e["streams"])
+    assert e["completo"] is True
+
+
+def test_multi_saltea_streams_cubiertos_por_conteo():
+    datos = {
+        None: [{"id": i} for i in range(1, 9)],            # paid: ya trae todo
+        "any": [{"id": i} for i in range(1, 9)],
+        "archived": [{"id": 2}, {"id": 3}],
+        "closed": [{"id": 6}, {"id": 7}, {"id": 8}],
+    }
+    requests_por_filtro = {}
+
+    def http(method, url, headers, body=None, timeout=30):
+        q = parse_qs(urlsplit(url).query)
+        st = q.get("status", [None])[0]
+        requests_por_filtro[st] = requests_por_filtro.get(st, 0) + 1
+        filas = datos[st]
+        per_page, page = int(q["per_page"][0]), int(q["page"][0])
+        lote = filas[(page - 1) * per_page: page * per_page]
+        return 200, {"x-total-count": str(len(filas))}, json.dumps(lote)
+
+    filtros = [{"payment_status": "paid"}, {"payment_status": "paid", "status": "archived"},
+               {"payment_status": "paid", "status": "closed"}]
+    e = {}
+    filas = [f for b in tn_client.iter_paginado_por_fechas_multi(
+        "orders", "2026-05-01", "2026-05-31", filtros, cubre={"status": "any"},
+        per_page=3, token="t", _http=http, estado=e) for f in b]
+    assert sorted(f["id"] for f in filas) == list(range(1, 9))
+    assert "archived" not in requests_por_filtro and "closed" not in requests_por_filtro
+    s = {st["filtros"].get("status"): st for st in e["streams"]}
+    assert s["archived"]["cubierto"] and s["closed"]["cubierto"]
+    assert not s[None]["cubierto"] and s[None]["nuevas"] == 8
+    assert e["completo"] is True
+
+    # Si ningún stream iguala el conteo de `cubre`, se recorren todos
+    datos["any"] = datos["any"] + [{"id": 9}]
+    datos["closed"] = datos["closed"] + [{"id": 9}]
+    e = {}
+    filas = [f for b in tn_client.iter_paginado_por_fechas_multi(
+        "orders", "2026-05-01", "2026-05-31", filtros, cubre={"status": "any"},
+        per_page=3, token="t", _http=http, estado=e) for f in b]
+    assert sorted(f["id"] for f in filas) == list(range(1, 10))
+    assert not any(st["cubierto"] for st in e["streams"])
+
+
+class _Reloj:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+    def dormir(self, s):
+        self.t += s
+
+
+def test_limiter_espacia_al_vaciarse_el_bucket():
+    reloj = _Reloj()
+    tn_client._dormir, original = reloj.dormir, tn_client._dormir
+    try:
+        rl = tn_client._RateLimiter(capacidad=3, tasa=2.0, reloj=reloj)
+        esperas = [rl.adquirir() for _ in range(6)]
+    finally:
+        tn_client._dormir = original
+    assert esperas[:3] == [0.0, 0.0, 0.0]
+    assert all(e > 0 for e in esperas[3:])
+    # 3 extra a 2 req/s: ~1.5 s en total, nunca por encima de la tasa
+    assert abs(reloj.t - 1.5) < 0.01
+    est = rl.estado()
+    assert est["esperas"] == 3 and est["requests"] == 6
+
+
+def test_limiter_sigue_headers_de_tn_y_adapta_por_429():
+    reloj = _Reloj()
+    rl = tn_client._RateLimiter(capacidad=40, tasa=2.0, reloj=reloj)
+    rl.actualizar(200, {"x-rate-limit-limit": "40", "x-rate-limit-remaining": "5"})
+    assert rl.estado()["tokens"] == 5 and rl.estado()["remaining_tn"] == 5
+    rl.actualizar(429, {})
+    rl.actualizar(429, {})
+    est = rl.estado()
+    assert est["errores_429"] == 2 and est["tasa"] == 0.5 and est["tokens"] <= 0
+    assert est["espera_proxima"] > 0
+    for _ in range(30):
+        rl.actualizar(200, {})
+    assert rl.estado()["tasa"] == 2.0
+    # plan con bucket mas grande: el leak escala igual (400 → 20 req/s)
+    rl.actualizar(200, {"x-rate-limit-limit": "400"})
+    assert rl.estado()["capacidad"] == 400 and rl.estado()["tasa_nominal"] == 20.0
+
+
+def test_request_pasa_por_el_limitador_de_proceso():
+    tn_client.LIMITADOR.configurar(capacidad=1e9, tasa=1e9)
+    http = _fake_http([(429, {"Retry-After": "0"}, {}), (200, {"x-rate-limit-remaining": "39"}, [])])
+    tn_client.request("GET", "orders", token="t", _http=http)
+    est = tn_client.estado_rate_limit()
+    assert est["requests"] == 2 and est["errores_429"] == 1 and est["remaining_tn"] == 39
+
+
+def _http_con_etag(paginas):
+    """Fake que versiona cada URL con un ETag y responde 304 si coincide."""
+    vistos = []
+
+    def http(method, url, headers, body=None, timeout=30):
+        page = int(parse_qs(urlsplit(url).query).get("page", ["1"])[0])
+        etag = f'"v{page}"'
+        vistos.append((page, headers.get("If-None-Match")))
+        if headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, ""
+        filas = paginas[page - 1] if page <= len(paginas) else None
+        if filas is None:
+            return 404, {}, json.dumps({"description": "Last page is 2"})
+        return 200, {"ETag": etag, "x-total-count": "3"}, json.dumps(filas)
+    http.vistos = vistos
+    return http
+
+
+def test_cache_etag_sirve_304_desde_disco(tmp_path):
+    tn_client.configurar_cache(str(tmp_path))
+    http = _http_con_etag([[1, 2], [3]])
+    primera = tn_client.get_paginado("products", per_page=2, _http=http, cache=True)
+    est = {}
+    segunda = [f for b in tn_client.iter_paginado("products", per_page=2, _http=http,
+                                                  cache=True, estado=est) for f in b]
+    assert primera == segunda == [1, 2, 3]
+    # el 304 no trae x-total-count: sale de la entrada guardada
+    assert est["total"] == 3
+    assert [v for _, v in http.vistos[2:]] == ['"v1"', '"v2"']
+    c = tn_client.estado_cache()
+    assert (c["misses"], c["hits"], c["entradas"]) == (2, 2, 2)
+
+
+def test_cache_solo_con_opt_in_y_validadores(tmp_path):
+    tn_client.configurar_cache(str(tmp_path))
+    http = _http_con_etag([[1]])
+    tn_client.get_paginado("products", per_page=2, _http=http)
+    assert tn_client.estado_cache()["entradas"] == 0
+    sin_etag = _fake_http([(200, {}, [1])])
+    tn_client.get("products", _http=sin_etag, cache=True)
+    assert tn_client.estado_cache()["entradas"] == 0
+
+
+def test_cache_desaloja_lo_menos_usado_al_pasar_el_tope(tmp_path):
+    cache = tn_client.configurar_cache(str(tmp_path), max_bytes=10_000)
+    http = _http_con_etag([["x" * 3000]] * 5)
+    for page in range(1, 6):
+        tn_client.get("products", params={"page": page}, _http=http, cache=True)
+    est = tn_client.estado_cache()
+    assert est["bytes"] <= 10_000 and est["desalojos"] >= 2
+    # la ultima pedida sigue y revalida con 304
+    tn_client.get("products", params={"page": 5}, _http=http, cache=True)
+    assert cache.stats["hits"] == 1
+    # una cache nueva sobre el mismo directorio retoma el tamaño en disco
+    assert tn_client.configurar_cache(str(tmp_path), max_bytes=10_000).estado()["entradas"] == est["entradas"]
+
+
+def test_proyectar_poda_anidado_y_listas():
+    orden = {"id": 1, "customer": {"email": "x"}, "products": [
+        {"name": "A", "price": "10", "image": {"src": "..."}}, {"name": "B"}],
+        "shipping_address": {"city": "Rosario", "address": "Calle"}}
+    campos = ("id", "products.name", "products.price", "shipping_address.city", "discount")
+    assert tn_client.proyectar(orden, campos) == {
+        "id": 1, "products": [{"name": "A", "price": "10"}, {"name": "B"}],
+        "shipping_address": {"city": "Rosario"}}
+    assert tn_client.campos_param(campos) == "id,products,shipping_address,discount"
+    assert tn_client.proyectar(orden, None) is orden
+
+
+def test_paginado_con_campos_pide_fields_y_recorta():
+    srv = servidor_local.levantar(total_ordenes=120)
+    tn_client.BASE = srv.base
+    try:
+        completo = tn_client.get_paginado("orders", per_page=50, token="t")
+        b0 = srv.bytes_enviados
+        recortado = tn_client.get_paginado("orders", per_page=50, token="t",
+                                           concurrente=True, campos=("id", "products.name"))
+        assert srv.bytes_enviados - b0 < b0
+    finally:
+        tn_client._POOL.cerrar()
+        srv.shutdown()
+    assert [o["id"] for o in recortado] == [o["id"] for o in completo]
+    assert all(set(o) == {"id", "products"} for o in recortado)
+    assert all(set(p) == {"name"} for o in recortado for p in o["products"])
+
+
+def _http_paginas(n_filas, per_page, fallas):
+    """Fake por numero de pagina; fallas[page] = cuantas veces responde 500."""
+    pedidas = []
+
+    def http(method, url, headers, body=None, timeout=30):
+        page = int(parse_qs(urlsplit(url).query)["page"][0])
+        pedidas.append(page)
+        if fallas.get(page, 0) > 0:
+            fallas[page] -= 1
+            return 500, {}, "{}"
+        filas = list(range((page - 1) * per_page, min(page * per_page, n_filas)))
+        if not filas:
+            return 404, {}, json.dumps({"description": "Last page is 1"})
+        return 200, {"x-total-count": str(n_filas)}, json.dumps(filas)
+    http.pedidas = pedidas
+    return http
+
+
+def test_pagina_fallida_se_reintenta_con_backoff_acotado():
+    esperas = []
+    tn_client._dormir = esperas.append
+    http = _http_paginas(100, 10, {3: 2})
+    est = {}
+    filas = tn_client.get_paginado("orders", per_page=10, _http=http, estado=est)
+    assert filas == list(range(100)) and est["completo"] and est["checkpoint"] is None
+    assert http.pedidas.count(3) == 3 and esperas == [1.0, 2.0]
+
+
+def test_checkpoint_reanuda_solo_la_cola():
+    http = _http_paginas(100, 10, {4: 99})
+    est = {}
+    filas = tn_client.get_paginado("orders", per_page=10, concurrente=True, _http=http,
+                                   estado=est, params={"status": "closed"})
+    assert filas == list(range(30)) and not est["completo"] and est["error"]
+    cp = est["checkpoint"]
+    assert cp == {"path": "orders", "params": {"status": "closed"}, "per_page": 10, "pagina": 4}
+
+    sano = _http_paginas(100, 10, {})
+    est2 = {}
+    cola = [f for b in tn_client.reanudar(cp, _http=sano, estado=est2) for f in b]
+    assert filas + cola == list(range(100))
+    assert min(sano.pedidas) == 4 and est2["completo"] and est2["filas"] == 100
+
+
+def test_4xx_no_se_reintenta():
+    http = _fake_http([(200, {}, [1, 2]), (401, {}, {"error": "auth"})])
+    est = {}
+    assert tn_client.get_paginado("orders", per_page=2, _http=http, estado=est) == [1, 2]
+    assert len(http.llamadas) == 2 and est["checkpoint"]["pagina"] == 2
+
+
+def _http_escrituras(fallas):
+    """Fake de PUT: fallas[path] = lista de status a devolver antes del 200."""
+    aplicados = []
+
+    def http(method, url, headers, body=None, timeout=30):
+        path = urlsplit(url).path.split("/v1/", 1)[-1].split("/", 1)[-1]
+        cola = fallas.get(path) or []
+        if cola:
+            return cola.pop(0), {}, json.dumps({"error": "x"})
+        aplicados.append(path)
+        return 200, {}, json.dumps(body)
+    http.aplicados = aplicados
+    return http
+
+
+def test_escribir_lote_reintenta_transitorios_y_sigue_con_el_lote():
+    items = [(f"products/{i}", {"price": i}) for i in range(20)]
+    http = _http_escrituras({"products/3": [503, 0], "products/7": [422]})
+    res = list(tn_client.escribir_lote(items, _http=http, workers=4))
+    assert sorted(r["i"] for r in res) == list(range(20))
+    por_i = {r["i"]: r for r in res}
+    assert por_i[3]["ok"] and por_i[3]["intentos"] == 3
+    assert not por_i[7]["ok"] and por_i[7]["status"] == 422 and por_i[7]["intentos"] == 1
+    assert len(http.aplicados) == 19
+
+
+def test_escribir_lote_post_no_reenvia_lo_que_pudo_haberse_procesado():
+    items = [(f"products/{i}", {"price": i}) for i in range(4)]
+    http = _http_escrituras({"products/0": [0], "products/1": [503], "products/2": [429]})
+
+    def con_rechazo(method, url, headers, body=None, timeout=30):
+        if url.endswith("products/3") and not con_rechazo.rechazado:
+            con_rechazo.rechazado = True
+            raise ConnectionRefusedError("sin server")
+        if url.endswith("products/0") and not con_rechazo.timeout:
+            con_rechazo.timeout = True
+            raise TimeoutError("read timeout")
+        return http(method, url, headers, body, timeout)
+    con_rechazo.rechazado = con_rechazo.timeout = False
+    res = {r["i"]: r for r in tn_client.escribir_lote(items, method="POST", _http=con_rechazo)}
+    # Timeout y 503: quedan como fallo, un solo intento
+    assert (res[0]["ok"], res[0]["intentos"]) == (False, 1)
+    assert (res[1]["status"], res[1]["intentos"]) == (503, 1)
+    # 429 y conexion rechazada: no llegaron, se reintentan
+    assert res[2]["ok"] and res[3]["ok"]
+    assert sorted(http.aplicados) == ["products/2", "products/3"]
+
+
+def test_escribir_lote_journal_reanuda_solo_lo_pendiente(tmp_path):
+    items = [(f"products/{i}", {"price": i}) for i in range(10)]
+    journal = str(tmp_path / "lote.jsonl")
+    http = _http_escrituras({"products/5": [422]})
+    gen = tn_client.escribir_lote(items, _http=http, workers=1, journal=journal)
+    primeros = [next(gen) for _ in range(4)]
+    gen.close()   # el lote se corta a mitad de camino
+    assert all(r["ok"] for r in primeros)
+
+    http2 = _http_escrituras({})
+    res = list(tn_client.escribir_lote(items, _http=http2, workers=3, journal=journal))
+    saltados = {r["i"] for r in res if r["saltado"]}
+    assert {r["i"] for r in primeros} <= saltados
+    assert set(http2.aplicados) == {p for i, (p, _) in enumerate(items) if i not in saltados}
+    assert all(r["ok"] for r in res)
+    # una linea cortada por un crash no rompe la lectura
+    with open(journal, "a") as f:
+        f.write('{"clave": "abc", "ok": tr')
+    assert len(tn_client._leer_journal(journal)) == 10
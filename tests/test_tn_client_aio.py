@@ -0,0 +1,141 @@
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import asyncio
+import json
+import threading
+
+import tn_client
+import tn_client_aio
+from bench import servidor_local
+
+
+async def _sin_espera(s):
+    pass
+
+
+def setup_function():
+    tn_client.LIMITADOR.configurar(capacidad=1e9, tasa=1e9)
+    tn_client.configurar_cache(None)
+    tn_client_aio._dormir = _sin_espera
+
+
+def teardown_function():
+    tn_client_aio._dormir = asyncio.sleep
+
+
+def _fake_http(respuestas):
+    llamadas = []
+
+    async def http(method, url, headers, body=None, timeout=30):
+        llamadas.append((method, url))
+        status, hdrs, data = respuestas.pop(0)
+        return status, hdrs, json.dumps(data)
+    http.llamadas = llamadas
+    return http
+
+
+def test_get_reintenta_429_y_levanta_tnerror():
+    dormidas = []
+
+    async def dormir(s):
+        dormidas.append(s)
+
+    tn_client_aio._dormir, original = dormir, tn_client_aio._dormir
+    try:
+        http = _fake_http([(429, {"Retry-After": "2"}, {}), (200, {}, [1, 2])])
+        assert asyncio.run(tn_client_aio.get("orders", token="t", _http=http)) == [1, 2]
+        http = _fake_http([(404, {}, {"description": "Not Found"})])
+        try:
+            asyncio.run(tn_client_aio.get("orders", token="t", _http=http))
+            assert False, "get debe levantar TNError en 4xx"
+        except tn_client.TNError:
+            pass
+    finally:
+        tn_client_aio._dormir = original
+    assert dormidas == [2.0]
+
+
+def test_get_paginado_parcial_y_put_post_no_levantan():
+    http = _fake_http([(200, {}, [1, 2]), (500, {}, {"error": "x"})])
+    filas = asyncio.run(tn_client_aio.get_paginado("orders", per_page=2, _http=http))
+    assert filas == [1, 2]
+
+    async def caido(method, url, headers, body=None, timeout=30):
+        raise ConnectionRefusedError("sin red")
+
+    status, data = asyncio.run(tn_client_aio.put("products/1", {"a": 1}, _http=caido))
+    assert status == 0 and "sin red" in data["error"]
+    status, _ = asyncio.run(tn_client_aio.post("products", {"a": 1}, _http=caido))
+    assert status == 0
+
+
+def test_contra_servidor_local_igual_que_sync_y_reusa_conexion():
+    srv = servidor_local.levantar(total_ordenes=230)
+    tn_client.BASE = srv.base
+    try:
+        esperado = tn_client.get_paginado("orders", per_page=50, token="t")
+
+        async def correr():
+            est = {}
+            serie = [f async for b in tn_client_aio.iter_paginado(
+                "orders", per_page=50, token="t", estado=est) for f in b]
+            c0 = srv.conexiones
+            conc = await tn_client_aio.get_paginado("orders", per_page=50, token="t",
+                                                    concurrente=True, campos=("id",))
+            await tn_client_aio.cerrar()
+            return serie, est, conc, c0
+        c_antes = srv.conexiones
+        serie, est, conc, c_serie = asyncio.run(correr())
+    finally:
+        tn_client._POOL.cerrar()
+        srv.shutdown()
+    assert serie == esperado
+    assert est["completo"] and est["paginas"] == 5 and est["total"] == 230
+    assert c_serie - c_antes == 1   # 5 paginas en serie, una sola conexion
+    assert [o["id"] for o in conc] == [o["id"] for o in esperado]
+    assert all(set(o) == {"id"} for o in conc)
+
+
+def test_comparte_el_tope_en_vuelo_con_el_cliente_sync():
+    http = _fake_http([(200, {}, [1])])
+    # Los requests sync del proceso ocupan todo el presupuesto
+    for _ in range(tn_client._MAX_EN_VUELO):
+        assert tn_client._EN_VUELO.acquire(blocking=False)
+
+    async def correr():
+        t = asyncio.create_task(tn_client_aio.get("orders", token="t", _http=http))
+        await asyncio.sleep(0.05)
+        antes = list(http.llamadas)
+        tn_client._EN_VUELO.release()
+        return antes, await t
+    try:
+        antes, data = asyncio.run(correr())
+    finally:
+        for _ in range(tn_client._MAX_EN_VUELO - 1):
+            tn_client._EN_VUELO.release()
+    assert antes == [] and data == [1]
+    # El async devolvió su lugar: el presupuesto quedó entero
+    for _ in range(tn_client._MAX_EN_VUELO):
+        assert tn_client._EN_VUELO.acquire(blocking=False)
+    for _ in range(tn_client._MAX_EN_VUELO):
+        tn_client._EN_VUELO.release()
+
+
+def test_cache_de_get_condicional_no_bloquea_el_loop(tmp_path):
+    tn_client.configurar_cache(str(tmp_path))
+    hdrs = {"ETag": '"v1"'}
+    http = _fake_http([(200, hdrs, [1, 2]), (304, hdrs, None)])
+    hilos = []
+    original = tn_client.CACHE.leer
+
+    def leer(*a):
+        hilos.append(threading.current_thread() is threading.main_thread())
+        return original(*a)
+    tn_client.CACHE.leer = leer
+    try:
+        for _ in range(2):
+            assert asyncio.run(tn_client_aio.get("products", _http=http, cache=True)) == [1, 2]
+    finally:
+        tn_client.configurar_cache(None)
+    assert hilos == [False, False]
@@ -256,6 +256,21 @@ def test_orden_por_facturacion_en_riesgo_desc():
     assert out.iloc[0]["Producto"] == "Caro"
 
 
+def test_acepta_lineas_de_venta_en_forma_larga():
+    rows = [("2026-05-10", [("A", 2, 10.0), ("B", 1, 5.0)]), ("2026-05-12", [("A", 3, 10.0)])]
+    largo = pd.DataFrame([{"Orden": i, "Fecha": f, "Producto": p, "Variante": "",
+                           "Cantidad": q, "Precio ($)": 0.0, "Costo": c}
+                          for i, (f, items) in enumerate(rows) for p, q, c in items])
+    kw = dict(stock_map={"A": 1, "B": 0}, historial={}, precio_map={"A": 100.0},
+              params=PARAMS, hoy_iso="2026-05-17")
+    pd.testing.assert_frame_equal(calcular_velocidad_restock(largo, **kw),
+                                  calcular_velocidad_restock(_df_items(rows), **kw))
+    # Fecha datetime64 (como la dan las líneas de venta de ordenes)
+    tipado = largo.assign(Fecha=pd.to_datetime(largo["Fecha"]).astype("datetime64[s]"))
+    pd.testing.assert_frame_equal(calcular_velocidad_restock(tipado, **kw),
+                                  calcular_velocidad_restock(largo, **kw))
+
+
 def _run():
     fns = [v for k, v in sorted(globals().items()) if k.startswith("test_")]
     for fn in fns:
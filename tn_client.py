@@ -1,29 +1,61 @@
 # ⚠ GENERADO desde Market Gamer - Core (sync/sync.py) — NO editar aca.
 # Fuente: lib/tn_client.py (Market Gamer - Core) · hash f78db9691264
+# ⚠ Esta copia DIVERGE de ese hash: tiene cambios hechos aca (ver git log de
+# este archivo) pendientes de replicar en Core antes de regenerar.
 
 """
 tn_client — cliente HTTP de la API de Tienda Nube (store Market Gamer 6623036).
 
 SOLO capa HTTP: auth, GET (suelto y paginado), PUT parcial, retry 429 con
-Retry-After, timeouts. Los parsers de dominio viven en cada app (parse_producto
-en el CRM, procesar_orders en el dashboard, etc.).
+Retry-After, rate limiter de proceso, timeouts, pool de conexiones keep-alive,
+cache en disco con GET condicional (ETag / Last-Modified). Los parsers de dominio
+viven en cada app (parse_producto en el CRM, procesar_orders en el dashboard,
+etc.).
 
 Semantica de errores (contratos historicos de los consumidores):
   - get(...)          devuelve el JSON parseado; levanta TNError si status >= 400
                       (tras agotar reintentos de 429). Errores de red propagan.
-  - get_paginado(...) acumula paginas; si una pagina falla devuelve lo acumulado
-                      (parcial), nunca levanta.
+  - get_paginado(...) acumula paginas; si una pagina falla (tras reintentarla
+                      con backoff) devuelve lo acumulado (parcial), nunca
+                      levanta; `estado` marca completo=False y deja un
+                      checkpoint para reanudar() solo la cola. Con concurrente=True pide las
+                      paginas 2..N en paralelo (N sale de x-total-count); el
+                      orden y el contrato de parciales son los mismos.
+  - iter_paginado(...) igual que get_paginado pero generador de paginas.
+  - iter_paginado_por_fechas(...) rango de fechas partido en ventanas segun
+                      densidad (sin el techo per_page*max_pages); mismo
+                      contrato de parciales, reporta truncado en `estado`.
+  - iter_paginado_por_fechas_multi(...) varios filtros del mismo rango en un
+                      barrido concurrente, dedup por id y tiempos por stream;
+                      con `cubre`, saltea los streams que el conteo prueba
+                      redundantes.
   - put(...)          devuelve (status, data) y NO levanta en 4xx/5xx.
+  - escribir_lote(...) muchos PUT/POST en paralelo bajo el rate limiter, con
+                      reintentos por item y journal reanudable; generador de
+                      resultados por item, NO levanta por un item.
+
+Variante asyncio con los mismos contratos: tn_client_aio.
+
+Instrumentacion: cada request (sync o aio) notifica a OBSERVADORES con status,
+latencia, bytes, reintentos, espera y estado de cache.
 
 Fuente unica: Market Gamer - Core (lib/tn_client.py). Las copias en cada app
 son GENERADAS por sync.py — editar aca y correr python sync/sync.py.
 """
+import hashlib
+import http.client
 import json
+import math
 import os
+import queue
+import threading
 import time
 import urllib.error
 import urllib.parse
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+from functools import lru_cache
 
 STORE_ID = "6623036"
 BASE = f"https://api.tiendanube.com/v1/{STORE_ID}"
@@ -33,17 +65,88 @@ _RETRY_429_ESPERA = 1.5   # segundos si TN no manda Retry-After
 _RETRY_429_TOPE = 10.0    # nunca dormir mas que esto
 _dormir = time.sleep      # inyectable en tests
 
+_REINTENTOS_429_PAGINA = 4   # una pagina perdida trunca el listado: insistir mas
+# Pagina que falla por red / 5xx / 429 persistente: se reintenta ESA pagina
+# (no el listado) con backoff exponencial, a lo sumo len() veces.
+_BACKOFF_PAGINA = (1.0, 2.0, 4.0)
+_BACKOFF_ESCRITURA = (1.0, 2.0, 4.0)   # idem para cada item de escribir_lote
+_WORKERS_PAGINADO = 4     # paginas en vuelo a la vez en modo concurrente
+_MAX_EN_VUELO = 8         # requests simultaneos a TN en todo el proceso
+_POOL_MAX_POR_HOST = 8    # conexiones ociosas que se guardan por host
+_POOL_IDLE_MAX = 30.0     # segundos; una conexion ociosa mas vieja se descarta
+
+# Rate limit de TN: leaky bucket de 40 requests que se vacia a 2 req/s por
+# token de app (compartido entre sesiones del dashboard, CRM, workers).
+_RL_CAPACIDAD = 40
+_RL_TASA = 2.0            # req/s nominal
+_RL_TASA_MIN = 0.25       # piso al que puede bajar la tasa tras 429s seguidos
+
+_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Headers de la respuesta original que un 304 no repite y el caller necesita
+_CACHE_HEADERS = ("x-total-count", "etag", "last-modified", "link")
+
+
+def _header(hdrs, nombre):
+    """Header del dict, case-insensitive (dict(e.headers) pierde el lookup
+    insensible de HTTPMessage). None si falta."""
+    nombre = nombre.lower()
+    for k, v in (hdrs or {}).items():
+        if k.lower() == nombre:
+            return v
+    return None
+
 
 def _retry_after(hdrs) -> float:
-    """Retry-After del dict de headers, case-insensitive (dict(e.headers) pierde
-    el lookup insensible de HTTPMessage). Default si falta o no parsea."""
-    for k, v in hdrs.items():
-        if k.lower() == "retry-after":
-            try:
-                return float(v)
-            except (TypeError, ValueError):
-                return _RETRY_429_ESPERA
-    return _RETRY_429_ESPERA
+    """Retry-After en segundos. Default si falta o no parsea."""
+    try:
+        return float(_header(hdrs, "retry-after"))
+    except (TypeError, ValueError):
+        return _RETRY_429_ESPERA
+
+
+def _total_count(hdrs):
+    """x-total-count de TN (total de filas del listado) o None."""
+    try:
+        return int(_header(hdrs, "x-total-count"))
+    except (TypeError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=64)
+def _arbol_campos(campos):
+    """('id', 'products.name', 'products.price') → {'id': {}, 'products':
+    {'name': {}, 'price': {}}}. Hoja vacia = el valor entero."""
+    arbol = {}
+    for c in campos:
+        nodo = arbol
+        for parte in c.split("."):
+            nodo = nodo.setdefault(parte, {})
+    return arbol
+
+
+def _podar(valor, arbol):
+    if not arbol:
+        return valor
+    if isinstance(valor, list):
+        return [_podar(v, arbol) for v in valor]
+    if isinstance(valor, dict):
+        return {k: _podar(valor[k], sub) for k, sub in arbol.items() if k in valor}
+    return valor
+
+
+def campos_param(campos):
+    """Valor del query param `fields` de TN (solo campos de primer nivel)."""
+    return ",".join(_arbol_campos(tuple(campos)))
+
+
+def proyectar(obj, campos):
+    """Recorta un objeto (o lista de objetos) de TN a `campos`: rutas con
+    punto para bajar a sub-objetos y listas ('products.name',
+    'shipping_address.city'). TN solo filtra el primer nivel con `fields`;
+    lo anidado (products, variants) se poda aca. Claves ausentes se omiten."""
+    if not campos:
+        return obj
+    return _podar(obj, _arbol_campos(tuple(campos)))
 
 
 class TNError(Exception):
@@ -53,8 +156,346 @@ class TNError(Exception):
         self.data = data
 
 
+class _PoolConexiones:
+    """Conexiones HTTP(S) persistentes por (scheme, host), thread-safe.
+
+    Cada hilo saca una conexion exclusiva y la devuelve al terminar; nunca dos
+    requests comparten socket. Acotado por cantidad de ociosas por host y por
+    tiempo ocioso (TN corta keep-alives viejos; reusarlas solo suma fallos)."""
+
+    def __init__(self, max_por_host=_POOL_MAX_POR_HOST, idle_max=_POOL_IDLE_MAX):
+        self.max_por_host = max_por_host
+        self.idle_max = idle_max
+        self._lock = threading.Lock()
+        self._libres = {}   # (scheme, netloc) -> [(conn, ts_monotonic)]
+
+    def tomar(self, scheme, netloc, timeout):
+        """(conn, reusada). Descarta las ociosas vencidas en el camino."""
+        ahora = time.monotonic()
+        vencidas = []
+        conn = None
+        with self._lock:
+            libres = self._libres.get((scheme, netloc), [])
+            while libres:
+                c, ts = libres.pop()
+                if ahora - ts <= self.idle_max:
+                    conn = c
+                    break
+                vencidas.append(c)
+        for c in vencidas:
+            c.close()
+        if conn is not None:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            return conn, True
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(netloc, timeout=timeout), False
+
+    def devolver(self, scheme, netloc, conn):
+        with self._lock:
+            libres = self._libres.setdefault((scheme, netloc), [])
+            if len(libres) < self.max_por_host:
+                libres.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def ociosas(self):
+        with self._lock:
+            return sum(len(v) for v in self._libres.values())
+
+    def cerrar(self):
+        with self._lock:
+            todas = [c for v in self._libres.values() for c, _ in v]
+            self._libres.clear()
+        for c in todas:
+            c.close()
+
+
+_POOL = _PoolConexiones()
+# Presupuesto compartido: por mas streams/workers que se lancen en paralelo,
+# nunca hay mas de _MAX_EN_VUELO requests abiertos contra TN a la vez.
+_EN_VUELO = threading.BoundedSemaphore(_MAX_EN_VUELO)
+
+
+class _RateLimiter:
+    """Token bucket de proceso para todo el trafico a TN (GET, PUT, POST).
+
+    Cada request reserva un token antes de salir; si no hay, duerme lo justo
+    para que la tasa no supere `tasa` (los tokens pueden quedar negativos:
+    cada hilo espera su turno, sin thundering herd). Se corrige con los
+    headers x-rate-limit-* de TN (el bucket real lo comparten otras apps con
+    el mismo token) y es adaptativo: cada 429 parte la tasa a la mitad y cada
+    respuesta ok la sube de a poco (5% de la nominal) hasta la nominal (AIMD)."""
+
+    def __init__(self, capacidad=_RL_CAPACIDAD, tasa=_RL_TASA, tasa_min=_RL_TASA_MIN,
+                 reloj=time.monotonic):
+        self._lock = threading.Lock()
+        self.reloj = reloj
+        self.configurar(capacidad, tasa, tasa_min)
+
+    def configurar(self, capacidad=_RL_CAPACIDAD, tasa=_RL_TASA, tasa_min=_RL_TASA_MIN):
+        """Reinicia el bucket (lleno) y los contadores."""
+        with self._lock:
+            self.capacidad = float(capacidad)
+            self.tasa_nominal = float(tasa)
+            self.tasa = float(tasa)
+            self.tasa_min = float(tasa_min)
+            self.tokens = float(capacidad)
+            self._t = self.reloj()
+            self.requests = 0
+            self.esperas = 0
+            self.espera_total = 0.0
+            self.errores_429 = 0
+            self.remaining_tn = None
+
+    def _recargar(self):
+        ahora = self.reloj()
+        self.tokens = min(self.capacidad, self.tokens + (ahora - self._t) * self.tasa)
+        self._t = ahora
+
+    def reservar(self):
+        """Reserva un token sin dormir: devuelve los segundos a esperar antes
+        de mandar el request (0.0 si hay). Para clientes que no bloquean el
+        hilo (tn_client_aio duerme con asyncio.sleep)."""
+        with self._lock:
+            self._recargar()
+            self.tokens -= 1
+            espera = -self.tokens / self.tasa if self.tokens < 0 else 0.0
+            self.requests += 1
+            if espera > 0:
+                self.esperas += 1
+                self.espera_total += espera
+        return espera
+
+    def adquirir(self):
+        """Reserva un token; duerme si hace falta. Devuelve los segundos esperados."""
+        espera = self.reservar()
+        if espera > 0:
+            _dormir(espera)
+        return espera
+
+    def actualizar(self, status, hdrs):
+        """Ajusta el bucket con la respuesta: headers de TN + AIMD por 429."""
+        limite = _header(hdrs, "x-rate-limit-limit")
+        restantes = _header(hdrs, "x-rate-limit-remaining")
+        with self._lock:
+            self._recargar()
+            try:
+                limite = float(limite)
+            except (TypeError, ValueError):
+                limite = None
+            if limite and limite != self.capacidad:
+                # Planes con bucket mas grande tienen leak proporcional (40 → 2/s):
+                # la tasa nominal escala con el limite que informa TN.
+                escala = limite / self.capacidad
+                self.capacidad = limite
+                self.tasa_nominal = limite * _RL_TASA / _RL_CAPACIDAD
+                self.tasa = min(self.tasa_nominal, self.tasa * escala)
+            try:
+                self.remaining_tn = int(restantes)
+                self.tokens = min(self.tokens, float(self.remaining_tn))
+            except (TypeError, ValueError):
+                pass
+            if status == 429:
+                self.errores_429 += 1
+                self.tasa = max(self.tasa_min, self.tasa / 2)
+                self.tokens = min(self.tokens, 0.0)
+            elif status < 400:
+                self.tasa = min(self.tasa_nominal, self.tasa + 0.05 * self.tasa_nominal)
+
+    def estado(self):
+        """Snapshot para monitoreo (⚙️ Operación)."""
+        with self._lock:
+            self._recargar()
+            return {
+                "tokens": round(self.tokens, 2),
+                "capacidad": self.capacidad,
+                "tasa": round(self.tasa, 3),
+                "tasa_nominal": self.tasa_nominal,
+                "espera_proxima": round(max(0.0, 1 - self.tokens) / self.tasa, 3)
+                                  if self.tokens < 1 else 0.0,
+                "requests": self.requests,
+                "esperas": self.esperas,
+                "espera_total": round(self.espera_total, 3),
+                "errores_429": self.errores_429,
+                "remaining_tn": self.remaining_tn,
+            }
+
+
+LIMITADOR = _RateLimiter()
+
+
+def estado_rate_limit():
+    """Estado del limitador de proceso: tokens, tasa, esperas, 429s."""
+    return LIMITADOR.estado()
+
+
+class _CacheHTTP:
+    """Cache de respuestas GET en disco, revalidada con GET condicional.
+
+    Una entrada por URL (+ token): JSON con el cuerpo y los validadores
+    (ETag / Last-Modified). Antes del GET se mandan If-None-Match /
+    If-Modified-Since; si TN responde 304 se sirve el cuerpo guardado (un
+    request igual, pero sin bajar ni parsear el JSON de nuevo). Nunca sirve
+    sin revalidar: no hay TTL ni riesgo de datos viejos.
+
+    Acotada en bytes: al pasarse desaloja las entradas usadas hace mas tiempo
+    (mtime del archivo, que se toca en cada hit)."""
+
+    def __init__(self, ruta, max_bytes=_CACHE_MAX_BYTES):
+        self.ruta = ruta
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(ruta, exist_ok=True)
+        self._bytes = {}
+        for nombre in os.listdir(ruta):
+            if nombre.endswith(".json"):
+                try:
+                    self._bytes[nombre] = os.path.getsize(os.path.join(ruta, nombre))
+                except OSError:
+                    pass
+        self.stats = {"hits": 0, "misses": 0, "guardadas": 0, "desalojos": 0}
+
+    def _archivo(self, url, token):
+        clave = hashlib.sha256(f"{token}\n{url}".encode("utf-8")).hexdigest()
+        return f"{clave}.json"
+
+    def leer(self, url, token):
+        """Entrada guardada (dict) o None."""
+        nombre = self._archivo(url, token)
+        try:
+            with open(os.path.join(self.ruta, nombre), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def validadores(self, entrada):
+        h = {}
+        if entrada and entrada.get("etag"):
+            h["If-None-Match"] = entrada["etag"]
+        if entrada and entrada.get("last_modified"):
+            h["If-Modified-Since"] = entrada["last_modified"]
+        return h
+
+    def hit(self, url, token, entrada, hdrs):
+        """304: headers guardados + los frescos; toca el mtime (LRU)."""
+        with self._lock:
+            self.stats["hits"] += 1
+        try:
+            os.utime(os.path.join(self.ruta, self._archivo(url, token)))
+        except OSError:
+            pass
+        return {**entrada.get("hdrs", {}), **dict(hdrs or {})}
+
+    def guardar(self, url, token, hdrs, texto):
+        """Respuesta 200: la guarda si trae validadores. Cuenta el miss igual."""
+        with self._lock:
+            self.stats["misses"] += 1
+        etag = _header(hdrs, "etag")
+        lm = _header(hdrs, "last-modified")
+        if not etag and not lm:
+            return
+        entrada = {
+            "url": url, "etag": etag, "last_modified": lm, "texto": texto,
+            "hdrs": {k: v for k, v in (hdrs or {}).items() if k.lower() in _CACHE_HEADERS},
+        }
+        payload = json.dumps(entrada).encode("utf-8")
+        if len(payload) > self.max_bytes:
+            return
+        nombre = self._archivo(url, token)
+        destino = os.path.join(self.ruta, nombre)
+        tmp = f"{destino}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(payload)
+            os.replace(tmp, destino)
+        except OSError:
+            return
+        with self._lock:
+            self._bytes[nombre] = len(payload)
+            self.stats["guardadas"] += 1
+            self._desalojar()
+
+    def _desalojar(self):
+        total = sum(self._bytes.values())
+        if total <= self.max_bytes:
+            return
+        def _mtime(nombre):
+            try:
+                return os.path.getmtime(os.path.join(self.ruta, nombre))
+            except OSError:
+                return 0.0
+        for nombre in sorted(self._bytes, key=_mtime):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.ruta, nombre))
+            except OSError:
+                pass
+            total -= self._bytes.pop(nombre)
+            self.stats["desalojos"] += 1
+
+    def estado(self):
+        with self._lock:
+            return {**self.stats, "entradas": len(self._bytes),
+                    "bytes": sum(self._bytes.values()), "max_bytes": self.max_bytes}
+
+
+CACHE = None   # _CacheHTTP del proceso; None = sin cache (ver configurar_cache)
+
+
+def configurar_cache(ruta, max_bytes=_CACHE_MAX_BYTES):
+    """Activa la cache en disco de GETs condicionales en `ruta` (None la apaga).
+    Solo la usan las llamadas con cache=True."""
+    global CACHE
+    CACHE = _CacheHTTP(ruta, max_bytes) if ruta else None
+    return CACHE
+
+
+def estado_cache():
+    """Contadores de la cache (hits = 304, misses = 200 con cuerpo), o None."""
+    return CACHE.estado() if CACHE is not None else None
+
+
+# Metodos que se pueden reenviar si la red falla despues de mandar el
+# request (repetirlos deja el mismo estado)
+_REINTENTABLES_RED = frozenset({"GET", "HEAD", "PUT"})
+
+
 def _http(method, url, headers, body=None, timeout=30):
-    """Transporte real. Inyectable en tests via el parametro _http de get/put."""
+    """Transporte real, sobre el pool keep-alive. Inyectable en tests via el
+    parametro _http de get/put. Si una conexion reusada resulta cerrada por el
+    server (keep-alive vencido del otro lado) reintenta con una nueva, solo
+    para metodos idempotentes (GET/PUT): un POST pudo haber llegado y
+    procesarse, asi que el error propaga."""
+    u = urllib.parse.urlsplit(url)
+    ruta = (u.path or "/") + (f"?{u.query}" if u.query else "")
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    while True:
+        conn, reusada = _POOL.tomar(u.scheme, u.netloc, timeout)
+        try:
+            conn.request(method, ruta, body=data, headers=headers)
+            r = conn.getresponse()
+            texto = r.read().decode("utf-8")
+        except (ConnectionError, http.client.BadStatusLine):
+            conn.close()
+            if reusada and method in _REINTENTABLES_RED:
+                continue
+            raise
+        except Exception:
+            conn.close()
+            raise
+        if r.will_close:
+            conn.close()
+        else:
+            _POOL.devolver(u.scheme, u.netloc, conn)
+        return r.status, dict(r.headers), texto
+
+
+def _http_sin_pool(method, url, headers, body=None, timeout=30):
+    """Transporte sin reuso (una conexion nueva por request). Referencia para
+    el benchmark de bench/bench_tn_pool.py; inyectable igual que _http."""
     data = json.dumps(body).encode("utf-8") if body is not None else None
     req = urllib.request.Request(url, data=data, method=method, headers=headers)
     try:
@@ -68,9 +509,34 @@ def _http(method, url, headers, body=None, timeout=30):
         return e.code, dict(e.headers), cuerpo
 
 
-def request(method, path, token=None, params=None, body=None, timeout=30,
-            user_agent=None, reintentos_429=2, _http=_http):
-    """(status, data) con retry de 429 respetando Retry-After (capado a 10s)."""
+# Observadores de cada llamada (instrumentacion: metricas_http.REGISTRO.evento
+# en el dashboard). Reciben un dict: servicio, method, endpoint (path sin
+# query), status, segundos (transporte, sumando intentos), bytes, reintentos
+# (429), espera (rate limiter + Retry-After) y cache (hit/miss/None). Un
+# observador que falla no afecta al request.
+OBSERVADORES = []
+
+
+def _bytes_cuerpo(hdrs, texto):
+    """Bytes del cuerpo para los observadores: Content-Length si vino (sin
+    copiar el texto); si no, el texto re-codificado. Solo se llama con
+    OBSERVADORES."""
+    try:
+        return int(_header(hdrs, "content-length"))
+    except (TypeError, ValueError):
+        return len(texto.encode("utf-8")) if texto else 0
+
+
+def _notificar(evento):
+    for obs in list(OBSERVADORES):
+        try:
+            obs(evento)
+        except Exception:
+            pass
+
+
+def _preparar(path, token, params, body, user_agent):
+    """(token, url, headers) de un request a TN."""
     tok = token or os.environ.get("TN_ACCESS_TOKEN", "")
     url = f"{BASE}/{path}"
     if params:
@@ -82,48 +548,465 @@ def request(method, path, token=None, params=None, body=None, timeout=30,
     }
     if body is not None:
         headers["Content-Type"] = "application/json"
+    return tok, url, headers
+
+
+def _parsear(texto):
+    try:
+        return json.loads(texto) if texto else None
+    except ValueError:
+        return {"raw": texto}
+
+
+def _request(method, path, token=None, params=None, body=None, timeout=30,
+             user_agent=None, reintentos_429=2, _http=_http, cache=False):
+    """(status, headers, data). Igual que request() pero expone los headers.
+    cache=True (solo GET, con configurar_cache activo): GET condicional; un 304
+    se devuelve como el 200 guardado."""
+    tok, url, headers = _preparar(path, token, params, body, user_agent)
+    cache = CACHE if (cache and method == "GET") else None
+    entrada = cache.leer(url, tok) if cache is not None else None
+    if entrada:
+        headers.update(cache.validadores(entrada))
     intento = 0
-    while True:
-        status, hdrs, texto = _http(method, url, headers, body=body, timeout=timeout)
-        if status == 429 and intento < reintentos_429:
-            intento += 1
-            _dormir(min(max(_retry_after(hdrs), 0.0), _RETRY_429_TOPE))
-            continue
-        try:
-            data = json.loads(texto) if texto else None
-        except ValueError:
-            data = {"raw": texto}
-        return status, data
+    ev = {"servicio": "tn", "method": method, "endpoint": path, "status": 0,
+          "segundos": 0.0, "bytes": None, "reintentos": 0, "espera": 0.0, "cache": None}
+    try:
+        while True:
+            ev["espera"] += LIMITADOR.adquirir()
+            t0 = time.perf_counter()
+            with _EN_VUELO:
+                status, hdrs, texto = _http(method, url, headers, body=body, timeout=timeout)
+            ev["segundos"] += time.perf_counter() - t0
+            ev["status"] = status
+            LIMITADOR.actualizar(status, hdrs)
+            if status == 429 and intento < reintentos_429:
+                intento += 1
+                ev["reintentos"] = intento
+                espera = min(max(_retry_after(hdrs), 0.0), _RETRY_429_TOPE)
+                ev["espera"] += espera
+                _dormir(espera)
+                continue
+            if OBSERVADORES:
+                ev["bytes"] = _bytes_cuerpo(hdrs, texto)
+            if cache is not None:
+                if status == 304 and entrada:
+                    ev["cache"] = "hit"
+                    status, hdrs, texto = 200, cache.hit(url, tok, entrada, hdrs), entrada["texto"]
+                elif status == 200:
+                    ev["cache"] = "miss"
+                    cache.guardar(url, tok, hdrs, texto)
+            return status, hdrs, _parsear(texto)
+    finally:
+        if OBSERVADORES:
+            _notificar(ev)
+
+
+def request(method, path, token=None, params=None, body=None, timeout=30,
+            user_agent=None, reintentos_429=2, _http=_http, cache=False):
+    """(status, data) con retry de 429 respetando Retry-After (capado a 10s)."""
+    status, _, data = _request(method, path, token=token, params=params, body=body,
+                               timeout=timeout, user_agent=user_agent,
+                               reintentos_429=reintentos_429, _http=_http, cache=cache)
+    return status, data
 
 
-def get(path, token=None, params=None, timeout=30, user_agent=None, _http=_http):
+def get(path, token=None, params=None, timeout=30, user_agent=None, _http=_http,
+        cache=False):
     status, data = request("GET", path, token=token, params=params,
-                           timeout=timeout, user_agent=user_agent, _http=_http)
+                           timeout=timeout, user_agent=user_agent, _http=_http,
+                           cache=cache)
     if status >= 400:
         raise TNError(status, data)
     return data
 
 
+def _get_pagina(path, params, page, per_page, token, timeout, user_agent, _http,
+                cache=False, campos=None):
+    """(batch, headers, status) de una pagina; batch None si fallo o no es
+    lista. status 0 si hubo error de red. campos: ver proyectar."""
+    p = dict(params or {})
+    p["per_page"] = per_page
+    p["page"] = page
+    if campos:
+        p["fields"] = campos_param(campos)
+    try:
+        status, hdrs, batch = _request("GET", path, token=token, params=p,
+                                       timeout=timeout, user_agent=user_agent,
+                                       reintentos_429=_REINTENTOS_429_PAGINA,
+                                       _http=_http, cache=cache)
+    except Exception:
+        return None, {}, 0
+    if status >= 400 or not isinstance(batch, list):
+        return None, hdrs, status
+    return proyectar(batch, campos), hdrs, status
+
+
+def _transitorio(status):
+    """Fallo que vale reintentar: red/timeout (0), 429 tras sus reintentos, 5xx."""
+    return status == 0 or status == 429 or status >= 500
+
+
+def _get_pagina_reintentando(path, params, page, per_page, token, timeout, user_agent,
+                             _http, cache=False, campos=None):
+    """_get_pagina con reintentos de la misma pagina ante fallos transitorios
+    (ver _BACKOFF_PAGINA). Un 404/4xx no se reintenta."""
+    for espera in (0.0,) + _BACKOFF_PAGINA:
+        if espera:
+            _dormir(espera)
+        batch, hdrs, status = _get_pagina(path, params, page, per_page, token, timeout,
+                                          user_agent, _http, cache, campos)
+        if batch is not None or not _transitorio(status):
+            break
+    return batch, hdrs, status
+
+
+def _fin_de_listado(batch, status):
+    """True si la pagina vacia/404 es el fin normal del listado (TN responde
+    404 'Last page is N' al pasarse), no un fallo."""
+    return batch is None and status == 404
+
+
+def _quedan_filas(est):
+    """Tras agotar max_pages con paginas llenas: sin x-total-count no se puede
+    descartar que haya mas (se asume truncado)."""
+    return est["total"] is None or est["total"] > est["filas"]
+
+
+def iter_paginado(path, params=None, per_page=200, max_pages=50, token=None,
+                  timeout=30, user_agent=None, _http=_http, concurrente=False,
+                  workers=_WORKERS_PAGINADO, estado=None, cache=False, campos=None,
+                  desde_pagina=1):
+    """Generador de paginas (listas) en orden, a medida que llegan. Mismas
+    reglas de corte que get_paginado: termina en la primera pagina que falle
+    o venga corta. El consumidor puede procesar y soltar cada pagina sin
+    retener el listado completo.
+
+    concurrente=True: la pagina 1 trae x-total-count, y las 2..N se piden con
+    `workers` en vuelo (cada una con su retry de 429). Sin x-total-count cae
+    al modo serie.
+
+    Una pagina que falla por red, 5xx o 429 persistente se reintenta sola
+    (backoff acotado, _BACKOFF_PAGINA); si igual no sale, el listado corta ahi.
+
+    estado (dict opcional) se completa al terminar: total (x-total-count o
+    None), paginas, filas, truncado (quedaban paginas despues de max_pages),
+    error (corto por una pagina fallida), completo (ni una ni la otra) y
+    checkpoint: None, o si hubo error {path, params, per_page, pagina} con la
+    pagina que fallo, para seguir desde ahi con reanudar() en vez de volver a
+    bajar todo. desde_pagina: arranca en esa pagina (las anteriores se dan
+    por entregadas y llenas).
+
+    cache=True: cada pagina es un GET condicional (ver configurar_cache).
+    campos: pide a TN solo esos campos (`fields`) y poda lo anidado; las
+    paginas llegan ya recortadas (ver proyectar)."""
+    est = estado if estado is not None else {}
+    inicio = max(1, int(desde_pagina))
+    est.update(total=None, paginas=inicio - 1, filas=(inicio - 1) * per_page,
+               truncado=False, error=False, completo=False, checkpoint=None)
+
+    def _ok(batch):
+        est["paginas"] += 1
+        est["filas"] += len(batch)
+
+    def _fallo(batch, status, page):
+        if not _fin_de_listado(batch, status):
+            est["error"] = True
+            est["checkpoint"] = {"path": path, "params": dict(params or {}),
+                                 "per_page": per_page, "pagina": page}
+
+    args = (token, timeout, user_agent, _http, cache, campos)
+    batch, hdrs, status = _get_pagina_reintentando(path, params, inicio, per_page, *args)
+    est["total"] = _total_count(hdrs)
+    try:
+        if batch is None:
+            _fallo(batch, status, inicio)
+            return
+        _ok(batch)
+        yield batch
+        if len(batch) < per_page:
+            return
+        if max_pages <= inicio:
+            est["truncado"] = _quedan_filas(est)
+            return
+
+        total = est["total"] if concurrente else None
+        if total is None:
+            for page in range(inicio + 1, max_pages + 1):
+                batch, _, status = _get_pagina_reintentando(path, params, page, per_page, *args)
+                if batch is None:
+                    _fallo(batch, status, page)
+                    return
+                _ok(batch)
+                yield batch
+                if len(batch) < per_page:
+                    return
+            est["truncado"] = _quedan_filas(est)
+            return
+
+        paginas_total = math.ceil(total / per_page)
+        ultima = min(max_pages, paginas_total)
+        if ultima <= inicio:
+            return
+        # Ventana deslizante: a lo sumo `workers` paginas pedidas por delante de
+        # la que se esta consumiendo (no se bufferea el listado entero).
+        workers = max(1, workers)
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            pendientes = []
+            siguiente = inicio + 1
+            try:
+                while pendientes or siguiente <= ultima:
+                    while siguiente <= ultima and len(pendientes) < workers:
+                        pendientes.append((siguiente, ex.submit(
+                            _get_pagina_reintentando, path, params, siguiente, per_page, *args)))
+                        siguiente += 1
+                    page, fut = pendientes.pop(0)
+                    batch, _, status = fut.result()
+                    if batch is None:
+                        _fallo(batch, status, page)
+                        return
+                    _ok(batch)
+                    yield batch
+                    if len(batch) < per_page:
+                        return
+                est["truncado"] = paginas_total > max_pages
+            finally:
+                for _, f in pendientes:
+                    f.cancel()
+    finally:
+        est["completo"] = not (est["truncado"] or est["error"])
+
+
+def reanudar(checkpoint, **kw):
+    """Sigue un listado cortado desde su checkpoint (estado["checkpoint"] de
+    iter_paginado): pide solo la cola, desde la pagina que fallo. kw se pasa
+    a iter_paginado (token, max_pages, concurrente, campos, estado...)."""
+    return iter_paginado(checkpoint["path"], params=checkpoint["params"],
+                         per_page=checkpoint["per_page"],
+                         desde_pagina=checkpoint["pagina"], **kw)
+
+
 def get_paginado(path, params=None, per_page=200, max_pages=50, token=None,
-                 timeout=30, user_agent=None, _http=_http):
+                 timeout=30, user_agent=None, _http=_http, concurrente=False,
+                 workers=_WORKERS_PAGINADO, cache=False, campos=None, estado=None):
     """Acumula paginas (1..max_pages); corta cuando una pagina trae menos de
-    per_page. Si una pagina falla, devuelve lo acumulado (parcial)."""
+    per_page. Si una pagina falla (tras sus reintentos), devuelve lo acumulado
+    (parcial) y estado["completo"] queda False con el checkpoint para
+    reanudar(). concurrente/workers/cache/campos/estado: ver iter_paginado."""
     filas = []
-    for page in range(1, max_pages + 1):
+    for batch in iter_paginado(path, params=params, per_page=per_page,
+                               max_pages=max_pages, token=token, timeout=timeout,
+                               user_agent=user_agent, _http=_http,
+                               concurrente=concurrente, workers=workers, cache=cache,
+                               campos=campos, estado=estado):
+        filas.extend(batch)
+    return filas
+
+
+def _ventanas(desde, hasta, dias):
+    """Parte [desde, hasta] (dates, inclusive) en ventanas de `dias` dias."""
+    out = []
+    d0 = desde
+    while d0 <= hasta:
+        d1 = min(hasta, d0 + timedelta(days=max(1, dias) - 1))
+        out.append((d0, d1))
+        d0 = d1 + timedelta(days=1)
+    return out
+
+
+def iter_paginado_por_fechas(path, desde, hasta, params=None, per_page=50,
+                             max_pages=50, token=None, timeout=30, user_agent=None,
+                             _http=_http, workers=_WORKERS_PAGINADO,
+                             campo="created_at", tz="-03:00", estado=None, campos=None):
+    """Listado de un rango de fechas largo partido en ventanas, sin el techo de
+    per_page * max_pages filas de un solo get_paginado.
+
+    Una pagina de 1 fila del rango completo trae x-total-count; con eso se
+    dimensionan las ventanas para que cada una entre con holgura (80%) en
+    per_page * max_pages. Las ventanas se piden en paralelo (`workers`) y se
+    entregan en orden de fecha, deduplicadas por id. Si una ventana igual sale
+    truncada se parte a la mitad y se vuelve a pedir, hasta llegar a un dia.
+
+    desde/hasta: date o ISO 'YYYY-MM-DD'. Generador de paginas como
+    iter_paginado; estado (dict opcional) queda con total, ventanas, filas,
+    truncado (alguna ventana de un dia no entro), error (alguna pagina fallo)
+    y salteado (x-total-count 0: el rango no se recorre). campos: ver
+    iter_paginado."""
+    desde = date.fromisoformat(str(desde)[:10])
+    hasta = date.fromisoformat(str(hasta)[:10])
+    est = estado if estado is not None else {}
+    est.update(total=None, ventanas=0, filas=0, truncado=False, error=False,
+               completo=False, salteado=False)
+    if hasta < desde:
+        est["completo"] = True
+        return
+
+    def _params(d0, d1):
         p = dict(params or {})
-        p["per_page"] = per_page
-        p["page"] = page
+        p[f"{campo}_min"] = f"{d0.isoformat()}T00:00:00{tz}"
+        p[f"{campo}_max"] = f"{d1.isoformat()}T23:59:59{tz}"
+        return p
+
+    sonda, hdrs, status = _get_pagina_reintentando(path, _params(desde, hasta), 1, 1,
+                                                   token, timeout, user_agent, _http,
+                                                   campos=campos)
+    total = est["total"] = _total_count(hdrs)
+    if total == 0 or (sonda == [] and total is None) or _fin_de_listado(sonda, status):
+        est["completo"] = est["salteado"] = True   # el filtro no trae nada: 1 request
+        return
+    dias = (hasta - desde).days + 1
+    capacidad = max(1, int(per_page * max_pages * 0.8))
+    tam = dias if not total or total <= capacidad else max(1, dias * capacidad // total)
+
+    def _ventana(d0, d1):
+        e = {}
+        filas = [f for b in iter_paginado(path, _params(d0, d1), per_page=per_page,
+                                          max_pages=max_pages, token=token,
+                                          timeout=timeout, user_agent=user_agent,
+                                          _http=_http, estado=e, campos=campos)
+                 for f in b]
+        return d0, d1, filas, e
+
+    vistos = set()
+    pendientes = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
         try:
-            batch = get(path, token=token, params=p, timeout=timeout,
-                        user_agent=user_agent, _http=_http)
+            pendientes = [ex.submit(_ventana, d0, d1) for d0, d1 in _ventanas(desde, hasta, tam)]
+            while pendientes:
+                d0, d1, filas, e = pendientes.pop(0).result()
+                if e["truncado"] and d1 > d0:
+                    medio = d0 + timedelta(days=(d1 - d0).days // 2)
+                    pendientes[:0] = [ex.submit(_ventana, d0, medio),
+                                      ex.submit(_ventana, medio + timedelta(days=1), d1)]
+                    continue
+                est["ventanas"] += 1
+                est["truncado"] = est["truncado"] or e["truncado"]
+                est["error"] = est["error"] or e["error"]
+                nuevas = []
+                for f in filas:
+                    fid = f.get("id") if isinstance(f, dict) else None
+                    if fid is not None:
+                        if fid in vistos:
+                            continue
+                        vistos.add(fid)
+                    nuevas.append(f)
+                est["filas"] += len(nuevas)
+                if nuevas:
+                    yield nuevas
+        finally:
+            for f in pendientes:
+                f.cancel()
+            est["completo"] = not (est["truncado"] or est["error"])
+
+
+def _contar_por_fechas(path, desde, hasta, params, kw):
+    """x-total-count del rango completo con `params` (1 request de 1 fila) o
+    None. kw: los de iter_paginado_por_fechas (token, _http, campo, tz...)."""
+    campo, tz = kw.get("campo", "created_at"), kw.get("tz", "-03:00")
+    p = dict(params or {})
+    p[f"{campo}_min"] = f"{str(desde)[:10]}T00:00:00{tz}"
+    p[f"{campo}_max"] = f"{str(hasta)[:10]}T23:59:59{tz}"
+    _, hdrs, _ = _get_pagina_reintentando(path, p, 1, 1, kw.get("token"), kw.get("timeout", 30),
+                                          kw.get("user_agent"), kw.get("_http", _http),
+                                          campos=kw.get("campos"))
+    return _total_count(hdrs)
+
+
+def iter_paginado_por_fechas_multi(path, desde, hasta, filtros, estado=None, cubre=None,
+                                   **kw):
+    """Varios listados del mismo rango (uno por dict de `filtros`, p.ej. los
+    combos de payment_status/status de orders) en UN solo barrido concurrente.
+
+    Cada stream corre iter_paginado_por_fechas en su hilo; todos comparten el
+    presupuesto de requests en vuelo del proceso. Un stream cuyo x-total-count
+    es 0 se saltea con un solo request. Las paginas se entregan a medida que
+    llegan (sin orden entre streams), deduplicadas por id entre streams.
+
+    Los conteos solos no prueban que un stream no aporte nada: dos listados
+    del mismo tamano pueden tener filas distintas. Hace falta un listado que
+    los contenga a todos: `cubre` (dict de filtros opcional, p.ej. status=any).
+    Si el x-total-count de un stream iguala al de `cubre`, ese stream ES el
+    listado completo y los demas se saltean (cubierto=True) sin recorrerlos.
+    Cuesta un request por conteo (el de `cubre` y los de los streams hasta el
+    primero que iguala). Sin `cubre`, o sin header, se recorren todos.
+
+    estado (dict opcional): completo, truncado, error y streams = una entrada
+    por filtro con filtros, segundos, filas, nuevas (no vistas en otro stream),
+    total, salteado y cubierto, para ver que pasadas valen la pena. kw se pasa
+    tal cual a iter_paginado_por_fechas."""
+    est = estado if estado is not None else {}
+    stats = [{"filtros": dict(f), "segundos": 0.0, "filas": 0, "nuevas": 0,
+              "total": None, "salteado": False, "cubierto": False} for f in filtros]
+    est.update(streams=stats, truncado=False, error=False, completo=False)
+    activos = list(range(len(stats)))
+    total_cubre = _contar_por_fechas(path, desde, hasta, cubre, kw) if cubre else None
+    if total_cubre is not None:
+        for i in activos:
+            stats[i]["total"] = _contar_por_fechas(path, desde, hasta, filtros[i], kw)
+            if stats[i]["total"] == total_cubre:
+                for j in activos:
+                    if j != i:
+                        stats[j].update(salteado=True, cubierto=True)
+                activos = [i]
+                break
+    cola = queue.Queue(maxsize=max(4, 2 * len(stats)))
+    parar = threading.Event()
+    _FIN = object()
+
+    def _poner(item):
+        while not parar.is_set():
+            try:
+                cola.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _stream(i):
+        e = {}
+        t0 = time.perf_counter()
+        try:
+            for batch in iter_paginado_por_fechas(path, desde, hasta,
+                                                  params=filtros[i], estado=e, **kw):
+                if not _poner((i, batch)):
+                    return
         except Exception:
-            break
-        if not isinstance(batch, list):
-            break
-        filas.extend(batch)
-        if len(batch) < per_page:
-            break
-    return filas
+            e["error"] = True
+        finally:
+            stats[i].update(segundos=round(time.perf_counter() - t0, 3),
+                            total=e.get("total"), salteado=e.get("salteado", False))
+            est["truncado"] = est["truncado"] or e.get("truncado", False)
+            est["error"] = est["error"] or e.get("error", False)
+            _poner((i, _FIN))
+
+    vistos = set()
+    hilos = [threading.Thread(target=_stream, args=(i,), daemon=True) for i in activos]
+    for h in hilos:
+        h.start()
+    vivos = len(hilos)
+    try:
+        while vivos:
+            i, batch = cola.get()
+            if batch is _FIN:
+                vivos -= 1
+                continue
+            stats[i]["filas"] += len(batch)
+            nuevas = []
+            for f in batch:
+                fid = f.get("id") if isinstance(f, dict) else None
+                if fid is not None:
+                    if fid in vistos:
+                        continue
+                    vistos.add(fid)
+                nuevas.append(f)
+            stats[i]["nuevas"] += len(nuevas)
+            if nuevas:
+                yield nuevas
+    finally:
+        parar.set()
+        for h in hilos:
+            h.join()
+        est["completo"] = not vivos and not (est["truncado"] or est["error"])
 
 
 def put(path, body, token=None, timeout=30, user_agent=None, _http=_http):
@@ -146,3 +1029,112 @@ def post(path, body, token=None, timeout=60, user_agent=None, _http=_http):
                        user_agent=user_agent, _http=_http)
     except Exception as e:
         return 0, {"error": str(e)}
+
+
+def _clave_item(method, path, body):
+    """Identidad de un item de lote para el journal (mismo path+body = mismo item)."""
+    crudo = f"{method} {path} " + json.dumps(body, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(crudo.encode("utf-8")).hexdigest()
+
+
+def _leer_journal(ruta):
+    """Claves ya aplicadas con exito (ok=True) segun el journal JSONL."""
+    hechas = set()
+    try:
+        with open(ruta, encoding="utf-8") as f:
+            for linea in f:
+                try:
+                    r = json.loads(linea)
+                except ValueError:
+                    continue   # ultima linea a medio escribir si el proceso murio
+                if r.get("ok"):
+                    hechas.add(r.get("clave"))
+    except FileNotFoundError:
+        pass
+    return hechas
+
+
+def _reintentable_escritura(method, status, error=None):
+    """Si vale reenviar una escritura que fallo. PUT (idempotente): los
+    transitorios (red/timeout, 429, 5xx). POST: solo lo que seguro no se
+    proceso (429, conexion rechazada); un timeout o un 5xx pudo haber creado
+    el recurso y reenviarlo lo duplicaria."""
+    if method.upper() in _REINTENTABLES_RED:
+        return _transitorio(status)
+    return status == 429 or isinstance(error, ConnectionRefusedError)
+
+
+def _escribir_item(method, path, body, token, timeout, user_agent, _http):
+    """(status, data, intentos). Reintenta con _BACKOFF_ESCRITURA lo que
+    _reintentable_escritura permite para el metodo; un 4xx queda como esta."""
+    intentos = 0
+    for espera in (0.0,) + _BACKOFF_ESCRITURA:
+        if espera:
+            _dormir(espera)
+        intentos += 1
+        error = None
+        try:
+            status, data = request(method, path, token=token, body=body, timeout=timeout,
+                                   user_agent=user_agent, _http=_http)
+        except Exception as e:
+            error = e
+            status, data = 0, {"error": str(e)}
+        if not _reintentable_escritura(method, status, error):
+            break
+    return status, data, intentos
+
+
+def escribir_lote(items, method="PUT", token=None, timeout=30, user_agent=None,
+                  _http=_http, workers=_MAX_EN_VUELO, journal=None):
+    """Aplica un lote de escrituras [(path, body), ...] en paralelo, bajo el
+    rate limiter y el tope de requests en vuelo del proceso. Generador: entrega
+    un resultado por item a medida que termina (orden de llegada), para
+    mostrar el avance en la UI:
+
+        {"i", "path", "ok", "status", "data", "intentos", "saltado"}
+
+    Mismo contrato que put(): NO levanta por un item; el error queda en su
+    resultado y el lote sigue. Fallos transitorios se reintentan por item;
+    con method="POST" solo 429 y conexion rechazada (un POST reenviado tras
+    un timeout puede duplicar el recurso, y el journal no lo ve).
+
+    journal: ruta de un JSONL donde se anota cada item terminado. Si el lote
+    se corta (proceso caido, usuario que cierra), correrlo de nuevo con el
+    mismo journal saltea los items ya aplicados (saltado=True) y solo manda
+    el resto. Cerrar el generador cancela lo que no arranco."""
+    items = list(items)
+    hechas = _leer_journal(journal) if journal else set()
+    lock = threading.Lock()
+    f_journal = open(journal, "a", encoding="utf-8") if journal else None
+
+    def _uno(i, path, body, clave):
+        status, data, intentos = _escribir_item(method, path, body, token, timeout,
+                                                user_agent, _http)
+        ok = 0 < status < 400
+        if f_journal is not None:
+            with lock:
+                f_journal.write(json.dumps({"clave": clave, "i": i, "path": path,
+                                            "ok": ok, "status": status}) + "\n")
+                f_journal.flush()
+        return {"i": i, "path": path, "ok": ok, "status": status, "data": data,
+                "intentos": intentos, "saltado": False}
+
+    pendientes = []
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+            for i, (path, body) in enumerate(items):
+                clave = _clave_item(method, path, body)
+                if clave in hechas:
+                    yield {"i": i, "path": path, "ok": True, "status": None, "data": None,
+                           "intentos": 0, "saltado": True}
+                    continue
+                pendientes.append(ex.submit(_uno, i, path, body, clave))
+            try:
+                for fut in as_completed(pendientes):
+                    yield fut.result()
+            finally:
+                for fut in pendientes:
+                    fut.cancel()
+    finally:
+        if f_journal is not None:
+            f_journal.close()
@@ -0,0 +1,405 @@
+"""
+tn_client_aio — variante asyncio de tn_client (misma API de Tienda Nube).
+
+Vive en este repo: no se genera desde Core (a diferencia de tn_client.py).
+Si tn_client cambia de contrato al regenerarse, revisar este modulo.
+
+Mismos contratos que tn_client, con corutinas:
+  - await get(...)           JSON parseado; levanta TNError si status >= 400
+                             (tras agotar reintentos de 429). Errores de red propagan.
+  - await get_paginado(...)  acumula paginas; si una falla devuelve lo acumulado
+                             (parcial), nunca levanta. concurrente=True: paginas
+                             2..N en vuelo a la vez, mismo orden y parciales.
+  - iter_paginado(...)       async generator de paginas; `estado` igual que sync.
+  - await put/post(...)      (status, data); NO levantan nunca.
+
+Comparte con tn_client el armado de URL/headers, el rate limiter de proceso
+(LIMITADOR: el bucket de TN es uno solo, sync y async juntos), el tope de
+requests en vuelo del proceso (_EN_VUELO, tambien compartido), la cache de
+GET condicional (su I/O de disco corre en un hilo, fuera del loop) y la
+proyeccion de campos. Transporte propio sobre asyncio streams (HTTP/1.1
+keep-alive, un pool por event loop): muchos requests en un loop, sin un hilo
+por request. Solo stdlib.
+"""
+import asyncio
+import json
+import ssl
+import time
+import urllib.parse
+import weakref
+
+import tn_client
+from tn_client import (
+    TNError, _BACKOFF_PAGINA, _MAX_EN_VUELO, _POOL_IDLE_MAX, _POOL_MAX_POR_HOST,
+    _REINTENTOS_429_PAGINA, _RETRY_429_TOPE, _WORKERS_PAGINADO, _bytes_cuerpo, _fin_de_listado,
+    _header, _parsear, _preparar, _quedan_filas, _retry_after, _total_count, _transitorio,
+    campos_param, proyectar,
+)
+
+_dormir = asyncio.sleep   # inyectable en tests
+_SSL = None
+
+
+class _PoolAsync:
+    """Conexiones keep-alive ociosas por (scheme, host) + cola de requests en
+    vuelo, de UN event loop (los streams de asyncio no cruzan loops). El tope
+    real es el de proceso (_tomar_en_vuelo); en_vuelo solo ordena la espera
+    de las corutinas del loop."""
+
+    def __init__(self):
+        self.en_vuelo = asyncio.Semaphore(_MAX_EN_VUELO)
+        self._ociosas = {}
+
+    async def tomar(self, scheme, netloc, timeout):
+        """(reader, writer, reusada)."""
+        global _SSL
+        lista = self._ociosas.get((scheme, netloc), [])
+        ahora = time.monotonic()
+        while lista:
+            r, w, t = lista.pop()
+            if ahora - t <= _POOL_IDLE_MAX and not w.is_closing() and not r.at_eof():
+                return r, w, True
+            w.close()
+        host, _, puerto = netloc.rpartition(":") if ":" in netloc else (netloc, "", "")
+        puerto = int(puerto) if puerto else (443 if scheme == "https" else 80)
+        contexto = None
+        if scheme == "https":
+            _SSL = _SSL or ssl.create_default_context()
+            contexto = _SSL
+        r, w = await asyncio.wait_for(
+            asyncio.open_connection(host, puerto, ssl=contexto), timeout)
+        return r, w, False
+
+    def devolver(self, scheme, netloc, r, w):
+        lista = self._ociosas.setdefault((scheme, netloc), [])
+        if len(lista) >= _POOL_MAX_POR_HOST:
+            w.close()
+            return
+        lista.append((r, w, time.monotonic()))
+
+    def ociosas(self):
+        return sum(len(v) for v in self._ociosas.values())
+
+    def cerrar(self):
+        for lista in self._ociosas.values():
+            for _, w, _ in lista:
+                w.close()
+        self._ociosas.clear()
+
+
+_POOLS = weakref.WeakKeyDictionary()
+
+
+def _pool():
+    loop = asyncio.get_running_loop()
+    p = _POOLS.get(loop)
+    if p is None:
+        p = _POOLS[loop] = _PoolAsync()
+    return p
+
+
+async def cerrar():
+    """Cierra las conexiones ociosas del loop actual (al terminar un asyncio.run)."""
+    _pool().cerrar()
+
+
+async def _tomar_en_vuelo():
+    """Toma un lugar de tn_client._EN_VUELO (el tope de proceso que usa el
+    cliente sync) sin bloquear el loop: intento no bloqueante y espera corta
+    entre intentos. Quien lo toma lo libera con _EN_VUELO.release()."""
+    espera = 0.001
+    while not tn_client._EN_VUELO.acquire(blocking=False):
+        await asyncio.sleep(espera)
+        espera = min(espera * 2, 0.05)
+
+
+async def _intercambio(r, w, method, netloc, ruta, headers, data):
+    """Un request/respuesta HTTP/1.1 sobre la conexion. (status, hdrs, texto,
+    cerrar): cerrar=True si la conexion no se puede reusar."""
+    lineas = [f"{method} {ruta} HTTP/1.1", f"Host: {netloc}", "Connection: keep-alive"]
+    lineas += [f"{k}: {v}" for k, v in headers.items()]
+    if data or method in ("PUT", "POST"):
+        lineas.append(f"Content-Length: {len(data)}")
+    w.write(("\r\n".join(lineas) + "\r\n\r\n").encode("latin-1") + data)
+    await w.drain()
+
+    linea = await r.readline()
+    if not linea:
+        raise ConnectionResetError("el server cerro la conexion")
+    version, status = linea.split(None, 2)[:2]
+    status = int(status)
+    hdrs = {}
+    while True:
+        h = await r.readline()
+        if h in (b"\r\n", b"\n", b""):
+            break
+        k, _, v = h.decode("latin-1").partition(":")
+        hdrs[k.strip()] = v.strip()
+    cerrar = (str(_header(hdrs, "connection") or "").lower() == "close"
+              or version == b"HTTP/1.0")
+    if status in (204, 304) or 100 <= status < 200:
+        cuerpo = b""
+    elif str(_header(hdrs, "transfer-encoding") or "").lower() == "chunked":
+        partes = []
+        while True:
+            tam = int((await r.readline()).split(b";")[0].strip() or b"0", 16)
+            if tam == 0:
+                while (await r.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                break
+            partes.append(await r.readexactly(tam))
+            await r.readexactly(2)
+        cuerpo = b"".join(partes)
+    elif _header(hdrs, "content-length") is not None:
+        cuerpo = await r.readexactly(int(_header(hdrs, "content-length")))
+    else:
+        cuerpo = await r.read()
+        cerrar = True
+    return status, hdrs, cuerpo.decode("utf-8"), cerrar
+
+
+async def _http(method, url, headers, body=None, timeout=30):
+    """Transporte real (asyncio streams + pool del loop). Inyectable en tests
+    via el parametro _http, con la misma firma que tn_client._http pero
+    corutina. Si una conexion reusada resulta cerrada por el server reintenta
+    con una nueva, solo para metodos idempotentes (como tn_client._http)."""
+    u = urllib.parse.urlsplit(url)
+    ruta = (u.path or "/") + (f"?{u.query}" if u.query else "")
+    data = json.dumps(body).encode("utf-8") if body is not None else b""
+    pool = _pool()
+    while True:
+        r, w, reusada = await pool.tomar(u.scheme, u.netloc, timeout)
+        try:
+            status, hdrs, texto, cerrar_conn = await asyncio.wait_for(
+                _intercambio(r, w, method, u.netloc, ruta, headers, data), timeout)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            w.close()
+            if reusada and method in tn_client._REINTENTABLES_RED:
+                continue
+            raise
+        except BaseException:
+            w.close()
+            raise
+        if cerrar_conn:
+            w.close()
+        else:
+            pool.devolver(u.scheme, u.netloc, r, w)
+        return status, hdrs, texto
+
+
+async def _request(method, path, token=None, params=None, body=None, timeout=30,
+                   user_agent=None, reintentos_429=2, _http=_http, cache=False):
+    """(status, headers, data). Igual que tn_client._request."""
+    tok, url, headers = _preparar(path, token, params, body, user_agent)
+    cache = tn_client.CACHE if (cache and method == "GET") else None
+    entrada = await asyncio.to_thread(cache.leer, url, tok) if cache is not None else None
+    if entrada:
+        headers.update(cache.validadores(entrada))
+    intento = 0
+    ev = {"servicio": "tn", "method": method, "endpoint": path, "status": 0,
+          "segundos": 0.0, "bytes": None, "reintentos": 0, "espera": 0.0, "cache": None}
+    try:
+        while True:
+            espera = tn_client.LIMITADOR.reservar()
+            if espera > 0:
+                ev["espera"] += espera
+                await _dormir(espera)
+            t0 = time.perf_counter()
+            async with _pool().en_vuelo:
+                await _tomar_en_vuelo()
+                try:
+                    status, hdrs, texto = await _http(method, url, headers, body=body,
+                                                      timeout=timeout)
+                finally:
+                    tn_client._EN_VUELO.release()
+            ev["segundos"] += time.perf_counter() - t0
+            ev["status"] = status
+            tn_client.LIMITADOR.actualizar(status, hdrs)
+            if status == 429 and intento < reintentos_429:
+                intento += 1
+                ev["reintentos"] = intento
+                espera = min(max(_retry_after(hdrs), 0.0), _RETRY_429_TOPE)
+                ev["espera"] += espera
+                await _dormir(espera)
+                continue
+            if tn_client.OBSERVADORES:
+                ev["bytes"] = _bytes_cuerpo(hdrs, texto)
+            if cache is not None:
+                if status == 304 and entrada:
+                    ev["cache"] = "hit"
+                    hdrs = await asyncio.to_thread(cache.hit, url, tok, entrada, hdrs)
+                    status, texto = 200, entrada["texto"]
+                elif status == 200:
+                    ev["cache"] = "miss"
+                    await asyncio.to_thread(cache.guardar, url, tok, hdrs, texto)
+            return status, hdrs, _parsear(texto)
+    finally:
+        if tn_client.OBSERVADORES:
+            tn_client._notificar(ev)
+
+
+async def request(method, path, token=None, params=None, body=None, timeout=30,
+                  user_agent=None, reintentos_429=2, _http=_http, cache=False):
+    """(status, data) con retry de 429 respetando Retry-After (capado a 10s)."""
+    status, _, data = await _request(method, path, token=token, params=params, body=body,
+                                     timeout=timeout, user_agent=user_agent,
+                                     reintentos_429=reintentos_429, _http=_http, cache=cache)
+    return status, data
+
+
+async def get(path, token=None, params=None, timeout=30, user_agent=None, _http=_http,
+              cache=False):
+    status, data = await request("GET", path, token=token, params=params,
+                                 timeout=timeout, user_agent=user_agent, _http=_http,
+                                 cache=cache)
+    if status >= 400:
+        raise TNError(status, data)
+    return data
+
+
+async def _get_pagina(path, params, page, per_page, token, timeout, user_agent, _http,
+                      cache=False, campos=None):
+    """(batch, headers, status) como tn_client._get_pagina."""
+    p = dict(params or {})
+    p["per_page"] = per_page
+    p["page"] = page
+    if campos:
+        p["fields"] = campos_param(campos)
+    try:
+        status, hdrs, batch = await _request("GET", path, token=token, params=p,
+                                             timeout=timeout, user_agent=user_agent,
+                                             reintentos_429=_REINTENTOS_429_PAGINA,
+                                             _http=_http, cache=cache)
+    except Exception:
+        return None, {}, 0
+    if status >= 400 or not isinstance(batch, list):
+        return None, hdrs, status
+    return proyectar(batch, campos), hdrs, status
+
+
+async def _get_pagina_reintentando(path, params, page, per_page, token, timeout,
+                                   user_agent, _http, cache=False, campos=None):
+    """Como tn_client._get_pagina_reintentando (backoff con asyncio.sleep)."""
+    for espera in (0.0,) + _BACKOFF_PAGINA:
+        if espera:
+            await _dormir(espera)
+        batch, hdrs, status = await _get_pagina(path, params, page, per_page, token,
+                                                timeout, user_agent, _http, cache, campos)
+        if batch is not None or not _transitorio(status):
+            break
+    return batch, hdrs, status
+
+
+async def iter_paginado(path, params=None, per_page=200, max_pages=50, token=None,
+                        timeout=30, user_agent=None, _http=_http, concurrente=False,
+                        workers=_WORKERS_PAGINADO, estado=None, cache=False, campos=None,
+                        desde_pagina=1):
+    """Async generator de paginas en orden. Mismas reglas de corte, reintentos
+    por pagina, estado (con checkpoint), cache, campos y desde_pagina que
+    tn_client.iter_paginado. concurrente=True: hasta `workers` paginas pedidas
+    por delante de la que se consume (tasks del mismo loop, no hilos)."""
+    est = estado if estado is not None else {}
+    inicio = max(1, int(desde_pagina))
+    est.update(total=None, paginas=inicio - 1, filas=(inicio - 1) * per_page,
+               truncado=False, error=False, completo=False, checkpoint=None)
+
+    def _ok(batch):
+        est["paginas"] += 1
+        est["filas"] += len(batch)
+
+    def _fallo(batch, status, page):
+        if not _fin_de_listado(batch, status):
+            est["error"] = True
+            est["checkpoint"] = {"path": path, "params": dict(params or {}),
+                                 "per_page": per_page, "pagina": page}
+
+    args = (token, timeout, user_agent, _http, cache, campos)
+    pendientes = []
+    try:
+        batch, hdrs, status = await _get_pagina_reintentando(path, params, inicio,
+                                                             per_page, *args)
+        est["total"] = _total_count(hdrs)
+        if batch is None:
+            _fallo(batch, status, inicio)
+            return
+        _ok(batch)
+        yield batch
+        if len(batch) < per_page:
+            return
+        if max_pages <= inicio:
+            est["truncado"] = _quedan_filas(est)
+            return
+
+        total = est["total"] if concurrente else None
+        if total is None:
+            for page in range(inicio + 1, max_pages + 1):
+                batch, _, status = await _get_pagina_reintentando(path, params, page,
+                                                                  per_page, *args)
+                if batch is None:
+                    _fallo(batch, status, page)
+                    return
+                _ok(batch)
+                yield batch
+                if len(batch) < per_page:
+                    return
+            est["truncado"] = _quedan_filas(est)
+            return
+
+        paginas_total = -(-total // per_page)
+        ultima = min(max_pages, paginas_total)
+        if ultima <= inicio:
+            return
+        workers = max(1, workers)
+        siguiente = inicio + 1
+        while pendientes or siguiente <= ultima:
+            while siguiente <= ultima and len(pendientes) < workers:
+                pendientes.append((siguiente, asyncio.ensure_future(
+                    _get_pagina_reintentando(path, params, siguiente, per_page, *args))))
+                siguiente += 1
+            page, tarea = pendientes.pop(0)
+            batch, _, status = await tarea
+            if batch is None:
+                _fallo(batch, status, page)
+                return
+            _ok(batch)
+            yield batch
+            if len(batch) < per_page:
+                return
+        est["truncado"] = paginas_total > max_pages
+    finally:
+        for _, t in pendientes:
+            t.cancel()
+        est["completo"] = not (est["truncado"] or est["error"])
+
+
+async def get_paginado(path, params=None, per_page=200, max_pages=50, token=None,
+                       timeout=30, user_agent=None, _http=_http, concurrente=False,
+                       workers=_WORKERS_PAGINADO, cache=False, campos=None, estado=None):
+    """Acumula paginas; si una falla (tras sus reintentos) devuelve lo
+    acumulado (parcial) con estado["completo"] False y el checkpoint."""
+    filas = []
+    async for batch in iter_paginado(path, params=params, per_page=per_page,
+                                     max_pages=max_pages, token=token, timeout=timeout,
+                                     user_agent=user_agent, _http=_http,
+                                     concurrente=concurrente, workers=workers,
+                                     cache=cache, campos=campos, estado=estado):
+        filas.extend(batch)
+    return filas
+
+
+async def put(path, body, token=None, timeout=30, user_agent=None, _http=_http):
+    """(status, data). NO levanta NUNCA (mismo contrato que tn_client.put)."""
+    try:
+        return await request("PUT", path, token=token, body=body, timeout=timeout,
+                             user_agent=user_agent, _http=_http)
+    except Exception as e:
+        return 0, {"error": str(e)}
+
+
+async def post(path, body, token=None, timeout=60, user_agent=None, _http=_http):
+    """(status, data). NO levanta NUNCA (mismo contrato que tn_client.post)."""
+    try:
+        return await request("POST", path, token=token, body=body, timeout=timeout,
+                             user_agent=user_agent, _http=_http)
+    except Exception as e:
+        return 0, {"error": str(e)}
@@ -55,14 +55,15 @@ def compactar_historial(historial, max_dias_diario=180, hoy_iso=None):
 
 
 def explotar_items(df_tn):
-    """Convierte df_tn (con columna Items) a long-form: una fila por línea de venta.
+    """Convierte df_tn (con columna Items, forma previa a las líneas de venta de
+    ordenes.procesar_orders_con_items) a long-form: una fila por línea de venta.
 
     Devuelve columnas: Fecha, Producto, Cantidad, Costo.
     """
     filas = []
     for _, row in df_tn.iterrows():
         items = row.get("Items")
-        if not items:
+        if not isinstance(items, list) or not items:
             continue
         for it in items:
             filas.append({
@@ -113,9 +114,25 @@ def dias_con_stock(fechas_venta, hoy_iso, tiene_stock_ahora, historial,
     return max(1, snap_con_stock + proxy_dias)
 
 
-def calcular_velocidad_restock(df_tn, stock_map, historial, precio_map,
+def _lineas(df):
+    """Líneas de venta (Fecha, Producto, Cantidad, ...): la tabla de
+    ordenes.procesar_orders_con_items tal cual, o un df_tn con Items. Fecha
+    sale como 'YYYY-MM-DD' ('' si falta): ordenes la da en datetime64."""
+    if "Items" in df.columns:
+        df = explotar_items(df)
+    if "Producto" not in df.columns:
+        return pd.DataFrame(columns=["Fecha", "Producto", "Cantidad", "Costo"])
+    if pd.api.types.is_datetime64_any_dtype(df["Fecha"]):
+        df = df.assign(Fecha=df["Fecha"].dt.strftime("%Y-%m-%d").fillna(""))
+    return df
+
+
+def calcular_velocidad_restock(df_items, stock_map, historial, precio_map,
                                 params, hoy_iso):
-    """Calcula velocidad histórica/reciente, ROP, restock y riesgo por producto."""
+    """Calcula velocidad histórica/reciente, ROP, restock y riesgo por producto.
+
+    df_items: líneas de venta (ordenes.procesar_orders_con_items); acepta
+    también un df_tn con columna Items."""
     lt = params["lead_time"]
     colchon = params["colchon"]
     cobertura = params["cobertura"]
@@ -123,7 +140,7 @@ def calcular_velocidad_restock(df_tn, stock_map, historial, precio_map,
     min_u = params["min_unidades_conf"]
     min_d = params["min_dias_conf"]
 
-    df_items = explotar_items(df_tn)
+    df_items = _lineas(df_items)
     hoy = _d(hoy_iso)
     corte_reciente = (hoy - timedelta(days=vent)).isoformat()
 